@@ -125,7 +125,7 @@ class Constants(object):
 	#
 	#	Supported URL schemes
 	#
-	supportedSchemes = ['http', 'https', 'mqtt', 'mqtts', 'acme']
+	supportedSchemes = ['http', 'https', 'mqtt', 'mqtts', 'coap', 'coaps', 'acme']
 	""" The URL schemes supported by the CSE """
 
 
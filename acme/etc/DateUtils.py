@@ -11,6 +11,7 @@ from __future__ import annotations
 from typing import Callable, Union, Tuple, Optional
 
 import time
+from functools import lru_cache
 from email.utils import formatdate
 from datetime import datetime, timedelta, timezone
 import isodate
@@ -20,16 +21,27 @@ import isodate
 #	Time, Date, Timestamp related
 #
 
+_resourceDateCache:Tuple[int, str] = (-1, '')
+"""	The last formatted second (POSIX timestamp, ISO 8601 date and time without the fraction) for `getResourceDate()`. """
+
+
 def getResourceDate(offset:Optional[int] = 0) -> str:
 	"""	Generate an UTC-relative ISO 8601 timestamp and return it.
 
+		The date and time part is formatted only once per second, and only the fraction is added for each call.
+
 		Args:
 			offset: adds or substracts *offset* seconds to the generated timestamp.
 		Return:
 			String with UTC-relative ISO 8601 timestamp.
 	"""
-	# return toISO8601Date(datetime.now(timezone.utc) + timedelta(seconds=delta))
-	return toISO8601Date(utcTime() + offset)
+	global _resourceDateCache
+
+	ts = time.time() + offset
+	second = int(ts)
+	if (cache := _resourceDateCache)[0] != second:
+		cache = _resourceDateCache = (second, time.strftime('%Y%m%dT%H%M%S', time.gmtime(second)))
+	return f'{cache[1]},{int((ts - second) * 1000000):06d}'
 
 
 def toISO8601Date(ts:Union[float, datetime], readable:Optional[bool] = False) -> str:
@@ -209,6 +221,10 @@ def waitFor(timeout:float,
 			latency:Optional[float] = 0.01) -> bool:
 	"""	Busy waiting for *timeout* seconds, or until a *condition* callback function returns *True*.
 
+		Note:
+			The *condition* is checked every *latency* seconds. When the awaited state is changed by another
+			thread then it is better to wait on a *threading.Condition*, *threading.Event* or a future instead.
+
 		Args:
 			timeout: The time to wait at most for the event to be true. 
 			condition: A callback. It it returns *True* the wait-for condition is met and the waiting stops. 
@@ -245,65 +261,84 @@ def waitFor(timeout:float,
 #	Cron
 #
 
-def cronMatchesTimestamp(cronPattern:Union[str, list[str]], 
-						 ts:Optional[datetime] = None) -> bool:
-	'''	A cron parser to determine if the *cronPattern* matches for a given timestamp *ts*.
+class CronPattern(object):
+	"""	A compiled cron pattern.
 
-		The cronPattern must follow the usual crontab pattern of 7 fields:
-	
-			second minute hour dayOfMonth month dayOfWeek year
+		Each of the seven cron fields is compiled into a bitset (an integer where bit *n* is set
+		if the value *n* matches the field). Matching a timestamp against the pattern is then only
+		a couple of bit tests, and the next matching timestamp can be calculated by jumping
+		directly to the next set bit of each field instead of testing every second or minute.
+	"""
 
-		which each must comply to the following patterns:
+	__slots__ = (
+		'pattern',
+		'seconds',
+		'minutes',
+		'hours',
+		'days',
+		'months',
+		'weekdays',
+		'years',
+	)
+	"""	Slots for the class. """
 
-		- \* : any integer value
-		- \*/num : step values
-		- num[,num]\* : value list separator (either num, range or step)
-		- num-num : range of values
-	
-		see also: https://crontab.guru/crontab.5.html
+	_fieldRanges = ( (0, 59), (0, 59), (0, 23), (1, 31), (1, 12), (0, 6), (1970, 9999) )
+	"""	Value ranges for the seven fields. Only used for expanding "*" and step values. """
 
-		Args:
-			cronPattern: Either a string with the pattern or a list of strings, one for each pattern element.
-			ts: Optional timestamp. If *None* then a current UTC-based timestamp is used to fill the timestamp.
-		
-		Return:
-			Boolean, indicating whether time pattern matches the given timestamp.
-		
-		Raises:
-			ValueError: If *cronPattern* is invalid.
-	'''
 
-	def _parseMatchCronArg(element:str, target:int) -> bool:
-		"""	Parse and match a single cron element and match it against a target value.
+	def __init__(self, cronPattern:Union[str, list[str]]) -> None:
+		"""	Compile a cron pattern.
+
+			Args:
+				cronPattern: Either a string with the pattern or a list of strings, one for each pattern element.
+
+			Raises:
+				ValueError: If *cronPattern* is invalid.
+		"""
+		cronElements = cronPattern.split() if isinstance(cronPattern, str) else cronPattern
+		if len(cronElements) != 7:
+			raise ValueError(f'Invalid or empty cron pattern: "{cronPattern}". Must have 7 elements.')
+		self.pattern = ' '.join(cronElements)
+		""" The normalized pattern string. """
+		(self.seconds,
+		 self.minutes,
+		 self.hours,
+		 self.days,
+		 self.months,
+		 self.weekdays,
+		 self.years) = ( self._compileField(e, *r) for e, r in zip(cronElements, self._fieldRanges) )
+
+
+	@staticmethod
+	def _compileField(element:str, low:int, high:int) -> int:
+		"""	Compile a single cron element into a bitset.
 
 			Args:
 				element: A single cron element/pattern.
-				target: Target value to match.
+				low: The lowest valid value of the field.
+				high: The highest valid value of the field.
 			
 			Return:
-				Indication whether the target value matches against the pattern element.
+				Integer bitset. Bit *n* is set if the value *n* matches the element.
 
 			Raises:
 				ValueError: If *element* is invalid.
 		"""
 
-		# Return True if element is only a *, because this matches anything
+		# A * matches anything in the range of the field
 		if element == '*':
-			return True
+			return ((1 << (high + 1)) - 1) & ~((1 << low) - 1)
 
+		bits = 0
 		# Either a list of values, of a single value 
-		for element in element.split(',') if ',' in element else [ element ] :
+		for element in element.split(','):
 			try:
-				# First, try a direct comparison
-				# If this isn't a number then continue after the exception
-				if int(element) == target:
-					return True
-				continue	# It didnt raise an exception, but didn't match either, so continue
+				# First, try a single number. Values outside of the field's range never match
+				if low <= (v := int(element)) <= high:
+					bits |= 1 << v
+				continue
 			except ValueError:
-				pass		# Exception, no number, but maybe a pattern
-			
-			# Value is something else, not a number, look for - or /
-			# If not, then ignore wrong format of value
+				pass		# No number, but maybe a pattern
 
 			if '-' in element:
 				step = 1
@@ -320,46 +355,184 @@ def cronMatchesTimestamp(cronPattern:Union[str, list[str]],
 						start, end = ( int(x) for x in element.split('-') )
 					except ValueError:
 						raise ValueError(f'Invalid cron element: {element}. Not a number.')	# Not a number
-
-				# If target value is in the range, it matches
-				if target in range(start, end + 1, step):
-					return True
-			
-				# Else continue
+				for v in range(start, end + 1, step):
+					if low <= v <= high:
+						bits |= 1 << v
 				continue
 
 			if '/' in element:
 				v, interval = ( x for x in element.split('/') )
 				if v != '*':	
 					raise ValueError(f'Invalid cron element: {element}. Interval only for *.')	# Intervals only, if it is a *
-				# If the remainder is zero, this matches
 				try:
-					if target % int(interval) == 0:
-						return True
+					_interval = int(interval)
 				except ValueError:
 					raise ValueError(f'Invalid cron element: {element}. Not a number.')	# Not a number
-				# Else continue
+				# All values in the range for which the remainder is zero
+				for v in range(low + (-low % _interval), high + 1, _interval):
+					bits |= 1 << v
 				continue
 
 			raise ValueError(f'Invalid cron element: {element}.')	# Not a number
 
-		return False
+		return bits
 
-	if ts is None:
-		ts = utcDatetime()
-	
-	cronElements = cronPattern.split() if isinstance(cronPattern, str) else cronPattern
+
+	@staticmethod
+	def _nextBit(bits:int, start:int, end:int) -> Optional[int]:
+		"""	Return the next set bit in a bitset, starting at *start*.
+
+			Args:
+				bits: The bitset.
+				start: The first value to check.
+				end: The last value to check.
+
+			Return:
+				The value of the next set bit, or None if there is no set bit in the range.
+		"""
+		if not (m := bits >> start):
+			return None
+		v = start + (m & -m).bit_length() - 1
+		return v if v <= end else None
+
+
+	def matches(self, ts:datetime) -> bool:
+		"""	Test whether the pattern matches a timestamp.
+
+			Args:
+				ts: The timestamp to test.
+
+			Return:
+				Boolean, indicating whether the pattern matches the timestamp.
+		"""
+		return bool(self.seconds >> ts.second & 1 
+					and self.minutes >> ts.minute & 1 
+					and self.hours >> ts.hour & 1 
+					and self.days >> ts.day & 1 
+					and self.months >> ts.month & 1 
+					and self.weekdays >> (ts.isoweekday() % 7) & 1 
+					and self.years >> ts.year & 1)
+
+
+	def nextMatch(self, ts:datetime, maxYears:Optional[int] = 10) -> Optional[datetime]:
+		"""	Calculate the next timestamp, starting at *ts* (inclusive), that matches the pattern.
+		
+			The resolution is one second.
+
+			Args:
+				ts: The start timestamp. 
+				maxYears: The maximum number of years to look ahead.
+
+			Return:
+				The next matching timestamp, or None if there is none within *maxYears*.
+		"""
+		ts = ts.replace(microsecond = 0)
+		endYear = ts.year + maxYears
+		while ts.year <= endYear:
+			if not self.years >> ts.year & 1:
+				if (y := self._nextBit(self.years, ts.year + 1, endYear)) is None:
+					return None
+				ts = ts.replace(year = y, month = 1, day = 1, hour = 0, minute = 0, second = 0)
+				continue
+			if not self.months >> ts.month & 1:
+				if (m := self._nextBit(self.months, ts.month + 1, 12)) is None:
+					ts = ts.replace(year = ts.year + 1, month = 1, day = 1, hour = 0, minute = 0, second = 0)
+				else:
+					ts = ts.replace(month = m, day = 1, hour = 0, minute = 0, second = 0)
+				continue
+			if not (self.days >> ts.day & 1 and self.weekdays >> (ts.isoweekday() % 7) & 1):
+				ts = ts.replace(hour = 0, minute = 0, second = 0) + timedelta(days = 1)
+				continue
+			if not self.hours >> ts.hour & 1:
+				if (h := self._nextBit(self.hours, ts.hour + 1, 23)) is None:
+					ts = ts.replace(hour = 0, minute = 0, second = 0) + timedelta(days = 1)
+				else:
+					ts = ts.replace(hour = h, minute = 0, second = 0)
+				continue
+			if not self.minutes >> ts.minute & 1:
+				if (m := self._nextBit(self.minutes, ts.minute + 1, 59)) is None:
+					ts = ts.replace(minute = 0, second = 0) + timedelta(hours = 1)
+				else:
+					ts = ts.replace(minute = m, second = 0)
+				continue
+			if (s := self._nextBit(self.seconds, ts.second, 59)) is None:
+				ts = ts.replace(second = 0) + timedelta(minutes = 1)
+				continue
+			return ts.replace(second = s)
+		return None
+
+
+	def __repr__(self) -> str:
+		"""	Return a string representation of the compiled pattern. 
+		
+			Return:
+				A string representation of the compiled pattern.
+		"""
+		return f'CronPattern({self.pattern})'
+
+
+@lru_cache(maxsize = 1024)
+def _compileCronPattern(cronElements:Tuple[str, ...]) -> CronPattern:
+	"""	Compile and cache a cron pattern.
+
+		Args:
+			cronElements: A tuple with the seven cron pattern elements.
+		
+		Return:
+			The compiled `CronPattern`.
+	"""
+	return CronPattern(list(cronElements))
+
+
+def compileCronPattern(cronPattern:Union[str, list[str]]) -> CronPattern:
+	"""	Return a compiled cron pattern. Compiled patterns are cached, so this function
+		can be called for the same pattern repeatedly without parsing it again.
+
+		Args:
+			cronPattern: Either a string with the pattern or a list of strings, one for each pattern element.
+		
+		Return:
+			The compiled `CronPattern`.
+
+		Raises:
+			ValueError: If *cronPattern* is invalid.
+	"""
+	cronElements = tuple(cronPattern.split() if isinstance(cronPattern, str) else cronPattern)
 	if len(cronElements) != 7:
 		raise ValueError(f'Invalid or empty cron pattern: "{cronPattern}". Must have 7 elements.')
+	return _compileCronPattern(cronElements)
+
+
+def cronMatchesTimestamp(cronPattern:Union[str, list[str]], 
+						 ts:Optional[datetime] = None) -> bool:
+	'''	A cron parser to determine if the *cronPattern* matches for a given timestamp *ts*.
+
+		The cronPattern must follow the usual crontab pattern of 7 fields:
+	
+			second minute hour dayOfMonth month dayOfWeek year
+
+		which each must comply to the following patterns:
+
+		- \* : any integer value
+		- \*/num : step values
+		- num[,num]\* : value list separator (either num, range or step)
+		- num-num : range of values
+	
+		see also: https://crontab.guru/crontab.5.html
 
-	weekday = ts.isoweekday()
-	return  _parseMatchCronArg(cronElements[0], ts.second) \
-		and _parseMatchCronArg(cronElements[1], ts.minute) \
-		and _parseMatchCronArg(cronElements[2], ts.hour) \
-		and _parseMatchCronArg(cronElements[3], ts.day) \
-		and _parseMatchCronArg(cronElements[4], ts.month) \
-		and _parseMatchCronArg(cronElements[5], 0 if weekday == 7 else weekday) \
-		and _parseMatchCronArg(cronElements[6], ts.year)
+		The pattern is compiled only once and then taken from a cache, see `compileCronPattern()`.
+
+		Args:
+			cronPattern: Either a string with the pattern or a list of strings, one for each pattern element.
+			ts: Optional timestamp. If *None* then a current UTC-based timestamp is used to fill the timestamp.
+		
+		Return:
+			Boolean, indicating whether time pattern matches the given timestamp.
+		
+		Raises:
+			ValueError: If *cronPattern* is invalid.
+	'''
+	return compileCronPattern(cronPattern).matches(ts if ts is not None else utcDatetime())
 
 
 def cronInPeriod(cronPattern:Union[str, 
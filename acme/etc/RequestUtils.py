@@ -8,55 +8,65 @@
 
 from __future__ import annotations
 
-import cbor2, json
+import json
 from typing import Any, cast, Optional
 from urllib.parse import urlparse, urlunparse, parse_qs, urlunparse, urlencode
 
 from .DateUtils import getResourceDate
-from .Types import ContentSerializationType, JSON, RequestType, ResponseStatusCode, Result, ResourceTypes, Operation
+from .Types import ContentSerializationType, JSON, RequestType, ResponseStatusCode, ResponseType, Result, ResourceTypes, Operation
 from .Constants import Constants
+from .Serializers import getSerializer
 from ..services.Logging import Logging as L
 from ..helpers import TextTools
 from ..etc.ResponseStatusCodes import ResponseStatusCode
 
 
-def serializeData(data:JSON, ct:ContentSerializationType) -> Optional[str|bytes|JSON]:
+def serializeData(data:JSON, ct:ContentSerializationType) -> Optional[bytes|JSON]:
 	"""	Serialize a dictionary, depending on the serialization type.
 
+		The selected serializer backend for the serialization type is used (see the *Serializers* module).
+
 		Args:
 			data: The data to serialize.
 			ct: The *data* content serialization format.
 		
 		Return:
-			A data *str* or *byte* object with the serialized data, or *None*.
+			A *byte* object with the serialized data, or *None*. For the PLAIN serialization *data* is returned unchanged.
 	"""
 	if ct == ContentSerializationType.PLAIN:
 		return data
-	encoder = json if ct == ContentSerializationType.JSON else cbor2 if ct == ContentSerializationType.CBOR else None
-	if not encoder:
+	if not (serializer := getSerializer(ct)):
 		return None
-	return encoder.dumps(data)	# type:ignore[no-any-return]
+	return serializer.dumps(data)
 
 
-def deserializeData(data:bytes, ct:ContentSerializationType) -> Optional[JSON]:
+def deserializeData(data:bytes, ct:ContentSerializationType, allowComments:Optional[bool] = True) -> Optional[JSON]:
 	"""	Deserialize data into a dictionary, depending on the serialization type.
 
+		JSON data is parsed directly first. Only if that fails, and if *allowComments* is *True*,
+		comments are removed from the data before it is parsed again.
+
 		Args:
 			data: The data to deserialize.
 			ct: The *data* content serialization format.
+			allowComments: Allow comments in JSON data.
 		
 		Return:
 			If the *data* is not *None*, but has a length of 0 then an empty dictionary is returned. If an unknown content serialization is specified then *None* is returned. Otherwise, a `JSON` object is returned.
 	"""
 	if len(data) == 0:
 		return {}
-	match ct:
-		case ContentSerializationType.JSON:
+	if not (serializer := getSerializer(ct)):
+		return None
+	if ct != ContentSerializationType.JSON:
+		return cast(JSON, serializer.loads(data))
+	try:
+		return cast(JSON, serializer.loads(data))
+	except ValueError:
+		# Parse again with the json module, which also reports the errors
+		if allowComments:
 			return cast(JSON, json.loads(TextTools.removeCommentsFromJSON(data.decode('utf-8'))))
-		case ContentSerializationType.CBOR:
-			return cast(JSON, cbor2.loads(data))
-		case _:
-			return None
+		return cast(JSON, json.loads(data))
 
 
 def toHttpUrl(url:str) -> str:
@@ -133,6 +143,35 @@ def determineSerialization(url:str, csz:list[str], defaultSerialization:ContentS
 	return defaultSerialization
 
 
+def contentFromResult(inResult:Result) -> Optional[JSON]:
+	"""	Return the primitive content of a request or response from a *Result* object.
+
+		If the result contains an embedded request (ie. for polling) then that request is the content.
+		An embedded request that is targeted to the receiver is wrapped in a "m2m:rqp" structure.
+
+		Args:
+			inResult: The input `Result` object.
+
+		Return:
+			The content as a dictionary, or *None* if there is no content.
+	"""
+	if inResult.embeddedRequest:
+		if inResult.embeddedRequest.originalRequest:
+			pc = inResult.embeddedRequest.originalRequest
+		else:
+			pc = cast(JSON, requestFromResult(Result(request = inResult.embeddedRequest)).data)
+	else:
+		# construct the data as JSON/dictionary. Encoding to JSON or CBOR is done later
+		pc = inResult.toData(ContentSerializationType.PLAIN)	#  type:ignore[assignment]
+	if not pc:
+		return None
+	# if the request/result is actually an incoming request targeted to the receiver, then the
+	# whole request must be embeded as a "m2m:rqp" request.
+	if inResult.embeddedRequest and inResult.embeddedRequest.requestType == RequestType.REQUEST:
+		return { 'm2m:rqp' : pc }
+	return cast(JSON, pc)
+
+
 def requestFromResult(inResult:Result, 
 					  originator:Optional[str] = None, 
 					  ty:Optional[ResourceTypes] = None, 
@@ -227,29 +266,14 @@ def requestFromResult(inResult:Result,
 	if inResult.request.rset:
 		req['rset'] = inResult.request.rset
 
+	# Response Type. Only *noResponse* is forwarded, since non-blocking requests are handled by this CSE
+	if not isResponse and inResult.request.rt == ResponseType.noResponse:
+		req['rt'] = { 'rtv': int(ResponseType.noResponse) }
 
 
-	# If the response contains a request (ie. for polling), then add that request to the pc
-	pc = None
-	# L.isDebug and L.logDebug(inResult)
-
-	if inResult.embeddedRequest:
-		if inResult.embeddedRequest.originalRequest:
-			pc = inResult.embeddedRequest.originalRequest
-		else:
-			pc = cast(JSON, requestFromResult(Result(request = inResult.embeddedRequest)).data)
-		# L.isDebug and L.logDebug(pc)
-
-	else:
-		# construct and serialize the data as JSON/dictionary. Encoding to JSON or CBOR is done later
-		pc = inResult.toData(ContentSerializationType.PLAIN)	#  type:ignore[assignment]
-	if pc:
-		# if the request/result is actually an incoming request targeted to the receiver, then the
-		# whole request must be embeded as a "m2m:rqp" request.
-		if inResult.embeddedRequest and inResult.embeddedRequest.requestType == RequestType.REQUEST:
-			req['pc'] = { 'm2m:rqp' : pc }
-		else:
-			req['pc'] = pc
+	# Primitive Content
+	if (pc := contentFromResult(inResult)):
+		req['pc'] = pc
 
 	# Filter Criteria attributes
 	if inResult.request.fc:
@@ -109,6 +109,11 @@ class ResponseStatusCode(ACMEIntEnum):
 		return _ResponseStatusCodeHttpStatusCodes[self]
 
 
+	def coapStatusCode(self) -> int:
+		""" Map the oneM2M RSC to a CoAP response code. """
+		return _ResponseStatusCodeCoAPStatusCodes[self]
+
+
 
 #
 #	Mapping of oneM2M return codes to http status codes
@@ -160,6 +165,19 @@ _ResponseStatusCodeHttpStatusCodes = {
 }
 """ Mapping of oneM2M return codes to http status codes. """
 
+_ResponseStatusCodeCoAPStatusCodes = {
+	rsc: ((status // 100) << 5) | (status % 100) for rsc, status in _ResponseStatusCodeHttpStatusCodes.items()
+} | {
+	ResponseStatusCode.OK 											: 0x45,		# 2.05 Content
+	ResponseStatusCode.DELETED 										: 0x42,		# 2.02 Deleted
+	ResponseStatusCode.UPDATED 										: 0x44,		# 2.04 Changed
+	ResponseStatusCode.CREATED										: 0x41,		# 2.01 Created
+	ResponseStatusCode.ACCEPTED 									: 0x41,		# 2.01 Created
+	ResponseStatusCode.ACCEPTED_NON_BLOCKING_REQUEST_SYNC 			: 0x41,		# 2.01 Created
+	ResponseStatusCode.ACCEPTED_NON_BLOCKING_REQUEST_ASYNC 			: 0x41,		# 2.01 Created
+}
+""" Mapping of oneM2M return codes to CoAP response codes. The codes are derived from the http status codes (e.g. 404 -> 4.04), except for the success codes. """
+
 _successRSC = (
 	ResponseStatusCode.ACCEPTED,
 	ResponseStatusCode.ACCEPTED_NON_BLOCKING_REQUEST_SYNC,
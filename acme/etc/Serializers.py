@@ -0,0 +1,163 @@
+#
+#	Serializers.py
+#
+#	(c) 2023 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+"""	This module provides a registry of serializers for the content serialization types.
+
+	Several backends can be registered for a content serialization type. The fastest available
+	backend is selected when this module is imported, and it can be changed with `selectSerializer()`.
+	All backends serialize to *bytes*.
+"""
+
+from __future__ import annotations
+from typing import Any, Callable, Optional
+
+import json, cbor2
+try:
+	import orjson
+except ImportError:
+	orjson = None	# type:ignore[assignment]	# JSON is serialized with the json module
+try:
+	import _cbor2
+except ImportError:
+	_cbor2 = None	# type:ignore[assignment]	# CBOR is serialized with the pure Python implementation of cbor2
+
+from .Types import ContentSerializationType
+
+
+class Serializer(object):
+	"""	A serializer backend for a content serialization type.
+
+		Attributes:
+			name: Name of the backend.
+			dumps: Function to serialize a data structure to *bytes*.
+			loads: Function to deserialize *bytes* to a data structure.
+	"""
+
+	__slots__ = (
+		'name',
+		'dumps',
+		'loads',
+	)
+	"""	Slots of the class. """
+
+
+	def __init__(self, name:str, dumps:Callable[[Any], bytes], loads:Callable[[bytes], Any]) -> None:
+		"""	Initialize a serializer.
+
+			Args:
+				name: Name of the backend.
+				dumps: Function to serialize a data structure to *bytes*.
+				loads: Function to deserialize *bytes* to a data structure.
+		"""
+		self.name = name
+		self.dumps = dumps
+		self.loads = loads
+
+
+	def __repr__(self) -> str:
+		"""	Return a string representation of the serializer.
+
+			Return:
+				The name of the serializer.
+		"""
+		return f'Serializer({self.name})'
+
+
+_registry:dict[ContentSerializationType, dict[str, Serializer]] = {}
+"""	All registered serializers. Mapping from the content serialization type and the backend name. """
+
+_serializers:dict[ContentSerializationType, Serializer] = {}
+"""	The selected serializer for each content serialization type. """
+
+
+def registerSerializer(ct:ContentSerializationType, serializer:Serializer, select:Optional[bool] = True) -> None:
+	"""	Register a serializer backend for a content serialization type.
+
+		Args:
+			ct: The content serialization type.
+			serializer: The serializer backend.
+			select: If *True* then the serializer is also selected for *ct*.
+	"""
+	_registry.setdefault(ct, {})[serializer.name] = serializer
+	if select:
+		_serializers[ct] = serializer
+
+
+def selectSerializer(ct:ContentSerializationType, name:str) -> Serializer:
+	"""	Select a registered serializer backend for a content serialization type.
+
+		Args:
+			ct: The content serialization type.
+			name: Name of the backend.
+
+		Return:
+			The selected serializer.
+
+		Raises:
+			KeyError: If no backend with this *name* is registered for *ct*.
+	"""
+	serializer = _serializers[ct] = _registry[ct][name]
+	return serializer
+
+
+def getSerializer(ct:ContentSerializationType) -> Optional[Serializer]:
+	"""	Return the selected serializer for a content serialization type.
+
+		Args:
+			ct: The content serialization type.
+
+		Return:
+			The serializer, or *None* if there is no serializer for *ct*.
+	"""
+	return _serializers.get(ct)
+
+
+def getSerializers() -> dict[ContentSerializationType, list[str]]:
+	"""	Return the names of the registered serializers.
+
+		Return:
+			Dictionary of the registered backend names for each content serialization type. The selected backend is the first entry.
+	"""
+	return { ct: sorted(backends, key = lambda name: name != _serializers[ct].name) for ct, backends in _registry.items() }
+
+
+#
+#	Backends
+#
+
+def _jsonDumps(data:Any) -> bytes:
+	"""	Serialize a data structure to JSON with the *json* module.
+
+		Args:
+			data: The data to serialize.
+
+		Return:
+			The UTF-8 encoded JSON.
+	"""
+	return json.dumps(data).encode('utf-8')
+
+
+def _orjsonDumps(data:Any) -> bytes:
+	"""	Serialize a data structure to JSON with the *orjson* module. Data that *orjson* does not support,
+		for example integers with more than 64 bit, is serialized with the *json* module instead.
+
+		Args:
+			data: The data to serialize.
+
+		Return:
+			The UTF-8 encoded JSON.
+	"""
+	try:
+		return orjson.dumps(data)
+	except TypeError:
+		return _jsonDumps(data)
+
+
+registerSerializer(ContentSerializationType.JSON, Serializer('json', _jsonDumps, json.loads))
+if orjson:
+	registerSerializer(ContentSerializationType.JSON, Serializer('orjson', _orjsonDumps, orjson.loads))
+
+registerSerializer(ContentSerializationType.CBOR, Serializer('cbor2 (C extension)' if _cbor2 else 'cbor2', cbor2.dumps, cbor2.loads))
@@ -1310,6 +1310,15 @@ class ContentSerializationType(ACMEIntEnum):
 		return self.value == self.getType(str(other))
 
 
+	def __hash__(self) -> int:
+		"""	Return the hash of the enum. This is necessary because `__eq__()` is overwritten.
+
+			Return:
+				The hash of the enum's value.
+		"""
+		return hash(self.value)
+
+
 ##############################################################################
 #
 #	Group related
@@ -1801,6 +1810,8 @@ class Result:
 	""" Optional `CSERequest`. """
 	embeddedRequest:Optional[CSERequest]	= None		# May contain a request as a response, e.g. when polling
 	""" Optional embedded `CSERequest`. """
+	pending:Any								= None		# Actually a PollingPending type, but have a circular import problem.
+	""" Optional `PollingPending` object of a long-polling request that waits asynchronously. """
 
 
 	# def errorResultCopy(self) -> Result:
@@ -2261,6 +2272,9 @@ class CSERequest:
 	_ot:float = None
 	""" The timestamp when this request object was created. """
 
+	_pcSerializer:Callable[[ContentSerializationType], Optional[str|bytes]] = None
+	""" Optional function that returns an already serialized *pc* for a content serialization type, or *None*. """
+
 
 
 	def fillOriginalRequest(self, update:bool = False) -> None:
@@ -2325,9 +2339,10 @@ class CSERequest:
 			Args:
 				targetRvi: The target's supported release version.
 			Return:
-				A deep copy of the request, with the fields removed or set to None.
+				A deep copy of the request, with the fields removed or set to None. The primitive content
+				is not copied but shared with the original request.
 		"""
-		newRequest = deepcopy(self)
+		newRequest = deepcopy(self, { id(self.pc): self.pc })
 		if targetRvi != '1':
 			return newRequest
 		if self.rvi:
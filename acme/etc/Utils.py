@@ -576,7 +576,7 @@ def riFromID(id:str) -> str:
 #	URL and Addressung related
 #
 _urlregex = re.compile(
-		r'^(?:http|ftp|mqtt)s?://|^(?:coap|acme)://' 	# http://, https://, ftp://, ftps://, coap://, mqtt://, mqtts://
+		r'^(?:http|ftp|mqtt|coap)s?://|^(?:acme)://' 	# http://, https://, ftp://, ftps://, coap://, coaps://, mqtt://, mqtts://
 		r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|' # domain
 		r'(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9]))|' # localhost or single name w/o domain
 		r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})' 		# ipv4
@@ -622,6 +622,17 @@ def isMQTTUrl(url:str) -> bool:
 	return isURL(url) and url.startswith(('mqtt', 'mqtts'))
 
 
+def isCoAPUrl(url:str) -> bool:
+	"""	Test whether a URL is a valid URL, and indicates a coap URL. 
+
+		Args:
+			url: String to check.
+		Returns:
+			True if the argument is a URL, and is a coap or coaps scheme.
+	"""
+	return isURL(url) and url.startswith(('coap', 'coaps'))
+
+
 def isAcmeUrl(url:str) -> bool:
 	"""	Test whether a URL is a valid URL and an internal ACME event URL. 
 
@@ -0,0 +1,177 @@
+#
+#	AsyncLoop.py
+#
+#	(c) 2023 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Running an asyncio event loop in a separate thread
+#
+
+"""	This module provides an asyncio event loop that runs in a separate thread, and functions
+	to bridge between the synchronous parts of the CSE and coroutines.
+"""
+
+from __future__ import annotations
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+import asyncio, concurrent.futures
+from datetime import datetime, timezone
+from threading import Thread, Event
+
+T = TypeVar('T')
+"""	Generic result type. """
+
+
+class AsyncLoop(object):
+	"""	An asyncio event loop that runs in its own thread.
+
+		Synchronous code can submit coroutines to the loop and wait for their results. Coroutines
+		can run blocking functions in a bounded thread pool executor.
+
+		Attributes:
+			name: Name of the loop thread.
+			maxWorkers: Maximum number of threads of the executor for blocking functions.
+			loop: The asyncio event loop.
+			thread: The thread that runs the event loop.
+			executor: The bounded executor for blocking functions.
+	"""
+
+	__slots__ = (
+		'name',
+		'maxWorkers',
+		'loop',
+		'thread',
+		'executor',
+		'_started',
+	)
+	"""	Slots of the class. """
+
+
+	def __init__(self, maxWorkers:int, name:Optional[str] = 'asyncLoop') -> None:
+		"""	Initialize the event loop. The loop is not started yet.
+
+			Args:
+				maxWorkers: Maximum number of threads of the executor for blocking functions.
+				name: Name of the loop thread.
+		"""
+		self.name = name
+		self.maxWorkers = maxWorkers
+		self.loop:asyncio.AbstractEventLoop = None
+		self.thread:Thread = None
+		self.executor:concurrent.futures.ThreadPoolExecutor = None
+		self._started = Event()
+
+
+	def start(self) -> AsyncLoop:
+		"""	Start the event loop in a separate thread. This method returns when the loop is running.
+
+			Return:
+				The AsyncLoop instance.
+		"""
+		if self.isRunning():
+			return self
+		self.executor = concurrent.futures.ThreadPoolExecutor(max_workers = self.maxWorkers, thread_name_prefix = f'{self.name}Executor')
+		self.loop = asyncio.new_event_loop()
+		self.loop.set_default_executor(self.executor)
+		self._started.clear()
+		self.thread = Thread(target = self._run, name = self.name, daemon = True)
+		self.thread.start()
+		self._started.wait()
+		return self
+
+
+	def stop(self, timeout:Optional[float] = 5.0) -> None:
+		"""	Stop the event loop and the executor.
+
+			Args:
+				timeout: Time in seconds to wait for the loop thread to finish.
+		"""
+		if not self.isRunning():
+			return
+		self.loop.call_soon_threadsafe(self.loop.stop)
+		self.thread.join(timeout)
+		self.executor.shutdown(wait = False, cancel_futures = True)
+		self.thread = None
+
+
+	def isRunning(self) -> bool:
+		"""	Check whether the event loop is running.
+
+			Return:
+				True if the event loop is running.
+		"""
+		return self.thread is not None and self.thread.is_alive()
+
+
+	def _run(self) -> None:
+		"""	Run the event loop until it is stopped. Remaining tasks are cancelled afterwards.
+		"""
+		asyncio.set_event_loop(self.loop)
+		self.loop.call_soon(self._started.set)
+		try:
+			self.loop.run_forever()
+		finally:
+			for task in asyncio.all_tasks(self.loop):
+				task.cancel()
+			self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+			self.loop.close()
+
+
+	#########################################################################
+	#
+	#	Bridging between synchronous code and coroutines
+	#
+
+	def submit(self, coroutine:Awaitable[T]) -> concurrent.futures.Future[T]:
+		"""	Submit a coroutine to the event loop. This can be called from any thread.
+
+			Args:
+				coroutine: The coroutine to run.
+
+			Return:
+				A Future that holds the result of the coroutine.
+		"""
+		return asyncio.run_coroutine_threadsafe(coroutine, self.loop)	# type:ignore[arg-type]
+
+
+	def run(self, coroutine:Awaitable[T], timeout:Optional[float] = None) -> T:
+		"""	Run a coroutine in the event loop and wait for its result.
+
+			This must not be called from the event loop thread itself.
+
+			Args:
+				coroutine: The coroutine to run.
+				timeout: Optional time in seconds to wait for the result.
+
+			Return:
+				The result of the coroutine. Exceptions of the coroutine are raised again.
+		"""
+		return self.submit(coroutine).result(timeout)
+
+
+	async def runBlocking(self, func:Callable[..., T], *args:Any) -> T:
+		"""	Run a blocking function in the bounded executor and wait asynchronously for its result.
+
+			Args:
+				func: The blocking function.
+				args: Positional arguments for the function.
+
+			Return:
+				The result of the function.
+		"""
+		return await self.loop.run_in_executor(self.executor, func, *args)
+
+
+	def callAt(self, ts:float, callback:Callable[[], None]) -> None:
+		"""	Call a function at a specific time using the timers of the event loop. This can be called from any thread.
+
+			The callback is run in the event loop thread and therefore must not block.
+
+			Args:
+				ts: UTC-based POSIX timestamp when the callback shall be called.
+				callback: The function to call.
+		"""
+		def _schedule() -> None:
+			delay = ts - datetime.now(tz = timezone.utc).timestamp()
+			self.loop.call_later(max(delay, 0.0), callback)
+		self.loop.call_soon_threadsafe(_schedule)
@@ -11,11 +11,13 @@
 
 from __future__ import annotations
 
-from typing import Callable, List, Dict, Any, Tuple, Optional
+from typing import Callable, List, Dict, Any, Tuple, Optional, Deque
+from collections import deque
 from .TextTools import simpleMatch
+from .AsyncLoop import AsyncLoop
 import random, sys, heapq, traceback, time, inspect
 from datetime import datetime, timezone
-from threading import Thread, Timer, Event, RLock, Lock, enumerate as threadsEnumerate
+from threading import Thread, Event, Lock, RLock, Condition, enumerate as threadsEnumerate
 import logging
 
 
@@ -28,6 +30,12 @@ def _utcTime() -> float:
 	return datetime.now(tz = timezone.utc).timestamp()
 
 
+class JobRejectedError(Exception):
+	"""	Raised when a task is rejected with the *abort* policy because the maximum number of jobs
+		is running and the job queue is full.
+	"""
+
+
 class BackgroundWorker(object):
 	"""	This class provides the functionality for background worker or a single actor instance.
 
@@ -329,29 +337,35 @@ class BackgroundWorker(object):
 
 
 class Job(Thread):
-	"""	Job class that extends the *Thread* class with pause, resume, stop functionalities, and lists of
+	"""	Job class that extends the *Thread* class with pause, resume, stop functionalities, and sets of
 		running and paused jobs for reuse.
 
 		Job objects are not deleted immediately after they finished but pooled for reuse. They are
 		only destroyed when the pressure on the pool was low for a certain time.
+
+		The number of jobs can be limited. When all jobs are busy then new tasks are added to a 
+		bounded queue, from which the jobs take their next task when they finished their current one.
+		When the queue is full as well then the rejection policy is applied to new tasks.
 	"""
 
 	__slots__ = (
 		'pauseFlag',
 		'activeFlag',
-		'Callable',
+		'task',
 		'finished',
 	)
 	"""	Slots for the class."""
 
 	jobListLock	= RLock()
-	"""	Lock for the job lists. """
+	"""	Lock for the job sets and the task queue. """
 
-	# Paused and running job lists
-	pausedJobs:list[Job] = []
-	""" List of paused jobs. """
-	runningJobs:list[Job] = []
-	""" List of running jobs. """
+	# Paused and running job sets
+	pausedJobs:set[Job] = set()
+	""" Set of paused jobs. """
+	runningJobs:set[Job] = set()
+	""" Set of running jobs. """
+	queuedTasks:Deque[Tuple[Callable, Optional[str], float]] = deque()
+	""" Queue of tasks that wait for a free job. Each entry is a tuple (task, name, time when queued). """
 
 	# Defaults for reducing overhead jobs
 	_balanceTarget:float = 3.0	
@@ -363,6 +377,18 @@ class Job(Thread):
 	_balanceCount:int = 0
 	""" Counter for current runs. Compares against balance. """
 
+	# Limits and metrics
+	_maxJobs:int = 0
+	""" Maximum number of running jobs. 0 means unlimited. """
+	_maxQueueSize:int = 1000
+	""" Maximum number of queued tasks. """
+	_rejectionPolicy:str = 'callerRuns'
+	""" Policy for tasks that are rejected because the queue is full: *callerRuns* or *discard*. """
+	_rejectedTasks:int = 0
+	""" Number of rejected tasks. """
+	_queueWaitTimes:Deque[float] = deque(maxlen = 1000)
+	""" The queue wait times in seconds of the most recent tasks. """
+
 
 	def __init__(self, *args:Any, **kwargs:Any) -> None:
 		"""	Initialize a Job object.
@@ -400,40 +426,56 @@ class Job(Thread):
 			if not self.activeFlag.is_set():
 				break
 			if self.task:
-				self.task()
+				try:
+					self.task()
+				except Exception as e:
+					if BackgroundWorker._logger:
+						BackgroundWorker._logger(logging.ERROR, f'Job "{self.name}" exception during task: {str(e)}\n{"".join(traceback.format_exception(type(e), value = e, tb = e.__traceback__))}')
 				self.task = None
 			if self.finished:
 				self.finished(self)
 				self.finished = None
+			self._nextTask()
+
+
+	def _nextTask(self) -> None:
+		"""	Take the next task from the queue, or pause the job if the queue is empty.
+		"""
+		with Job.jobListLock:
+			if not self.activeFlag.is_set():
+				return
+			if Job.queuedTasks:
+				task, name, queuedAt = Job.queuedTasks.popleft()
+				Job._queueWaitTimes.append(time.monotonic() - queuedAt)
+				self.setTask(task, name = name)
+				return
 			self.pause()
 
 
 	def pause(self) -> Job:
-		"""	Pause a thread job. The job is removed from the running list
-			(if still present there) and moved to the paused list.
+		"""	Pause a thread job. The job is removed from the running set
+			(if still present there) and moved to the paused set.
 		
 			Return:
 				The Job object.
 		"""
 		with Job.jobListLock:
-			if self in Job.runningJobs:
-				Job.runningJobs.remove(self)
-			Job.pausedJobs.append(self)
+			Job.runningJobs.discard(self)
+			Job.pausedJobs.add(self)
 			self.pauseFlag.clear() # Block the thread
 		return self
 
 
 	def resume(self) -> Job:
-		"""	Resume a thread job. The job is removed from the paused list
-			(if still present there) and moved to the running list.
+		"""	Resume a thread job. The job is removed from the paused set
+			(if still present there) and moved to the running set.
 		
 			Return:
 				The Job object.
 		"""
 		with Job.jobListLock:
-			if self in Job.pausedJobs:
-				Job.pausedJobs.remove(self)
-			Job.runningJobs.append(self)
+			Job.pausedJobs.discard(self)
+			Job.runningJobs.add(self)
 			self.pauseFlag.set() # Stop blocking
 		return self
 
@@ -446,10 +488,9 @@ class Job(Thread):
 		"""
 		self.activeFlag.clear() # Stop the thread
 		self.pauseFlag.set() # Resume the thread from the suspended state
-		if self in Job.runningJobs:
-			Job.runningJobs.remove(self)
-		if self in Job.pausedJobs:
-			Job.runningJobs.remove(self)
+		with Job.jobListLock:
+			Job.runningJobs.discard(self)
+			Job.pausedJobs.discard(self)
 		return self
 	
 
@@ -472,12 +513,15 @@ class Job(Thread):
 	@classmethod
 	def getJob(cls, task:Callable, finished:Optional[Callable] = None, name:Optional[str] = None) -> Job:
 		"""	Get a Job object, and set a task and a finished Callable for it to execute.
-			The Job object is either taken from the paused list (if available), or
+			The Job object is either taken from the paused set (if available), or
 			a new one is created.
 			After calling this method the Job instance is neither in the paused nor the
-			running list. It is moved into the running list, for example, with the `resume()`
+			running set. It is moved into the running set, for example, with the `resume()`
 			method.
 
+			Note:
+				This method does not check the maximum number of jobs. Use `submit()` for this.
+
 			Args:
 				task: A Callable. This must include arguments, so a lambda can be used here.
 				finished: A Callable that is called when the task finished.
@@ -486,15 +530,53 @@ class Job(Thread):
 				The Job object.
 		"""
 		with Job.jobListLock :
-			if not Job.pausedJobs:
-				job = Job().pause()	# new job and internal pause before start
+			if Job.pausedJobs:
+				job = Job.pausedJobs.pop()	# remove a job from the paused set
+			else:
+				job = Job()
+				job.pauseFlag.clear()	# internal pause before start
 				job.start() # start the thread, but since it is paused, it will not run the task
-
-			job = Job.pausedJobs.pop(0).setTask(task, finished, name)	# remove next job from paused list and set the task parameter
+			job.setTask(task, finished, name)	# set the task parameter
 			Job._balanceJobs()	# check the pause/running jobs balance
 			return job
 	
 
+	@classmethod
+	def submit(cls, task:Callable, name:Optional[str] = None, rejectionPolicy:Optional[str] = None) -> Optional[Job]:
+		"""	Run a task in a job, or queue it if the maximum number of jobs is running.
+
+			If the queue is full as well then the task is rejected according to the rejection policy:
+			either it is executed in the caller's thread (*callerRuns*), it is discarded (*discard*),
+			or a `JobRejectedError` is raised (*abort*).
+
+			Args:
+				task: A Callable. This must include arguments, so a lambda can be used here.
+				name: Optional name of the job.
+				rejectionPolicy: Optional rejection policy for this task. If None then the configured policy is used.
+			Return:
+				The Job object that runs the task, or None if the task was queued or rejected.
+		"""
+		with Job.jobListLock:
+			if not Job._maxJobs or len(Job.runningJobs) < Job._maxJobs:
+				Job._queueWaitTimes.append(0.0)
+				return Job.getJob(task, name = name).resume()
+			if len(Job.queuedTasks) < Job._maxQueueSize:
+				Job.queuedTasks.append((task, name, time.monotonic()))
+				return None
+			Job._rejectedTasks += 1
+
+		# The queue is full
+		policy = rejectionPolicy or Job._rejectionPolicy
+		if policy == 'abort':
+			raise JobRejectedError(f'Job queue is full. Task rejected: {name}')
+		if policy == 'discard':
+			if BackgroundWorker._logger:
+				BackgroundWorker._logger(logging.WARNING, f'Job queue is full. Task discarded: {name}')
+			return None
+		task()	# callerRuns
+		return None
+
+
 	@classmethod
 	def _balanceJobs(cls) -> None:
 		"""	Internal function to balance the number of paused and running jobs.
@@ -503,9 +585,9 @@ class Job(Thread):
 			return
 		Job._balanceCount += 1
 		if Job._balanceCount >= Job._balanceLatency:		# check after balancyLatency runs
-			if float(lp := len(Job.pausedJobs)) / float(len(Job.runningJobs)) > Job._balanceTarget:				# out of balance?
+			if float(lp := len(Job.pausedJobs)) / float(max(len(Job.runningJobs), 1)) > Job._balanceTarget:				# out of balance?
 				for _ in range((int(lp / Job._balanceReduceFactor))):
-					Job.pausedJobs.pop(0).stop()
+					Job.pausedJobs.pop().stop()
 			Job._balanceCount = 0
 
 
@@ -525,6 +607,42 @@ class Job(Thread):
 		cls._balanceReduceFactor = balanceReduceFactor
 
 
+	@classmethod
+	def setJobLimits(cls, maxJobs:Optional[int] = 0,
+						  maxQueueSize:Optional[int] = 1000,
+						  rejectionPolicy:Optional[str] = 'callerRuns') -> None:
+		"""	Set the limits for the number of running jobs and queued tasks.
+
+			Args:
+				maxJobs: Maximum number of running jobs. 0 means unlimited.
+				maxQueueSize: Maximum number of tasks that wait for a free job.
+				rejectionPolicy: Policy for tasks that are rejected because the queue is full: *callerRuns* or *discard*.
+		"""
+		cls._maxJobs = maxJobs
+		cls._maxQueueSize = maxQueueSize
+		cls._rejectionPolicy = rejectionPolicy
+
+
+	@classmethod
+	def getStatistics(cls) -> Dict[str, Any]:
+		"""	Return the current job metrics.
+
+			Return:
+				Dictionary with the number of running and paused jobs, the number of queued and rejected tasks,
+				the maximum number of jobs, and the 99th percentile of the queue wait time in seconds.
+		"""
+		with Job.jobListLock:
+			waitTimes = sorted(Job._queueWaitTimes)
+			return {
+				'running': len(Job.runningJobs),
+				'paused': len(Job.pausedJobs),
+				'queued': len(Job.queuedTasks),
+				'rejected': Job._rejectedTasks,
+				'maxJobs': Job._maxJobs,
+				'queueWaitP99': waitTimes[min(len(waitTimes) - 1, int(len(waitTimes) * 0.99))] if waitTimes else 0.0,
+			}
+
+
 class WorkerEntry(object):
 	"""	Internal class for a worker entry in the priority queue.
 	"""
@@ -533,6 +651,7 @@ class WorkerEntry(object):
 		'timestamp',
 		'workerID',
 		'workerName',
+		'cancelled',
 	)
 	"""	Slots for the class. """
 
@@ -550,6 +669,8 @@ class WorkerEntry(object):
 		""" ID of the worker. """
 		self.workerName = workerName
 		""" Name of the worker. """
+		self.cancelled = False
+		""" True if the entry has been removed from the queue. Cancelled entries are skipped by the scheduler. """
 
 
 	def __lt__(self, other:WorkerEntry) -> bool:
@@ -570,7 +691,7 @@ class WorkerEntry(object):
 			Return:
 				A string representation of the WorkerEntry.
 		"""
-		return f'(ts: {self.timestamp} id: {self.workerID} name: {self.workerName})'
+		return f'(ts: {self.timestamp} id: {self.workerID} name: {self.workerName}{" cancelled" if self.cancelled else ""})'
 	
 
 	def __repr__(self) -> str:
@@ -582,6 +703,114 @@ class WorkerEntry(object):
 		return self.__str__()
 
 
+class WorkerNameIndex(object):
+	"""	Internal index of the background workers by their names.
+
+		Workers are found by their exact name in a dictionary. For names with wildcards the literal prefix
+		before the first wildcard is looked up in a prefix trie, and only the names below that prefix
+		are matched against the full pattern.
+	"""
+
+	__slots__ = (
+		'names',
+		'trie',
+		'lock',
+	)
+	"""	Slots for the class. """
+
+	_wildcards = frozenset('*?+\\')
+	"""	Characters that start a wildcard or escape sequence in a name pattern. """
+
+
+	def __init__(self) -> None:
+		"""	Initialize the index.
+		"""
+		self.names:Dict[str, Dict[int, BackgroundWorker]] = {}
+		""" Mapping from a worker name to the workers with that name. """
+		self.trie:Dict[str, Any] = {}
+		""" Prefix trie of the names. Each node maps characters to child nodes. The key *None* marks the end of a name. """
+		self.lock = Lock()
+		""" Lock to protect the index. """
+
+
+	def add(self, worker:BackgroundWorker) -> None:
+		"""	Add a worker to the index.
+
+			Args:
+				worker: The worker to add. Workers without a name are not indexed.
+		"""
+		if (name := worker.name) is None:
+			return
+		with self.lock:
+			if not (workers := self.names.get(name)):
+				workers = self.names[name] = {}
+				node = self.trie
+				for c in name:
+					node = node.setdefault(c, {})
+				node[None] = name
+			workers[worker.id] = worker
+
+
+	def remove(self, worker:BackgroundWorker) -> None:
+		"""	Remove a worker from the index.
+
+			Args:
+				worker: The worker to remove.
+		"""
+		if (name := worker.name) is None:
+			return
+		with self.lock:
+			if not (workers := self.names.get(name)) or workers.pop(worker.id, None) is None or workers:
+				return
+			del self.names[name]
+
+			# Remove the name from the trie and prune the empty nodes
+			path = [ self.trie ]
+			for c in name:
+				path.append(path[-1][c])
+			del path[-1][None]
+			for i in range(len(name) - 1, -1, -1):
+				if path[i + 1]:
+					break
+				del path[i][name[i]]
+
+
+	def find(self, pattern:str) -> List[BackgroundWorker]:
+		"""	Find the workers whose names match a *pattern*.
+
+			Args:
+				pattern: Name of the workers. It may contain simple wildcards (* and ?).
+
+			Return:
+				A list of `BackgroundWorker` objects, or an empty list.
+		"""
+		# Literal prefix of the pattern
+		prefixLength = next((i for i, c in enumerate(pattern) if c in self._wildcards), len(pattern))
+		with self.lock:
+			if prefixLength == len(pattern):	# No wildcards
+				return list(self.names.get(pattern, {}).values())
+
+			# Find the node of the prefix, and collect all names below it
+			node = self.trie
+			for c in pattern[:prefixLength]:
+				if (node := node.get(c)) is None:
+					return []
+			names = []
+			stack = [ node ]
+			while stack:
+				node = stack.pop()
+				for c, child in node.items():
+					if c is None:
+						names.append(child)
+					else:
+						stack.append(child)
+
+			# Only a trailing "*" after the prefix matches all names below the prefix
+			isPrefixPattern = pattern[prefixLength:] == '*'
+			return [ w	for name in names if isPrefixPattern or simpleMatch(name, pattern)
+						for w in self.names[name].values() ]
+
+
 class BackgroundWorkerPool(object):
 	"""	Pool and factory for background workers and actors.
 	"""
@@ -589,14 +818,27 @@ class BackgroundWorkerPool(object):
 	backgroundWorkers:Dict[int, BackgroundWorker]	= {}
 	"""	All background workers. """
 	workerQueue:list[WorkerEntry] 					= []
-	""" Priority queue. Contains tuples (next execution timestamp, worker ID, worker name). """
-	workerTimer:Timer								= None
-	"""	A single timer to run the next task in the *workerQueue*. """
+	""" Priority queue. Contains `WorkerEntry` objects (next execution timestamp, worker ID, worker name). """
+	queuedWorkers:Dict[int, WorkerEntry]			= {}
+	""" The current queue entry of each queued worker. Mapping from worker ID. """
+	cancelledEntries:int							= 0
+	""" Number of cancelled entries that are still in the *workerQueue*. """
+	workerIndex:WorkerNameIndex						= WorkerNameIndex()
+	""" Index of the *backgroundWorkers* by their names. """
 
-	queueLock:Lock					 				= Lock()
-	"""	Lock for the *workerQueue*. """
-	timerLock:Lock					 				= Lock()
-	"""	Lock for the *workerTimer*. """
+	queueCondition:Condition	 					= Condition()
+	"""	Condition for the *workerQueue*. The scheduler thread waits on it for the next due worker. """
+	schedulerThread:Thread							= None
+	"""	A single scheduler thread to run the due workers in the *workerQueue*. """
+
+	_compactThreshold:int							= 1024
+	"""	Minimum number of cancelled entries before the *workerQueue* is compacted. """
+
+	_rejectedRetryDelay:float						= 0.1
+	"""	Delay in seconds after which a worker is queued again when its job was rejected by the scheduler thread. """
+
+	eventLoop:AsyncLoop								= None
+	"""	Optional asyncio event loop. If set then its timers are used to schedule the workers instead of the scheduler thread. """
 
 
 	def __new__(cls, *args:str, **kwargs:str) -> BackgroundWorkerPool:
@@ -617,6 +859,18 @@ class BackgroundWorkerPool(object):
 		BackgroundWorker._logger = logger
 
 
+	@classmethod
+	def setEventLoop(cls, eventLoop:Optional[AsyncLoop]) -> None:
+		"""	Assign an asyncio event loop whose timers are used to schedule the workers.
+
+			This must be called before any worker is started.
+
+			Args:
+				eventLoop: A running `AsyncLoop`, or None to use the scheduler thread.
+		"""
+		cls.eventLoop = eventLoop
+
+
 	@classmethod
 	def setJobBalance(cls, balanceTarget:Optional[float] = 3.0, 
 						   balanceLatency:Optional[int] = 1000, 
@@ -631,6 +885,20 @@ class BackgroundWorkerPool(object):
 		Job.setJobBalance(balanceTarget, balanceLatency, balanceReduceFactor)
 
 
+	@classmethod
+	def setJobLimits(cls, maxJobs:Optional[int] = 0,
+						  maxQueueSize:Optional[int] = 1000,
+						  rejectionPolicy:Optional[str] = 'callerRuns') -> None:
+		"""	Set the limits for the number of running jobs and queued tasks.
+
+			Args:
+				maxJobs: Maximum number of running jobs. 0 means unlimited.
+				maxQueueSize: Maximum number of tasks that wait for a free job.
+				rejectionPolicy: Policy for tasks that are rejected because the queue is full: *callerRuns* or *discard*.
+		"""
+		Job.setJobLimits(maxJobs, maxQueueSize, rejectionPolicy)
+
+
 	@classmethod
 	def newWorker(cls,	interval:float, 
 						workerCallback:Callable,
@@ -678,6 +946,7 @@ class BackgroundWorkerPool(object):
 								  ignoreException = ignoreException,
 								  data = data)
 		cls.backgroundWorkers[id] = worker
+		cls.workerIndex.add(worker)
 		return worker
 
 
@@ -737,7 +1006,8 @@ class BackgroundWorkerPool(object):
 			Return:
 				A list of `BackgroundWorker` objects, or an empty list.
 		"""
-		return [ w for w in cls.backgroundWorkers.values() if (not name or simpleMatch(w.name, name)) and (not running or running == w.running) ]
+		workers = cls.workerIndex.find(name) if name else list(cls.backgroundWorkers.values())
+		return [ w for w in workers if not running or running == w.running ]
 
 
 	@classmethod
@@ -779,16 +1049,23 @@ class BackgroundWorkerPool(object):
 	#
 
 	@classmethod
-	def runJob(cls, task:Callable, name:Optional[str] = None) -> Job:
+	def runJob(cls, task:Callable, name:Optional[str] = None, rejectionPolicy:Optional[str] = None) -> Optional[Job]:
 		"""	Run a task as a Thread. Reuse finished threads if possible.
 
+			If the maximum number of jobs is running then the task is queued until a job
+			becomes available.
+
 			Args:
 				task: A Callable that is run as a job. This must include arguments, so a lambda can be used here.
 				name: Optional name of the job.
+				rejectionPolicy: Optional rejection policy for this task (*callerRuns*, *discard* or *abort*). If None then the configured policy is used.
 			Return:
-				`Job` instance.
+				`Job` instance, or None if the task was queued or rejected.
+
+			Raises:
+				JobRejectedError: If the task is rejected with the *abort* policy.
 		"""
-		return Job.getJob(task, name = name).resume()
+		return Job.submit(task, name = name, rejectionPolicy = rejectionPolicy)
 
 
 	@classmethod
@@ -801,15 +1078,26 @@ class BackgroundWorkerPool(object):
 		return (len(Job.runningJobs), len(Job.pausedJobs))
 
 
+	@classmethod
+	def getJobStatistics(cls) -> Dict[str, Any]:
+		"""	Return the current job metrics.
+		
+			Return:
+				Dictionary with the number of running and paused jobs, the number of queued and rejected tasks,
+				the maximum number of jobs, and the 99th percentile of the queue wait time in seconds.
+		"""
+		return Job.getStatistics()
+
+
 	@classmethod
 	def killJobs(cls) -> None:
 		"""	Stop and remove all Jobs.
 		"""
-		while Job.runningJobs:
-			# Job.runningJobs.pop(0).stop()
-			Job.runningJobs[0].stop()	# will remove itself
-		while Job.pausedJobs:
-			Job.pausedJobs[0].stop()	# will remove itself
+		with Job.jobListLock:
+			Job.queuedTasks.clear()
+			jobs = list(Job.runningJobs) + list(Job.pausedJobs)
+		for job in jobs:
+			job.stop()	# will remove itself
 		while any( [ isinstance(each, Job) for each in threadsEnumerate() ] ):
 			time.sleep(0.00001)
 
@@ -827,72 +1115,149 @@ class BackgroundWorkerPool(object):
 			"""
 		if worker and worker.id in cls.backgroundWorkers:
 			del cls.backgroundWorkers[worker.id]
+			cls.workerIndex.remove(worker)
 
 
 	@classmethod
 	def _queueWorker(cls, ts:float, worker:BackgroundWorker) -> None:
 		"""	Queue a `BackgroundWorker` object for execution at the *ts* timestamp.
 
+			A worker is only queued once. A previous queue entry of the worker is cancelled.
+
 			Args:
 				ts: Timestamp at which the worker shall be executed.
 				worker: Backgroundworker object to queue.
 		"""
-		top = cls.workerQueue[0] if cls.workerQueue else None
-		with cls.queueLock:
-			cls._stopTimer()
-			heapq.heappush(cls.workerQueue, WorkerEntry(ts, worker.id, worker.name))
-			cls._startTimer()
+		entry = WorkerEntry(ts, worker.id, worker.name)
+		with cls.queueCondition:
+			if (previous := cls.queuedWorkers.get(worker.id)):
+				previous.cancelled = True
+				if not cls.eventLoop:
+					cls.cancelledEntries += 1
+			cls.queuedWorkers[worker.id] = entry
+
+			# Use the timers of the event loop, if available
+			if cls.eventLoop:
+				cls.eventLoop.callAt(ts, lambda: cls._runQueueEntry(entry))
+				return
+
+			heapq.heappush(cls.workerQueue, entry)
+			if cls.workerQueue[0] is entry:	# Wake up the scheduler only if the new entry is the next one to run
+				cls.queueCondition.notify()
+			cls._startScheduler()
 
 
 	@classmethod
 	def _unqueueWorker(cls, worker:BackgroundWorker) -> None:
 		"""	Remove the Backgroundworker for `id` from the queue.
 
+			The queue entry is only marked as cancelled and is skipped by the scheduler later.
+
 			Args:
 				worker: Backgroundworker to unqueue
 		"""
-		with cls.queueLock:
-			cls._stopTimer()
-			for each in cls.workerQueue:
-				if each.workerID == worker.id:
-					cls.workerQueue.remove(each)
-					heapq.heapify(cls.workerQueue)
-					break	# Only 1 worker
-			cls._startTimer()
+		with cls.queueCondition:
+			if (entry := cls.queuedWorkers.pop(worker.id, None)):
+				entry.cancelled = True
+				if not cls.eventLoop:
+					cls.cancelledEntries += 1
+					cls._compactQueue()
 
 
 	@classmethod
-	def _startTimer(cls) -> None:
-		""" Start the workers queue timer.
-		"""
-		if cls.workerQueue:
-			with cls.timerLock:
-				if cls.workerTimer is not None:	# don't start another timer!
-					return
-				cls.workerTimer = Timer(cls.workerQueue[0].timestamp - _utcTime(), cls._execQueue)
-				cls.workerTimer.setDaemon(True)	# Make the Timer thread a daemon of the main thread
-				cls.workerTimer.start()
-	
+	def _compactQueue(cls) -> None:
+		"""	Remove the cancelled entries from the queue when they make up more than half of it.
+
+			This must be called while holding the *queueCondition*.
+		"""
+		if cls.cancelledEntries >= cls._compactThreshold and cls.cancelledEntries * 2 > len(cls.workerQueue):
+			cls.workerQueue = [ each for each in cls.workerQueue if not each.cancelled ]
+			heapq.heapify(cls.workerQueue)
+			cls.cancelledEntries = 0
+
+
+	@classmethod
+	def _startScheduler(cls) -> None:
+		""" Start the scheduler thread if it is not running yet.
+
+			This must be called while holding the *queueCondition*.
+		"""
+		if cls.schedulerThread is None or not cls.schedulerThread.is_alive():
+			cls.schedulerThread = Thread(target = cls._runScheduler, name = 'workerScheduler', daemon = True)
+			cls.schedulerThread.start()
+
 
 	@classmethod
-	def _stopTimer(cls) -> None:
-		"""	Cancel/interrupt the workers queue timer.
+	def _runScheduler(cls) -> None:
+		"""	The scheduler thread. Wait for the next due worker in the queue and execute
+			the BackgroundWorker's callback in a job.
+
+			The callbacks never run in the scheduler thread itself, because this would delay all other workers.
+			If the job queue is full then a due worker is queued again after a short delay.
 		"""
-		with cls.timerLock:
-			if cls.workerTimer is not None:
-				cls.workerTimer.cancel()
-				cls.workerTimer = None
+		while True:
+			due:list[WorkerEntry] = []
+			with cls.queueCondition:
+				while not due:
+					# Skip cancelled entries at the top of the queue
+					while cls.workerQueue and cls.workerQueue[0].cancelled:
+						heapq.heappop(cls.workerQueue)
+						cls.cancelledEntries -= 1
+					if not cls.workerQueue:
+						cls.queueCondition.wait()
+						continue
+					if (delay := cls.workerQueue[0].timestamp - _utcTime()) > 0.0:
+						cls.queueCondition.wait(delay)
+						continue
+					# Collect all due workers
+					while cls.workerQueue and cls.workerQueue[0].timestamp <= _utcTime():
+						if not (entry := heapq.heappop(cls.workerQueue)).cancelled:
+							del cls.queuedWorkers[entry.workerID]
+							due.append(entry)
+						else:
+							cls.cancelledEntries -= 1
+			for entry in due:
+				if worker := cls.backgroundWorkers.get(entry.workerID):
+					try:
+						cls.runJob(worker._work, entry.workerName, rejectionPolicy = 'abort')
+					except JobRejectedError:
+						cls._requeueRejectedWorker(worker)
 
 
 	@classmethod
-	def _execQueue(cls) -> None:
-		"""	Execute the actual BackgroundWorker's callback in a thread.
+	def _requeueRejectedWorker(cls, worker:BackgroundWorker) -> None:
+		"""	Queue a worker again whose job was rejected by the scheduler thread because the job queue is full.
+			The worker is not queued again if it was queued in the meantime.
+
+			Args:
+				worker: The rejected worker.
 		"""
-		with cls.queueLock:
-			cls._stopTimer()
-			if cls.workerQueue:
-				w = heapq.heappop(cls.workerQueue)
-				if worker := cls.backgroundWorkers.get(w.workerID):
-					cls.runJob(worker._work, w.workerName)
-			cls._startTimer()	# start timer again
+		with cls.queueCondition:
+			if worker.id in cls.queuedWorkers:
+				return
+			if BackgroundWorker._logger:
+				BackgroundWorker._logger(logging.WARNING, f'Job queue is full. Worker: {worker.name} queued again')
+			cls._queueWorker(_utcTime() + cls._rejectedRetryDelay, worker)
+
+
+	@classmethod
+	def _runQueueEntry(cls, entry:WorkerEntry) -> None:
+		"""	Execute the BackgroundWorker's callback of a queue entry in a job when the
+			timer of the event loop fires. Cancelled entries are skipped.
+
+			This runs in the event loop thread. With the *callerRuns* rejection policy a rejected task is
+			therefore run in the executor of the event loop, and not in the calling thread.
 
+			Args:
+				entry: The queue entry of the worker.
+		"""
+		with cls.queueCondition:
+			if entry.cancelled:
+				return
+			del cls.queuedWorkers[entry.workerID]
+		if worker := cls.backgroundWorkers.get(entry.workerID):
+			try:
+				cls.runJob(worker._work, entry.workerName, rejectionPolicy = 'abort' if Job._rejectionPolicy == 'callerRuns' else None)
+			except JobRejectedError:
+				# The task must not run in the event loop thread. Run it in the loop's executor instead
+				cls.eventLoop.executor.submit(worker._work)
@@ -0,0 +1,488 @@
+#
+#	CoAPMessage.py
+#
+#	(c) 2023 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Encoding and decoding of CoAP messages
+#
+
+"""	This module implements the encoding and decoding of CoAP messages (RFC 7252), including the
+	Block1 and Block2 options for block-wise transfers (RFC 7959), the Observe option (RFC 7641),
+	and the options of the oneM2M CoAP binding (TS-0008).
+"""
+
+from __future__ import annotations
+from typing import Optional, Tuple
+
+from ..helpers.ACMEIntEnum import ACMEIntEnum
+
+
+class CoAPType(ACMEIntEnum):
+	"""	CoAP message types.
+	"""
+
+	CON	= 0
+	"""	Confirmable. """
+	NON	= 1
+	"""	Non-confirmable. """
+	ACK	= 2
+	"""	Acknowledgement. """
+	RST	= 3
+	"""	Reset. """
+
+
+class CoAPCode(ACMEIntEnum):
+	"""	CoAP method and response codes. The upper 3 bits are the class, the lower 5 bits the detail.
+	"""
+
+	EMPTY						= 0x00
+	"""	0.00 Empty message. """
+	GET							= 0x01
+	"""	0.01 GET. """
+	POST						= 0x02
+	"""	0.02 POST. """
+	PUT							= 0x03
+	"""	0.03 PUT. """
+	DELETE						= 0x04
+	"""	0.04 DELETE. """
+
+	CREATED						= 0x41
+	"""	2.01 Created. """
+	DELETED						= 0x42
+	"""	2.02 Deleted. """
+	VALID						= 0x43
+	"""	2.03 Valid. """
+	CHANGED						= 0x44
+	"""	2.04 Changed. """
+	CONTENT						= 0x45
+	"""	2.05 Content. """
+	CONTINUE					= 0x5f
+	"""	2.31 Continue. """
+
+	BAD_REQUEST					= 0x80
+	"""	4.00 Bad Request. """
+	UNAUTHORIZED				= 0x81
+	"""	4.01 Unauthorized. """
+	BAD_OPTION					= 0x82
+	"""	4.02 Bad Option. """
+	FORBIDDEN					= 0x83
+	"""	4.03 Forbidden. """
+	NOT_FOUND					= 0x84
+	"""	4.04 Not Found. """
+	METHOD_NOT_ALLOWED			= 0x85
+	"""	4.05 Method Not Allowed. """
+	NOT_ACCEPTABLE				= 0x86
+	"""	4.06 Not Acceptable. """
+	REQUEST_ENTITY_INCOMPLETE	= 0x88
+	"""	4.08 Request Entity Incomplete. """
+	CONFLICT					= 0x89
+	"""	4.09 Conflict. """
+	PRECONDITION_FAILED			= 0x8c
+	"""	4.12 Precondition Failed. """
+	REQUEST_ENTITY_TOO_LARGE	= 0x8d
+	"""	4.13 Request Entity Too Large. """
+	UNSUPPORTED_CONTENT_FORMAT	= 0x8f
+	"""	4.15 Unsupported Content-Format. """
+
+	INTERNAL_SERVER_ERROR		= 0xa0
+	"""	5.00 Internal Server Error. """
+	NOT_IMPLEMENTED				= 0xa1
+	"""	5.01 Not Implemented. """
+	BAD_GATEWAY					= 0xa2
+	"""	5.02 Bad Gateway. """
+	SERVICE_UNAVAILABLE			= 0xa3
+	"""	5.03 Service Unavailable. """
+	GATEWAY_TIMEOUT				= 0xa4
+	"""	5.04 Gateway Timeout. """
+	PROXYING_NOT_SUPPORTED		= 0xa5
+	"""	5.05 Proxying Not Supported. """
+
+
+class CoAPOption(ACMEIntEnum):
+	"""	CoAP option numbers, including the oneM2M specific options.
+	"""
+
+	IF_MATCH			= 1
+	"""	If-Match. """
+	URI_HOST			= 3
+	"""	Uri-Host. """
+	ETAG				= 4
+	"""	ETag. """
+	IF_NONE_MATCH		= 5
+	"""	If-None-Match. """
+	OBSERVE				= 6
+	"""	Observe. """
+	URI_PORT			= 7
+	"""	Uri-Port. """
+	LOCATION_PATH		= 8
+	"""	Location-Path. """
+	URI_PATH			= 11
+	"""	Uri-Path. """
+	CONTENT_FORMAT		= 12
+	"""	Content-Format. """
+	MAX_AGE				= 14
+	"""	Max-Age. """
+	URI_QUERY			= 15
+	"""	Uri-Query. """
+	ACCEPT				= 17
+	"""	Accept. """
+	LOCATION_QUERY		= 20
+	"""	Location-Query. """
+	BLOCK2				= 23
+	"""	Block2. """
+	BLOCK1				= 27
+	"""	Block1. """
+	SIZE2				= 28
+	"""	Size2. """
+	PROXY_URI			= 35
+	"""	Proxy-Uri. """
+	PROXY_SCHEME		= 39
+	"""	Proxy-Scheme. """
+	SIZE1				= 60
+	"""	Size1. """
+
+	ONEM2M_FR			= 256
+	"""	oneM2M From. """
+	ONEM2M_RQI			= 257
+	"""	oneM2M Request Identifier. """
+	ONEM2M_OT			= 259
+	"""	oneM2M Originating Timestamp. """
+	ONEM2M_RQET			= 260
+	"""	oneM2M Request Expiration Timestamp. """
+	ONEM2M_RSET			= 261
+	"""	oneM2M Result Expiration Timestamp. """
+	ONEM2M_OET			= 262
+	"""	oneM2M Operation Execution Time. """
+	ONEM2M_RTURI		= 263
+	"""	oneM2M notificationURI element of the Response Type. """
+	ONEM2M_EC			= 264
+	"""	oneM2M Event Category. """
+	ONEM2M_RSC			= 265
+	"""	oneM2M Response Status Code. """
+	ONEM2M_GID			= 266
+	"""	oneM2M Group Request Identifier. """
+	ONEM2M_TY			= 267
+	"""	oneM2M Resource Type. """
+	ONEM2M_RVI			= 271
+	"""	oneM2M Release Version Indicator. """
+	ONEM2M_VSI			= 272
+	"""	oneM2M Vendor Information. """
+
+
+class CoAPContentFormat(ACMEIntEnum):
+	"""	CoAP Content-Format numbers of the supported content serializations.
+	"""
+
+	TEXT	= 0
+	"""	text/plain;charset=utf-8 """
+	JSON	= 50
+	"""	application/json """
+	CBOR	= 60
+	"""	application/cbor """
+
+
+def codeToString(code:int) -> str:
+	"""	Return the "c.dd" notation of a CoAP code.
+
+		Args:
+			code: The CoAP code.
+
+		Return:
+			The code as a string, e.g. "2.05".
+	"""
+	return f'{code >> 5}.{code & 0x1f:02d}'
+
+
+def encodeUint(value:int) -> bytes:
+	"""	Encode an unsigned integer option value with the minimum number of bytes.
+
+		Args:
+			value: The integer value.
+
+		Return:
+			The big-endian encoded value. The value 0 is encoded as an empty byte string.
+	"""
+	return value.to_bytes((value.bit_length() + 7) // 8, 'big')
+
+
+def decodeUint(value:bytes) -> int:
+	"""	Decode an unsigned integer option value.
+
+		Args:
+			value: The big-endian encoded value.
+
+		Return:
+			The integer value.
+	"""
+	return int.from_bytes(value, 'big')
+
+
+def encodeBlock(num:int, more:bool, szx:int) -> int:
+	"""	Encode the value of a Block1 or Block2 option.
+
+		Args:
+			num: The block number.
+			more: Whether more blocks follow.
+			szx: The size exponent. The block size is 2**(szx + 4).
+
+		Return:
+			The option value.
+	"""
+	return (num << 4) | (0x08 if more else 0) | szx
+
+
+def decodeBlock(value:int) -> Tuple[int, bool, int]:
+	"""	Decode the value of a Block1 or Block2 option.
+
+		Args:
+			value: The option value.
+
+		Return:
+			Tuple (block number, more blocks follow, size exponent).
+	"""
+	return (value >> 4, bool(value & 0x08), value & 0x07)
+
+
+def blockSizeToSZX(size:int) -> int:
+	"""	Return the size exponent for a block size.
+
+		Args:
+			size: The block size. This must be a power of 2 between 16 and 1024.
+
+		Return:
+			The size exponent.
+	"""
+	return size.bit_length() - 5
+
+
+class CoAPMessage(object):
+	"""	A CoAP message.
+
+		Attributes:
+			type: The message type.
+			code: The method or response code.
+			mid: The message ID.
+			token: The token.
+			options: List of (option number, value) tuples, in the order they were added or received.
+			payload: The payload.
+	"""
+
+	__slots__ = (
+		'type',
+		'code',
+		'mid',
+		'token',
+		'options',
+		'payload',
+	)
+	"""	Slots of the class. """
+
+
+	def __init__(self, type:CoAPType,
+					   code:int,
+					   mid:int,
+					   token:bytes = b'',
+					   payload:bytes = b'') -> None:
+		"""	Initialization of a message.
+
+			Args:
+				type: The message type.
+				code: The method or response code.
+				mid: The message ID.
+				token: The token.
+				payload: The payload.
+		"""
+		self.type = type
+		self.code = code
+		self.mid = mid
+		self.token = token
+		self.options:list[Tuple[int, bytes]] = []
+		self.payload = payload
+
+
+	@property
+	def isRequest(self) -> bool:
+		"""	Whether the message is a request.
+		"""
+		return 0 < self.code < 0x20
+
+
+	@property
+	def isResponse(self) -> bool:
+		"""	Whether the message is a response.
+		"""
+		return self.code >= 0x40
+
+
+	@property
+	def isEmpty(self) -> bool:
+		"""	Whether the message is an empty message, e.g. an empty ACK or a RST.
+		"""
+		return self.code == CoAPCode.EMPTY
+
+
+	def addOption(self, number:int, value:bytes|str|int) -> CoAPMessage:
+		"""	Add an option to the message. Options that may occur multiple times, e.g. Uri-Path,
+			are added in the order of the calls.
+
+			Args:
+				number: The option number.
+				value: The option value. Integers are encoded as unsigned integers, strings as UTF-8.
+
+			Return:
+				The message itself.
+		"""
+		if isinstance(value, int):
+			value = encodeUint(value)
+		elif isinstance(value, str):
+			value = value.encode('utf-8')
+		self.options.append((number, value))
+		return self
+
+
+	def getOption(self, number:int) -> Optional[bytes]:
+		"""	Return the value of the first occurrence of an option.
+
+			Args:
+				number: The option number.
+
+			Return:
+				The option value, or None if the option is not present.
+		"""
+		for n, v in self.options:
+			if n == number:
+				return v
+		return None
+
+
+	def getOptions(self, number:int) -> list[bytes]:
+		"""	Return the values of all occurrences of an option.
+
+			Args:
+				number: The option number.
+
+			Return:
+				List of the option values in the order of the message.
+		"""
+		return [ v for n, v in self.options if n == number ]
+
+
+	def getUintOption(self, number:int) -> Optional[int]:
+		"""	Return the value of an option as an unsigned integer.
+
+			Args:
+				number: The option number.
+
+			Return:
+				The option value, or None if the option is not present.
+		"""
+		return None if (v := self.getOption(number)) is None else decodeUint(v)
+
+
+	def getStringOption(self, number:int) -> Optional[str]:
+		"""	Return the value of an option as a string.
+
+			Args:
+				number: The option number.
+
+			Return:
+				The option value, or None if the option is not present.
+		"""
+		return None if (v := self.getOption(number)) is None else v.decode('utf-8')
+
+
+	def removeOption(self, number:int) -> None:
+		"""	Remove all occurrences of an option.
+
+			Args:
+				number: The option number.
+		"""
+		self.options = [ o for o in self.options if o[0] != number ]
+
+
+	def encode(self) -> bytes:
+		"""	Encode the message.
+
+			Return:
+				The message as a byte string.
+		"""
+		result = bytearray((0x40 | (self.type << 4) | len(self.token), self.code, self.mid >> 8, self.mid & 0xff))
+		result += self.token
+		last = 0
+		for number, value in sorted(self.options, key = lambda o: o[0]):		# stable sort keeps the order of repeated options
+			delta = number - last
+			last = number
+			length = len(value)
+			header = len(result)
+			result.append(0)
+			for nibble, shift in ((delta, 4), (length, 0)):
+				if nibble < 13:
+					result[header] |= nibble << shift
+				elif nibble < 269:
+					result[header] |= 13 << shift
+					result.append(nibble - 13)
+				else:
+					result[header] |= 14 << shift
+					result += (nibble - 269).to_bytes(2, 'big')
+			result += value
+		if self.payload:
+			result.append(0xff)
+			result += self.payload
+		return bytes(result)
+
+
+	@classmethod
+	def decode(cls, data:bytes) -> CoAPMessage:
+		"""	Decode a message.
+
+			Args:
+				data: The received datagram.
+
+			Return:
+				The decoded message.
+
+			Raises:
+				ValueError: If the datagram is not a valid CoAP message.
+		"""
+		if len(data) < 4 or data[0] >> 6 != 1:
+			raise ValueError('Not a CoAP version 1 message')
+		tokenLength = data[0] & 0x0f
+		if tokenLength > 8:
+			raise ValueError('Invalid token length')
+		if len(data) < 4 + tokenLength:
+			raise ValueError('Token exceeds message')
+		message = cls(CoAPType(data[0] >> 4 & 0x03), data[1], data[2] << 8 | data[3], data[4:4 + tokenLength])
+		index = 4 + tokenLength
+		length = len(data)
+		number = 0
+		while index < length:
+			if data[index] == 0xff:		# payload marker
+				if index + 1 == length:
+					raise ValueError('Payload marker without payload')
+				message.payload = data[index + 1:]
+				break
+			header = data[index]
+			index += 1
+			values = []
+			for nibble in (header >> 4, header & 0x0f):
+				match nibble:
+					case 13:
+						if index + 1 > length:
+							raise ValueError('Option exceeds message')
+						nibble = data[index] + 13
+						index += 1
+					case 14:
+						if index + 2 > length:
+							raise ValueError('Option exceeds message')
+						nibble = (data[index] << 8 | data[index + 1]) + 269
+						index += 2
+					case 15:
+						raise ValueError('Invalid option delta or length')
+				values.append(nibble)
+			number += values[0]
+			if index + values[1] > length:
+				raise ValueError('Option exceeds message')
+			message.options.append((number, data[index:index + values[1]]))
+			index += values[1]
+		return message
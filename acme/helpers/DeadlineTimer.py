@@ -0,0 +1,149 @@
+#
+#	DeadlineTimer.py
+#
+#	(c) 2023 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	A single timer thread for many deadlines
+#
+
+"""	This module provides a timer that handles many deadlines with a single thread.
+"""
+
+from __future__ import annotations
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+import heapq, itertools
+from datetime import datetime, timezone
+from threading import Condition, Thread, current_thread
+
+
+def _utcTime() -> float:
+	"""	Return the current time's timestamp, but relative to UTC.
+
+		Return:
+			Float with the current UTC-based POSIX timestamp.
+	"""
+	return datetime.now(tz = timezone.utc).timestamp()
+
+
+class DeadlineTimer(object):
+	"""	A single timer thread that is shared by many deadlines.
+
+		The deadlines are kept in a heap. Cancelled or rescheduled deadlines are not removed from the heap,
+		but the callback must check whether an entry is outdated when it becomes due.
+
+		Attributes:
+			callback: The function that is called with the key and the deadline of an expired entry.
+			errorCallback: Optional function that is called with the key and the exception when the *callback* raises an exception.
+			name: Name of the timer thread.
+			heap: The heap of (deadline, sequence number, key) entries.
+			condition: The condition to wait for the next deadline or new entries.
+			thread: The timer thread.
+			running: Indicates whether the timer is running.
+	"""
+
+	__slots__ = (
+		'callback',
+		'errorCallback',
+		'name',
+		'heap',
+		'condition',
+		'thread',
+		'running',
+		'_sequence',
+	)
+	"""	Slots of the class. """
+
+
+	def __init__(self, callback:Callable[[Any, float], None],
+					   name:str,
+					   errorCallback:Optional[Callable[[Any, Exception], None]] = None) -> None:
+		"""	Initialization of the timer.
+
+			Args:
+				callback: The function that is called with the key and the deadline of an expired entry.
+				name: Name of the timer thread.
+				errorCallback: Optional function that is called with the key and the exception when the *callback* raises an exception.
+		"""
+		self.callback = callback
+		self.errorCallback = errorCallback
+		self.name = name
+		self.heap:list[Tuple[float, int, Hashable]] = []
+		self.condition = Condition()
+		self.thread:Optional[Thread] = None
+		self.running = False
+		self._sequence = itertools.count()
+
+
+	def start(self) -> DeadlineTimer:
+		"""	Start the timer thread.
+
+			Return:
+				The DeadlineTimer instance.
+		"""
+		with self.condition:
+			if self.running:
+				return self
+			self.running = True
+		self.thread = Thread(target = self._run, name = self.name, daemon = True)
+		self.thread.start()
+		return self
+
+
+	def stop(self) -> None:
+		"""	Stop the timer thread and remove all deadlines.
+		"""
+		with self.condition:
+			self.running = False
+			self.heap.clear()
+			self.condition.notify()
+		if self.thread and self.thread is not current_thread():
+			self.thread.join(2.0)
+		self.thread = None
+
+
+	def clear(self) -> None:
+		"""	Remove all deadlines.
+		"""
+		with self.condition:
+			self.heap.clear()
+
+
+	def schedule(self, key:Hashable, deadline:float) -> None:
+		"""	Add a deadline.
+
+			Args:
+				key: The key that is passed to the callback.
+				deadline: The UTC-based POSIX timestamp of the deadline.
+		"""
+		with self.condition:
+			heapq.heappush(self.heap, (deadline, next(self._sequence), key))
+			if self.heap[0][0] == deadline:	# Wake up the timer thread only if the new deadline is the next one
+				self.condition.notify()
+
+
+	def __len__(self) -> int:
+		"""	Return the number of scheduled deadlines, including outdated ones.
+
+			Return:
+				The number of entries in the heap.
+		"""
+		return len(self.heap)
+
+
+	def _run(self) -> None:
+		"""	The timer thread. Wait for the next deadline and call the callback for all expired entries.
+		"""
+		while True:
+			with self.condition:
+				while self.running and (not self.heap or self.heap[0][0] > (now := _utcTime())):
+					self.condition.wait(self.heap[0][0] - now if self.heap else None)
+				if not self.running:
+					return
+				deadline, _, key = heapq.heappop(self.heap)
+			try:
+				self.callback(key, deadline)
+			except Exception as e:
+				if self.errorCallback:
+					self.errorCallback(key, e)
@@ -8,19 +8,46 @@
 #
 
 """	Generic event and event handling classes and functions. 
+
+	Event handlers are registered with a `HandlerMode` that determines how they are called when an event is raised:
+
+	- *inline* handlers are lightweight and called synchronously in the thread that raises the event.
+	- *counter* handlers are only interested in the number of occurrences. Occurrences are coalesced and delivered
+	  periodically as a count by the event dispatch thread.
+	- *dispatch* handlers are called by the single event dispatch thread. The events are queued in a bounded queue.
+	- *job* handlers may block for a longer time and are called in a separate job of the thread pool.
 """
 
 from __future__ import annotations
 
-from typing import Any, Callable, Optional, cast
+from typing import Any, Callable, Optional, Tuple, Dict, cast
+
+import logging, traceback, itertools
+from collections import deque
+from enum import IntEnum, auto
+from threading import Thread, Condition, Lock
+from time import perf_counter
 
-from ..helpers.BackgroundWorker import BackgroundWorkerPool
+from ..helpers.BackgroundWorker import BackgroundWorkerPool, BackgroundWorker
 
 # TODO: create/delete each resource to count! resourceCreate(ty)
 
 # TODO move event creations from here to the resp modules.
 
 
+class HandlerMode(IntEnum):
+	"""	The ways how an event handler is called.
+	"""
+	inline		= auto()
+	"""	Call the handler synchronously in the thread that raises the event. """
+	counter		= auto()
+	"""	Coalesce the occurrences of the event and call the handler periodically with the number of occurrences. """
+	dispatch	= auto()
+	"""	Call the handler in the event dispatch thread. """
+	job			= auto()
+	"""	Call the handler in a separate job. """
+
+
 #########################################################################
 #
 #	Event class.
@@ -31,16 +58,16 @@ class Event(list):	# type:ignore[type-arg]
 	"""Event subscription.
 
 	A list of callable methods. Calling an instance of Event will cause a
-	call to each function in the list in ascending order by index. 
-	It supports all methods from its base class (list), so use append() and remove()
-	to add and remove functions.
+	call to each function in the list. 
+	It supports all methods from its base class (list), but handlers should be added and removed
+	with `addHandler()` and `removeHandler()` so that their `HandlerMode` is taken into account.
 
 	An event is raised by calling the event: anEvent(anArgument). It may have an
 	arbitrary number of arguments which are passed to the functions.
 
-	The function will be called in a separate thread in order to prevent waiting
-	for the returns. This might lead to some race conditions, so the synchronizations
-	must be done inside the functions.
+	Depending on their `HandlerMode` the functions are called inline, in the event dispatch thread,
+	in a separate job, or periodically with the number of occurrences. This might lead to some race 
+	conditions, so the synchronizations must be done inside the functions.
 
 	Attention: 
 		Since the parent class is a *list* calling *isInstance(obj, list)* will return True.
@@ -50,6 +77,17 @@ class Event(list):	# type:ignore[type-arg]
 		'runInBackground',
 		'manager',
 		'name',
+		'modes',
+		'inlineHandlers',
+		'counterHandlers',
+		'dispatchHandlers',
+		'jobHandlers',
+		'raised',
+		'backlog',
+		'overflows',
+		'latencies',
+		'_occurrences',
+		'_flushes',
 	)
 	"""	Slots of the Event class. """
 
@@ -59,52 +97,132 @@ class Event(list):	# type:ignore[type-arg]
 		"""	Event initialization.
 
 			Args:
-				runInBackground: Indicator whether an event should be handled in a separate thread.
+				runInBackground: Indicator whether the handlers of an event are by default called in the event dispatch thread.
 				manager: The responsible `EventManager` to handle an event.
 				name: The event name.
 		"""
 		self.runInBackground = runInBackground
-		"""	Indicator whether an event should be handled in a separate thread. """
+		"""	Indicator whether the handlers of an event are by default called in the event dispatch thread. """
 		self.manager = manager
 		"""	The responsible `EventManager` to handle an event. """
 		self.name = name
 		"""	The event name. """
+		self.modes:Dict[Callable, HandlerMode] = {}
+		"""	The `HandlerMode` of each handler. """
+		self.inlineHandlers:list[Callable] = []
+		"""	Handlers that are called inline. """
+		self.counterHandlers:list[Callable] = []
+		"""	Handlers that are called with the number of occurrences. """
+		self.dispatchHandlers:list[Callable] = []
+		"""	Handlers that are called in the event dispatch thread. """
+		self.jobHandlers:list[Callable] = []
+		"""	Handlers that are called in a separate job. """
+		self.raised = 0
+		"""	Number of times the event was raised, as of the last coalescing of the occurrences. """
+		self.backlog = 0
+		"""	Number of occurrences of the event that are waiting in the event dispatch queue. """
+		self.overflows = 0
+		"""	Number of occurrences that were handled in a separate job because the event dispatch queue was full. """
+		self.latencies:deque[float] = deque(maxlen = 1000)
+		"""	The latest latencies (in seconds) between raising the event and finishing its handlers. """
+		self._occurrences = itertools.count()
+		"""	Counter of the occurrences. *next()* on it is atomic, so no lock is needed when raising an event. """
+		self._flushes = 0
+		"""	Number of values taken from the occurrences counter by `takeOccurrences()`. """
 
 
 	def __call__(self, *args:Any, **kwargs:Any) -> None:
 		"""	Handle calling an event instance. This call is forwarded to **all** of the registered
-			callback functions for this event. 
-			
-			If the event was created with `runInBackground` as True,
-			then the callbacks are called sequentially (not individually!) as a thread.
+			callback functions for this event, depending on their `HandlerMode`.
 
 			Args:
 				args: Unnamed function arguments.
 				kwargs: Keyword function arguments.
 		"""
-
-		def _runner(name:str, *args:Any, **kwargs:Any) -> None:
-			"""	Call all registered function for this event object. Pass on any argument.
-	
-				Args:
-					args: Unnamed function arguments.
-					kwargs: Keyword function arguments.
-			"""
-			for function in self:
-				# if self.runInBackground:
-				# 	x = BackgroundWorkerPool.runJob(lambda name = name, args = args, kwargs = kwargs: function(name, *args, **kwargs))
-				# else:
-				# 	function(name, *args, **kwargs)
-				function(name, *args, **kwargs)
-
 		if not self.manager._running:
 			return
-		if self.runInBackground:
-			# Call the handlers in a thread so that we don't block everything
-			BackgroundWorkerPool.runJob(lambda args = args, kwargs = kwargs: _runner(self.name, *args, **kwargs), name = self.name)
-		else:
-			_runner(self.name, *args, **kwargs)
-		# _runner(self.name, *args, **kwargs)
+		next(self._occurrences)
+		if self.inlineHandlers:
+			self.runHandlers(self.inlineHandlers, args, kwargs, perf_counter())
+		if self.dispatchHandlers:
+			self.manager._enqueue(self, args, kwargs)
+		if (handlers := self.jobHandlers):
+			ts = perf_counter()
+			BackgroundWorkerPool.runJob(lambda: self.runHandlers(handlers, args, kwargs, ts), name = self.name)
+
+
+	def runHandlers(self, handlers:list[Callable], args:Tuple[Any, ...], kwargs:Dict[str, Any], ts:float) -> None:
+		"""	Call a list of handlers and record the latency of the event.
+
+			Exceptions of the handlers are logged and do not prevent calling the other handlers.
+
+			Args:
+				handlers: The handlers to call.
+				args: Unnamed function arguments.
+				kwargs: Keyword function arguments.
+				ts: The *perf_counter()* timestamp when the event was raised.
+		"""
+		for function in handlers:
+			try:
+				function(self.name, *args, **kwargs)
+			except Exception as e:
+				if BackgroundWorker._logger:
+					BackgroundWorker._logger(logging.ERROR, f'Event "{self.name}" exception during handler: {str(e)}\n{"".join(traceback.format_exception(type(e), value = e, tb = e.__traceback__))}')
+		self.latencies.append(perf_counter() - ts)
+
+
+	def takeOccurrences(self) -> int:
+		"""	Return the number of occurrences of the event since the last call of this method.
+
+			This method must not be called concurrently. The `EventManager` serializes the calls.
+
+			Return:
+				Number of occurrences.
+		"""
+		# Each call takes one value from the counter, so subtract the number of previous calls
+		raised = next(self._occurrences) - self._flushes
+		self._flushes += 1
+		count = raised - self.raised
+		self.raised = raised
+		return count
+
+
+	def addHandler(self, func:Callable, mode:Optional[HandlerMode] = None) -> None:
+		"""	Add a handler to the event.
+
+			Args:
+				func: The function callback to call when the event is raised.
+				mode: The `HandlerMode` of the handler. If *None* then the handler is called in the event dispatch thread
+					for events that run in the background, or inline otherwise.
+		"""
+		if mode is None:
+			mode = HandlerMode.dispatch if self.runInBackground else HandlerMode.inline
+		self.append(func)
+		self.modes[func] = mode
+		self._assignHandlers()
+
+
+	def removeHandler(self, func:Callable) -> None:
+		"""	Remove a handler from the event.
+
+			Args:
+				func: The function callback to remove.
+		"""
+		self.remove(func)
+		if func not in self:
+			self.modes.pop(func, None)
+		self._assignHandlers()
+
+
+	def _assignHandlers(self) -> None:
+		"""	Rebuild the handler lists for the different handler modes.
+
+			New lists are assigned, so that a list taken during raising an event is not changed.
+		"""
+		self.inlineHandlers = [ f for f in self if self.modes.get(f) == HandlerMode.inline ]
+		self.counterHandlers = [ f for f in self if self.modes.get(f) == HandlerMode.counter ]
+		self.dispatchHandlers = [ f for f in self if self.modes.get(f) == HandlerMode.dispatch ]
+		self.jobHandlers = [ f for f in self if self.modes.get(f) == HandlerMode.job ]
 
 
 	def __repr__(self) -> str:
@@ -121,6 +239,9 @@ class EventManager(object):
 	"""	Event topics are added as new methods to an *EventManager* instance. 
 		Events can be raised by calling those new methods.
 
+		The manager runs a single event dispatch thread. It calls the *dispatch* handlers of the queued events,
+		and periodically delivers the coalesced occurrences to the *counter* handlers.
+
 		Example:
 			manager.addEvent("anEvent")
 				Add new `Event` topic *anEvent* to *manager*.
@@ -134,26 +255,64 @@ class EventManager(object):
 
 	__slots__ = (
 		'_running',
+		'maxQueueSize',
+		'flushInterval',
+		'_queue',
+		'_queueCondition',
+		'_flushLock',
+		'_dispatchThread',
 	)
 	"""	Slots of the EventManager class. """
 
 
 	def __init__(self) -> None:
-		"""	EventManager initialization.
+		"""	EventManager initialization. This also starts the event dispatch thread.
 		"""
 		self._running = True
 		"""	Internal Running indicator for the manager instance. """
+		self.maxQueueSize = 10000
+		"""	Maximum number of queued events for the event dispatch thread. """
+		self.flushInterval = 1.0
+		"""	Interval in seconds in which the coalesced occurrences are delivered to the *counter* handlers. """
+		self._queue:deque[Tuple[Event, Tuple[Any, ...], Dict[str, Any], float]] = deque()
+		"""	The queue of the event dispatch thread. """
+		self._queueCondition = Condition()
+		"""	Condition to wake up the event dispatch thread. """
+		self._flushLock = Lock()
+		"""	Lock to serialize the delivery of coalesced occurrences. """
+		self._dispatchThread = Thread(target = self._runDispatcher, name = 'eventDispatcher', daemon = True)
+		"""	The event dispatch thread. """
+		self._dispatchThread.start()
 
 
 	def shutdown(self) -> bool:
-		"""	Shutdown the Event Manager.
+		"""	Shutdown the Event Manager. Remaining coalesced occurrences are delivered, 
+			and the event dispatch thread is stopped.
 		
 			Return:
 				*True* when shutdown is complete.
 		"""
+		self.flushCounters()
 		self._running = False
+		with self._queueCondition:
+			self._queue.clear()
+			self._queueCondition.notify()
+		self._dispatchThread.join(2.0)
 		return True
 
+
+	def setDispatchLimits(self, maxQueueSize:int, flushInterval:float) -> None:
+		"""	Set the limits of the event dispatch thread.
+
+			Args:
+				maxQueueSize: Maximum number of queued events. If the queue is full then the handlers are called in a separate job.
+				flushInterval: Interval in seconds in which the coalesced occurrences are delivered to the *counter* handlers.
+		"""
+		with self._queueCondition:
+			self.maxQueueSize = maxQueueSize
+			self.flushInterval = flushInterval
+			self._queueCondition.notify()
+
 	#########################################################################
 
 	def addEvent(self, name:str, runInBackground:Optional[bool] = True) -> Event:
@@ -161,7 +320,7 @@ class EventManager(object):
 
 			Args:
 				name: Name of the `Event`.
-				runInBackground: (optional, default = True) Execute the callbacks in a thread.
+				runInBackground: (optional, default = True) Call the handlers by default in the event dispatch thread.
 			
 			Return:
 				The created `Event`.
@@ -200,14 +359,26 @@ class EventManager(object):
 		return name in self.__dict__
 
 
-	def addHandler(self, event:Event|list[Event], func:Callable) -> None:		# type:ignore[type-arg]
+	def events(self) -> list[Event]:
+		"""	Return all registered `Event` instances.
+
+			Return:
+				List of `Event` instances.
+		"""
+		return [ e for e in list(vars(self).values()) if isinstance(e, Event) ]
+
+
+	def addHandler(self, event:Event|list[Event], func:Callable, mode:Optional[HandlerMode] = None) -> None:		# type:ignore[type-arg]
 		"""	Add a new event handler to an `Event` or to a list of `Event` instance.
 
 			Args:
 				event: Either a single `Event` instance or a list of `Event` instances.
-				func: The function callback to call when the event is raised.
+				func: The function callback to call when the event is raised. *counter* handlers are called
+					with the event name and the number of occurrences as arguments.
+				mode: The `HandlerMode` of the handler. If *None* then the handler is called in the event dispatch thread
+					for events that run in the background, or inline otherwise.
 		"""
-		list(map(lambda e: e.append(func), [event] if isinstance(event, Event) else event))
+		list(map(lambda e: e.addHandler(func, mode), [event] if isinstance(event, Event) else event))
 	
 
 	def hasHandler(self, event:Event|list[Event], func:Callable) -> bool:
@@ -230,4 +401,114 @@ class EventManager(object):
 				event: Either a single `Event` or a list of `Event` instances.
 				func: The function callback to remove from the `Event` instance(s).
 		"""
-		list(map(lambda e: e.remove(func), [event] if isinstance(event, Event) else event))
+		list(map(lambda e: e.removeHandler(func), [event] if isinstance(event, Event) else event))
+
+
+	#########################################################################
+	#
+	#	Event dispatching
+	#
+
+	def _enqueue(self, event:Event, args:Tuple[Any, ...], kwargs:Dict[str, Any]) -> None:
+		"""	Queue an event for the event dispatch thread.
+
+			If the queue is full then the *dispatch* handlers are called in a separate job instead, 
+			so that no event is lost.
+
+			Args:
+				event: The raised `Event`.
+				args: Unnamed function arguments.
+				kwargs: Keyword function arguments.
+		"""
+		ts = perf_counter()
+		with self._queueCondition:
+			if len(self._queue) < self.maxQueueSize:
+				self._queue.append((event, args, kwargs, ts))
+				event.backlog += 1
+				self._queueCondition.notify()
+				return
+			event.overflows += 1
+		handlers = event.dispatchHandlers
+		BackgroundWorkerPool.runJob(lambda: event.runHandlers(handlers, args, kwargs, ts), name = event.name)
+
+
+	def _runDispatcher(self) -> None:
+		"""	Run the event dispatch thread. It calls the *dispatch* handlers of the queued events, and
+			delivers the coalesced occurrences to the *counter* handlers every *flushInterval* seconds.
+		"""
+		nextFlush = perf_counter() + self.flushInterval
+		while True:
+			with self._queueCondition:
+				while self._running and not self._queue and (timeout := nextFlush - perf_counter()) > 0:
+					self._queueCondition.wait(timeout)
+				if not self._running:
+					return
+				if self._queue:
+					event, args, kwargs, ts = self._queue.popleft()
+					event.backlog -= 1
+				else:
+					event = None
+			if event:
+				event.runHandlers(event.dispatchHandlers, args, kwargs, ts)
+			if perf_counter() >= nextFlush:
+				self.flushCounters()
+				nextFlush = perf_counter() + self.flushInterval
+
+
+	def flushCounters(self) -> None:
+		"""	Deliver the coalesced occurrences of all events to their *counter* handlers.
+
+			This is done periodically by the event dispatch thread, but may also be called to get up-to-date counts.
+		"""
+		with self._flushLock:
+			for event in self.events():
+				if not event.counterHandlers:
+					continue
+				if (count := event.takeOccurrences()) > 0:
+					for function in event.counterHandlers:
+						try:
+							function(event.name, count)
+						except Exception as e:
+							if BackgroundWorker._logger:
+								BackgroundWorker._logger(logging.ERROR, f'Event "{event.name}" exception during counter handler: {str(e)}\n{"".join(traceback.format_exception(type(e), value = e, tb = e.__traceback__))}')
+
+
+	#########################################################################
+	#
+	#	Metrics
+	#
+
+	def getEventStatistics(self) -> Dict[str, Dict[str, Any]]:
+		"""	Return metrics for all events that have handlers.
+
+			Return:
+				Dictionary with the event names as keys. Each value is a dictionary with the number of times
+				the event was *raised*, the current *backlog* in the dispatch queue, the number of *overflows* 
+				of the dispatch queue, and the *latencyAvg* and *latencyP99* (in seconds) of the latest handler calls.
+		"""
+		self.flushCounters()	# This updates the events with counter handlers
+		with self._flushLock:
+			result:Dict[str, Dict[str, Any]] = {}
+			for event in self.events():
+				if not len(event):
+					continue
+				if not event.counterHandlers:
+					event.takeOccurrences()
+				latencies = sorted(event.latencies)
+				result[event.name] = {
+					'raised':		event.raised,
+					'backlog':		event.backlog,
+					'overflows':	event.overflows,
+					'latencyAvg':	sum(latencies) / len(latencies) if latencies else 0.0,
+					'latencyP99':	latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] if latencies else 0.0,
+				}
+		return result
+
+
+	def getQueueSize(self) -> int:
+		"""	Return the number of events that are waiting in the dispatch queue.
+
+			Return:
+				Number of queued events.
+		"""
+		return len(self._queue)
@@ -11,12 +11,13 @@
 from __future__ import annotations
 from typing import Callable, Any, Tuple, Optional
 
-import ssl, time
+import ssl, time, itertools
+from threading import Event
 from dataclasses import dataclass
 import logging
 
 from ..helpers.BackgroundWorker import BackgroundWorkerPool, BackgroundWorker
-from ..helpers.TextTools import simpleMatch
+from ..helpers.OrderedDispatcher import OrderedDispatcher
 
 import paho.mqtt.client as mqtt
 
@@ -34,6 +35,110 @@ class MQTTTopic:
 	""" The callback function for the topic. """
 	callbackArgs:dict 		= None
 	""" The callback arguments for the topic. """
+	inline:bool				= False
+	""" Whether the callback is called directly in the MQTT client's thread instead of a worker thread. """
+	rejectedCallback:MQTTCallback = None
+	""" Optional callback that is called in the MQTT client's thread when a message is rejected because the queue of received messages is full. """
+
+
+class MQTTTopicTrie(object):
+	"""	Subscribed-to topic filters, compiled into a trie of topic levels. 
+	
+		Each node is a dictionary that maps a topic level, or the wildcards *+* and *#*, to the 
+		node of the next level. The special key *None* marks the end of a topic filter and holds a 
+		tuple (sequence number, value). When several topic filters match a topic then the value 
+		of the earliest added topic filter is returned.
+
+		Attributes:
+			root: The root node of the trie.
+	"""
+
+	__slots__ = (
+		'root',
+		'_sequence',
+	)
+	"""	Slots of the class. """
+
+
+	def __init__(self) -> None:
+		"""	Initialize an empty trie.
+		"""
+		self.root:dict = {}
+		self._sequence = itertools.count()
+
+
+	def add(self, topicFilter:str, value:Any) -> None:
+		"""	Add a topic filter.
+
+			Args:
+				topicFilter: The topic filter, which may contain the wildcards *+* and *#*.
+				value: The value that is returned for a matching topic.
+		"""
+		node = self.root
+		for level in topicFilter.split('/'):
+			node = node.setdefault(level, {})
+		node[None] = (next(self._sequence), value)
+
+
+	def remove(self, topicFilter:str) -> None:
+		"""	Remove a topic filter, and the nodes that are not needed anymore.
+
+			Args:
+				topicFilter: The topic filter to remove.
+		"""
+		path = [ self.root ]
+		levels = topicFilter.split('/')
+		for level in levels:
+			if (node := path[-1].get(level)) is None:
+				return
+			path.append(node)
+		path[-1].pop(None, None)
+		for level in reversed(levels):
+			if path.pop():
+				break
+			del path[-1][level]
+
+
+	def clear(self) -> None:
+		"""	Remove all topic filters.
+		"""
+		self.root = {}
+
+
+	def match(self, topic:str) -> Optional[Any]:
+		"""	Find the value of the topic filter that matches a topic.
+
+			Args:
+				topic: The topic of a received message.
+
+			Return:
+				The value of the earliest added matching topic filter, or None if no topic filter matches.
+		"""
+		found:Tuple[int, Any] = None
+
+		def _found(node:dict) -> None:
+			nonlocal found
+			if (entry := node.get(None)) and (found is None or entry[0] < found[0]):
+				found = entry
+
+		nodes = [ self.root ]
+		for level in topic.split('/'):
+			nextNodes = []
+			for node in nodes:
+				if (n := node.get('#')) is not None:	# multi-level wildcard matches the rest of the topic
+					_found(n)
+				if (n := node.get(level)) is not None:
+					nextNodes.append(n)
+				if (n := node.get('+')) is not None:	# single-level wildcard
+					nextNodes.append(n)
+			if not (nodes := nextNodes):
+				break
+		else:
+			for node in nodes:
+				_found(node)
+				if (n := node.get('#')) is not None:	# multi-level wildcard also matches the parent level
+					_found(n)
+		return found[1] if found else None
 
 
 class MQTTHandler(object):
@@ -158,11 +263,17 @@ class MQTTConnection(object):
 		'lowLevelLogging',
 		'isStopped',
 		'isConnected',
+		'connectedEvent',
 		'subscribedCount',
 		'mqttClient',
 		'messageHandler',
 		'actor',
 		'subscribedTopics',
+		'topicRouter',
+		'dispatcher',
+		'qos',
+		'maxInflightMessages',
+		'maxQueuedMessages',
 	)
 	"""	Slots of the class. """
 
@@ -183,7 +294,12 @@ class MQTTConnection(object):
 					   certfile:str = None, 
 					   keyfile: str = None,
 					   lowLevelLogging:bool = True,
-					   messageHandler:MQTTHandler = None
+					   messageHandler:MQTTHandler = None,
+					   workerPoolSize:int = 10,
+					   maxQueueSize:int = 1000,
+					   qos:int = 0,
+					   maxInflightMessages:int = 20,
+					   maxQueuedMessages:int = 0
 				) -> None:
 		"""	Constructor. Initialize the MQTT client.
 
@@ -202,6 +318,11 @@ class MQTTConnection(object):
 				keyfile: The key file for the MQTT client.
 				lowLevelLogging: Indicator whether to log MQTT messages.
 				messageHandler: The message handler.
+				workerPoolSize: The number of threads that handle received messages.
+				maxQueueSize: The maximum number of received messages that wait to be handled.
+				qos: The default QoS for published messages.
+				maxInflightMessages: The maximum number of published QoS 1 and 2 messages that are not yet acknowledged by the broker.
+				maxQueuedMessages: The maximum number of messages that wait to be sent. 0 means unlimited.
 		"""
 		
 		self.address								= address
@@ -235,6 +356,8 @@ class MQTTConnection(object):
 		""" Indicator whether the MQTT client is stopped."""
 		self.isConnected							= False
 		""" Indicator whether the MQTT client is connected."""
+		self.connectedEvent							= Event()
+		""" Event that is set while the MQTT client is connected. """
 		self.subscribedCount 						= 0
 		""" The number of subscribed-to topics. """
 
@@ -247,6 +370,19 @@ class MQTTConnection(object):
 		""" The actor for the MQTT client. """
 		self.subscribedTopics:dict[str, MQTTTopic]	= {}
 		""" The list of subscribed-to topics. """
+		self.topicRouter							= MQTTTopicTrie()
+		""" The subscribed-to topics, compiled for matching received messages. """
+		self.dispatcher								= OrderedDispatcher(name = 'MQTTMessage', 
+																		poolSize = workerPoolSize, 
+																		maxQueueSize = maxQueueSize,
+																		errorCallback = self._onHandlerError)
+		""" The worker threads that handle received messages. Messages with the same topic are handled in order. """
+		self.qos									= qos
+		""" The default QoS for published messages. """
+		self.maxInflightMessages					= maxInflightMessages
+		""" The maximum number of published QoS 1 and 2 messages that are not yet acknowledged by the broker. """
+		self.maxQueuedMessages						= maxQueuedMessages
+		""" The maximum number of messages that wait to be sent. 0 means unlimited. """
 
 	
 	def shutdown(self) -> bool:
@@ -268,6 +404,7 @@ class MQTTConnection(object):
 			# Then disconnect. The actor is stoped implicitly
 			self.mqttClient.disconnect()
 			self.actor = None
+		self.dispatcher.stop()
 
 		self.messageHandler and self.messageHandler.logging(self.mqttClient, logging.INFO, 'MQTT client shut down')
 		return True
@@ -302,6 +439,10 @@ class MQTTConnection(object):
 		self.mqttClient.on_unsubscribe	= self._onUnsubscribe
 		self.mqttClient.on_message		= self._onMessage
 
+		# Tune the window of unacknowledged messages and the queue of outgoing messages
+		self.mqttClient.max_inflight_messages_set(self.maxInflightMessages)
+		self.mqttClient.max_queued_messages_set(self.maxQueuedMessages)
+
 		try:
 			self.messageHandler and self.messageHandler.logging(self.mqttClient, logging.DEBUG, f'MQTT: connecting to host:{self.address}, port:{self.port}, keepalive: {self.keepalive}, bind: {self.bindIF}')
 			self.mqttClient.connect(host = self.address, port = self.port, keepalive = self.keepalive, bind_address = self.bindIF)
@@ -311,7 +452,8 @@ class MQTTConnection(object):
 				self.messageHandler.onError(self, -1)
 				return
 
-		# Actually start the actor to run the MQTT client as a thread
+		# Start the worker threads for received messages, and actually start the actor to run the MQTT client as a thread
+		self.dispatcher.start()
 		self.actor = BackgroundWorkerPool.newActor(self._mqttActor, name='MQTTClient').start()
 
 
@@ -346,9 +488,11 @@ class MQTTConnection(object):
 		self.messageHandler and self.messageHandler.logging(self, logging.DEBUG, f'MQTT: Connected with result code: {rc} ({mqtt.error_string(rc)})')
 		if rc == 0:
 			self.isConnected = True
+			self.connectedEvent.set()
 			self.messageHandler and self.messageHandler.onConnect(self)
 		else:
 			self.isConnected = False
+			self.connectedEvent.clear()
 			if self.messageHandler:
 				self.messageHandler.logging(self, logging.ERROR, f'MQTT: Cannot connect to broker. Result code: {rc} ({mqtt.error_string(rc)})')
 				self.messageHandler.onError(self, rc)
@@ -364,6 +508,8 @@ class MQTTConnection(object):
 		"""
 		self.messageHandler and self.messageHandler.logging(self, logging.DEBUG, f'MQTT: Disconnected with result code: {rc} ({mqtt.error_string(rc)})')
 		self.subscribedTopics.clear()
+		self.topicRouter.clear()
+		self.connectedEvent.clear()
 
 		match rc:
 			case 0:
@@ -429,13 +575,19 @@ class MQTTConnection(object):
 		for t in self.subscribedTopics.values():
 			if t.mid == mid:
 				del self.subscribedTopics[t.topic]
+				self.topicRouter.remove(t.topic)
 				self.messageHandler and self.messageHandler.onUnsubscribed(self, t.topic)
 				break
 
 
 	def _onMessage(self, client:mqtt.Client, userdata:Any, message:mqtt.MQTTMessage) -> None:
 		"""	Handle a received message. Forward it to the apropriate handler callback
-		 	(in another Thread).
+		 	(in a worker thread, or directly for *inline* topics).
+
+			Messages with the same topic, ie. from the same originator, are handled in the order they were received.
+
+			This method never blocks the MQTT client's thread. If the queue of received messages is full then
+			the message is rejected and the topic's *rejectedCallback* is called, if any.
 			 
 			Args:
 				client: The MQTT client.
@@ -443,29 +595,55 @@ class MQTTConnection(object):
 				message: The received message.
 		"""
 		self.lowLevelLogging and self.messageHandler and self.messageHandler.logging(self, logging.DEBUG, f'MQTT: received topic:{message.topic}, payload:{message.payload}')
-		for t in self.subscribedTopics.keys():
-			if simpleMatch(message.topic, t, star='#'):
-				if (topic := self.subscribedTopics[t]).callback:
-					# Run actual request handling in a thread
-					# For some reasons mid is not initialized in the on on_message callback, so we use the timestamp for the actor name
-					BackgroundWorkerPool.newActor(topic.callback, name=f'mid_{message.timestamp}').start(	connection=self,
-																											topic=message.topic,
-																											data=message.payload, 
-																											**topic.callbackArgs)
-					break	# break at first occurence
+		if (topic := self.topicRouter.match(message.topic)) and topic.callback:
+			if topic.inline:
+				try:
+					topic.callback(connection = self, topic = message.topic, data = message.payload, **topic.callbackArgs)
+				except Exception as e:
+					self._onHandlerError(message.topic, e)
+			else:
+				# Run actual request handling in a worker thread
+				if not self.dispatcher.dispatch(message.topic, 
+												topic.callback, 
+												connection = self, 
+												topic = message.topic, 
+												data = message.payload, 
+												**topic.callbackArgs):
+					self.messageHandler and self.messageHandler.logging(self, logging.WARNING, f'MQTT: message queue is full. Message rejected for topic: {message.topic}')
+					if topic.rejectedCallback:
+						try:
+							topic.rejectedCallback(connection = self, topic = message.topic, data = message.payload, **topic.callbackArgs)
+						except Exception as e:
+							self._onHandlerError(message.topic, e)
+
+
+	def _onHandlerError(self, topic:str, exception:Exception) -> None:
+		"""	Log an exception that was raised by a topic callback.
+
+			Args:
+				topic: The topic of the received message.
+				exception: The exception.
+		"""
+		self.messageHandler and self.messageHandler.logging(self, logging.ERROR, f'MQTT: error handling message for topic: {topic}: {exception}')
 
 
 	#
 	#	MQTT messaging methods
 	#
 
-	def subscribeTopic(self, topic:str|list[str], callback:Optional[MQTTCallback] = None, **kwargs:Any) -> None:
+	def subscribeTopic(self, topic:str|list[str], 
+							 callback:Optional[MQTTCallback] = None, 
+							 inline:Optional[bool] = False, 
+							 rejectedCallback:Optional[MQTTCallback] = None,
+							 **kwargs:Any) -> None:
 		"""	Add one or more MQTT topics to subscribe to. Add the topic(s) afterwards
 			to the list of subscribed-to topics.
 
 			Args:
 				topic: The topic(s) to subscribe to. Either a single topic or a list of topics.
 				callback: The callback function to call when a message is received for the topic.
+				inline: If True then the callback is called directly in the MQTT client's thread. This is meant for short callbacks, for example for responses, that must not wait behind other messages.
+				rejectedCallback: Optional callback that is called directly in the MQTT client's thread when a received message is rejected because the queue of received messages is full. It must not block.
 				kwargs: Additional arguments for the callback function.
 		"""
 		def _subscribe(topic:str) -> None:
@@ -475,8 +653,9 @@ class MQTTConnection(object):
 				self.messageHandler and self.messageHandler.logging(self.mqttClient, logging.WARNING, f'MQTT: topic already subscribed: {topic}')
 				return
 			if (r := self.mqttClient.subscribe(topic))[0] == 0:
-				t = MQTTTopic(topic = topic, mid=r[1], callback=callback, callbackArgs=kwargs)
+				t = MQTTTopic(topic = topic, mid=r[1], callback=callback, callbackArgs=kwargs, inline=inline, rejectedCallback=rejectedCallback)
 				self.subscribedTopics[topic] = t
+				self.topicRouter.add(topic, t)
 			else:
 				self.messageHandler and self.messageHandler.logging(self.mqttClient, logging.ERROR, f'MQTT: cannot subscribe: {r[0]}')
 
@@ -533,14 +712,33 @@ class MQTTConnection(object):
 		return self.subscribedCount == len(self.subscribedTopics)
 
 
-	def publish(self, topic:str, data:bytes) -> None:
+	def waitForConnection(self, timeout:float) -> bool:
+		"""	Wait until the MQTT client is connected to the broker.
+
+			Args:
+				timeout: The time in seconds to wait at most.
+
+			Return:
+				True if the client is connected, or False if the timeout was reached.
+		"""
+		return self.connectedEvent.wait(max(timeout, 0.0))
+
+
+	def publish(self, topic:str, data:bytes, qos:Optional[int] = None) -> bool:
 		"""	Publish the message *data* with the topic *topic* with the MQTT broker.
 		
 			Args:
 				topic: The topic to publish to.
 				data: The data to publish.
+				qos: The QoS for the message. If None then the connection's default QoS is used.
+
+			Return:
+				True if the message was sent or queued for sending, or False otherwise, for example when the queue of outgoing messages is full.
 		"""
-		self.mqttClient.publish(topic, data)
+		if (rc := self.mqttClient.publish(topic, data, qos = self.qos if qos is None else qos).rc) != mqtt.MQTT_ERR_SUCCESS:
+			self.messageHandler and self.messageHandler.logging(self.mqttClient, logging.ERROR, f'MQTT: cannot publish to topic: {topic}: {mqtt.error_string(rc)}')
+			return False
+		return True
 
 
 
@@ -80,6 +80,22 @@ def isTCPPortAvailable(port:int) -> bool:
 	return True
 
 
+def isUDPPortAvailable(port:int) -> bool:
+	"""	Check whether a UDP port is available.
+
+		Args:
+			port: The port to check.
+
+		Return:
+			True if *port* is available, or False otherwise."""
+	try:
+		with contextlib.closing(socket.socket(socket.AF_INET, socket.SOCK_DGRAM)) as s:
+			s.bind(('', port))
+	except OSError:
+		return False
+	return True
+
+
 def getIPAddress(hostname:Optional[str] = None) -> str:
 	"""	Lookup and return the IP address for a host name.
 	
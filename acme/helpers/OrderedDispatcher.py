@@ -0,0 +1,213 @@
+#
+#	OrderedDispatcher.py
+#
+#	(c) 2023 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	A fixed-size thread pool that preserves the order of tasks per key
+#
+
+"""	This module provides a fixed-size thread pool with a bounded queue. Tasks with the same key
+	are run in the order they were dispatched, and never concurrently.
+"""
+
+from __future__ import annotations
+from typing import Any, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+from collections import deque
+from threading import Condition, Thread, current_thread
+from time import perf_counter
+
+
+class OrderedDispatcher(object):
+	"""	A fixed number of worker threads that run dispatched tasks.
+
+		Tasks are queued per key. Only one worker at a time runs the tasks of a key, so tasks with the
+		same key are run in order. Tasks with different keys are run concurrently. After each task the
+		key is queued again behind the other waiting keys, so that a busy key doesn't starve the others.
+
+		The total number of queued tasks is bounded. When the queue is full then `dispatch()` doesn't
+		block, but rejects the task. The caller must then handle the task otherwise, for example by
+		answering a request with an error.
+
+		Attributes:
+			name: Name prefix of the worker threads.
+			poolSize: Number of worker threads.
+			maxQueueSize: Maximum number of queued tasks.
+			errorCallback: Optional function that is called with the key and the exception when a task raises an exception.
+			tasks: The queued tasks per key. A key stays in this dictionary while one of its tasks is running.
+			readyKeys: Keys with queued tasks that are not currently run by a worker.
+			condition: The condition to wait for ready keys, or for free space in the queue.
+			queued: The number of queued tasks, excluding the running ones.
+			workers: The worker threads.
+			running: Indicates whether the dispatcher is running.
+			generation: Incremented with every start, so that workers of an earlier start stop.
+			latencies: The latest latencies from dispatching to finishing a task, in seconds.
+			handled: Number of finished tasks.
+			maxQueued: The highest number of queued tasks so far.
+			rejected: Number of tasks that were rejected because the queue was full.
+	"""
+
+	__slots__ = (
+		'name',
+		'poolSize',
+		'maxQueueSize',
+		'errorCallback',
+		'tasks',
+		'readyKeys',
+		'condition',
+		'queued',
+		'workers',
+		'running',
+		'generation',
+		'latencies',
+		'handled',
+		'maxQueued',
+		'rejected',
+	)
+	"""	Slots of the class. """
+
+
+	def __init__(self, name:str,
+					   poolSize:int,
+					   maxQueueSize:int,
+					   errorCallback:Optional[Callable[[Hashable, Exception], None]] = None) -> None:
+		"""	Initialization of the dispatcher.
+
+			Args:
+				name: Name prefix of the worker threads.
+				poolSize: Number of worker threads.
+				maxQueueSize: Maximum number of queued tasks.
+				errorCallback: Optional function that is called with the key and the exception when a task raises an exception.
+		"""
+		self.name = name
+		self.poolSize = poolSize
+		self.maxQueueSize = maxQueueSize
+		self.errorCallback = errorCallback
+		self.tasks:Dict[Hashable, Deque[Tuple[Callable, Dict[str, Any], float]]] = {}
+		self.readyKeys:Deque[Hashable] = deque()
+		self.condition = Condition()
+		self.queued = 0
+		self.workers:list[Thread] = []
+		self.running = False
+		self.generation = 0
+		self.latencies:Deque[float] = deque(maxlen = 1000)
+		self.handled = 0
+		self.maxQueued = 0
+		self.rejected = 0
+
+
+	def start(self) -> OrderedDispatcher:
+		"""	Start the worker threads.
+
+			Return:
+				The OrderedDispatcher instance.
+		"""
+		with self.condition:
+			if self.running:
+				return self
+			self.running = True
+			self.generation += 1
+			generation = self.generation
+		self.workers = [ Thread(target = self._run, args = (generation, ), name = f'{self.name}_{i}', daemon = True) for i in range(self.poolSize) ]
+		for w in self.workers:
+			w.start()
+		return self
+
+
+	def stop(self) -> None:
+		"""	Stop the worker threads and remove all queued tasks. Running tasks are finished, and
+			the worker threads are joined.
+
+			If this is called by a task then the worker thread that runs this task is not joined, but
+			it stops after the task has finished, even if the dispatcher is started again in the meantime.
+		"""
+		with self.condition:
+			self.running = False
+			self.tasks.clear()
+			self.readyKeys.clear()
+			self.queued = 0
+			self.condition.notify_all()
+		workers, self.workers = self.workers, []
+		for w in workers:
+			if w is not current_thread():
+				w.join()
+
+
+	def dispatch(self, key:Hashable, task:Callable, **kwargs:Any) -> bool:
+		"""	Queue a task. This never blocks. If the queue is full, or if the dispatcher is not running, 
+			then the task is rejected.
+
+			Args:
+				key: Tasks with the same key are run in order.
+				task: The function to call.
+				kwargs: Keyword arguments for the *task*.
+
+			Return:
+				True if the task was queued, False if it was rejected.
+		"""
+		ts = perf_counter()
+		with self.condition:
+			if not self.running:
+				return False
+			if self.queued >= self.maxQueueSize:
+				self.rejected += 1
+				return False
+			if (queue := self.tasks.get(key)) is None:
+				self.tasks[key] = deque([ (task, kwargs, ts) ])
+				self.readyKeys.append(key)
+			else:
+				queue.append((task, kwargs, ts))	# Already ready or running
+			self.queued += 1
+			self.maxQueued = max(self.maxQueued, self.queued)
+			self.condition.notify_all()
+		return True
+
+
+	def getStatistics(self) -> Dict[str, Any]:
+		"""	Return the current metrics of the dispatcher.
+
+			Return:
+				Dictionary with the number of currently and maximum queued tasks, the number of finished and rejected tasks,
+				and the 99th percentile of the latency from dispatching to finishing a task in seconds.
+		"""
+		with self.condition:
+			latencies = sorted(self.latencies)
+			return {
+				'queued': self.queued,
+				'maxQueued': self.maxQueued,
+				'handled': self.handled,
+				'rejected': self.rejected,
+				'latencyP99': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0,
+			}
+
+
+	def _run(self, generation:int) -> None:
+		"""	A worker thread. Take the next ready key and run its oldest task.
+
+			Args:
+				generation: The generation of the start that created this worker.
+		"""
+		while True:
+			with self.condition:
+				while self.running and self.generation == generation and not self.readyKeys:
+					self.condition.wait()
+				if not self.running or self.generation != generation:
+					return
+				key = self.readyKeys.popleft()
+				task, kwargs, ts = self.tasks[key].popleft()
+				self.queued -= 1
+			try:
+				task(**kwargs)
+			except Exception as e:
+				if self.errorCallback:
+					self.errorCallback(key, e)
+			with self.condition:
+				self.latencies.append(perf_counter() - ts)
+				self.handled += 1
+				if self.generation == generation and (queue := self.tasks.get(key)) is not None:	# may have been removed by stop()
+					if queue:
+						self.readyKeys.append(key)
+						self.condition.notify_all()
+					else:
+						del self.tasks[key]
@@ -0,0 +1,186 @@
+#
+#	SingleFlight.py
+#
+#	(c) 2023 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Coalescing of identical concurrent calls, with an optional short-lived result cache
+#
+
+"""	This module provides the coalescing of identical concurrent calls ("single-flight"),
+	and an optional short-lived cache for their results.
+"""
+
+from __future__ import annotations
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import time, copy
+from threading import Event, Lock
+
+
+class _Call(object):
+	"""	A call that is in progress.
+
+		Attributes:
+			done: Set when the call has finished.
+			value: The return value of the call.
+			exception: The exception raised by the call, or None.
+			cacheable: Whether the return value may be cached. Cleared when the key is invalidated during the call.
+	"""
+
+	__slots__ = (
+		'done',
+		'value',
+		'exception',
+		'cacheable',
+	)
+	"""	Slots of the class. """
+
+	def __init__(self) -> None:
+		self.done = Event()
+		self.value:Any = None
+		self.exception:Optional[BaseException] = None
+		self.cacheable = True
+
+
+class SingleFlight(object):
+	"""	Coalesce identical concurrent calls.
+
+		The first caller for a key runs the function. Further callers for the same key wait for that
+		call to finish and receive a deep copy of its return value, or a copy of its exception, instead
+		of running the function again.
+
+		Optionally, return values are cached for a short time. Callers for the same key then receive
+		a deep copy of the cached value until it expires.
+
+		Attributes:
+			maxCacheSize: Maximum number of cached values. The oldest values are removed first when this size is reached.
+			lock: Lock for the calls in progress and the cache.
+			calls: Calls in progress by key.
+			cache: Cached values by key. Each maps to a tuple (value, expiration time).
+	"""
+
+	__slots__ = (
+		'maxCacheSize',
+		'lock',
+		'calls',
+		'cache',
+	)
+	"""	Slots of the class. """
+
+
+	def __init__(self, maxCacheSize:int = 1000) -> None:
+		"""	Initialization of the single-flight object.
+
+			Args:
+				maxCacheSize: Maximum number of cached values.
+		"""
+		self.maxCacheSize = maxCacheSize
+		self.lock = Lock()
+		self.calls:Dict[Hashable, _Call] = {}
+		self.cache:Dict[Hashable, Tuple[Any, float]] = {}
+
+
+	def do(self, key:Hashable,
+				 function:Callable[[], Any],
+				 timeout:Optional[float] = None,
+				 cacheTTL:Optional[Callable[[Any], float]] = None) -> Tuple[Any, bool]:
+		"""	Run a function, or wait for a call of the function with the same key that is already in progress,
+			or return a cached value.
+
+			Args:
+				key: The key that identifies identical calls.
+				function: The function to call.
+				timeout: The maximum time in seconds to wait for a call in progress, or None to wait without a timeout.
+				cacheTTL: Optional function that returns for a return value the time in seconds to cache that value. A value <= 0 means not to cache it.
+
+			Return:
+				Tuple (return value, shared). *shared* is True if the value was returned by a call of another caller, or from the cache. A shared value is a deep copy that the caller may modify.
+
+			Raises:
+				TimeoutError: If a call in progress didn't finish within *timeout* seconds.
+				Exception: Any exception raised by the function is raised for all callers of the same call. Each waiting caller receives its own copy of the exception.
+		"""
+		with self.lock:
+			if (entry := self.cache.get(key)) is not None:
+				if entry[1] > time.monotonic():
+					return copy.deepcopy(entry[0]), True
+				del self.cache[key]
+			if (call := self.calls.get(key)) is None:
+				call = self.calls[key] = _Call()
+				leader = True
+			else:
+				leader = False
+
+		if not leader:
+			if not call.done.wait(timeout):
+				raise TimeoutError(f'call in progress did not finish within {timeout} seconds')
+			if call.exception:
+				raise _copyException(call.exception) from call.exception
+			return copy.deepcopy(call.value), True
+
+		try:
+			call.value = function()
+		except BaseException as e:
+			call.exception = e
+			raise
+		finally:
+			with self.lock:
+				del self.calls[key]
+				if not call.exception and call.cacheable and cacheTTL and (ttl := cacheTTL(call.value)) > 0:
+					if len(self.cache) >= self.maxCacheSize:
+						self._removeExpired()
+						while len(self.cache) >= self.maxCacheSize:
+							del self.cache[next(iter(self.cache))]		# Remove the oldest value
+					self.cache[key] = (copy.deepcopy(call.value), time.monotonic() + ttl)
+			call.done.set()
+		return call.value, False
+
+
+	def invalidate(self, predicate:Callable[[Hashable], bool]) -> None:
+		"""	Remove cached values. The return values of matching calls that are in progress are not cached.
+
+			Args:
+				predicate: Function that returns True for the keys whose values are removed.
+		"""
+		with self.lock:
+			for key in [ k for k in self.cache if predicate(k) ]:
+				del self.cache[key]
+			for key, call in self.calls.items():
+				if predicate(key):
+					call.cacheable = False
+
+
+	def clear(self) -> None:
+		"""	Remove all cached values. Calls in progress are not affected.
+		"""
+		with self.lock:
+			self.cache.clear()
+
+
+	def _removeExpired(self) -> None:
+		"""	Remove expired values from the cache. This must be called with the lock held.
+		"""
+		now = time.monotonic()
+		for key in [ k for k, v in self.cache.items() if v[1] <= now ]:
+			del self.cache[key]
+
+
+def _copyException(exception:BaseException) -> BaseException:
+	"""	Return a copy of an exception without its traceback. 
+	
+		The same exception instance must not be raised in several threads, because raising it modifies its traceback.
+
+		Args:
+			exception: The exception to copy.
+
+		Return:
+			The copied exception.
+	"""
+	try:
+		result = copy.copy(exception)
+	except Exception:
+		# The exception's constructor doesn't accept its arguments, so create it without calling the constructor
+		result = type(exception).__new__(type(exception), *exception.args)
+		result.__dict__.update(exception.__dict__)
+	return result.with_traceback(None)
@@ -114,16 +114,16 @@ class CRS(Resource):
 					self._deleteSubscriptions(originator)
 					raise
 	
-		# Start periodic window immediately if necessary
-		if self.twt == TimeWindowType.PERIODICWINDOW:
-			CSE.notification.startCRSPeriodicWindow(self.ri, self.tws, self._countSubscriptions(), self.eem)
-
 		# "nsi" will be added later during the first stat recording
 		
 		# Set twi default if not present
 		self.setAttribute('eem', EventEvaluationMode.ALL_EVENTS_PRESENT.value, False)
 
 		self.dbUpdate()
+
+		# Start periodic window immediately if necessary
+		if self.twt == TimeWindowType.PERIODICWINDOW:
+			CSE.notification.startCRSPeriodicWindow(self)
 	
 
 	def update(self, dct:Optional[JSON] = None, 
@@ -153,35 +153,26 @@ class CRS(Resource):
 		# Update the CRS for notifications
 		CSE.notification.updateCrossResourceSubscription(self, previousNus, originator)
 
+		super().update(dct, originator, doValidateAttributes = False)	# Was vaildated before
+
 		# Update TimeWindowType and TimeWindowSize
-		oldTwt = self.twt
-		newTwt = findXPath(dct, 'm2m:crs/twt')
-		newTws = findXPath(dct, 'm2m:crs/tws')
-
-		if newTwt is not None or newTws is not None:
-			if oldTwt == TimeWindowType.PERIODICWINDOW:
-				CSE.notification.stopCRSPeriodicWindow(self.ri)
-			else:
-				CSE.notification.stopCRSSlidingWindow(self.ri)
+		if findXPath(dct, 'm2m:crs/twt') is not None or findXPath(dct, 'm2m:crs/tws') is not None:
+			CSE.notification.stopCRSWindow(self.ri)
 			
-			# Start periodic window with new tws if given, and when twt is still periodic
+			# Start periodic window with the new tws and when twt is still periodic.
 			# Sliding window will be activated when first notification is received
-			if (newTwt is not None and newTwt == TimeWindowType.PERIODICWINDOW) or \
-			   (newTwt is None     and oldTwt == TimeWindowType.PERIODICWINDOW):
-				CSE.notification.startCRSPeriodicWindow(self.ri, self.tws if newTws is None else newTws, self._countSubscriptions())
-		
-		super().update(dct, originator, doValidateAttributes = False)	# Was vaildated before
+			if self.twt == TimeWindowType.PERIODICWINDOW:
+				CSE.notification.startCRSPeriodicWindow(self)
+		else:
+			# Update the cached attributes of a running window
+			CSE.notification.updateCRSWindow(self)
 	
 
 	@criticalResourceSection(state = 'deactivate')
 	def deactivate(self, originator:str) -> None:
 
 		# Deactivate time windows
-		match self.twt:
-			case TimeWindowType.PERIODICWINDOW:
-				CSE.notification.stopCRSPeriodicWindow(self.ri)
-			case TimeWindowType.SLIDINGWINDOW:
-				CSE.notification.stopCRSSlidingWindow(self.ri)
+		CSE.notification.stopCRSWindow(self.ri)
 
 		# Delete rrat and srat subscriptions
 		self._deleteSubscriptions(originator)
@@ -8,7 +8,7 @@
 #
 
 from __future__ import annotations
-from typing import cast, Optional
+from typing import Callable, cast, Optional
 
 from ..etc.Types import AttributePolicyDict, Operation, RequestType, ResourceTypes, JSON, CSERequest, Result
 from ..etc.ResponseStatusCodes import BAD_REQUEST, OPERATION_NOT_ALLOWED, INTERNAL_SERVER_ERROR, REQUEST_TIMEOUT
@@ -76,12 +76,17 @@ class PCH_PCU(VirtualResource):
 			L.isDebug and L.logDebug(f'Polling timeout: indefinite')
 
 		# Return the response or time out
-		try:
-			res = CSE.request.waitForPollingRequest(originator, None, timeout = ret, aggregate = self.getAggregate())
-		except REQUEST_TIMEOUT:
-			raise REQUEST_TIMEOUT(L.logWarn(f'Request Expiration Timestamp reached. No request queued for originator: {self.getOriginator()}'))
-		
-		return Result(rsc = ResponseStatusCode.OK, resource = res.resource, request = request, embeddedRequest = res.request)
+		def _pollingResult(wait:Callable[[], Result]) -> Result:
+			try:
+				res = wait()
+			except REQUEST_TIMEOUT:
+				raise REQUEST_TIMEOUT(L.logWarn(f'Request Expiration Timestamp reached. No request queued for originator: {self.getOriginator()}'))
+			if res.pending:		# Waiting asynchronously. Complete the result when the request is resumed
+				res.pending.wrap(_pollingResult)
+				return res
+			return Result(rsc = ResponseStatusCode.OK, resource = res.resource, request = request, embeddedRequest = res.request)
+
+		return _pollingResult(lambda: CSE.request.waitForPollingRequest(originator, None, timeout = ret, aggregate = self.getAggregate(), asyncWait = True))
 
 
 	def handleNotifyRequest(self, request:CSERequest, originator:str) -> None:
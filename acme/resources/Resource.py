@@ -250,8 +250,10 @@ class Resource(object):
 		# when the subresources are removed
 		CSE.notification.checkSubscriptions(self, NotificationEventType.resourceDelete)
 		
-		# Remove directChildResources. Don't do checks (e.g. subscriptions) for the sub-resources
-		CSE.dispatcher.deleteChildResources(self, originator, doDeleteCheck = False)
+		# Remove directChildResources. Don't do checks (e.g. subscriptions) for the sub-resources.
+		# Deletion notifications for removed subscriptions are sent asynchronously.
+		with CSE.notification.cascadedDeletion():
+			CSE.dispatcher.deleteChildResources(self, originator, doDeleteCheck = False)
 		
 		# Removal of a deleted resource from group(s) is done 
 		# asynchronously in GroupManager, triggered by an event.
@@ -74,8 +74,8 @@ class SCH(AnnounceableResource):
 		if _nco is not None and _nco == True and not C.networkCoordinationSupported:
 			raise NOT_IMPLEMENTED (L.logWarn(f'Network Coordinated Operation is not supported by this CSE'))
 
-		# Add the schedule to the schedules DB
-		CSE.storage.upsertSchedule(self)
+		# Add the schedule to the schedules DB and the schedule manager
+		CSE.schedule.addSchedule(self)
 
 		# TODO When <SoftwareCampaign> is supported
 		# c)The request shall be rejected with the "OPERATION_NOT_ALLOWED" Response Status Code if the target resource 
@@ -102,8 +102,8 @@ class SCH(AnnounceableResource):
 		
 		super().update(dct, originator, doValidateAttributes)
 
-		# Update the schedule in the schedules DB
-		CSE.storage.upsertSchedule(self)
+		# Update the schedule in the schedules DB and the schedule manager
+		CSE.schedule.addSchedule(self)
 	
 
 	def validate(self, originator: str | None = None, dct: JSON | None = None, parentResource: Resource | None = None) -> None:
@@ -123,6 +123,6 @@ class SCH(AnnounceableResource):
 		
 		super().deactivate(originator)
 
-		# Remove the schedule from the schedules DB
-		CSE.storage.removeSchedule(self)
+		# Remove the schedule from the schedules DB and the schedule manager
+		CSE.schedule.removeSchedule(self)
 
@@ -23,6 +23,7 @@ from ..services.Configuration import Configuration
 from ..services.Logging import Logging as L
 from ..resources.ACTR import ACTR
 from ..helpers.ResourceSemaphore import CriticalSection
+from ..helpers.EventManager import HandlerMode
 
 
 # TODO implement support for input attribute when the procedure is clear
@@ -53,8 +54,8 @@ class ActionManager(object):
 		# Add handler for configuration updates
 		CSE.event.addHandler(CSE.event.configUpdate, self.configUpdate)				# type: ignore
 
-		# Add handler for any resource change event
-		CSE.event.addHandler(CSE.event.changeResource, self.evaluateActions)	# type: ignore
+		# Add handler for any resource change event. Actions may send requests, so the evaluation runs in separate jobs
+		CSE.event.addHandler(CSE.event.changeResource, self.evaluateActions, HandlerMode.job)	# type: ignore
 
 		CSE.event.addHandler(CSE.event.cseReset, self.restart)		# type: ignore
 		L.isInfo and L.log('ActionManager initialized')
@@ -16,6 +16,7 @@ from typing import Optional, Tuple, List, cast, Any
 import time
 from ..etc.Utils import isSPRelative
 from ..helpers.TextTools import findXPath
+from ..helpers.EventManager import HandlerMode
 from ..etc.RequestUtils import createRawRequest
 from ..etc.Types import DesiredIdentifierResultType, ResourceTypes, JSON, Result, ResultContentType, CSERequest, FilterCriteria 
 from ..etc.Types import Operation 
@@ -52,8 +53,9 @@ class AnnouncementManager(object):
 	def __init__(self) -> None:
 		"""	Initialization of the announcement manager.
 		"""
-		CSE.event.addHandler(CSE.event.registeredToRegistrarCSE, self.handleRegisteredToRegistrarCSE)			# type: ignore
-		CSE.event.addHandler(CSE.event.registreeCSEHasRegistered, self.handleRegistreeCSEHasRegistered)			# type: ignore
+		# The handlers announce resources to other CSEs, so they run in separate jobs
+		CSE.event.addHandler(CSE.event.registeredToRegistrarCSE, self.handleRegisteredToRegistrarCSE, HandlerMode.job)			# type: ignore
+		CSE.event.addHandler(CSE.event.registreeCSEHasRegistered, self.handleRegistreeCSEHasRegistered, HandlerMode.job)			# type: ignore
 		
 		# Configuration values
 		self._assignConfig()
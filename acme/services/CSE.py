@@ -15,13 +15,15 @@
 from __future__ import annotations
 
 import atexit, argparse, sys
-from threading import Lock
+from threading import Lock, Event
 from typing import Dict, Any
 
 from ..helpers.BackgroundWorker import BackgroundWorkerPool
-from ..etc.DateUtils import waitFor
+from ..helpers.AsyncLoop import AsyncLoop
 from ..etc.Types import CSEStatus, CSEType, ContentSerializationType
+from ..etc.Serializers import getSerializers
 from ..services.ActionManager import ActionManager
+from ..services.CoAPServer import CoAPServer
 from ..services.Configuration import Configuration
 from ..services.Console import Console
 from ..services.Dispatcher import Dispatcher
@@ -35,6 +37,7 @@ from ..services.MQTTClient import MQTTClient
 from ..services.NotificationManager import NotificationManager
 from ..services.RegistrationManager import RegistrationManager
 from ..services.RemoteCSEManager import RemoteCSEManager
+from ..services.ScheduleManager import ScheduleManager
 from ..services.ScriptManager import ScriptManager
 from ..services.SecurityManager import SecurityManager
 from ..services.SemanticManager import SemanticManager
@@ -56,6 +59,12 @@ action:ActionManager							= None
 announce:AnnouncementManager					= None
 """	Runtime instance of the `AnnouncementManager`. """
 
+asyncLoop:AsyncLoop								= None
+"""	Runtime instance of the asyncio event loop, or *None* if the asyncio mode is disabled. """
+
+coapServer:CoAPServer							= None
+"""	Runtime instance of the `CoAPServer`. """
+
 console:Console									= None
 """ Runtime instance of the `Console`. """
 
@@ -92,6 +101,9 @@ remote:RemoteCSEManager							= None
 request:RequestManager							= None
 """	Runtime instance of the `RequestManager`. """
 
+schedule:ScheduleManager						= None
+"""	Runtime instance of the `ScheduleManager`. """
+
 script:ScriptManager							= None
 """	Runtime instance of the `ScriptManager`. """
 
@@ -181,6 +193,9 @@ _cseResetLock									= Lock()	# lock for resetting the CSE
 
 _cseStartupDelay:float							= 2.0		# delay for CSE startup
 
+_cseRunning										= Event()	# set when the CSE is running
+""" Internal event that is set when the CSE startup finished. """
+
 ##############################################################################
 
 
@@ -193,8 +208,8 @@ def startup(args:argparse.Namespace, **kwargs:Dict[str, Any]) -> bool:
 		Return:
 			False if the CSE couldn't initialized and started. 
 	"""
-	global action, announce, console, dispatcher, event, groupResource, httpServer, importer, location, mqttClient, notification, registration
-	global remote, request, script, security, semantic, statistics, storage, textUI, time, timeSeries, validator
+	global action, announce, asyncLoop, coapServer, console, dispatcher, event, groupResource, httpServer, importer, location, mqttClient, notification, registration
+	global remote, request, schedule, script, security, semantic, statistics, storage, textUI, time, timeSeries, validator
 	global aeStatistics
 	global supportedReleaseVersions, cseType, defaultSerialization, cseCsi, cseCsiSlash, cseCsiSlashLess, cseAbsoluteSlash
 	global cseSpid, cseSPRelative, cseAbsolute, cseRi, cseRn, releaseVersion, csePOA
@@ -203,6 +218,7 @@ def startup(args:argparse.Namespace, **kwargs:Dict[str, Any]) -> bool:
 
 	# Set status
 	cseStatus = CSEStatus.STARTING
+	_cseRunning.clear()
 
 	# Handle command line arguments and load the configuration
 	if not args:
@@ -260,11 +276,24 @@ def startup(args:argparse.Namespace, **kwargs:Dict[str, Any]) -> bool:
 	BackgroundWorkerPool.setJobBalance(	balanceTarget = Configuration.get('cse.operation.jobs.balanceTarget'),
 										balanceLatency = Configuration.get('cse.operation.jobs.balanceLatency'),
 										balanceReduceFactor = Configuration.get('cse.operation.jobs.balanceReduceFactor'))
+	BackgroundWorkerPool.setJobLimits(	maxJobs = Configuration.get('cse.operation.jobs.maxJobs'),
+										maxQueueSize = Configuration.get('cse.operation.jobs.queueSize'),
+										rejectionPolicy = Configuration.get('cse.operation.jobs.rejectionPolicy'))
+	event.setDispatchLimits(maxQueueSize = Configuration.get('cse.operation.events.queueSize'),
+							flushInterval = Configuration.get('cse.operation.events.flushInterval'))
+
+	# Start the asyncio event loop, if enabled. Its timers are then used for the background workers
+	if Configuration.get('cse.operation.asyncio.enable'):
+		asyncLoop = AsyncLoop(Configuration.get('cse.operation.asyncio.executorSize')).start()
+		BackgroundWorkerPool.setEventLoop(asyncLoop)
+		L.isInfo and L.log('asyncio mode enabled')
+	L.isDebug and L.logDebug(f'Serializers: {", ".join(f"{ct.name}: {backends[0]}" for ct, backends in getSerializers().items())}')
 
 	textUI = TextUI()						# Start the textUI
 	console = Console()						# Start the console
 
 	storage = Storage()						# Initialize the resource storage
+	schedule = ScheduleManager()			# Initialize the schedule manager
 	statistics = Statistics()				# Initialize the statistics system
 	registration = RegistrationManager()	# Initialize the registration manager
 	validator = Validator()					# Initialize the resource validator
@@ -273,6 +302,7 @@ def startup(args:argparse.Namespace, **kwargs:Dict[str, Any]) -> bool:
 	security = SecurityManager()			# Initialize the security manager
 	httpServer = HttpServer()				# Initialize the HTTP server
 	mqttClient = MQTTClient()				# Initialize the MQTT client
+	coapServer = CoAPServer()				# Initialize the CoAP server
 	notification = NotificationManager()	# Initialize the notification manager
 	groupResource = GroupManager()					# Initialize the group manager
 	timeSeries = TimeSeriesManager()		# Initialize the timeSeries manager
@@ -304,6 +334,12 @@ def startup(args:argparse.Namespace, **kwargs:Dict[str, Any]) -> bool:
 		cseStatus = CSEStatus.STOPPED
 		return False 					
 
+	# Start the CoAP server
+	if not coapServer.run():				# This does return
+		L.logErr('Terminating', showStackTrace = False)
+		cseStatus = CSEStatus.STOPPED
+		return False 					
+
 	# Enable log queuing
 	L.queueOn()	
 
@@ -315,6 +351,7 @@ def startup(args:argparse.Namespace, **kwargs:Dict[str, Any]) -> bool:
 		"""
 		global cseStatus
 		cseStatus = CSEStatus.RUNNING
+		_cseRunning.set()
 		# Send an event that the CSE startup finished
 		event.cseStartup()	# type: ignore
 
@@ -370,6 +407,7 @@ def _shutdown() -> None:
 	location and location.shutdown()
 	semantic and semantic.shutdown()
 	remote and remote.shutdown()
+	coapServer and coapServer.shutdown()
 	mqttClient and mqttClient.shutdown()
 	httpServer and httpServer.shutdown()
 	script and script.shutdown()
@@ -384,7 +422,9 @@ def _shutdown() -> None:
 	registration and registration.shutdown()
 	statistics and statistics.shutdown()
 	event and event.shutdown()
+	schedule and schedule.shutdown()
 	storage  and storage.shutdown()
+	asyncLoop and asyncLoop.stop()
 	
 	L.isInfo and L.log('CSE shut down')
 	L.console('CSE shut down', nlb = True)
@@ -408,6 +448,7 @@ def resetCSE() -> None:
 		
 		httpServer.pause()
 		mqttClient.pause()
+		coapServer.pause()
 
 		storage.purge()
 
@@ -419,6 +460,7 @@ def resetCSE() -> None:
 			L.logErr('Error during import')
 			sys.exit()	# what else can we do?
 		remote.restart()
+		coapServer.unpause()
 		mqttClient.unpause()
 		httpServer.unpause()
 
@@ -435,7 +477,7 @@ def resetCSE() -> None:
 def run() -> None:
 	"""	Run the CSE.
 	"""
-	if waitFor(_cseStartupDelay * 3, lambda: cseStatus == CSEStatus.RUNNING):
+	if _cseRunning.wait(_cseStartupDelay * 3):
 		console.run()
 	else:
 		raise TimeoutError(L.logErr(f'CSE did not start within {_cseStartupDelay * 3} seconds'))
@@ -0,0 +1,1224 @@
+#
+#	CoAPServer.py
+#
+#	(c) 2023 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Server and client for the oneM2M CoAP binding
+#
+
+"""	Implementation of the oneM2M CoAP binding (TS-0008). The CoAP server receives requests via UDP
+	(or DTLS), and also sends requests and notifications from the same endpoint.
+"""
+
+from __future__ import annotations
+from typing import Any, Dict, Optional, Tuple
+
+import itertools, random, socket
+from threading import Event, Lock
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from time import perf_counter
+from urllib.parse import urlparse
+
+from ..etc.Types import ReqResp, RequestType, Result, ResponseStatusCode
+from ..etc.Types import Operation, CSERequest, ContentSerializationType, DesiredIdentifierResultType, ResponseType, ResultContentType
+from ..etc.ResponseStatusCodes import INTERNAL_SERVER_ERROR, BAD_REQUEST, REQUEST_TIMEOUT, TARGET_NOT_REACHABLE, ResponseException
+from ..etc.Utils import exceptionToResult, renameThread, uniqueRI, toSPRelative, removeNoneValuesFromDict, isURL, localResourceID
+from ..etc.DateUtils import timeUntilAbsRelTimestamp, getResourceDate
+from ..etc.RequestUtils import toHttpUrl, serializeData, deserializeData, contentFromResult
+from ..helpers.TextTools import findXPath
+from ..helpers import TextTools
+from ..helpers.CoAPMessage import CoAPMessage, CoAPType, CoAPCode, CoAPOption, CoAPContentFormat
+from ..helpers.CoAPMessage import codeToString, encodeUint, encodeBlock, decodeBlock, blockSizeToSZX
+from ..helpers.NetworkTools import isUDPPortAvailable
+from ..helpers.OrderedDispatcher import OrderedDispatcher
+from ..helpers.UDPServer import UdpServer
+from ..helpers.BackgroundWorker import BackgroundWorker, BackgroundWorkerPool
+from ..resources.Resource import Resource
+from ..services.Configuration import Configuration
+from ..services import CSE
+from ..services.Logging import Logging as L
+
+
+ACK_TIMEOUT = 2.0
+"""	Initial time in seconds to wait for the acknowledgement of a confirmable message (RFC 7252). """
+
+ACK_RANDOM_FACTOR = 1.5
+"""	Random factor for the initial acknowledgement timeout (RFC 7252). """
+
+MAX_RETRANSMIT = 4
+"""	Maximum number of retransmissions of a confirmable message (RFC 7252). """
+
+EXCHANGE_LIFETIME = 247.0
+"""	Time in seconds a message ID is remembered for the deduplication of received messages (RFC 7252). """
+
+_cleanupInterval = 10.0
+"""	Minimum time in seconds between two removals of expired deduplication and block transfer entries. """
+
+
+_requestOptions:dict[int, str] = {
+	CoAPOption.ONEM2M_FR:	'fr',
+	CoAPOption.ONEM2M_RQI:	'rqi',
+	CoAPOption.ONEM2M_RQET:	'rqet',
+	CoAPOption.ONEM2M_RSET:	'rset',
+	CoAPOption.ONEM2M_OET:	'oet',
+	CoAPOption.ONEM2M_RVI:	'rvi',
+	CoAPOption.ONEM2M_VSI:	'vsi',
+	CoAPOption.ONEM2M_OT:	'ot',
+}
+"""	Mapping of the string options to the request attributes. The *oneM2M-RTURI* and *oneM2M-TY* options are handled separately. """
+
+_multipleArguments = frozenset(( 'ty', 'cty', 'lbl', 'atrl' ))
+"""	Request arguments that could occur multiple times, and whose values could be space separated lists. """
+
+_contentFormats:dict[int, ContentSerializationType] = {
+	CoAPContentFormat.JSON:	ContentSerializationType.JSON,
+	CoAPContentFormat.CBOR:	ContentSerializationType.CBOR,
+}
+"""	Mapping of the supported CoAP Content-Formats to the content serializations. """
+
+_contentFormatsReverse:dict[ContentSerializationType, int] = { v: k for k, v in _contentFormats.items() }
+"""	Mapping of the content serializations to the CoAP Content-Formats. """
+
+_methodOperations:dict[int, Operation] = {
+	CoAPCode.GET:		Operation.RETRIEVE,
+	CoAPCode.PUT:		Operation.UPDATE,
+	CoAPCode.DELETE:	Operation.DELETE,
+}
+"""	Mapping of the CoAP methods to operations. POST is either a CREATE or a NOTIFY, depending on the *oneM2M-TY* option. """
+
+_operationMethods:dict[Operation, int] = {
+	Operation.RETRIEVE:		CoAPCode.GET,
+	Operation.DISCOVERY:	CoAPCode.GET,
+	Operation.CREATE:		CoAPCode.POST,
+	Operation.NOTIFY:		CoAPCode.POST,
+	Operation.UPDATE:		CoAPCode.PUT,
+	Operation.DELETE:		CoAPCode.DELETE,
+}
+"""	Mapping of the operations to the CoAP methods. """
+
+_threadNames:dict[Operation, str] = {
+	Operation.RETRIEVE:	'CORE',
+	Operation.CREATE:	'COCR',
+	Operation.UPDATE:	'COUP',
+	Operation.DELETE:	'CODE',
+	Operation.NOTIFY:	'CONO',
+}
+"""	Thread names for handling the operations. """
+
+
+class CoAPExchange(object):
+	"""	A confirmable or non-confirmable message sent by the CSE, and waiting for its acknowledgement
+		and/or response.
+
+		Attributes:
+			token: The token of the sent message.
+			mid: The message ID of the sent message.
+			acknowledged: Set when an ACK, a RST or a response for the message was received.
+			future: Completed with the response, or with the ACK or RST message.
+	"""
+
+	__slots__ = (
+		'token',
+		'mid',
+		'acknowledged',
+		'future',
+	)
+	"""	Slots of the class. """
+
+	def __init__(self, token:bytes, mid:int) -> None:
+		self.token = token
+		self.mid = mid
+		self.acknowledged = Event()
+		self.future:Future[CoAPMessage] = Future()
+
+
+class CoAPObservation(object):
+	"""	A client that observes a resource for notifications.
+
+		Attributes:
+			token: The token of the client's observe registration.
+			originator: The originator of the observe registration.
+			ri: The resource ID of the observed resource.
+			sequence: The current value of the Observe option for notifications.
+	"""
+
+	__slots__ = (
+		'token',
+		'originator',
+		'ri',
+		'sequence',
+	)
+	"""	Slots of the class. """
+
+	def __init__(self, token:bytes, originator:str, ri:str) -> None:
+		self.token = token
+		self.originator = originator
+		self.ri = ri
+		self.sequence = 1
+
+
+#########################################################################
+#
+#	CoAP Server
+#
+
+class CoAPServer(object):
+	"""	The CoAP server and client of the CSE.
+
+		Received requests are deduplicated by the client's address and the message ID, and are handled
+		by a pool of worker threads. Requests from the same client are handled in the order they
+		were received. Confirmable requests are answered with a piggybacked response.
+
+		Large request payloads are received in blocks (Block1), and large responses are returned
+		in blocks (Block2). The remaining blocks of a response are served from a cache.
+
+		A client can observe a resource with a RETRIEVE request with the Observe option 0.
+		Notifications for the subscriptions of that resource to the client's address are then sent as observe
+		notifications. Verification requests and all other notifications are sent as normal requests.
+
+		Attributes:
+			enable: Whether the CoAP binding is enabled.
+			listenIF: The interface to listen on.
+			port: The port to listen on.
+			useDTLS: Whether DTLS is used.
+			blockSize: The maximum payload size of a message. Larger payloads are transferred in blocks.
+			workerPoolSize: Number of worker threads that handle received requests.
+			maxQueueSize: Maximum number of received requests that wait to be handled.
+			requestTimeout: Timeout in seconds when sending requests and waiting for responses.
+			isStopped: Whether the server is stopped or paused.
+			udpServer: The UDP server.
+			serverActor: The background actor that runs the UDP server.
+			dispatcher: The pool of worker threads.
+			lock: Lock for the deduplication, block transfer and observation data.
+			exchanges: Received requests by (client address, message ID). Each maps to a tuple (encoded response or None if still in progress, expiration time).
+			blockTransfers: Block1 transfers by (client address, request URI). Each maps to a tuple (received payload, next block number, expiration time).
+			blockResponses: Block2 responses by (client address, request URI). Each maps to a tuple (code, options, payload, expiration time).
+			observations: Observing clients by (client address, resource ID of the observed resource).
+			nextCleanup: The time of the next removal of expired entries.
+			pendingLock: Lock for the pending exchanges of sent messages.
+			pendingTokens: Pending exchanges of sent messages by token.
+			pendingMids: Pending exchanges of sent messages by message ID.
+			messageIDs: Generator of message IDs.
+	"""
+
+	__slots__ = (
+		'enable',
+		'listenIF',
+		'port',
+		'useDTLS',
+		'dtlsVersion',
+		'verifyCertificate',
+		'certificateFile',
+		'privateKeyFile',
+		'blockSize',
+		'workerPoolSize',
+		'maxQueueSize',
+		'requestTimeout',
+
+		'isStopped',
+		'udpServer',
+		'serverActor',
+		'dispatcher',
+		'lock',
+		'exchanges',
+		'blockTransfers',
+		'blockResponses',
+		'observations',
+		'nextCleanup',
+		'pendingLock',
+		'pendingTokens',
+		'pendingMids',
+		'messageIDs',
+
+		'_eventResponseReceived',
+	)
+	"""	Slots of the class. """
+
+
+	def __init__(self) -> None:
+
+		# Get the configuration settings
+		self._assignConfig()
+
+		# Add a handler for configuration changes
+		CSE.event.addHandler(CSE.event.configUpdate, self.configUpdate)		# type: ignore
+
+		self.isStopped											= False
+		self.udpServer:UdpServer								= None
+		self.serverActor:BackgroundWorker						= None
+		self.dispatcher:OrderedDispatcher						= None
+		self.lock												= Lock()
+		self.exchanges:Dict[Tuple[Tuple[str, int], int], Tuple[Optional[bytes], float]]				= {}
+		self.blockTransfers:Dict[Tuple[Tuple[str, int], str], Tuple[bytearray, int, float]]			= {}
+		self.blockResponses:Dict[Tuple[Tuple[str, int], str], Tuple[int, list, bytes, float]]		= {}
+		self.observations:Dict[Tuple[Tuple[str, int], str], CoAPObservation]	= {}
+		self.nextCleanup										= 0.0
+		self.pendingLock										= Lock()
+		self.pendingTokens:Dict[bytes, CoAPExchange]			= {}
+		self.pendingMids:Dict[int, CoAPExchange]				= {}
+		self.messageIDs											= itertools.count(random.randrange(0x10000))
+
+		# Optimize event handling
+		self._eventResponseReceived = CSE.event.responseReceived	# type: ignore [attr-defined]
+
+		L.isInfo and L.log('CoAP Server initialized')
+
+
+	def _assignConfig(self) -> None:
+		"""	Assign the configuration values to the CoAP server.
+		"""
+		self.enable				= Configuration.get('coap.enable')
+		self.listenIF			= Configuration.get('coap.listenIF')
+		self.port				= Configuration.get('coap.port')
+		self.useDTLS			= Configuration.get('coap.security.useDTLS')
+		self.dtlsVersion		= Configuration.get('coap.security.dtlsVersion')
+		self.verifyCertificate	= Configuration.get('coap.security.verifyCertificate')
+		self.certificateFile	= Configuration.get('coap.security.certificateFile')
+		self.privateKeyFile		= Configuration.get('coap.security.privateKeyFile')
+		self.blockSize			= Configuration.get('coap.blockSize')
+		self.workerPoolSize		= Configuration.get('coap.workerPoolSize')
+		self.maxQueueSize		= Configuration.get('coap.maxQueueSize')
+		self.requestTimeout		= Configuration.get('coap.timeout')
+
+
+	def configUpdate(self, name:str,
+						   key:Optional[str] = None,
+						   value:Any = None) -> None:
+		"""	Handle configuration updates.
+
+			Args:
+				name: The name of the configuration section.
+				key: The key of the configuration value.
+				value: The new value.
+		"""
+		if key not in ( 'coap.blockSize',
+						'coap.timeout',
+					  ):
+			return
+		self._assignConfig()
+
+
+	def run(self) -> bool:
+		"""	Run the CoAP server in a separate thread.
+
+			Return:
+				True if the server is started or not enabled, False if it cannot be started.
+		"""
+		if not self.enable:
+			L.isInfo and L.log('CoAP: server NOT enabled')
+			return True
+		if not isUDPPortAvailable(self.port):
+			L.logErr(f'Cannot start CoAP server. Port: {self.port} already in use.', showStackTrace = False)
+			return False
+		try:
+			self.udpServer = UdpServer(self.listenIF,
+									   self.port,
+									   useDTLS = self.useDTLS,
+									   tlsVersion = self.dtlsVersion,
+									   verifyCertificate = self.verifyCertificate,
+									   privateKeyFile = self.privateKeyFile,
+									   certificateFile = self.certificateFile,
+									   received_data_callback = self._receivedData,
+									   logging = L.logDebug if L.enableBindingsLogging else None)
+		except RuntimeError as e:
+			L.logErr(f'Cannot start CoAP server: {str(e)}', showStackTrace = False)
+			return False
+		self.dispatcher = OrderedDispatcher('CoAPWorker',
+											poolSize = self.workerPoolSize,
+											maxQueueSize = self.maxQueueSize,
+											errorCallback = lambda address, e: L.logErr(f'Error handling CoAP request from: {address}', exc = e)).start()
+		self.serverActor = BackgroundWorkerPool.newActor(self._run, name = 'CoAPServer')
+		self.serverActor.start()
+		return True
+
+
+	def shutdown(self) -> bool:
+		"""	Shutting down the CoAP server.
+		"""
+		L.isInfo and L.log('CoAPServer shut down')
+		self.isStopped = True
+		if self.udpServer:
+			self.udpServer.close()
+			self.udpServer = None
+		if self.dispatcher:
+			self.dispatcher.stop()
+			self.dispatcher = None
+		return True
+
+
+	def pause(self) -> None:
+		"""	Stop handling requests.
+		"""
+		L.isInfo and L.log('CoAPServer paused')
+		self.isStopped = True
+
+
+	def unpause(self) -> None:
+		"""	Continue handling requests.
+		"""
+		L.isInfo and L.log('CoAPServer unpaused')
+		self.isStopped = False
+
+
+	def _run(self) -> None:
+		"""	Receive datagrams. This runs until the server is shut down.
+		"""
+		L.isInfo and L.log(f'CoAP server listening on {self.listenIF}:{self.port}{" (DTLS)" if self.useDTLS else ""}')
+		try:
+			self.udpServer.listen(timeout = 1.0)
+		except Exception as e:
+			if not self.isStopped:
+				L.logErr(f'CoAP server error: {str(e)}')
+				CSE.shutdown() # exit the CSE. Cleanup happens in the CSE atexit() handler
+
+
+	def getStatistics(self) -> Optional[Dict[str, Any]]:
+		"""	Return the metrics of the handling of received requests.
+
+			Return:
+				Dictionary with the number of currently and maximum queued requests, the number of handled requests,
+				and the 99th percentile of the handling latency in seconds, or None if the CoAP server is not running.
+		"""
+		return self.dispatcher.getStatistics() if self.dispatcher else None
+
+
+	#########################################################################
+	#
+	#	Receiving messages
+	#
+
+	def _receivedData(self, data:bytes, address:Tuple[str, int]) -> None:
+		"""	Handle a received datagram. This is called in the listening thread.
+
+			Requests are deduplicated and then handed over to the worker threads. A duplicate of an already
+			answered confirmable request is answered again with the same response. Responses, ACKs and RSTs
+			are handed to the waiting exchanges directly.
+
+			This method never blocks. If the queue of the worker threads is full then a request is answered
+			with *5.03 Service Unavailable*.
+
+			Args:
+				data: The received datagram.
+				address: The (host, port) tuple of the sender.
+		"""
+		try:
+			message = CoAPMessage.decode(data)
+		except Exception as e:
+			L.isDebug and L.logDebug(f'Ignoring invalid CoAP message from: {address}: {str(e)}')
+			return
+
+		if message.isRequest:
+			now = perf_counter()
+			key = (address, message.mid)
+			with self.lock:
+				if now >= self.nextCleanup:
+					self._removeExpired(now)
+				if (exchange := self.exchanges.get(key)) is None:
+					self.exchanges[key] = (None, now + EXCHANGE_LIFETIME)
+			if exchange is None:
+				if not self.dispatcher.dispatch(address, self._handleRequest, message = message, address = address):
+					self._rejectRequest(message, address)
+			elif exchange[0] is not None and message.type == CoAPType.CON:	# Retransmission of an answered request
+				L.isDebug and L.logDebug(f'Resending response for duplicate CoAP request: {message.mid} from: {address}')
+				self.udpServer.sendTo(exchange[0], address)
+			return
+
+		if message.isEmpty and message.type == CoAPType.CON:	# CoAP ping
+			self.udpServer.sendTo(CoAPMessage(CoAPType.RST, CoAPCode.EMPTY, message.mid).encode(), address)
+			return
+
+		self._handleResponse(message, address)
+
+
+	def _rejectRequest(self, message:CoAPMessage, address:Tuple[str, int]) -> None:
+		"""	Answer a request that could not be queued for the worker threads with *5.03 Service Unavailable*.
+
+			The response is not remembered, so that a retransmission of the request is handled again.
+
+			Args:
+				message: The rejected request.
+				address: The (host, port) tuple of the client.
+		"""
+		with self.lock:
+			self.exchanges.pop((address, message.mid), None)
+		L.isWarn and L.logWarn(f'CoAP request queue is full. Request rejected: {message.mid} from: {address}')
+		self.udpServer.sendTo(self._newResponse(message, CoAPCode.SERVICE_UNAVAILABLE).encode(), address)
+
+
+	def _removeExpired(self, now:float) -> None:
+		"""	Remove expired deduplication entries and block transfers. This must be called with the lock held.
+
+			Args:
+				now: The current time.
+		"""
+		for d in (self.exchanges, self.blockTransfers, self.blockResponses):
+			for key in [ k for k, v in d.items() if v[-1] < now ]:		# type: ignore [attr-defined]
+				del d[key]		# type: ignore [attr-defined]
+		self.nextCleanup = now + _cleanupInterval
+
+
+	def _handleResponse(self, message:CoAPMessage, address:Tuple[str, int]) -> None:
+		"""	Hand a received response, ACK or RST to the waiting exchange.
+
+			Args:
+				message: The received message.
+				address: The (host, port) tuple of the sender.
+		"""
+		with self.pendingLock:
+			if message.isEmpty or message.type in (CoAPType.ACK, CoAPType.RST):
+				exchange = self.pendingMids.get(message.mid)
+			else:
+				exchange = self.pendingTokens.get(message.token)
+
+		if message.type == CoAPType.CON:	# Separate response. Acknowledge or reject it
+			self.udpServer.sendTo(CoAPMessage(CoAPType.ACK if exchange else CoAPType.RST, CoAPCode.EMPTY, message.mid).encode(), address)
+
+		if not exchange:
+			L.isDebug and L.logDebug(f'Ignoring unexpected CoAP {message.type.name} message: {message.mid} from: {address}')
+			return
+		exchange.acknowledged.set()
+		if (message.isResponse or message.type == CoAPType.RST) and not exchange.future.done():
+			exchange.future.set_result(message)
+		elif message.isEmpty and message.type == CoAPType.ACK and not exchange.future.done() and exchange.token is None:
+			exchange.future.set_result(message)		# Only an acknowledgement is expected
+
+
+	def _handleRequest(self, message:CoAPMessage, address:Tuple[str, int]) -> None:
+		"""	Handle a received request in a worker thread.
+
+			Args:
+				message: The received request.
+				address: The (host, port) tuple of the client.
+		"""
+		startTs = perf_counter()
+		paths = [ p.decode('utf-8') for p in message.getOptions(CoAPOption.URI_PATH) ]
+		queries = [ q.decode('utf-8') for q in message.getOptions(CoAPOption.URI_QUERY) ]
+		uri = f'{"/".join(paths)}?{"&".join(queries)}'
+		L.isDebug and L.logDebug('==> CoAP Request: %s %s (%s, mid: %s) from: %s', codeToString(message.code), uri, message.type.name, message.mid, address)
+
+		# Serve a further block of a response from the cache
+		if (block2 := message.getUintOption(CoAPOption.BLOCK2)) is not None and block2 >> 4 > 0:
+			with self.lock:
+				cached = self.blockResponses.get((address, uri))
+			if cached:
+				self._sendBlocks(message, address, uri, cached[0], cached[1], cached[2])
+				return
+
+		# Receive the payload in blocks
+		block1Option:Optional[int] = None
+		if (block1 := message.getUintOption(CoAPOption.BLOCK1)) is not None:
+			num, more, szx = decodeBlock(block1)
+			key = (address, uri)
+			with self.lock:
+				if num == 0:
+					transfer = (bytearray(), 0, 0.0)
+				elif not (transfer := self.blockTransfers.get(key)) or transfer[1] != num:	# type: ignore [assignment]
+					self.blockTransfers.pop(key, None)
+					transfer = None
+				if transfer:
+					transfer[0].extend(message.payload)
+					if more:
+						self.blockTransfers[key] = (transfer[0], num + 1, perf_counter() + EXCHANGE_LIFETIME)
+					else:
+						self.blockTransfers.pop(key, None)
+			if not transfer:
+				self._sendMessage(message, address, self._newResponse(message, CoAPCode.REQUEST_ENTITY_INCOMPLETE))
+				return
+			if more:
+				self._sendMessage(message, address, self._newResponse(message, CoAPCode.CONTINUE).addOption(CoAPOption.BLOCK1, encodeBlock(num, True, szx)))
+				return
+			message.payload = bytes(transfer[0])
+			block1Option = encodeBlock(num, False, szx)
+
+		# Determine the operation
+		if message.code == CoAPCode.POST:
+			operation = Operation.CREATE if message.getOption(CoAPOption.ONEM2M_TY) is not None else Operation.NOTIFY
+		elif not (operation := _methodOperations.get(message.code)):	# type: ignore [assignment]
+			self._sendMessage(message, address, self._newResponse(message, CoAPCode.METHOD_NOT_ALLOWED))
+			return
+		renameThread(_threadNames[operation])
+
+		try:
+			dissectResult = self._dissectCoAPRequest(message, operation, "/".join(paths), queries)
+		except ResponseException as e:
+			dissectResult = Result(rsc = e.rsc, request = e.data if isinstance(e.data, CSERequest) else None, dbg = e.dbg)
+
+		# log Body, if there is one
+		if L.isDebug and message.payload and dissectResult.request:
+			if dissectResult.request.ct == ContentSerializationType.JSON:
+				L.logDebug(f'Body: \n{message.payload.decode("utf-8", errors = "replace")}')
+			else:
+				L.logDebug('Body: \n%s\n=>\n%s', TextTools.toHex(message.payload), dissectResult.request.pc)
+
+		observe = message.getUintOption(CoAPOption.OBSERVE)
+		if self.isStopped:
+			# Return an error if the server is stopped
+			responseResult = Result(rsc = ResponseStatusCode.INTERNAL_SERVER_ERROR,
+									request = dissectResult.request,
+									dbg = 'coap server not running')
+		elif dissectResult.rsc != ResponseStatusCode.UNKNOWN:	# any other value right now indicates an error condition
+			# Something went wrong during dissection
+			if dissectResult.request:
+				CSE.request.recordRequest(dissectResult.request, dissectResult)
+			responseResult = dissectResult
+		else:
+			try:
+				responseResult = CSE.request.handleRequest(dissectResult.request)
+			except Exception as e:
+				responseResult = exceptionToResult(e)
+
+			# Register or deregister an observing client for the retrieved resource
+			if observe is not None and operation == Operation.RETRIEVE:
+				ri = responseResult.resource.ri if isinstance(responseResult.resource, Resource) else None
+				with self.lock:
+					if observe == 0 and ri and responseResult.rsc == ResponseStatusCode.OK:
+						self.observations[(address, ri)] = CoAPObservation(message.token, dissectResult.request.originator, ri)
+						L.isDebug and L.logDebug(f'Registered CoAP observation for: {address} on: {ri}')
+					else:
+						observe = None
+						if ri and self.observations.pop((address, ri), None):
+							L.isDebug and L.logDebug(f'Removed CoAP observation for: {address} on: {ri}')
+
+		# No response is sent if the originator didn't request one
+		if dissectResult.request and dissectResult.request.rt == ResponseType.noResponse and dissectResult.rsc == ResponseStatusCode.UNKNOWN:
+			L.isDebug and L.logDebug(f'No response requested for: {dissectResult.request.rqi}')
+			if message.type == CoAPType.CON:
+				self._sendMessage(message, address, CoAPMessage(CoAPType.ACK, CoAPCode.EMPTY, message.mid))
+			else:
+				self._sendMessage(message, address, None)
+		else:
+			self._sendResponse(message, address, uri, responseResult, dissectResult.request, block1Option, 0 if observe == 0 else None)
+		CSE.statistics.recordRequest('coap', operation, perf_counter() - startTs)
+
+
+	def _newResponse(self, message:CoAPMessage, code:int) -> CoAPMessage:
+		"""	Create a response for a request. Confirmable requests are answered with a piggybacked response.
+
+			Args:
+				message: The request.
+				code: The CoAP response code.
+
+			Return:
+				The response without options and payload.
+		"""
+		if message.type == CoAPType.CON:
+			return CoAPMessage(CoAPType.ACK, code, message.mid, message.token)
+		return CoAPMessage(CoAPType.NON, code, next(self.messageIDs) & 0xffff, message.token)
+
+
+	def _sendMessage(self, message:CoAPMessage, address:Tuple[str, int], response:Optional[CoAPMessage]) -> None:
+		"""	Send a response, and remember it for answering duplicates of the request.
+
+			Args:
+				message: The request.
+				address: The (host, port) tuple of the client.
+				response: The response, or None if no response is sent.
+		"""
+		data = response.encode() if response else None
+		with self.lock:
+			self.exchanges[(address, message.mid)] = (data, perf_counter() + EXCHANGE_LIFETIME)
+		if data:
+			L.isDebug and L.logDebug(f'<== CoAP Response ({codeToString(response.code)}, {response.type.name}, mid: {response.mid}) to: {address}')
+			self.udpServer.sendTo(data, address)
+
+
+	def _sendResponse(self, message:CoAPMessage,
+							address:Tuple[str, int],
+							uri:str,
+							result:Result,
+							originalRequest:Optional[CSERequest],
+							block1Option:Optional[int],
+							observe:Optional[int]) -> None:
+		"""	Prepare and send the response for a request.
+
+			Args:
+				message: The request.
+				address: The (host, port) tuple of the client.
+				uri: The request URI, used as the key for the cached blocks of a large response.
+				result: The result of the request.
+				originalRequest: The dissected request, if available.
+				block1Option: The value of the Block1 option for the last block of a block-wise request, or None.
+				observe: The value of the Observe option for a successful observe registration, or None.
+		"""
+		if not result.request:
+			result.request = CSERequest()
+
+		#
+		#  Copy a couple of attributes from the originalRequest to the new request
+		#
+
+		result.request.ct = CSE.defaultSerialization	# default serialization
+		if originalRequest:
+
+			# Determine contentType for the response. Check the 'accept' option first, then take the
+			# originator's contentSerialization. If this is not possible, the fallback is still the
+			# CSE's default
+			result.request.originator = originalRequest.originator
+			if originalRequest.httpAccept:																# accept / contentType
+				result.request.ct = ContentSerializationType.getType(originalRequest.httpAccept[0])
+			elif csz := CSE.request.getSerializationFromOriginator(originalRequest.originator):
+				result.request.ct = csz[0]
+
+			result.request.rqi = originalRequest.rqi
+			result.request.rvi = originalRequest.rvi
+			result.request.vsi = originalRequest.vsi
+			result.request.ec  = originalRequest.ec
+			result.request.rset = originalRequest.rset
+
+		#
+		#	Build the options directly from the request
+		#
+		request = result.request
+		options:list[Tuple[int, bytes|str|int]] = []
+		if result.rsc:
+			options.append((CoAPOption.ONEM2M_RSC, int(result.rsc)))
+		if request.rqi:
+			options.append((CoAPOption.ONEM2M_RQI, request.rqi))
+		if request.rvi:
+			options.append((CoAPOption.ONEM2M_RVI, request.rvi))
+		if request.vsi:
+			options.append((CoAPOption.ONEM2M_VSI, request.vsi))
+		if request.rset:
+			options.append((CoAPOption.ONEM2M_RSET, request.rset))
+		options.append((CoAPOption.ONEM2M_OT, getResourceDate()))
+		if block1Option is not None:
+			options.append((CoAPOption.BLOCK1, block1Option))
+		if observe is not None:
+			options.append((CoAPOption.OBSERVE, observe))
+
+		# Serialize the content only once. From hereon, data is a byte string
+		pc = contentFromResult(result)
+		payload = serializeData(pc, request.ct) if pc else b''
+		if isinstance(payload, str):
+			payload = payload.encode('utf-8')
+		if payload:
+			options.append((CoAPOption.CONTENT_FORMAT, _contentFormatsReverse.get(request.ct, CoAPContentFormat.JSON)))
+
+		#
+		#	Add Location-Path options, if this is a response to a CREATE operation, and uri is present
+		#
+		if pc and originalRequest and originalRequest.op == Operation.CREATE:
+			if  (location := findXPath(pc, 'm2m:uri')) is not None or \
+				(location := findXPath(pc, 'm2m:rce/uri')):
+					for p in location.split('/'):
+						options.append((CoAPOption.LOCATION_PATH, p))
+
+		if L.isDebug:
+			if request.ct == ContentSerializationType.CBOR and payload:
+				L.logDebug(f'<== CoAP Response ({result.rsc}):\nOptions: {options}\nBody: \n{TextTools.toHex(payload)}\n=>\n{str(result.toData())}')
+			elif pc:
+				L.logDebug(f'<== CoAP Response ({result.rsc}):\nOptions: {options}\nBody: {pc}')
+			else:
+				L.logDebug(f'<== CoAP Response ({result.rsc}):\nOptions: {options}')
+
+		self._sendBlocks(message, address, uri, result.rsc.coapStatusCode(), options, payload)
+
+
+	def _sendBlocks(self, message:CoAPMessage,
+						  address:Tuple[str, int],
+						  uri:str,
+						  code:int,
+						  options:list[Tuple[int, bytes|str|int]],
+						  payload:bytes) -> None:
+		"""	Send a response, or the requested block of a large response. The complete response of a
+			block-wise transfer is cached until the last block was sent.
+
+			Args:
+				message: The request.
+				address: The (host, port) tuple of the client.
+				uri: The request URI.
+				code: The CoAP response code.
+				options: The options of the response.
+				payload: The complete payload of the response.
+		"""
+		response = self._newResponse(message, code)
+		for number, value in options:
+			response.addOption(number, value)
+
+		szx = blockSizeToSZX(self.blockSize)
+		num = 0
+		if (block2 := message.getUintOption(CoAPOption.BLOCK2)) is not None:
+			num, _, requestedSzx = decodeBlock(block2)
+			if requestedSzx < szx:				# The client requested a smaller block size
+				szx = requestedSzx
+		size = 1 << (szx + 4)
+
+		if block2 is None and len(payload) <= size:
+			response.payload = payload
+			self._sendMessage(message, address, response)
+			return
+
+		if num * size >= len(payload) and num > 0:
+			self._sendMessage(message, address, self._newResponse(message, CoAPCode.BAD_OPTION))
+			return
+		more = (num + 1) * size < len(payload)
+		response.payload = payload[num * size:(num + 1) * size]
+		response.addOption(CoAPOption.BLOCK2, encodeBlock(num, more, szx))
+		if num == 0:
+			response.addOption(CoAPOption.SIZE2, len(payload))
+		with self.lock:
+			if more:
+				self.blockResponses[(address, uri)] = (code, options, payload, perf_counter() + EXCHANGE_LIFETIME)
+			else:
+				self.blockResponses.pop((address, uri), None)
+		self._sendMessage(message, address, response)
+
+
+	#########################################################################
+	#
+	#	CoAP request helper functions
+	#
+
+	def _dissectCoAPRequest(self, message:CoAPMessage, operation:Operation, path:str, queries:list[str]) -> Result:
+		"""	Dissect a CoAP request. Combine options and contents into a single structure. Result is returned in Result.request.
+
+			Args:
+				message: The received request.
+				operation: The request's operation.
+				path: The target path from the Uri-Path options.
+				queries: The Uri-Query options.
+
+			Return:
+				Result object with the dissected request.
+		"""
+		cseRequest 					= CSERequest()
+		req:ReqResp 				= {}
+		cseRequest.originalData 	= message.payload
+		cseRequest.op 				= operation
+		req['op']   				= operation.value		# Needed later for validation
+
+		# resolve the /~ and /_ special prefixs
+		if not path:
+			raise BAD_REQUEST(L.logWarn('missing target in CoAP request'), data = cseRequest)
+		match path[0]:
+			case '~':
+				path = path[1:]			# ~/xxx -> /xxx
+			case '_':
+				path = f'/{path[1:]}'	# _/xxx -> //xxx
+		req['to'] 		 			= path
+
+		# Copy the oneM2M options
+		for number, value in message.options:
+			if (attribute := _requestOptions.get(number)) and value and attribute not in req:
+				req[attribute] = value.decode('utf-8')
+		if (rtu := message.getStringOption(CoAPOption.ONEM2M_RTURI)) is not None:	# handle rtu as a list AND it might be an empty list!
+			req['rt'] = { 'nu': rtu.split('&') }	# req.rt.rtu
+		if (ty := message.getUintOption(CoAPOption.ONEM2M_TY)) is not None:
+			req['ty'] = ty
+
+		cseRequest.originalRequest = req 	# Already store now the incompliete request to save the option data
+
+		# Content format and accept
+		if (contentFormat := message.getUintOption(CoAPOption.CONTENT_FORMAT)) is not None and contentFormat in _contentFormats:
+			cseRequest.mediaType = _contentFormats[contentFormat].toHeader()
+		if (accept := message.getUintOption(CoAPOption.ACCEPT)) is not None and accept in _contentFormats:
+			cseRequest.httpAccept = [ _contentFormats[accept].toHeader() ]
+
+		# Go through the request arguments once. Arguments that could occur multiple times
+		# are collected together in a single list. The other arguments are request attributes,
+		# the attributeList, or filter criteria.
+		arguments:dict[str, list[str]] = {}
+		for q in queries:
+			name, _, value = q.partition('=')
+			arguments.setdefault(name, []).append(value)
+		attributeList:list[str] = []
+		filterCriteria:ReqResp = {}
+		for name, values in arguments.items():
+			if name in _multipleArguments:
+				if not (value := [ t for v in values for t in v.split() ]):	# conversion to int happens later in fillAndValidateCSERequest()
+					continue
+			else:
+				value = values[0]
+
+			match name:
+				# Handle some parameters differently.
+				# They are not filter criteria, but request attributes
+				case 'rcn' | 'rp' | 'drt' | 'sqi' if value:
+					req[name] = value
+				case 'rt' if value:
+					req.setdefault('rt', {})['rtv'] = value	# type: ignore [union-attr] # req.rt.rtv
+
+				# Handle attributeList
+				case 'atrl':
+					if len(value) == 1:
+						req['to'] = f'{req["to"]}#{value[0]}'
+					else:
+						attributeList = value
+
+				# Add all other arguments to the filterCriteria
+				case _:
+					if name == 'ma' and value:	# Maxage
+						cseRequest.ma = value
+					filterCriteria[name] = value
+		if filterCriteria:
+			req['fc'] = filterCriteria
+
+		if attributeList:
+			req['pc'] = { 'm2m:atrl': attributeList }
+			cseRequest.ct = CSE.defaultSerialization
+
+		else:
+
+			# De-Serialize the content
+			pc, ct = CSE.request.deserializeContent(cseRequest.originalData, cseRequest.mediaType) # may throw an exception
+
+			# Remove 'None' fields *before* adding the pc, because the pc may contain 'None' fields that need to be preserved
+			req = removeNoneValuesFromDict(req)
+
+			# Add the primitive content and
+			req['pc'] = pc		# The actual content
+			cseRequest.ct = ct	# The conten serialization type
+
+		cseRequest.originalRequest	= req	# finally store the oneM2M request object in the cseRequest
+
+		# do validation and copying of attributes of the whole request
+		try:
+			CSE.request.fillAndValidateCSERequest(cseRequest)
+		except REQUEST_TIMEOUT as e:
+			raise e
+		except ResponseException as e:
+			e.dbg = f'invalid arguments/attributes: {e.dbg}'
+			raise e
+
+		# Here, if everything went okay so far, we have a request to the CSE
+		return Result(request = cseRequest)
+
+
+	#########################################################################
+	#
+	#	Sending requests
+	#
+
+	def _exchange(self, message:CoAPMessage, address:Tuple[str, int], timeout:float, expectResponse:bool = True) -> Optional[CoAPMessage]:
+		"""	Send a message and wait for its acknowledgement and/or response.
+
+			Confirmable messages are retransmitted with an exponential back-off until they are acknowledged,
+			the maximum number of retransmissions is reached, or the *timeout* is met.
+
+			Args:
+				message: The message to send.
+				address: The (host, port) tuple of the receiver.
+				timeout: The time in seconds to wait for a response.
+				expectResponse: If True then wait for a response, otherwise only for the acknowledgement of a confirmable message.
+
+			Return:
+				The response, the ACK or RST message, or None for a non-confirmable message that expects no response.
+
+			Raises:
+				TARGET_NOT_REACHABLE: If a confirmable message was not acknowledged, or if the message could not be sent.
+				REQUEST_TIMEOUT: If no acknowledgement or response was received in time.
+		"""
+		exchange = CoAPExchange(message.token if expectResponse else None, message.mid)
+		with self.pendingLock:
+			if expectResponse:
+				self.pendingTokens[message.token] = exchange
+			self.pendingMids[message.mid] = exchange
+		try:
+			data = message.encode()
+			deadline = perf_counter() + timeout
+			if message.type == CoAPType.CON:
+				wait = ACK_TIMEOUT * random.uniform(1.0, ACK_RANDOM_FACTOR)
+				for _ in range(MAX_RETRANSMIT + 1):
+					if (remaining := deadline - perf_counter()) <= 0.0:
+						raise REQUEST_TIMEOUT(L.logWarn(f'CoAP message not acknowledged by: {address} within {timeout}s'))
+					if not self.udpServer.sendTo(data, address):
+						raise TARGET_NOT_REACHABLE(L.logWarn(f'Cannot send CoAP message to: {address}'))
+					if exchange.acknowledged.wait(min(wait, remaining)):
+						break
+					wait *= 2
+				else:
+					raise TARGET_NOT_REACHABLE(L.logWarn(f'CoAP message not acknowledged by: {address}'))
+			else:
+				if not self.udpServer.sendTo(data, address):
+					raise TARGET_NOT_REACHABLE(L.logWarn(f'Cannot send CoAP message to: {address}'))
+				if not expectResponse:
+					return None
+			try:
+				return exchange.future.result(timeout = max(0.0, deadline - perf_counter()))
+			except FutureTimeoutError:
+				raise REQUEST_TIMEOUT(L.logWarn(f'CoAP request timeout after {timeout}s'))
+		finally:
+			with self.pendingLock:
+				if expectResponse:
+					self.pendingTokens.pop(message.token, None)
+				self.pendingMids.pop(message.mid, None)
+
+
+	def _newToken(self) -> bytes:
+		"""	Return a new random token for a request.
+
+			Return:
+				An 8 byte token.
+		"""
+		return random.getrandbits(64).to_bytes(8, 'big')
+
+
+	def sendCoapRequest(self, request:CSERequest, url:str) -> Result:
+		"""	Send a CoAP request.
+
+			If the request is a notification for a subscription of a resource that the target's address observes
+			then the notification is sent as an observe notification to that client.
+
+			Payloads larger than the block size are sent in blocks, and responses in blocks are
+			retrieved completely. If the request's responseType is *noResponse* then the request is sent as a
+			non-confirmable message and no response is awaited.
+
+			The result is returned in *Result.data*.
+
+			Args:
+				request: The request to send.
+				url: The URL of the target.
+
+			Return:
+				Result object with the response.
+		"""
+		if not self.enable or self.isStopped or not self.udpServer:
+			return Result(rsc = ResponseStatusCode.INTERNAL_SERVER_ERROR,
+						  dbg = 'CoAP server is not running')
+
+		# Add the to to the base url
+		if request.to:
+			if isURL(request.to):
+				url = request.to
+			else:
+				url = url + request.to
+
+		# Make the URL a valid URL (escape // and ///)
+		u = urlparse(toHttpUrl(url))
+		if u.scheme.lower() == 'coaps':
+			raise TARGET_NOT_REACHABLE(L.logWarn(f'Sending CoAP requests via DTLS is not supported: {url}'))
+		try:
+			address = (socket.gethostbyname(u.hostname), u.port if u.port else 5683)
+		except Exception as e:
+			raise TARGET_NOT_REACHABLE(L.logWarn(f'Cannot resolve CoAP target: {url}: {str(e)}'))
+
+		# get the serialization
+		ct = request.ct if request.ct else CSE.defaultSerialization
+		if not request.rqi:
+			request.rqi = uniqueRI()
+
+		# Timeout
+		timeout = timeUntilAbsRelTimestamp(request.rqet) if request.rqet else self.requestTimeout
+
+		# serialize data (only if dictionary, pass on non-dict data).
+		# Use an already serialized content if available, e.g. for notifications.
+		payload:bytes = b''
+		if request.op in [ Operation.CREATE, Operation.UPDATE, Operation.NOTIFY ]:
+			if not request._pcSerializer or (data := request._pcSerializer(ct)) is None:
+				data = serializeData(request.pc, ct)
+			payload = data.encode('utf-8') if isinstance(data, str) else data if data else b''
+		elif request.pc:
+			raise INTERNAL_SERVER_ERROR(L.logErr(f'Operation: {request.op.name} doesn\'t allow content'))
+
+		# Send a notification to an observing client
+		if request.op == Operation.NOTIFY and (observation := self._getObservation(request, address)):
+			return self._sendObserveNotification(request, address, observation, ct, payload, timeout)
+
+		# Build the request
+		message = CoAPMessage(CoAPType.NON if request.rt == ResponseType.noResponse else CoAPType.CON,
+							  _operationMethods[request.op],
+							  0,
+							  self._newToken())
+		for p in u.path.split('/'):
+			if p:
+				message.addOption(CoAPOption.URI_PATH, p)
+		if u.query:
+			for q in u.query.split('&'):
+				message.addOption(CoAPOption.URI_QUERY, q)
+		if request.rcn and request.rcn != ResultContentType.default(request.op):
+			message.addOption(CoAPOption.URI_QUERY, f'rcn={request.rcn.value}')
+		if request.drt and request.drt != DesiredIdentifierResultType.structured:
+			message.addOption(CoAPOption.URI_QUERY, f'drt={request.drt.value}')
+		if fc := request.fc:	# Add filterCriteria arguments
+			fc.mapAttributes(lambda k, v: message.addOption(CoAPOption.URI_QUERY, f'{k}={v}'), True)
+		if request.sqi:
+			message.addOption(CoAPOption.URI_QUERY, f'sqi={request.sqi}')
+		if (atrl := findXPath(request.pc, 'm2m:atrl')) is not None:
+			message.addOption(CoAPOption.URI_QUERY, f'atrl={"+".join(atrl)}')
+
+		message.addOption(CoAPOption.ONEM2M_FR, toSPRelative(request.originator))
+		message.addOption(CoAPOption.ONEM2M_RQI, request.rqi)
+		if request.rvi != '1':
+			message.addOption(CoAPOption.ONEM2M_RVI, request.rvi if request.rvi is not None else CSE.releaseVersion)
+		message.addOption(CoAPOption.ONEM2M_OT, request.ot if request.ot else getResourceDate())
+		if request.ec:				# Event Category
+			message.addOption(CoAPOption.ONEM2M_EC, int(request.ec.value))
+		if request.rqet:
+			message.addOption(CoAPOption.ONEM2M_RQET, request.rqet)
+		if request.rset:
+			message.addOption(CoAPOption.ONEM2M_RSET, request.rset)
+		if request.oet:
+			message.addOption(CoAPOption.ONEM2M_OET, request.oet)
+		if request.rt and request.rt != ResponseType.blockingRequest:
+			message.addOption(CoAPOption.ONEM2M_RTURI, str(request.rt.value))
+		if request.vsi:
+			message.addOption(CoAPOption.ONEM2M_VSI, request.vsi)
+		if request.ty:
+			message.addOption(CoAPOption.ONEM2M_TY, int(request.ty))
+		message.addOption(CoAPOption.ACCEPT, _contentFormatsReverse.get(ct, CoAPContentFormat.JSON))
+		if payload:
+			message.addOption(CoAPOption.CONTENT_FORMAT, _contentFormatsReverse.get(ct, CoAPContentFormat.JSON))
+
+		L.isDebug and L.logDebug(f'CoAP Request ==> {codeToString(message.code)} {url} ({message.type.name}):\nOptions: {message.options}\nBody: \n{payload.decode("utf-8", errors = "replace") if ct == ContentSerializationType.JSON else TextTools.toHex(payload)}\n')
+
+		# Send the request, in blocks if necessary
+		if request.rt == ResponseType.noResponse:
+			message.mid = next(self.messageIDs) & 0xffff
+			message.payload = payload
+			self._exchange(message, address, timeout, expectResponse = False)
+			return Result(rsc = ResponseStatusCode.OK, request = request)
+		response = self._sendRequestBlocks(message, address, payload, timeout)
+
+		# Construct CSERequest response object from the result
+		resp = CSERequest(requestType = RequestType.RESPONSE)
+		contentFormat = response.getUintOption(CoAPOption.CONTENT_FORMAT)
+		resp.ct = _contentFormats.get(contentFormat, ct) if contentFormat is not None else ct
+		resp.rsc = ResponseStatusCode(rsc) if (rsc := response.getUintOption(CoAPOption.ONEM2M_RSC)) is not None else ResponseStatusCode.INTERNAL_SERVER_ERROR
+		resp.pc = deserializeData(response.payload, resp.ct, CSE.request.allowJSONComments) if response.payload else None
+		resp.originator = response.getStringOption(CoAPOption.ONEM2M_FR)
+		resp.ot = response.getStringOption(CoAPOption.ONEM2M_OT)
+		if (rqi := response.getStringOption(CoAPOption.ONEM2M_RQI)) != request.rqi:
+			raise BAD_REQUEST(L.logWarn(f'Received wrong or missing request identifier: {rqi}'))
+		resp.rqi = rqi
+
+		L.isDebug and L.logDebug(f'CoAP Response <== ({codeToString(response.code)}):\nOptions: {response.options}\nBody: \n{resp.pc}\n')
+		res = Result(rsc = resp.rsc, data = resp.pc, request = resp)
+		self._eventResponseReceived(resp)
+		return res
+
+
+	def _sendRequestBlocks(self, message:CoAPMessage, address:Tuple[str, int], payload:bytes, timeout:float) -> CoAPMessage:
+		"""	Send a request with its payload, in blocks if necessary, and return the complete response.
+			The blocks of a large response are retrieved as well.
+
+			Args:
+				message: The request without a message ID and payload.
+				address: The (host, port) tuple of the target.
+				payload: The complete payload.
+				timeout: The time in seconds to wait for each response.
+
+			Return:
+				The response with the complete payload.
+
+			Raises:
+				TARGET_NOT_REACHABLE: If the target doesn't acknowledge a message, or resets it.
+				REQUEST_TIMEOUT: If no response was received in time.
+		"""
+		szx = blockSizeToSZX(self.blockSize)
+		size = self.blockSize
+		options = list(message.options)
+
+		# Send the payload in blocks
+		num = 0
+		while True:
+			message.mid = next(self.messageIDs) & 0xffff
+			if len(payload) > size:
+				more = (num + 1) * size < len(payload)
+				message.options = options + [ (CoAPOption.BLOCK1, encodeUint(encodeBlock(num, more, szx))) ]
+				if num == 0:
+					message.addOption(CoAPOption.SIZE1, len(payload))
+				message.payload = payload[num * size:(num + 1) * size]
+			else:
+				more = False
+				message.payload = payload
+			response = self._exchange(message, address, timeout)
+			if response.type == CoAPType.RST:
+				raise TARGET_NOT_REACHABLE(L.logWarn(f'CoAP request reset by: {address}'))
+			if not more:
+				break
+			if response.code != CoAPCode.CONTINUE:
+				return response		# Error response for a block
+			num += 1
+
+		# Retrieve the remaining blocks of the response
+		result = response
+		data = bytearray(response.payload)
+		while (block2 := response.getUintOption(CoAPOption.BLOCK2)) is not None:
+			num, more, responseSzx = decodeBlock(block2)
+			if not more:
+				break
+			message.mid = next(self.messageIDs) & 0xffff
+			message.token = self._newToken()
+			message.options = options + [ (CoAPOption.BLOCK2, encodeUint(encodeBlock(num + 1, False, responseSzx))) ]
+			message.payload = b''
+			response = self._exchange(message, address, timeout)
+			if response.type == CoAPType.RST or not response.isResponse:
+				raise TARGET_NOT_REACHABLE(L.logWarn(f'CoAP block transfer failed with: {address}'))
+			data.extend(response.payload)
+		result.payload = bytes(data)
+		return result
+
+
+	def _getObservation(self, request:CSERequest, address:Tuple[str, int]) -> Optional[CoAPObservation]:
+		"""	Return the observation that a notification belongs to. A notification belongs to an observation
+			if it is sent for a subscription of the observed resource. Verification requests never belong
+			to an observation.
+
+			Args:
+				request: The notification request.
+				address: The (host, port) tuple of the target.
+
+			Return:
+				The client's observation, or None if the notification must be sent as a normal request.
+		"""
+		with self.lock:
+			if not any(each[0] == address for each in self.observations):
+				return None
+		if not (sgn := findXPath(request.pc, 'm2m:sgn')) or sgn.get('vrq') or not (sur := sgn.get('sur')):
+			return None
+		if not (ri := localResourceID(sur)) or not (subscription := CSE.storage.getSubscription(ri)):
+			return None
+		with self.lock:
+			return self.observations.get((address, subscription['pi']))
+
+
+	def _sendObserveNotification(self, request:CSERequest,
+									   address:Tuple[str, int],
+									   observation:CoAPObservation,
+									   ct:ContentSerializationType,
+									   payload:bytes,
+									   timeout:float) -> Result:
+		"""	Send a notification as an observe notification to an observing client. The notification is
+			sent unfragmented, and only its acknowledgement is awaited.
+
+			Args:
+				request: The notification request.
+				address: The (host, port) tuple of the client.
+				observation: The client's observation.
+				ct: The content serialization of the payload.
+				payload: The serialized notification.
+				timeout: The time in seconds to wait for the acknowledgement.
+
+			Return:
+				Result object. The observation is removed when the client resets the notification.
+		"""
+		with self.lock:
+			observation.sequence = (observation.sequence + 1) & 0xffffff
+			sequence = observation.sequence
+		message = CoAPMessage(CoAPType.NON if request.rt == ResponseType.noResponse else CoAPType.CON,
+							  CoAPCode.CONTENT,
+							  next(self.messageIDs) & 0xffff,
+							  observation.token,
+							  payload)
+		message.addOption(CoAPOption.OBSERVE, sequence)
+		message.addOption(CoAPOption.CONTENT_FORMAT, _contentFormatsReverse.get(ct, CoAPContentFormat.JSON))
+		message.addOption(CoAPOption.ONEM2M_FR, toSPRelative(request.originator))
+		message.addOption(CoAPOption.ONEM2M_RQI, request.rqi)
+		message.addOption(CoAPOption.ONEM2M_OT, request.ot if request.ot else getResourceDate())
+		if request.rvi and request.rvi != '1':
+			message.addOption(CoAPOption.ONEM2M_RVI, request.rvi)
+		L.isDebug and L.logDebug(f'CoAP Notification ==> {address} (observe: {sequence}, {message.type.name})')
+
+		try:
+			ack = self._exchange(message, address, timeout, expectResponse = False)
+		except ResponseException:
+			with self.lock:
+				self.observations.pop((address, observation.ri), None)	# Client is gone
+			raise
+		if ack and ack.type == CoAPType.RST:
+			with self.lock:
+				self.observations.pop((address, observation.ri), None)
+			L.isDebug and L.logDebug(f'Removed CoAP observation for: {address} on: {observation.ri}')
+			raise TARGET_NOT_REACHABLE(L.logWarn(f'CoAP notification reset by: {address}'))
+		return Result(rsc = ResponseStatusCode.OK, request = request)
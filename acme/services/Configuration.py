@@ -26,12 +26,17 @@ from ..services import Onboarding
 documentationLinks = {
 	'cse': 'https://github.com/ankraft/ACME-oneM2M-CSE/blob/master/docs/Configuration.md#general',
 	'cse.announcements': 'https://github.com/ankraft/ACME-oneM2M-CSE/blob/master/docs/Configuration.md#announcements',
+	'cse.notification': 'https://github.com/ankraft/ACME-oneM2M-CSE/blob/master/docs/Configuration.md#notification',
 	'cse.operation.jobs': 'https://github.com/ankraft/ACME-oneM2M-CSE/blob/master/docs/Configuration.md#operation_jobs',
+	'cse.operation.asyncio': 'https://github.com/ankraft/ACME-oneM2M-CSE/blob/master/docs/Configuration.md#operation_asyncio',
+	'cse.operation.events': 'https://github.com/ankraft/ACME-oneM2M-CSE/blob/master/docs/Configuration.md#operation_events',
 	'cse.operation.requests': 'https://github.com/ankraft/ACME-oneM2M-CSE/blob/master/docs/Configuration.md#operation_requests',
 	'cse.registrar': 'https://github.com/ankraft/ACME-oneM2M-CSE/blob/master/docs/Configuration.md#registrar',
 	'cse.registration': 'https://github.com/ankraft/ACME-oneM2M-CSE/blob/master/docs/Configuration.md#cse_registration',
 	'cse.security': 'https://github.com/ankraft/ACME-oneM2M-CSE/blob/master/docs/Configuration.md#security',
 	'cse.statistics': 'https://github.com/ankraft/ACME-oneM2M-CSE/blob/master/docs/Configuration.md#statistics',
+	'coap': 'https://github.com/ankraft/ACME-oneM2M-CSE/blob/master/docs/Configuration.md#server_coap',
+	'coap.security': 'https://github.com/ankraft/ACME-oneM2M-CSE/blob/master/docs/Configuration.md#security_coap',
 	'console': 'https://github.com/ankraft/ACME-oneM2M-CSE/blob/master/docs/Configuration.md#console',
 	'database': 'https://github.com/ankraft/ACME-oneM2M-CSE/blob/master/docs/Configuration.md#database',
 	'http': 'https://github.com/ankraft/ACME-oneM2M-CSE/blob/master/docs/Configuration.md#server_http',
@@ -228,6 +233,7 @@ class Configuration(object):
 				#	CSE
 				#
 
+				'cse.allowJSONComments'							: config.getboolean('cse', 'allowJSONComments',						fallback = True),
 				'cse.asyncSubscriptionNotifications'			: config.getboolean('cse', 'asyncSubscriptionNotifications',		fallback = True),
 				'cse.checkExpirationsInterval'					: config.getint('cse', 'checkExpirationsInterval',					fallback = 60),		# Seconds
 				'cse.cseID'										: config.get('cse', 'cseID',										fallback = '/id-in'),
@@ -257,6 +263,20 @@ class Configuration(object):
 				'cse.announcements.checkInterval'					: config.getint('cse.announcements', 'checkInterval',						fallback = 10),
 				'cse.announcements.delayAfterRegistration'			: config.getfloat('cse.announcements', 'delayAfterRegistration',			fallback = 3.0),
 
+				#
+				#	Notifications
+				#
+
+				'cse.notification.circuitBreakerThreshold'	: config.getint('cse.notification', 'circuitBreakerThreshold',		fallback = 5),
+				'cse.notification.circuitBreakerTimeout'	: config.getfloat('cse.notification', 'circuitBreakerTimeout',		fallback = 30.0),	# Seconds
+				'cse.notification.deadLetterSize'			: config.getint('cse.notification', 'deadLetterSize',				fallback = 1000),
+				'cse.notification.enableRetries'			: config.getboolean('cse.notification', 'enableRetries',			fallback = False),
+				'cse.notification.retryInitialDelay'		: config.getfloat('cse.notification', 'retryInitialDelay',			fallback = 1.0),	# Seconds
+				'cse.notification.retryJitter'				: config.getfloat('cse.notification', 'retryJitter',				fallback = 0.2),
+				'cse.notification.retryMaxAttempts'			: config.getint('cse.notification', 'retryMaxAttempts',				fallback = 5),
+				'cse.notification.retryMaxDelay'			: config.getfloat('cse.notification', 'retryMaxDelay',				fallback = 60.0),	# Seconds
+				'cse.notification.timeoutBudget'			: config.getfloat('cse.notification', 'timeoutBudget',				fallback = 10.0),	# Seconds
+
 
 				#
 				#	CSE Operation : Jobs
@@ -265,6 +285,25 @@ class Configuration(object):
 				'cse.operation.jobs.balanceLatency'		: config.getint('cse.operation.jobs', 'jobBalanceLatency', 			fallback = 1000),
 				'cse.operation.jobs.balanceReduceFactor': config.getfloat('cse.operation.jobs', 'jobBalanceReduceFactor', 	fallback = 2.0),
 				'cse.operation.jobs.balanceTarget'		: config.getfloat('cse.operation.jobs', 'jobBalanceTarget',			fallback = 3.0),
+				'cse.operation.jobs.maxJobs'			: config.getint('cse.operation.jobs', 'maxJobs',						fallback = 200),
+				'cse.operation.jobs.queueSize'			: config.getint('cse.operation.jobs', 'queueSize',					fallback = 10000),
+				'cse.operation.jobs.rejectionPolicy'	: config.get('cse.operation.jobs', 'rejectionPolicy',				fallback = 'callerRuns'),
+
+
+				#
+				#	CSE Operation : asyncio
+				#
+
+				'cse.operation.asyncio.enable'			: config.getboolean('cse.operation.asyncio', 'enable',				fallback = False),
+				'cse.operation.asyncio.executorSize'	: config.getint('cse.operation.asyncio', 'executorSize',			fallback = 100),
+
+
+				#
+				#	CSE Operation : Events
+				#
+
+				'cse.operation.events.queueSize'		: config.getint('cse.operation.events', 'queueSize',				fallback = 10000),
+				'cse.operation.events.flushInterval'	: config.getfloat('cse.operation.events', 'flushInterval',			fallback = 1.0),
 
 				#
 				#	CSE Operation : Requests
@@ -272,6 +311,9 @@ class Configuration(object):
 
 				'cse.operation.requests.enable'			: config.getboolean('cse.operation.requests', 'enable',				fallback = False),
 				'cse.operation.requests.size'			: config.getint('cse.operation.requests', 'size', 					fallback = 1000),
+				'cse.operation.requests.coalesceTransitRetrieves'	: config.getboolean('cse.operation.requests', 'coalesceTransitRetrieves',	fallback = True),
+				'cse.operation.requests.transitCacheTTL'			: config.getfloat('cse.operation.requests', 'transitCacheTTL',				fallback = 0.0),	# Seconds
+				'cse.operation.requests.transitPermissionClasses'	: config.getlist('cse.operation.requests', 'transitPermissionClasses',		fallback = []),		# type: ignore [attr-defined]
 
 				#
 				#	Registrar CSE
@@ -374,6 +416,11 @@ class Configuration(object):
 				'http.wsgi.enable'						: config.getboolean('http.wsgi', 'enable', 							fallback = False),
 				'http.wsgi.connectionLimit'				: config.getint('http.wsgi', 'connectionLimit',						fallback = 100),
 				'http.wsgi.threadPoolSize'				: config.getint('http.wsgi', 'threadPoolSize',						fallback = 100),
+				'http.wsgi.leanApp'						: config.getboolean('http.wsgi', 'leanApp',							fallback = False),
+				'http.wsgi.channelTimeout'				: config.getint('http.wsgi', 'channelTimeout',						fallback = 120),
+				'http.wsgi.backlog'						: config.getint('http.wsgi', 'backlog',								fallback = 1024),
+				'http.wsgi.recvBytes'					: config.getint('http.wsgi', 'recvBytes',							fallback = 8192),
+				'http.wsgi.useAsyncorePoll'				: config.getboolean('http.wsgi', 'useAsyncorePoll',					fallback = False),
 
 
 				#
@@ -384,11 +431,13 @@ class Configuration(object):
 				'logging.enableBindingsLogging'			: config.getboolean('logging', 'enableBindingsLogging',				fallback = False),
 				'logging.enableFileLogging'				: config.getboolean('logging', 'enableFileLogging', 				fallback = False),
 				'logging.enableScreenLogging'			: config.getboolean('logging', 'enableScreenLogging', 				fallback = True),
+				'logging.fileFormat'					: config.get('logging', 'fileFormat',								fallback = 'text'),	# Format of the log file: text or json
 				'logging.filter'						: config.getlist('logging', 'filter',								fallback = []),		# type: ignore [attr-defined]
 				'logging.level'							: config.get('logging', 'level', 									fallback = 'debug'),
 				'logging.maxLogMessageLength'			: config.getint('logging', 'maxLogMessageLength',					fallback = 1000),	# Max length of a log message
 				'logging.path'							: config.get('logging', 'path', 									fallback = './logs'),
 				'logging.queueSize'						: config.getint('logging', 'queueSize', 							fallback = 5000),	# Size of the log queue
+				'logging.rateLimit'						: config.getint('logging', 'rateLimit', 							fallback = 0),		# Max log messages per second per source file
 				'logging.size'							: config.getint('logging', 'size', 									fallback = 100000),
 				'logging.stackTraceOnError'				: config.getboolean('logging', 'stackTraceOnError',					fallback = True),
 
@@ -404,6 +453,12 @@ class Configuration(object):
 				'mqtt.port' 							: config.getint('mqtt', 'port', 									fallback = None),	# Default will be determined later (s.b.)
 				'mqtt.timeout' 							: config.getfloat('mqtt', 'timeout',								fallback = 10.0),
 				'mqtt.topicPrefix' 						: config.get('mqtt', 'topicPrefix',									fallback = ''),
+				'mqtt.workerPoolSize'					: config.getint('mqtt', 'workerPoolSize',							fallback = 10),
+				'mqtt.maxQueueSize'						: config.getint('mqtt', 'maxQueueSize',								fallback = 1000),
+				'mqtt.qos'								: config.getint('mqtt', 'qos',										fallback = 0),
+				'mqtt.maxInflightMessages'				: config.getint('mqtt', 'maxInflightMessages',						fallback = 20),
+				'mqtt.maxQueuedMessages'				: config.getint('mqtt', 'maxQueuedMessages',						fallback = 0),
+				'mqtt.notificationNoResponse'			: config.getboolean('mqtt', 'notificationNoResponse',				fallback = False),
 
 				#
 				#	MQTT Client Security
@@ -423,6 +478,10 @@ class Configuration(object):
 				'coap.enable'							: config.getboolean('coap', 'enable', 								fallback = False),
 				'coap.listenIF' 						: config.get('coap', 'listenIF',									fallback = '0.0.0.0'),
 				'coap.port' 							: config.getint('coap', 'port', 									fallback = None),	# Default will be determined later (s.b.)
+				'coap.blockSize'						: config.getint('coap', 'blockSize',								fallback = 1024),
+				'coap.workerPoolSize'					: config.getint('coap', 'workerPoolSize',							fallback = 10),
+				'coap.maxQueueSize'						: config.getint('coap', 'maxQueueSize',								fallback = 1000),
+				'coap.timeout' 							: config.getfloat('coap', 'timeout',								fallback = 10.0),
 
 				#
 				#	CoAP Client Security
@@ -625,6 +684,10 @@ class Configuration(object):
 		# Test for correct logging queue size
 		if (queueSize := Configuration._configuration['logging.queueSize']) < 0:
 			return False, f'Configuration Error: \[logging]:queueSize must be 0 or greater'
+		if _get('logging.rateLimit') < 0:
+			return False, f'Configuration Error: [i]\[logging]:rateLimit[/i] must be 0 or greater'
+		if (val := _get('logging.fileFormat')) not in [ 'text', 'json' ]:
+			return False, f'Configuration Error: [i]\[logging]:fileFormat[/i] must be "text" or "json": {val}'
 
 		# Overwriting some configurations from command line
 		if Configuration._argsDBReset is True:					_put('database.resetOnStartup', True)									# Override DB reset from command line
@@ -673,6 +736,42 @@ class Configuration(object):
 			return False, f'Configuration Error: [i]\[cse.operation.jobs]:balanceLatency[/i] must be >= 0'
 		if _get('cse.operation.jobs.balanceReduceFactor') < 1.0:
 			return False, f'Configuration Error: [i]\[cse.operation.jobs]:balanceReduceFactor[/i] must be >= 1.0'
+		if _get('cse.operation.jobs.maxJobs') < 0:
+			return False, f'Configuration Error: [i]\[cse.operation.jobs]:maxJobs[/i] must be >= 0'
+		if _get('cse.operation.jobs.queueSize') < 1:
+			return False, f'Configuration Error: [i]\[cse.operation.jobs]:queueSize[/i] must be >= 1'
+		if (val := _get('cse.operation.jobs.rejectionPolicy')) not in [ 'callerRuns', 'discard' ]:
+			return False, f'Configuration Error: [i]\[cse.operation.jobs]:rejectionPolicy[/i] must be "callerRuns" or "discard": {val}'
+		if _get('cse.operation.asyncio.executorSize') < 1:
+			return False, f'Configuration Error: [i]\[cse.operation.asyncio]:executorSize[/i] must be >= 1'
+		if _get('cse.operation.events.queueSize') < 1:
+			return False, f'Configuration Error: [i]\[cse.operation.events]:queueSize[/i] must be >= 1'
+		if _get('cse.operation.events.flushInterval') <= 0.0:
+			return False, f'Configuration Error: [i]\[cse.operation.events]:flushInterval[/i] must be > 0.0'
+		if _get('cse.operation.requests.transitCacheTTL') < 0.0:
+			return False, f'Configuration Error: [i]\[cse.operation.requests]:transitCacheTTL[/i] must be >= 0.0'
+		for each in _get('cse.operation.requests.transitPermissionClasses'):
+			permissionClass, _, pattern = each.partition(':')
+			if not permissionClass.strip() or not pattern.strip():
+				return False, f'Configuration Error: [i]\[cse.operation.requests]:transitPermissionClasses[/i] entries must have the format "<class>:<originator pattern>": {each}'
+
+		# Notifications
+		if _get('cse.notification.retryMaxAttempts') < 1:
+			return False, f'Configuration Error: [i]\[cse.notification]:retryMaxAttempts[/i] must be >= 1'
+		if _get('cse.notification.retryInitialDelay') <= 0.0:
+			return False, f'Configuration Error: [i]\[cse.notification]:retryInitialDelay[/i] must be > 0.0'
+		if _get('cse.notification.retryMaxDelay') < _get('cse.notification.retryInitialDelay'):
+			return False, f'Configuration Error: [i]\[cse.notification]:retryMaxDelay[/i] must be >= retryInitialDelay'
+		if not 0.0 <= _get('cse.notification.retryJitter') <= 1.0:
+			return False, f'Configuration Error: [i]\[cse.notification]:retryJitter[/i] must be between 0.0 and 1.0'
+		if _get('cse.notification.circuitBreakerThreshold') < 1:
+			return False, f'Configuration Error: [i]\[cse.notification]:circuitBreakerThreshold[/i] must be >= 1'
+		if _get('cse.notification.circuitBreakerTimeout') <= 0.0:
+			return False, f'Configuration Error: [i]\[cse.notification]:circuitBreakerTimeout[/i] must be > 0.0'
+		if _get('cse.notification.deadLetterSize') < 0:
+			return False, f'Configuration Error: [i]\[cse.notification]:deadLetterSize[/i] must be >= 0'
+		if _get('cse.notification.timeoutBudget') <= 0.0:
+			return False, f'Configuration Error: [i]\[cse.notification]:timeoutBudget[/i] must be > 0.0'
 
 
 		#
@@ -718,11 +817,27 @@ class Configuration(object):
 			return False, 'Configuration Error: [i]\[http.wsgi]:threadPoolSize[/i] must be > 0'
 		if _get('http.wsgi.connectionLimit') < 1:
 			return False, 'Configuration Error: [i]\[http.wsgi]:connectionLimit[/i] must be > 0'
+		if _get('http.wsgi.channelTimeout') < 1:
+			return False, 'Configuration Error: [i]\[http.wsgi]:channelTimeout[/i] must be > 0'
+		if _get('http.wsgi.backlog') < 1:
+			return False, 'Configuration Error: [i]\[http.wsgi]:backlog[/i] must be > 0'
+		if _get('http.wsgi.recvBytes') < 1:
+			return False, 'Configuration Error: [i]\[http.wsgi]:recvBytes[/i] must be > 0'
 
 		
 		#
 		#	MQTT client
 		#
+		if _get('mqtt.workerPoolSize') < 1:
+			return False, 'Configuration Error: [i]\[mqtt]:workerPoolSize[/i] must be > 0'
+		if _get('mqtt.maxQueueSize') < 1:
+			return False, 'Configuration Error: [i]\[mqtt]:maxQueueSize[/i] must be > 0'
+		if _get('mqtt.qos') not in [ 0, 1, 2 ]:
+			return False, 'Configuration Error: [i]\[mqtt]:qos[/i] must be 0, 1 or 2'
+		if _get('mqtt.maxInflightMessages') < 1:
+			return False, 'Configuration Error: [i]\[mqtt]:maxInflightMessages[/i] must be > 0'
+		if _get('mqtt.maxQueuedMessages') < 0:
+			return False, 'Configuration Error: [i]\[mqtt]:maxQueuedMessages[/i] must be >= 0'
 		if not _get('mqtt.port'):	# set the default port depending on whether to use TLS
 			_put('mqtt.port', 8883) if _get('mqtt.security.useTLS') else 1883
 		if not _get('mqtt.security.username') != (not _get('mqtt.security.password')):	# Hack: != -> either both are empty, or both are set
@@ -731,6 +846,21 @@ class Configuration(object):
 		_put('mqtt.security.allowedCredentialIDs', [ cid for cid in _get('mqtt.security.allowedCredentialIDs') if len(cid) ])
 		
 
+		#
+		#	CoAP server
+		#
+		if (val := _get('coap.blockSize')) not in [ 16, 32, 64, 128, 256, 512, 1024 ]:
+			return False, f'Configuration Error: [i]\[coap]:blockSize[/i] must be a power of 2 between 16 and 1024: {val}'
+		if _get('coap.workerPoolSize') < 1:
+			return False, 'Configuration Error: [i]\[coap]:workerPoolSize[/i] must be > 0'
+		if _get('coap.maxQueueSize') < 1:
+			return False, 'Configuration Error: [i]\[coap]:maxQueueSize[/i] must be > 0'
+		if _get('coap.timeout') <= 0:
+			return False, 'Configuration Error: [i]\[coap]:timeout[/i] must be > 0'
+		if not _get('coap.port'):	# set the default port depending on whether to use DTLS
+			_put('coap.port', 5684 if _get('coap.security.useDTLS') else 5683)
+
+
 		# COAP TLS & certificates
 		if not _get('coap.security.useDTLS'):	# clear certificates configuration if not in use
 			_put('coap.security.verifyCertificate', False)
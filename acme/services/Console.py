@@ -257,6 +257,7 @@ class Console(object):
 			'k'					: self.katalogScripts,
 			'l'     			: self.toggleScreenLogging,
 			'L'     			: self.toggleLogging,
+			'n'					: self.notificationTargets,
 			'Q'					: self.shutdownCSE,		# See handler below
 			'r'					: self.registrations,
 			'R'					: self.runScript,
@@ -346,6 +347,7 @@ class Console(object):
 			('^K', 'Show resource continuously'),
 			('l', 'Toggle screen logging on/off'),
 			('L', 'Toggle through log levels'),
+			('n', 'Show notification targets'),
 			('r', 'Show CSE registrations'),
 			('s', 'Show statistics'),
 			('^S', 'Show & refresh statistics continuously'),
@@ -559,6 +561,20 @@ Available under the BSD 3-Clause License
 			L.logErr('', exc = e)
 
 
+	def notificationTargets(self, key:str) -> None:
+		"""	Render the delivery metrics of the notification targets.
+
+			Args:
+				key: Input key. Ignored.
+		"""
+		L.console('Notification Targets', isHeader = True)
+		L.console()
+		try:
+			L.console(self.getNotificationTargetsRich())
+		except Exception as e:
+			L.logErr('', exc = e)
+
+
 	def statistics(self, key:str) -> None:
 		""" Render various statistics & counts.
 
@@ -979,6 +995,33 @@ Available under the BSD 3-Clause License
 	#	Generators for rich output
 	#
 
+	def getNotificationTargetsRich(self) -> Table:
+		"""	Create and return an overview about the delivery metrics of the notification targets.
+
+			Return:
+				Rich Table object.
+		"""
+		table = Table(row_styles = [ '', L.tableRowStyle], box = None, expand = True)
+		table.add_column(_markup('[u]Target[/u]\n'), no_wrap = False)
+		table.add_column(_markup('[u]Available[/u]\n'), no_wrap = True)
+		table.add_column(_markup('[u]Delivered[/u]\n'), no_wrap = True, justify = 'right')
+		table.add_column(_markup('[u]Failed[/u]\n'), no_wrap = True, justify = 'right')
+		table.add_column(_markup('[u]Rejected[/u]\n'), no_wrap = True, justify = 'right')
+		table.add_column(_markup('[u]Retries[/u]\n'), no_wrap = True, justify = 'right')
+		table.add_column(_markup('[u]Dead Letters[/u]\n'), no_wrap = True, justify = 'right')
+		table.add_column(_markup('[u]Replayed[/u]\n'), no_wrap = True, justify = 'right')
+		for nu, metrics in sorted(CSE.notification.getNotificationTargetStatistics().items()):
+			table.add_row(nu,
+						  str(metrics['available']),
+						  str(metrics['delivered']),
+						  str(metrics['failed']),
+						  str(metrics['rejected']),
+						  str(metrics['retries']),
+						  str(metrics['deadLetters']),
+						  str(metrics['replayed']))
+		return table
+
+
 	def getRegistrationsRich(self) -> Table:
 		"""	Create and return an overview about the registrar, registrees, and
 			descendant CSE's.
@@ -1106,6 +1149,14 @@ Available under the BSD 3-Clause License
 			#
 
 			stats = CSE.statistics.getStats()
+			requestMetrics = CSE.statistics.getRequestMetrics()
+
+			def _transportMetrics(transport:str) -> str:
+				metrics = [ m for (t, _), m in requestMetrics.items() if t == transport ]
+				p99 = max([ m['p99'] for m in metrics ], default = 0.0)
+				return (f'\n'
+						f'/s  : {sum([ m["rate"] for m in metrics ]):.1f}\n'
+						f'p99 : {"-" if not metrics else ">10s" if p99 == float("inf") else f"{p99 * 1000:.0f}ms"}\n')
 
 			if CSE.statistics.statisticsEnabled:
 				resourceOps  =  _markup('[underline]Operations[/underline]\n')
@@ -1123,6 +1174,7 @@ Available under the BSD 3-Clause License
 				httpReceived += f'R : {stats.get(Statistics.httpRetrieves, 0)}\n'
 				httpReceived += f'U : {stats.get(Statistics.httpUpdates, 0)}\n'
 				httpReceived += f'D : {stats.get(Statistics.httpDeletes, 0)}\n'
+				httpReceived += _transportMetrics('http')
 
 				httpSent  = 	_markup('[underline]HTTP:S[/underline]\n')
 				httpSent += 	'\n'
@@ -1137,6 +1189,7 @@ Available under the BSD 3-Clause License
 				mqttReceived += f'R : {stats.get(Statistics.mqttRetrieves, 0)}\n'
 				mqttReceived += f'U : {stats.get(Statistics.mqttUpdates, 0)}\n'
 				mqttReceived += f'D : {stats.get(Statistics.mqttDeletes, 0)}\n'
+				mqttReceived += _transportMetrics('mqtt')
 
 				mqttSent  = 	_markup('[underline]MQTT:S[/underline]\n')
 				mqttSent += 	'\n'
@@ -1151,6 +1204,7 @@ Available under the BSD 3-Clause License
 				logs += f'LogLevel : {str(L.logLevel)}\n'
 				logs += f'Errors   : {stats.get(Statistics.logErrors, 0)}\n'
 				logs += f'Warnings : {stats.get(Statistics.logWarnings, 0)}\n'
+				logs += f'Dropped  : {L.droppedQueueFull + L.droppedRateLimit}\n'
 
 			else:
 				resourceOps  = _markup('\n[dim]statistics are disabled[/dim]\n')
@@ -1204,9 +1258,19 @@ Available under the BSD 3-Clause License
 			tableThreads = Table(row_styles = [ '', L.tableRowStyle], box = None)
 			tableThreads.add_column(_markup('[u]Thread Queues\n[/u]'), no_wrap = True)
 			tableThreads.add_column(_markup('[u]Count\n[/u]'), no_wrap = True)
-			r, p = BackgroundWorkerPool.countJobs()
-			tableThreads.add_row('Running', str(r))
-			tableThreads.add_row('Paused', str(p))
+			jobStats = BackgroundWorkerPool.getJobStatistics()
+			tableThreads.add_row('Running', f'{jobStats["running"]}/{jobStats["maxJobs"]}' if jobStats['maxJobs'] else str(jobStats['running']))
+			tableThreads.add_row('Paused', str(jobStats['paused']))
+			tableThreads.add_row('Queued', str(jobStats['queued']))
+			tableThreads.add_row('Rejected', str(jobStats['rejected']))
+			tableThreads.add_row('Wait p99 (ms)', f'{jobStats["queueWaitP99"] * 1000:.1f}')
+			eventStats = CSE.event.getEventStatistics()
+			tableThreads.add_row('Event Backlog', str(CSE.event.getQueueSize()))
+			tableThreads.add_row('Event p99 (ms)', f'{max([ e["latencyP99"] for e in eventStats.values() ], default = 0.0) * 1000:.1f}')
+			if CSE.mqttClient and (mqttStats := CSE.mqttClient.getStatistics()):
+				tableThreads.add_row('MQTT Queued', str(mqttStats['queued']))
+				tableThreads.add_row('MQTT Rejected', str(mqttStats['rejected']))
+				tableThreads.add_row('MQTT p99 (ms)', f'{mqttStats["latencyP99"] * 1000:.1f}')
 
 			requestsGrid = Table.grid(expand = True)
 			requestsGrid.add_column(ratio = 28)
@@ -8,9 +8,12 @@
 #
 
 from __future__ import annotations
-from typing import Any, Callable, cast, Optional
+from typing import Any, Callable, cast, Iterable, Optional, Tuple
 
-import logging, sys, urllib3, re
+import logging, sys, urllib3, re, io, asyncio
+from threading import local
+from time import perf_counter
+from urllib.parse import unquote_to_bytes
 from copy import deepcopy
 
 import flask
@@ -18,11 +21,16 @@ from flask import Flask, Request, request
 
 from werkzeug.wrappers import Response
 from werkzeug.serving import WSGIRequestHandler
-from werkzeug.datastructures import MultiDict
 from waitress import serve
 from flask_cors import CORS
 import requests
 import isodate
+try:
+	import aiohttp
+	from aiohttp import web
+	from multidict import CIMultiDict
+except ImportError:
+	aiohttp = None	# type:ignore[assignment]	# asyncio mode is not available
 
 from ..etc.Constants import Constants
 from ..etc.Types import ReqResp, RequestType, Result, ResponseStatusCode, JSON
@@ -31,9 +39,10 @@ from ..etc.ResponseStatusCodes import INTERNAL_SERVER_ERROR, BAD_REQUEST, REQUES
 from ..etc.Utils import exceptionToResult, renameThread, uniqueRI, toSPRelative, removeNoneValuesFromDict,isURL
 from ..helpers.TextTools import findXPath
 from ..etc.DateUtils import timeUntilAbsRelTimestamp, getResourceDate, rfc1123Date
-from ..etc.RequestUtils import toHttpUrl, serializeData, deserializeData, requestFromResult
+from ..etc.RequestUtils import toHttpUrl, serializeData, deserializeData, contentFromResult
 from ..helpers.NetworkTools import isTCPPortAvailable
 from ..services.Configuration import Configuration
+from ..services.RequestManager import PollingPending
 from ..services import CSE
 from ..webui.webUI import WebUI
 from ..helpers import TextTools as TextTools
@@ -50,6 +59,22 @@ FlaskHandler = 	Callable[[str], Response]
 """ Type definition for flask handler. """
 
 
+_requestHeaders:dict[str, str] = {
+	Constants.hfOrigin.lower():	'fr',
+	Constants.hfRI.lower():		'rqi',
+	Constants.hfRET.lower():	'rqet',
+	Constants.hfRST.lower():	'rset',
+	Constants.hfOET.lower():	'oet',
+	Constants.hfRVI.lower():	'rvi',
+	Constants.hfVSI.lower():	'vsi',
+	Constants.hfOT.lower():		'ot',
+}
+"""	Mapping of the lower-case names of the http headers to the request attributes. The *X-M2M-RTU* header is handled separately. """
+
+_multipleArguments = frozenset(( 'ty', 'cty', 'lbl', 'atrl' ))
+"""	Request arguments that could occur multiple times, and whose values could be space separated lists. """
+
+
 
 #########################################################################
 #
@@ -76,11 +101,22 @@ class HttpServer(object):
 		'wsgiEnable',
 		'wsgiThreadPoolSize',
 		'wsgiConnectionLimit',
+		'wsgiLeanApp',
+		'wsgiChannelTimeout',
+		'wsgiBacklog',
+		'wsgiRecvBytes',
+		'wsgiUseAsyncorePoll',
+		'leanHandlers',
+		'leanReservedPaths',
 		'backgroundActor',
 		'serverID',
 		'_responseHeaders',
 		'webui',
 		'httpActor',
+		'asyncEnable',
+		'asyncRunner',
+		'asyncClientSession',
+		'pendingPolling',
 
 		'_eventHttpRetrieve',
 		'_eventHttpCreate',
@@ -105,6 +141,14 @@ class HttpServer(object):
 		self.isStopped					 = False
 		self.backgroundActor:BackgroundWorker = None
 
+		# Use the asyncio event loop for the http server and client, if enabled and available
+		self.asyncEnable		= CSE.asyncLoop is not None and aiohttp is not None
+		self.asyncRunner:web.AppRunner = None
+		self.asyncClientSession:aiohttp.ClientSession = None
+		self.pendingPolling		= local()	# Per-thread pending long-polling request of the asyncio server
+		if CSE.asyncLoop is not None and aiohttp is None:
+			L.logWarn('asyncio mode is enabled, but the "aiohttp" package is not installed. HTTP server and client run in threading mode.')
+
 		self.serverID			= f'ACME {Constants.version}' 	# The server's ID for http response headers
 		self._responseHeaders	= {'Server' : self.serverID}	# Additional headers for other requests
 
@@ -152,6 +196,9 @@ class HttpServer(object):
 		if Configuration.get('http.allowPatchForDelete'):
 			self.addEndpoint(self.rootPath + '/<path:path>', handler = self.handlePATCH, methods = ['PATCH'])
 
+		# Prepare the dispatching of the lean WSGI application
+		self._prepareLeanWSGIApp()
+
 		# Disable most logs from requests and urllib3 library 
 		logging.getLogger("requests").setLevel(LogLevel.WARNING)
 		logging.getLogger("urllib3").setLevel(LogLevel.WARNING)
@@ -186,6 +233,11 @@ class HttpServer(object):
 		self.wsgiEnable			= Configuration.get('http.wsgi.enable')
 		self.wsgiThreadPoolSize	= Configuration.get('http.wsgi.threadPoolSize')
 		self.wsgiConnectionLimit= Configuration.get('http.wsgi.connectionLimit')
+		self.wsgiLeanApp		= Configuration.get('http.wsgi.leanApp')
+		self.wsgiChannelTimeout	= Configuration.get('http.wsgi.channelTimeout')
+		self.wsgiBacklog		= Configuration.get('http.wsgi.backlog')
+		self.wsgiRecvBytes		= Configuration.get('http.wsgi.recvBytes')
+		self.wsgiUseAsyncorePoll= Configuration.get('http.wsgi.useAsyncorePoll')
 
 
 	def configUpdate(self, name:str, 
@@ -210,6 +262,11 @@ class HttpServer(object):
 						'http.wsgi.enable',
 						'http.wsgi.threadPoolSize',
 						'http.wsgi.connectionLimit',
+						'http.wsgi.leanApp',
+						'http.wsgi.channelTimeout',
+						'http.wsgi.backlog',
+						'http.wsgi.recvBytes',
+						'http.wsgi.useAsyncorePoll',
 						'http.security.enableBasicAuth',
 						'http.security.enableTokenAuth',
 						'mqtt.security.password'
@@ -234,6 +291,11 @@ class HttpServer(object):
 		"""
 		L.isInfo and L.log('HttpServer shut down')
 		self.isStopped = True
+		if self.asyncEnable and CSE.asyncLoop.isRunning():
+			try:
+				CSE.asyncLoop.run(self._stopAsyncServer(), timeout = 5.0)
+			except Exception as e:
+				L.logWarn(f'Error stopping asyncio HTTP server: {str(e)}')
 		return True
 	
 
@@ -263,13 +325,23 @@ class HttpServer(object):
 			cli.show_server_banner = lambda *x: None 	# type: ignore
 			# Start the server
 			try:
-				if self.wsgiEnable:
+				if self.asyncEnable:
+					# Start the server in the asyncio event loop. This call returns when the server is listening.
+					CSE.asyncLoop.run(self._startAsyncServer())
+					L.isInfo and L.log(f'HTTP server listening on {self.listenIF}:{self.port} (asyncio)')
+				elif self.wsgiEnable:
 					L.isInfo and L.log(f'HTTP server listening on {self.listenIF}:{self.port} (wsgi)')
-					serve(self.flaskApp, 
+					if self.wsgiLeanApp and self.corsEnable:
+						L.logWarn('CORS is enabled. The lean WSGI application is not used.')
+					serve(self._leanWSGIApp if self.wsgiLeanApp and not self.corsEnable else self.flaskApp, 
 		   				  host = self.listenIF, 
 						  port = self.port, 
 						  threads = self.wsgiThreadPoolSize, 
-						  connection_limit = self.wsgiConnectionLimit)
+						  connection_limit = self.wsgiConnectionLimit,
+						  channel_timeout = self.wsgiChannelTimeout,
+						  backlog = self.wsgiBacklog,
+						  recv_bytes = self.wsgiRecvBytes,
+						  asyncore_use_poll = self.wsgiUseAsyncorePoll)
 				else:
 					L.isInfo and L.log(f'HTTP server listening on {self.listenIF}:{self.port} (flask http)')
 					self.flaskApp.run(host = self.listenIF, 
@@ -293,6 +365,239 @@ class HttpServer(object):
 				CSE.shutdown() # exit the CSE. Cleanup happens in the CSE atexit() handler
 
 
+	def _prepareLeanWSGIApp(self) -> None:
+		"""	Assign the request handlers for the http methods, and the paths of all other Flask endpoints, 
+			for the lean WSGI application. This must be called after all endpoints have been added.
+		"""
+		self.leanHandlers:dict[str, Callable[[str, Request], Response]] = {
+			'GET':		self.handleGET,
+			'POST':		self.handlePOST,
+			'PUT':		self.handlePUT,
+			'DELETE':	self.handleDELETE,
+		}
+		if self.allowPatchForDelete:
+			self.leanHandlers['PATCH'] = self.handlePATCH
+		self.leanReservedPaths = tuple(f'{_p}/'
+									   for r in self.flaskApp.url_map.iter_rules() 
+									   if r.endpoint not in ( 'handleGET', 'handlePOST', 'handlePUT', 'handleDELETE', 'handlePATCH' ) and
+									   	  (_p := r.rule.split('<', 1)[0].rstrip('/')))
+
+
+	def _leanWSGIApp(self, environ:dict[str, Any], startResponse:Callable) -> Iterable[bytes]:
+		"""	A lean WSGI application that dispatches oneM2M requests directly to the request handlers,
+			without Flask's routing and request context. All other requests, for example for the web UI, 
+			are passed on to the Flask application.
+
+			Args:
+				environ: The WSGI environment.
+				startResponse: The WSGI *start_response* callable.
+
+			Return:
+				The response body.
+		"""
+		if (handler := self.leanHandlers.get(environ.get('REQUEST_METHOD'))):
+			# Use the request's decoded path. PATH_INFO of the environment is latin-1 decoded
+			path = (httpRequest := Request(environ)).path
+			if path.startswith(self.rootPath + '/') and \
+			   len(path) > len(self.rootPath) + 1 and \
+			   not f'{path}/'.startswith(self.leanReservedPaths):
+				try:
+					response = handler(path[len(self.rootPath) + 1:], httpRequest)
+				except Exception as e:
+					L.logErr(f'Error handling http request: {str(e)}', exc = e)
+					response = Response(status = 500)
+				return response(environ, startResponse)
+		return self.flaskApp.wsgi_app(environ, startResponse)
+
+
+	#########################################################################
+	#
+	#	asyncio HTTP server
+	#
+
+	async def _startAsyncServer(self) -> None:
+		"""	Start the aiohttp server in the asyncio event loop. 
+
+			All requests are passed to the WSGI application, which runs in the bounded executor 
+			of the event loop.
+		"""
+		app = web.Application(client_max_size = 0)	# No limit, as with the other http servers
+		app.router.add_route('*', '/{tail:.*}', self._handleAsyncRequest)
+		self.asyncRunner = web.AppRunner(app, access_log = None)
+		await self.asyncRunner.setup()
+		await web.TCPSite(self.asyncRunner, 
+						  self.listenIF, 
+						  self.port, 
+						  ssl_context = CSE.security.getSSLContext()).start()
+
+
+	async def _stopAsyncServer(self) -> None:
+		"""	Stop the aiohttp server and close the client session.
+		"""
+		if self.asyncClientSession:
+			await self.asyncClientSession.close()
+			self.asyncClientSession = None
+		if self.asyncRunner:
+			await self.asyncRunner.cleanup()
+			self.asyncRunner = None
+
+
+	async def _handleAsyncRequest(self, httpRequest:web.Request) -> web.Response:
+		"""	Handle a request that was received by the aiohttp server.
+
+			The request is converted to a WSGI request and handled by the WSGI application in the 
+			bounded executor of the event loop.
+
+			Long-polling requests don't block a thread of the executor while they wait for a request. 
+			Instead, they are awaited asynchronously, and then only the remaining steps of the request 
+			processing are done.
+
+			Args:
+				httpRequest: The aiohttp request.
+
+			Return:
+				The aiohttp response.
+		"""
+		environ = self._wsgiEnviron(httpRequest, await httpRequest.read())
+		response = await CSE.asyncLoop.runBlocking(self._callWSGIApp, environ)
+		if isinstance(response, PollingPending):
+			await CSE.request.awaitPollingRequest(response.originator, response.remainingTime())
+			response = await CSE.asyncLoop.runBlocking(self._resumeWSGIApp, environ, response)
+		status, headers, content = response
+		return web.Response(body = content, 
+							status = int(status.split(' ', 1)[0]), 
+							headers = [ (k, v) for k, v in headers if k.lower() not in ('content-length', 'transfer-encoding') ])
+
+
+	def _wsgiEnviron(self, httpRequest:web.Request, body:bytes) -> dict[str, Any]:
+		"""	Build a WSGI environment from an aiohttp request.
+
+			Args:
+				httpRequest: The aiohttp request.
+				body: The request body.
+
+			Return:
+				The WSGI environment.
+		"""
+		environ:dict[str, Any] = {
+			'REQUEST_METHOD': httpRequest.method,
+			'SCRIPT_NAME': '',
+			'PATH_INFO': unquote_to_bytes(httpRequest.rel_url.raw_path).decode('latin-1'),
+			'QUERY_STRING': httpRequest.query_string,
+			'CONTENT_TYPE': httpRequest.headers.get('Content-Type', ''),
+			'CONTENT_LENGTH': str(len(body)),
+			'SERVER_NAME': httpRequest.host.split(':', 1)[0],
+			'SERVER_PORT': str(self.port),
+			'SERVER_PROTOCOL': f'HTTP/{httpRequest.version.major}.{httpRequest.version.minor}',
+			'REMOTE_ADDR': httpRequest.remote or '',
+			'wsgi.version': (1, 0),
+			'wsgi.url_scheme': httpRequest.scheme,
+			'wsgi.input': io.BytesIO(body),
+			'wsgi.errors': sys.stderr,
+			'wsgi.multithread': True,
+			'wsgi.multiprocess': False,
+			'wsgi.run_once': False,
+		}
+		for name, value in httpRequest.headers.items():
+			if (key := f'HTTP_{name.upper().replace("-", "_")}') in ('HTTP_CONTENT_TYPE', 'HTTP_CONTENT_LENGTH'):
+				continue
+			environ[key] = f'{environ[key]},{value}' if key in environ else value
+		return environ
+
+
+	def _callWSGIApp(self, environ:dict[str, Any]) -> Tuple[str, list[Tuple[str, str]], bytes]|PollingPending:
+		"""	Call the WSGI application with a WSGI environment. The lean WSGI application is used
+			under the same conditions as for the waitress server.
+
+			Long-polling requests don't block. Instead, their `PollingPending` object is returned.
+
+			Args:
+				environ: The WSGI environment.
+
+			Return:
+				Tuple (status line, list of headers, body), or the `PollingPending` object of a long-polling request.
+		"""
+		self.pendingPolling.pending = None
+		with CSE.request.asyncPolling():
+			response = self._runWSGIApp(self._leanWSGIApp if self.wsgiLeanApp and not self.corsEnable else self.flaskApp.wsgi_app, environ)
+		if (pending := self.pendingPolling.pending):
+			self.pendingPolling.pending = None
+			return pending
+		return response
+
+
+	def _resumeWSGIApp(self, environ:dict[str, Any], pending:PollingPending) -> Tuple[str, list[Tuple[str, str]], bytes]:
+		"""	Complete a long-polling request after it has been awaited asynchronously.
+
+			Args:
+				environ: The WSGI environment of the request.
+				pending: The `PollingPending` object of the request.
+
+			Return:
+				Tuple (status line, list of headers, body).
+		"""
+		response = pending.resume()
+		if not self.wsgiLeanApp or self.corsEnable:
+			# Apply flask's response processing, e.g. the CORS headers
+			with self.flaskApp.request_context(environ):
+				response = self.flaskApp.process_response(response)
+		return self._runWSGIApp(response, environ)
+
+
+	def _runWSGIApp(self, app:Callable, environ:dict[str, Any]) -> Tuple[str, list[Tuple[str, str]], bytes]:
+		"""	Call a WSGI application and collect its response.
+
+			Args:
+				app: The WSGI application.
+				environ: The WSGI environment.
+
+			Return:
+				Tuple (status line, list of headers, body).
+		"""
+		response:dict[str, Any] = {}
+		def startResponse(status:str, headers:list[Tuple[str, str]], excInfo:Any = None) -> Callable:
+			response['status'] = status
+			response['headers'] = headers
+			return lambda data: None
+		result = app(environ, startResponse)
+		try:
+			content = b''.join(result)
+		finally:
+			if hasattr(result, 'close'):
+				result.close()
+		return response['status'], response['headers'], content
+
+
+	async def _sendAsyncHttpRequest(self, method:str, 
+										  url:str, 
+										  data:Optional[str|bytes], 
+										  headers:dict[str, str], 
+										  timeout:float) -> Tuple[int, CIMultiDict, bytes]:
+		"""	Send an http request with the aiohttp client in the asyncio event loop.
+
+			The client session, and with it the connection pool, is shared by all requests.
+
+			Args:
+				method: The http method.
+				url: The target URL.
+				data: The request body.
+				headers: The request headers.
+				timeout: The request timeout in seconds.
+
+			Return:
+				Tuple (status code, response headers, response body).
+		"""
+		if not self.asyncClientSession:
+			self.asyncClientSession = aiohttp.ClientSession()
+		async with self.asyncClientSession.request(method, 
+												   url, 
+												   data = data, 
+												   headers = headers, 
+												   ssl = None if CSE.security.verifyCertificateHttp else False,
+												   timeout = aiohttp.ClientTimeout(total = timeout)) as response:
+			return response.status, CIMultiDict(response.headers), await response.read()
+
+
 	def addEndpoint(self, endpoint:Optional[str] = None, 
 						  endpoint_name:Optional[str] = None, 
 						  handler:Optional[FlaskHandler] = None, 
@@ -301,16 +606,17 @@ class HttpServer(object):
 		self.flaskApp.add_url_rule(endpoint, endpoint_name, handler, methods = methods, strict_slashes = strictSlashes)
 
 
-	def _handleRequest(self, path:str, operation:Operation) -> Response:
+	def _handleRequest(self, path:str, operation:Operation, httpRequest:Request) -> Response:
 		"""	Get and check all the necessary information from the request and
 			build the internal strutures. Then, depending on the operation,
 			call the associated request handler.
 		"""
-		L.isDebug and L.logDebug(f'==> HTTP Request: {path}') 	# path = request.path  w/o the root
-		L.isDebug and L.logDebug(f'Operation: {operation.name}')
-		L.isDebug and L.logDebug(f'Headers: \n{str(request.headers).rstrip()}')
+		startTs = perf_counter()
+		L.isDebug and L.logDebug('==> HTTP Request: %s', path) 	# path = request.path  w/o the root
+		L.isDebug and L.logDebug('Operation: %s', operation.name)
+		L.isDebug and L.logDebug('Headers: \n%s', httpRequest.headers)
 		try:
-			dissectResult = self._dissectHttpRequest(request, operation, path)
+			dissectResult = self._dissectHttpRequest(httpRequest, operation, path)
 		except ResponseException as e:
 			dissectResult = Result(rsc = e.rsc, request = e.data, dbg = e.dbg)
 
@@ -318,14 +624,14 @@ class HttpServer(object):
 		# log Body, if there is one
 		if operation in [ Operation.CREATE, Operation.UPDATE, Operation.NOTIFY ] and dissectResult.request.originalData:
 			if dissectResult.request.ct == ContentSerializationType.JSON:
-				L.isDebug and L.logDebug(f'Body: \n{str(dissectResult.request.originalData)}')
+				L.isDebug and L.logDebug('Body: \n%s', dissectResult.request.originalData)
 			else:
-				L.isDebug and L.logDebug(f'Body: \n{TextTools.toHex(cast(bytes, dissectResult.request.originalData))}\n=>\n{dissectResult.request.pc}')
+				L.isDebug and L.logDebug('Body: \n%s\n=>\n%s', TextTools.toHex(cast(bytes, dissectResult.request.originalData)), dissectResult.request.pc)
 
 		# Send and error message when the CSE is shutting down, or the http server is stopped
 		if self.isStopped:
 			# Return an error if the server is stopped
-
+			CSE.statistics.recordRequest('http', operation, perf_counter() - startTs)
 			return self._prepareResponse(Result(rsc = ResponseStatusCode.INTERNAL_SERVER_ERROR, 
 												request = dissectResult.request, 
 												dbg = 'http server not running'))
@@ -333,63 +639,89 @@ class HttpServer(object):
 		if dissectResult.rsc != ResponseStatusCode.UNKNOWN:	# any other value right now indicates an error condition
 			# Something went wrong during dissection
 			CSE.request.recordRequest(dissectResult.request, dissectResult)
+			CSE.statistics.recordRequest('http', operation, perf_counter() - startTs)
 			return self._prepareResponse(dissectResult)
 
+		return self._handleAndPrepareResponse(lambda: CSE.request.handleRequest(dissectResult.request), dissectResult.request, operation, startTs)
+
+
+	def _handleAndPrepareResponse(self, handler:Callable[[], Result], 
+										request:CSERequest, 
+										operation:Operation, 
+										startTs:float) -> Response:
+		"""	Call a request handler and prepare the response for its result.
+
+			The `PollingPending` object of a long-polling request is stored for the asyncio server, which
+			resumes the request later. The returned response is then only a placeholder.
+
+			Args:
+				handler: Callable that handles the request.
+				request: The dissected request.
+				operation: The request's operation.
+				startTs: The start time of the request processing.
+
+			Return:
+				The response.
+		"""
 		try:
-			responseResult = CSE.request.handleRequest(dissectResult.request)
+			responseResult = handler()
 		except Exception as e:
 			responseResult = exceptionToResult(e)
-		# L.inspect(responseResult)
-		return self._prepareResponse(responseResult, dissectResult.request)
+		if (pending := responseResult.pending):
+			pending.wrap(lambda resume: self._handleAndPrepareResponse(resume, request, operation, startTs))
+			self.pendingPolling.pending = pending
+			return Response(status = 202)
+		CSE.statistics.recordRequest('http', operation, perf_counter() - startTs)
+		return self._prepareResponse(responseResult, request)
 
 
-	def handleGET(self, path:Optional[str] = None) -> Response:
-		if not self.handleAuthentication():
+	def handleGET(self, path:Optional[str] = None, httpRequest:Request = request) -> Response:
+		if not self.handleAuthentication(httpRequest):
 			return Response(status = 401)
 		renameThread('HTRE')
 		self._eventHttpRetrieve()
-		return self._handleRequest(path, Operation.RETRIEVE)
+		return self._handleRequest(path, Operation.RETRIEVE, httpRequest)
 
 
-	def handlePOST(self, path:Optional[str] = None) -> Response:
-		if not self.handleAuthentication():
+	def handlePOST(self, path:Optional[str] = None, httpRequest:Request = request) -> Response:
+		if not self.handleAuthentication(httpRequest):
 			return Response(status = 401)
-		if self._hasContentType():
+		if self._hasContentType(httpRequest):
 			renameThread('HTCR')
 			self._eventHttpCreate()
-			return self._handleRequest(path, Operation.CREATE)
+			return self._handleRequest(path, Operation.CREATE, httpRequest)
 		else:
 			renameThread('HTNO')
 			self._eventNotify()
-			return self._handleRequest(path, Operation.NOTIFY)
+			return self._handleRequest(path, Operation.NOTIFY, httpRequest)
 
 
-	def handlePUT(self, path:Optional[str] = None) -> Response:
-		if not self.handleAuthentication():
+	def handlePUT(self, path:Optional[str] = None, httpRequest:Request = request) -> Response:
+		if not self.handleAuthentication(httpRequest):
 			return Response(status = 401)
 		renameThread('HTUP')
 		self._eventHttpUpdate()
-		return self._handleRequest(path, Operation.UPDATE)
+		return self._handleRequest(path, Operation.UPDATE, httpRequest)
 
 
-	def handleDELETE(self, path:Optional[str] = None) -> Response:
-		if not self.handleAuthentication():
+	def handleDELETE(self, path:Optional[str] = None, httpRequest:Request = request) -> Response:
+		if not self.handleAuthentication(httpRequest):
 			return Response(status = 401)
 		renameThread('HTDE')
 		self._eventHttpDelete()
-		return self._handleRequest(path, Operation.DELETE)
+		return self._handleRequest(path, Operation.DELETE, httpRequest)
 
 
-	def handlePATCH(self, path:Optional[str] = None) -> Response:
+	def handlePATCH(self, path:Optional[str] = None, httpRequest:Request = request) -> Response:
 		"""	Support instead of DELETE for http/1.0.
 		"""
-		if not self.handleAuthentication():
+		if not self.handleAuthentication(httpRequest):
 			return Response(status = 401)
-		if request.environ.get('SERVER_PROTOCOL') != 'HTTP/1.0':
+		if httpRequest.environ.get('SERVER_PROTOCOL') != 'HTTP/1.0':
 			return Response(L.logWarn('PATCH method is only allowed for HTTP/1.0. Rejected.'), status = 405)
 		renameThread('HTDE')
 		self._eventHttpDelete()
-		return self._handleRequest(path, Operation.DELETE)
+		return self._handleRequest(path, Operation.DELETE, httpRequest)
 
 
 	#########################################################################
@@ -489,6 +821,10 @@ class HttpServer(object):
 
 	def sendHttpRequest(self, request:CSERequest, url:str) -> Result:
 		"""	Send an http request.
+
+			In asyncio mode the request is sent by the aiohttp client in the event loop, which shares the 
+			connections of all requests. The calling thread still waits for the response, so each outstanding 
+			request or notification occupies a thread as before.
 		
 			The result is returned in *Result.data*.
 		"""
@@ -569,10 +905,12 @@ class HttpServer(object):
 		# Get request timeout
 		timeout = self.requestTimeout if timeout is None else timeout
 
-		# serialize data (only if dictionary, pass on non-dict data)
+		# serialize data (only if dictionary, pass on non-dict data).
+		# Use an already serialized content if available, e.g. for notifications.
 		data = None
 		if request.op in [ Operation.CREATE, Operation.UPDATE, Operation.NOTIFY ]:
-			data = serializeData(content, ct)
+			if not request._pcSerializer or (data := request._pcSerializer(ct)) is None:
+				data = serializeData(content, ct)
 		# elif content and not raw:
 		elif content:
 			raise INTERNAL_SERVER_ERROR(L.logErr(f'Operation: {request.op.name} doesn\'t allow content'))
@@ -580,40 +918,45 @@ class HttpServer(object):
 		# ! Don't forget: requests are done through the request library, not flask.
 		# ! The attribute names are different
 		try:
-			L.isDebug and L.logDebug(f'Sending request: {method.__name__.upper()} {url}')
+			L.isDebug and L.logDebug('Sending request: %s %s', method.__name__.upper(), url)
 			if ct == ContentSerializationType.CBOR:
-				L.isDebug and L.logDebug(f'HTTP Request ==>:\nHeaders: {hds}\nBody: \n{self._prepContent(data, ct)}\n=>\n{str(data) if data else ""}\n')
+				L.isDebug and L.logDebug('HTTP Request ==>:\nHeaders: %s\nBody: \n%s\n=>\n%s\n', hds, self._prepContent(data, ct), data if data else '')
 			else:
-				L.isDebug and L.logDebug(f'HTTP Request ==>:\nHeaders: {hds}\nBody: \n{self._prepContent(data, ct)}\n')
+				L.isDebug and L.logDebug('HTTP Request ==>:\nHeaders: %s\nBody: \n%s\n', hds, self._prepContent(data, ct))
 			
 			# Actual sending the request
-			r = method(url, 
-					   data = data,
-					   headers = hds,
-					   verify = CSE.security.verifyCertificateHttp,
-					   timeout = timeout)
+			if self.asyncEnable:
+				# The calling thread waits for the response, because the request processing is synchronous
+				statusCode, rHeaders, rContent = CSE.asyncLoop.run(self._sendAsyncHttpRequest(method.__name__.upper(), url, data, hds, timeout))
+			else:
+				r = method(url, 
+						   data = data,
+						   headers = hds,
+						   verify = CSE.security.verifyCertificateHttp,
+						   timeout = timeout)
+				statusCode, rHeaders, rContent = r.status_code, r.headers, r.content
 
 			# Construct CSERequest response object from the result
 			resp = CSERequest(requestType = RequestType.RESPONSE)
-			resp.ct = ContentSerializationType.getType(r.headers['Content-Type']) if 'Content-Type' in r.headers else ct
-			resp.rsc = ResponseStatusCode(int(r.headers[Constants.hfRSC])) if Constants().hfRSC in r.headers else ResponseStatusCode.INTERNAL_SERVER_ERROR
-			resp.pc = deserializeData(r.content, resp.ct)
-			resp.originator = r.headers.get(Constants.hfOrigin)
+			resp.ct = ContentSerializationType.getType(rHeaders['Content-Type']) if 'Content-Type' in rHeaders else ct
+			resp.rsc = ResponseStatusCode(int(rHeaders[Constants.hfRSC])) if Constants().hfRSC in rHeaders else ResponseStatusCode.INTERNAL_SERVER_ERROR
+			resp.pc = deserializeData(rContent, resp.ct, CSE.request.allowJSONComments)
+			resp.originator = rHeaders.get(Constants.hfOrigin)
 			try:
 				# Add Originating Timestamp if present in request
-				if (ot := r.headers.get(Constants().hfOT)):
+				if (ot := rHeaders.get(Constants().hfOT)):
 					isodate.parse_date(ot) # Check if valid ISO 8601 date, may raise exception
 					resp.ot = ot
 			except Exception as ee:
 				raise BAD_REQUEST(L.logWarn(f'Received wrong format for X-M2M-OT: {ot} - {str(ee)}'))
-			if (rqi := r.headers.get(Constants().hfRI)) != hds[Constants().hfRI]:
+			if (rqi := rHeaders.get(Constants().hfRI)) != hds[Constants().hfRI]:
 				raise BAD_REQUEST(L.logWarn(f'Received wrong or missing request identifier: {resp.rqi}'))
 			resp.rqi = rqi
 
-			L.isDebug and L.logDebug(f'HTTP Response <== ({str(r.status_code)}):\nHeaders: {str(r.headers)}\nBody: \n{self._prepContent(r.content, resp.ct)}\n')
+			L.isDebug and L.logDebug('HTTP Response <== (%s):\nHeaders: %s\nBody: \n%s\n', statusCode, rHeaders, self._prepContent(rContent, resp.ct))
 		except ResponseException as e:
 			raise e
-		except requests.Timeout as e:
+		except (requests.Timeout, asyncio.TimeoutError) as e:
 			raise REQUEST_TIMEOUT(L.logWarn(f'http request timeout after {timeout}s'))
 		except Exception as e:
 			L.logWarn(f'Failed to send request: {str(e)}')
@@ -629,16 +972,19 @@ class HttpServer(object):
 	#	Handle authentication
 	#
 
-	def handleAuthentication(self) -> bool:
+	def handleAuthentication(self, httpRequest:Request = request) -> bool:
 		"""	Handle the authentication for the current request.
 
+			Args:
+				httpRequest: The http request. The default is the request of the current Flask request context.
+
 			Return:
 				True if the request is authenticated, False otherwise.
 		"""
 		if not (self.enableBasicAuth or self.enableTokenAuth):
 			return True
 		
-		if (authorization := request.authorization) is None:
+		if (authorization := httpRequest.authorization) is None:
 			L.isDebug and L.logDebug('No authorization header found.')
 			return False
 		
@@ -671,8 +1017,10 @@ class HttpServer(object):
 							   originalRequest:Optional[CSERequest] = None) -> Response:
 		"""	Prepare the response for a request. If `request` is given then
 			set it for the response.
+
+			The http headers are set directly from the response's request fields, and the
+			content is serialized only once.
 		"""
-		content:str|bytes|JSON = ''
 		if not result.request:
 			result.request = CSERequest()
 
@@ -699,64 +1047,45 @@ class HttpServer(object):
 			result.request.rset = originalRequest.rset
 	
 		#
-		#	Transform request to oneM2M request
-		#
-		outResult = requestFromResult(result, isResponse = True)
-
+		#	Build the http headers directly from the request
 		#
-		#	Transform oneM2M request to http message
-		#
-
-		# Build the headers
-		headers = {}
-		headers['Server'] = self.serverID						# set server field
+		request = result.request
+		headers = { 'Server': self.serverID }					# set server field
 		if result.rsc:
-			headers[Constants().hfRSC] = f'{int(result.rsc)}'				# set the response status code
-		if rqi := findXPath(cast(JSON, outResult.data), 'rqi'):
-			headers[Constants().hfRI] = rqi
-		else:
-			headers[Constants().hfRI] = result.request.rqi
-		if rvi := findXPath(cast(JSON, outResult.data), 'rvi'):
-			headers[Constants().hfRVI] = rvi
-		if vsi := findXPath(cast(JSON, outResult.data), 'vsi'):
-			headers[Constants().hfVSI] = vsi
-		if rset := findXPath(cast(JSON, outResult.data), 'rset'):
-			headers[Constants().hfRST] = rset
-		headers[Constants().hfOT] = getResourceDate()
+			headers[Constants.hfRSC] = str(int(result.rsc))	# set the response status code
+		headers[Constants.hfRI] = request.rqi
+		if request.rvi:
+			headers[Constants.hfRVI] = request.rvi
+		if request.vsi:
+			headers[Constants.hfVSI] = request.vsi
+		if request.rset:
+			headers[Constants.hfRST] = request.rset
+		headers[Constants.hfOT] = getResourceDate()
+		headers['Content-Type'] = (cts := request.ct.toHeader())
 
 		# HTTP status code
 		statusCode = result.rsc.httpStatusCode()
-		
-		# Assign and encode content accordingly
-		headers['Content-Type'] = (cts := result.request.ct.toHeader())
-		# (re-)add an empty pc if it is missing	
-
 
-		# From hereon, data is a string or byte string
-		origData:JSON = cast(JSON, outResult.data)
-		outResult.data = serializeData(cast(JSON, outResult.data)['pc'], result.request.ct) if 'pc' in cast(JSON, outResult.data) else ''
+		# Serialize the content only once. From hereon, data is a byte string
+		pc = contentFromResult(result)
+		data = serializeData(pc, request.ct) if pc else ''
 		
 		#
 		#	Add Content-Location header, if this is a response to a CREATE operation, and uri is present
 		#
-		try:
-			if originalRequest and originalRequest.op == Operation.CREATE:
-				if  (uri := findXPath(origData, 'pc/m2m:uri')) is not None or \
-					(uri := findXPath(origData, 'pc/m2m:rce/uri')):
-						headers['Content-Location'] = uri
-		except Exception as e:
-			L.logErr(str(e))
-			quit()	# TODO
+		if pc and originalRequest and originalRequest.op == Operation.CREATE:
+			if  (uri := findXPath(pc, 'm2m:uri')) is not None or \
+				(uri := findXPath(pc, 'm2m:rce/uri')):
+					headers['Content-Location'] = uri
 
 		# Build and return the response
-		if isinstance(outResult.data, bytes):
-			L.isDebug and L.logDebug(f'<== HTTP Response ({result.rsc}):\nHeaders: {str(headers)}\nBody: \n{TextTools.toHex(outResult.data)}\n=>\n{str(result.toData())}')
-		elif 'pc' in origData:
-			# L.isDebug and L.logDebug(f'<== HTTP Response (RSC: {int(result.rsc)}):\nHeaders: {str(headers)}\nBody: {str(content)}\n')
-			L.isDebug and L.logDebug(f'<== HTTP Response ({result.rsc}):\nHeaders: {str(headers)}\nBody: {origData["pc"]}')	# might be different serialization
+		if request.ct == ContentSerializationType.CBOR and data:
+			L.isDebug and L.logDebug('<== HTTP Response (%s):\nHeaders: %s\nBody: \n%s\n=>\n%s', result.rsc, headers, TextTools.toHex(cast(bytes, data)), result.toData())
+		elif pc:
+			L.isDebug and L.logDebug('<== HTTP Response (%s):\nHeaders: %s\nBody: %s', result.rsc, headers, pc)	# might be different serialization
 		else:
-			L.isDebug and L.logDebug(f'<== HTTP Response ({result.rsc}):\nHeaders: {str(headers)}')
-		return Response(response = outResult.data, status = statusCode, content_type = cts, headers = headers)
+			L.isDebug and L.logDebug('<== HTTP Response (%s):\nHeaders: %s', result.rsc, headers)
+		return Response(response = data, status = statusCode, content_type = cts, headers = headers)
 
 
 	#########################################################################
@@ -768,16 +1097,6 @@ class HttpServer(object):
 		"""	Dissect an HTTP request. Combine headers and contents into a single structure. Result is returned in Result.request.
 		"""
 
-		def extractMultipleArgs(args:MultiDict, argName:str) -> None:
-			"""	Get multi-arguments. Remove the found arguments from the original list, but add the new list again with the argument name.
-			"""
-			lst = [ t for sublist in args.getlist(argName) for t in sublist.split() ]
-			args.poplist(argName)	# type: ignore [no-untyped-call] # perhaps even multiple times
-			if len(lst) > 0:
-				args[argName] = lst
-
-
-
 		cseRequest 					= CSERequest()
 		req:ReqResp 				= {}
 		cseRequest.originalData 	= request.data			# get the data first. This marks the request as consumed, just in case that we have to return early
@@ -793,28 +1112,14 @@ class HttpServer(object):
 		req['to'] 		 			= path
 
 
-		# Copy and parse the original request headers
+		# Copy and parse the original request headers.
+		# Only the headers that are actually present are looked up in the header table
 		_headers = request.headers							# optimize access to headers
-		if f := _headers.get(Constants.hfOrigin):
-			req['fr'] = f
-		if f := _headers.get(Constants.hfRI):
-			req['rqi'] = f
-		if f := _headers.get(Constants.hfRET):
-			req['rqet'] = f
-		if f := _headers.get(Constants.hfRST):
-			req['rset'] = f
-		if f := _headers.get(Constants.hfOET):
-			req['oet'] = f
-		if f := _headers.get(Constants.hfRVI):
-			req['rvi'] = f
+		for name, value in _headers.items():
+			if (attribute := _requestHeaders.get(name.lower())) and value and attribute not in req:
+				req[attribute] = value
 		if (rtu := _headers.get(Constants.hfRTU)) is not None:	# handle rtu as a list AND it might be an empty list!
-			rt = dict()
-			rt['nu'] = rtu.split('&')		
-			req['rt'] = rt					# req.rt.rtu
-		if f := _headers.get(Constants.hfVSI):
-			req['vsi'] = f
-		if f := _headers.get(Constants.hfOT):
-			req['ot'] = f
+			req['rt'] = { 'nu': rtu.split('&') }	# req.rt.rtu
 
 		cseRequest.originalRequest = req 	# Already store now the incompliete request to save the header data
 	
@@ -837,47 +1142,40 @@ class HttpServer(object):
 		# parse accept header
 		cseRequest.httpAccept 	= [ a for a in _headers.getlist('accept') if a != '*/*' ]
 
-		# copy request arguments for greedy attributes checking
-		_args = request.args.copy() 	# type: ignore [no-untyped-call]
-		
-		# Do some special handling for those arguments that could occur multiple
-		# times in the args MultiDict. They are collected together in a single list
-		# and added again to args.
-		extractMultipleArgs(_args, 'ty')	# conversation to int happens later in fillAndValidateCSERequest()
-		extractMultipleArgs(_args, 'cty')
-		extractMultipleArgs(_args, 'lbl')
-
-		# Handle some parameters differently.
-		# They are not filter criteria, but request attributes
-		for param in ['rcn', 'rp', 'drt', 'sqi']:
-			if p := _args.get(param):	# type: ignore [assignment]
-				req[param] = p
-				del _args[param]
-		if rtv := _args.get('rt'):
-			if not (rt := cast(JSON, req.get('rt'))):
-				rt = {}
-			rt['rtv'] = rtv		# type: ignore [assignment] # req.rt.rtv
-			req['rt'] = rt
-			del _args['rt']
-		
-		# Maxage
-		if (ma := _args.get('ma')):
-			cseRequest.ma = ma
-
-		# Handle attributeList
+		# Go through the request arguments once. Arguments that could occur multiple times
+		# are collected together in a single list. The other arguments are request attributes,
+		# the attributeList, or filter criteria.
+		_args = request.args
 		attributeList:list[str] = []
-		extractMultipleArgs(_args, 'atrl')
-		if atrl := _args.get('atrl'):
-			if len(atrl) == 1:
-				req['to'] = f'{req["to"]}#{atrl[0]}'
+		filterCriteria:ReqResp = {}
+		for name in _args.keys():
+			if name in _multipleArguments:
+				if not (value := [ t for v in _args.getlist(name) for t in v.split() ]):	# conversion to int happens later in fillAndValidateCSERequest()
+					continue
 			else:
-				attributeList = [ a for a in atrl ]
-			del _args['atrl']
-		
-		# Extract further request arguments from the http request
-		# add all the args to the filterCriteria
-		filterCriteria:ReqResp = { k:v for k,v in _args.items() }
-		if len(filterCriteria) > 0:
+				value = _args[name]
+
+			match name:
+				# Handle some parameters differently.
+				# They are not filter criteria, but request attributes
+				case 'rcn' | 'rp' | 'drt' | 'sqi' if value:
+					req[name] = value
+				case 'rt' if value:
+					req.setdefault('rt', {})['rtv'] = value	# type: ignore [union-attr] # req.rt.rtv
+
+				# Handle attributeList
+				case 'atrl':
+					if len(value) == 1:
+						req['to'] = f'{req["to"]}#{value[0]}'
+					else:
+						attributeList = value
+
+				# Add all other arguments to the filterCriteria
+				case _:
+					if name == 'ma' and value:	# Maxage
+						cseRequest.ma = value
+					filterCriteria[name] = value
+		if filterCriteria:
 			req['fc'] = filterCriteria
 
 		if attributeList:
@@ -912,8 +1210,8 @@ class HttpServer(object):
 
 
 	_hdrArgument = re.compile(r'^\s*ty\s*=\s*', re.IGNORECASE)
-	def _hasContentType(self) -> bool:
-		return (ct := request.content_type) is not None and any(re.match(self._hdrArgument, s) is not None for s in ct.split(';'))
+	def _hasContentType(self, httpRequest:Request) -> bool:
+		return (ct := httpRequest.content_type) is not None and any(re.match(self._hdrArgument, s) is not None for s in ct.split(';'))
 
 
 ##########################################################################
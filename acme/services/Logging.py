@@ -15,9 +15,9 @@
 from __future__ import annotations
 from typing import List, Any, Union, Optional
 
-import traceback
-import logging, logging.handlers, os, inspect, sys, datetime, time, threading
-from queue import Queue
+import traceback, json
+import logging, logging.handlers, os, sys, datetime, time, threading
+from queue import Queue, Empty, Full
 from logging import LogRecord
 
 
@@ -125,6 +125,10 @@ class Logging:
 	queue:Queue						= None
 	enableQueue						= False		# Can be used to enable/disable the logging queue 
 	queueSize:int					= 0			# max number of items in the logging queue. Might otherwise grow forever on large load
+	batchSize:int					= 100		# max number of log messages that are processed before the file output is flushed
+	rateLimit:int					= 0			# max number of log messages per second per source file. 0 means no limit
+	droppedQueueFull:int			= 0			# Number of log messages dropped because the log queue was full
+	droppedRateLimit:int			= 0			# Number of log messages dropped because of the rate limit
 	filterSources:tuple[str, ...]	= ()		# List of log sources that will be removed while processing the log messages
 	maxLogMessageLength:int			= 0			# Max length of a log message. Longer messages will be truncated
 
@@ -133,6 +137,9 @@ class Logging:
 	_handlers:List[Any] 			= None
 	_logWorker:BackgroundWorker		= None
 	_basenames:dict[str, str]		= {}
+	_rateBuckets:dict[str, list[float]]	= {}	# Token buckets for the rate limit per source file: [tokens, timestamp]
+	_dropLock						= threading.Lock()	# Lock for the rate buckets and the drop counters
+	_droppedReported:int			= 0			# Number of dropped log messages that were already reported
 
 	_eventLogError					= None
 	_eventLogWarning				= None
@@ -158,6 +165,8 @@ class Logging:
 		Logging.queueSize				= Configuration.get('logging.queueSize')
 		Logging.filterSources			= tuple(Configuration.get('logging.filter'))
 		Logging.maxLogMessageLength		= Configuration.get('logging.maxLogMessageLength')
+		Logging.rateLimit				= Configuration.get('logging.rateLimit')
+		Logging._rateBuckets			= {}
 
 		Logging._configureColors(Configuration.get('console.theme'))
 
@@ -186,11 +195,14 @@ class Logging:
 			logpath = Configuration.get('logging.path')
 			os.makedirs(logpath, exist_ok = True)# create log directory if necessary
 			logfile = f'{logpath}/cse-{CSE.cseType.name}.log'
-			logfp = logging.handlers.RotatingFileHandler(logfile,
-														 maxBytes = Configuration.get('logging.size'),
-														 backupCount = Configuration.get('logging.count'))
+			logfp = BufferedRotatingFileHandler(logfile,
+												maxBytes = Configuration.get('logging.size'),
+												backupCount = Configuration.get('logging.count'))
 			logfp.setLevel(Logging.logLevel)
-			logfp.setFormatter(logging.Formatter('%(levelname)s %(asctime)s %(message)s'))
+			if Configuration.get('logging.fileFormat') == 'json':
+				logfp.setFormatter(JSONLogFormatter())
+			else:
+				logfp.setFormatter(logging.Formatter('%(levelname)s %(asctime)s %(message)s'))
 			logfp.addFilter(LogFilter(Logging.filterSources))
 			Logging.logger.addHandler(logfp) 
 			Logging._handlers.append(logfp)
@@ -269,15 +281,31 @@ class Logging:
 
 
 	@staticmethod
-	def _logMessageToLoggerConsole(level:int, msg:str, caller:inspect.Traceback, thread:threading.Thread) -> None:
+	def _logMessageToLoggerConsole(level:int, msg:str, args:tuple, filename:str, lineno:int, threadName:str) -> None:
+		"""	Format and output a log message. This is usually called by the logging actor.
+
+			Args:
+				level: The log level.
+				msg: The log message or format string, or an object to inspect.
+				args: Arguments for the format string. 
+				filename: The caller's source file.
+				lineno: The caller's line number.
+				threadName: The name of the caller's thread.
+		"""
 		if isinstance(msg, str):
+			if args:
+				try:
+					msg = msg % args
+				except Exception as e:
+					msg = f'{msg} (formatting error: {str(e)}) {args}'
+				msg = msg[:Logging.maxLogMessageLength] if Logging.maxLogMessageLength else msg	# truncate message if necessary
 			
 			# optimize determining the source file's basename
-			if not (basename := Logging._basenames.get(caller.filename)):
-				basename = os.path.basename(caller.filename)
-				Logging._basenames[caller.filename] = basename
+			if not (basename := Logging._basenames.get(filename)):
+				basename = os.path.basename(filename)
+				Logging._basenames[filename] = basename
 
-			Logging.loggerConsole.log(level, f'{basename}\x04{caller.lineno}\x04{thread.name:<10.10}\x04{msg}')
+			Logging.loggerConsole.log(level, f'{basename}\x04{lineno}\x04{threadName:<10.10}\x04{msg}')
 		else:
 			try:
 				richInspect(msg, private = True, docs = False, dunder = False)
@@ -286,55 +314,90 @@ class Logging:
 			
 	@staticmethod
 	def loggingActor() -> bool:
+		"""	Process the log queue. 
+		
+			The messages are processed in batches of up to *batchSize* messages, and the file output 
+			is flushed after each batch. Dropped messages are reported in the log.
+
+			Return:
+				Always True.
+		"""
 		while Logging._logWorker.running:
-			# Check queue and give up the CPU
-			if Logging.queue.empty():
-				time.sleep(0.1)
-				continue
-			level, msg, caller, thread = Logging.queue.get(block = True)
-			# if msg is None or (isinstance(msg, str) and not len(msg)):
-			if msg is None:
+			# Wait for the next message, but check regularly whether the actor is still running
+			try:
+				batch = [ Logging.queue.get(timeout = 0.1) ]
+			except Empty:
 				continue
-			Logging._logMessageToLoggerConsole(level, msg, caller, thread)
+			# Take further waiting messages
+			try:
+				while len(batch) < Logging.batchSize:
+					batch.append(Logging.queue.get_nowait())
+			except Empty:
+				pass
+
+			# Buffer the file output of this batch
+			fileHandlers = [ handler for handler in Logging._handlers or [] if isinstance(handler, BufferedRotatingFileHandler) ]
+			for handler in fileHandlers:
+				handler.startBuffer()
+
+			for level, msg, args, filename, lineno, threadName in batch:
+				# if msg is None or (isinstance(msg, str) and not len(msg)):
+				if msg is None:
+					continue
+				Logging._logMessageToLoggerConsole(level, msg, args, filename, lineno, threadName)
+			
+			# Report dropped messages
+			if (dropped := Logging.droppedQueueFull + Logging.droppedRateLimit) > Logging._droppedReported:
+				Logging._logMessageToLoggerConsole(logging.WARNING, 
+												   f'{dropped - Logging._droppedReported} log message(s) dropped (queue full: {Logging.droppedQueueFull}, rate limit: {Logging.droppedRateLimit})', 
+												   (), __file__, 0, threading.current_thread().name)
+				Logging._droppedReported = dropped
+
+			for handler in fileHandlers:
+				handler.flushBuffer()
 
 		return True
 
 
 	@staticmethod
-	def log(msg:Any, stackOffset:Optional[int] = 0) -> str:
+	def log(msg:Any, *args:Any, stackOffset:Optional[int] = 0) -> str:
 		"""Print a log message with log-level **INFO**. 
 
 			Args:
-				msg: The log message.
+				msg: The log message, or a format string for *args*.
+				args: Optional arguments for the format string. The message is then formatted by the logging actor.
 				stackOffset: Optional offset for printing stacktraces.
 			Return:
 				Return the log *msg* again. 
 		"""
-		return Logging._log(logging.INFO, msg, stackOffset = stackOffset)
+		return Logging._log(logging.INFO, msg, args, stackOffset = stackOffset)
 
 
 	@staticmethod
-	def logDebug(msg:Any, stackOffset:Optional[int] = 0) -> str:
+	def logDebug(msg:Any, *args:Any, stackOffset:Optional[int] = 0) -> str:
 		"""Print a log message with log-level **DEBUG**. 
 
 			Args:
-				msg: The log message.
+				msg: The log message, or a format string for *args*.
+				args: Optional arguments for the format string. The message is then formatted by the logging actor.
 				stackOffset: Optional offset for printing stacktraces.
 			Return:
 				Return the log *msg* again. 
 		"""
-		return Logging._log(logging.DEBUG, msg, stackOffset = stackOffset)
+		return Logging._log(logging.DEBUG, msg, args, stackOffset = stackOffset)
 
 
 	@staticmethod
 	def logErr(msg:Any, 
+			   *args:Any,
 			   showStackTrace:Optional[bool] = True, 
 			   exc:Optional[Exception] = None, 
 			   stackOffset:Optional[int] = 0) -> str:
 		"""	Print a log message with log-level **ERROR**. 
 
 			Args:
-				msg: The log message.
+				msg: The log message, or a format string for *args*.
+				args: Optional arguments for the format string. The message is then formatted by the logging actor.
 				showStackTrace: Optional indicates whether a stacktrace shall be logged 
 					together with the error	as well.
 				exc: Optional exception to log.
@@ -347,21 +410,23 @@ class Logging:
 		Logging._eventLogError()
 
 		if exc:
-			fmtexc = ''.join(traceback.TracebackException.from_exception(exc).format())
-			return Logging._log(logging.ERROR, f'{msg}\n\n{fmtexc}', stackOffset = stackOffset)
+			trace = ''.join(traceback.TracebackException.from_exception(exc).format())
 		elif showStackTrace and Logging.stackTraceOnError:
-			strace = ''.join(map(str, traceback.format_stack()[:-1]))
-			return Logging._log(logging.ERROR, f'{msg}\n\n{strace}', stackOffset = stackOffset)
+			trace = ''.join(map(str, traceback.format_stack()[:-1]))
 		else:
-			return Logging._log(logging.ERROR, msg, stackOffset = stackOffset)
+			return Logging._log(logging.ERROR, msg, args, stackOffset = stackOffset)
+		if args:	# The trace is passed as an argument, because it may contain "%" characters
+			return Logging._log(logging.ERROR, f'{msg}\n\n%s', (*args, trace), stackOffset = stackOffset)
+		return Logging._log(logging.ERROR, f'{msg}\n\n{trace}', stackOffset = stackOffset)
 
 
 	@staticmethod
-	def logWarn(msg:Any, stackOffset:Optional[int] = 0) -> str:
+	def logWarn(msg:Any, *args:Any, stackOffset:Optional[int] = 0) -> str:
 		"""	Print a log message with log-level **WARNING**. 
 
 			Args:
-				msg: The log message.
+				msg: The log message, or a format string for *args*.
+				args: Optional arguments for the format string. The message is then formatted by the logging actor.
 				stackOffset: Optional offset for printing stacktraces.
 			Return:
 				Return the log *msg* again. 
@@ -369,7 +434,7 @@ class Logging:
 		from ..services import CSE as CSE
 		# raise logWarning event
 		Logging._eventLogWarning()
-		return Logging._log(logging.WARNING, msg, stackOffset = stackOffset)
+		return Logging._log(logging.WARNING, msg, args, stackOffset = stackOffset)
 
 
 	@staticmethod
@@ -409,31 +474,65 @@ class Logging:
 
 
 	@staticmethod
-	def _log(level:int, msg:Any, stackOffset:Optional[int] = 0, immediate:Optional[bool] = False) -> str:
+	def _log(level:int, 
+			 msg:Any, 
+			 args:Optional[tuple] = (), 
+			 stackOffset:Optional[int] = 0, 
+			 immediate:Optional[bool] = False) -> str:
 		"""	Internally adding various information to the log output. 
 		
 			The *stackOffset* is used to determine the correct caller. 
 			It is set by a calling method in case the log information are re-routed.
 
+			Only the caller's frame is accessed, and only its file name and line number are taken.
+			All formatting is done later by the logging actor.
+
+			This method never blocks. If the log queue is full, or the rate limit for the caller's source file 
+			is exceeded (not for errors), then the message is dropped and counted.
+
 			Args:
 				level: The log level.
-				msg: The log message.
+				msg: The log message, or a format string for *args*.
+				args: Optional arguments for the format string. 
 				stackOffset: Optional offset in the stack frame.
 				immediate: Immediately log the message, don't put it into the log queue.
 			
 			Return:
-				The log *msg*.
+				The log *msg*. If *args* are given then this is the unformatted format string.
 		"""
-		if Logging.logLevel <= level:
+		if Logging.logLevel <= level and (Logging.enableScreenLogging or Logging.enableFileLogging):
 			try:
-				# Queue a log message : (level, message, caller from stackframe, current thread)
-				caller = inspect.getframeinfo(inspect.stack()[stackOffset + 2][0])
-				thread = threading.current_thread()
-				msg = msg[:Logging.maxLogMessageLength] if Logging.maxLogMessageLength else msg	# truncate message if necessary
+				# Queue a log message : (level, message, arguments, caller's file name and line number, current thread's name)
+				caller = sys._getframe(stackOffset + 2)
+				filename = caller.f_code.co_filename
+				lineno = caller.f_lineno
+				del caller	# Don't keep a reference to the frame
+
+				# Rate limit per source file with a token bucket
+				if Logging.rateLimit and level < logging.ERROR:
+					with Logging._dropLock:
+						now = time.monotonic()
+						if not (bucket := Logging._rateBuckets.get(filename)):
+							bucket = Logging._rateBuckets[filename] = [ float(Logging.rateLimit), now ]
+						tokens = min(float(Logging.rateLimit), bucket[0] + (now - bucket[1]) * Logging.rateLimit)
+						bucket[1] = now
+						if tokens < 1.0:
+							bucket[0] = tokens
+							Logging.droppedRateLimit += 1
+							return msg
+						bucket[0] = tokens - 1.0
+
+				if not args:
+					msg = msg[:Logging.maxLogMessageLength] if Logging.maxLogMessageLength else msg	# truncate message if necessary
+				entry = (level, msg, args, filename, lineno, threading.current_thread().name)
 				if Logging.enableQueue and not immediate:
-					Logging.queue.put((level, msg, caller, thread))
+					try:
+						Logging.queue.put_nowait(entry)
+					except Full:
+						with Logging._dropLock:
+							Logging.droppedQueueFull += 1
 				else:
-					Logging._logMessageToLoggerConsole(level, msg, caller, thread)
+					Logging._logMessageToLoggerConsole(*entry)
 			except Exception as e:
 				print(e)
 				# sometimes this raises an exception. Just ignore it.
@@ -727,3 +826,77 @@ class ACMERichLogHandler(RichHandler):
 				line_no		= lineno,
 			)
 		)
+
+
+#
+#	File output
+#
+
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+	"""	A rotating file handler that does not flush the file after every log record that is written
+		by the logging actor. The logging actor flushes the file after each batch of log messages.
+
+		All other records, e.g. when the logging queue is off or from other loggers, are flushed immediately.
+	"""
+
+	def __init__(self, *args:Any, **kwargs:Any) -> None:
+		"""	Initialize the handler.
+
+			Args:
+				args: Positional arguments for the *RotatingFileHandler*.
+				kwargs: Keyword arguments for the *RotatingFileHandler*.
+		"""
+		super().__init__(*args, **kwargs)
+		self._buffering = threading.local()
+
+
+	def flush(self) -> None:
+		"""	Flush the file, unless the current thread buffers its records. Use `flushBuffer()` then.
+		"""
+		if not getattr(self._buffering, 'active', False):
+			super().flush()
+
+
+	def startBuffer(self) -> None:
+		"""	Buffer the records that are written by the current thread until `flushBuffer()` is called.
+		"""
+		self._buffering.active = True
+
+
+	def flushBuffer(self) -> None:
+		"""	Stop buffering in the current thread and flush the buffered log records to the file.
+		"""
+		self._buffering.active = False
+		super().flush()
+
+
+class JSONLogFormatter(logging.Formatter):
+	"""	Formatter that formats each log record as a single JSON line for ingestion by log processing tools.
+	"""
+
+	def format(self, record:LogRecord) -> str:
+		"""	Format a log record as JSON.
+
+			Args:
+				record: The log record.
+
+			Return:
+				A JSON object with the attributes *ts*, *level*, *file*, *line*, *thread*, and *msg*.
+		"""
+		message = record.getMessage()
+		if len(messageElements := message.split('\x04', 3)) == 4:
+			path 	= messageElements[0]
+			lineno 	= int(messageElements[1])
+			threadID= messageElements[2].rstrip()
+			message = messageElements[3]
+		else:
+			path	= record.filename
+			lineno	= record.lineno
+			threadID= record.threadName
+		return json.dumps({ 'ts':		datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+							'level':	record.levelname,
+							'file':		path,
+							'line':		lineno,
+							'thread':	threadID,
+							'msg':		message },
+						  ensure_ascii = False)
@@ -10,10 +10,12 @@
 from __future__ import annotations
 from typing import Tuple, cast, Dict, Optional, Any, Union
 
-from urllib.parse import urlparse
+from urllib.parse import urlparse, parse_qs
 from threading import Lock
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from time import perf_counter
 
-from ..etc.Types import JSON, Operation, CSERequest, ContentSerializationType, RequestType, ResourceTypes, Result, ResponseStatusCode, ResourceTypes
+from ..etc.Types import JSON, Operation, CSERequest, ContentSerializationType, RequestType, ResourceTypes, Result, ResponseStatusCode, ResourceTypes, ResponseType
 from ..etc.ResponseStatusCodes import ResponseException
 from ..etc.RequestUtils import requestFromResult, serializeData
 from ..etc.DateUtils import getResourceDate, waitFor
@@ -75,9 +77,9 @@ class MQTTClientHandler(MQTTHandler):
 		"""
 		super().onConnect(connection)
 		L.isDebug and L.logDebug('Connected to MQTT broker')
-		connection.subscribeTopic(f'{self.topicPrefix}/oneM2M/req/+/{idToMQTT(CSE.cseCsi)}/#', self._requestCB)					# Subscribe to general requests
-		connection.subscribeTopic(f'{self.topicPrefix}/oneM2M/resp/{idToMQTT(CSE.cseCsi)}/+/#', self._responseCB)				# Subscribe to responses
-		connection.subscribeTopic(f'{self.topicPrefix}/oneM2M/reg_req/+/{idToMQTT(CSE.cseCsi)}/#', self._registrationRequestCB)	# Subscribe to registration requests
+		connection.subscribeTopic(f'{self.topicPrefix}/oneM2M/req/+/{idToMQTT(CSE.cseCsi)}/#', self._requestCB, rejectedCallback = self._requestRejectedCB)					# Subscribe to general requests
+		connection.subscribeTopic(f'{self.topicPrefix}/oneM2M/resp/{idToMQTT(CSE.cseCsi)}/+/#', self._responseCB, inline = True)	# Subscribe to responses. They are handed to the waiting requests directly
+		connection.subscribeTopic(f'{self.topicPrefix}/oneM2M/reg_req/+/{idToMQTT(CSE.cseCsi)}/#', self._registrationRequestCB, rejectedCallback = self._registrationRequestRejectedCB)	# Subscribe to registration requests
 		return True
 
 
@@ -140,6 +142,18 @@ class MQTTClientHandler(MQTTHandler):
 		self._handleIncommingRequest(connection, topic, data, 'reg_resp', isRegistration=True)
 
 
+	def _requestRejectedCB(self, connection:MQTTConnection, topic:str, data:bytes) -> None:
+		"""	Answer a normal MQTT request that was rejected because the queue of received messages is full.
+		"""
+		self._handleIncommingRequest(connection, topic, data, 'resp', isRejected = True)
+
+
+	def _registrationRequestRejectedCB(self, connection:MQTTConnection, topic:str, data:bytes) -> None:
+		"""	Answer an MQTT registration request that was rejected because the queue of received messages is full.
+		"""
+		self._handleIncommingRequest(connection, topic, data, 'reg_resp', isRegistration = True, isRejected = True)
+
+
 	def _responseCB(self, connection:MQTTConnection, topic:str, data:bytes) -> None:
 		"""	Receive and handle a 'resp' message.
 		"""
@@ -168,9 +182,12 @@ class MQTTClientHandler(MQTTHandler):
 									  topic:str, 
 									  data:bytes, 
 									  responseTopicType:str, 
-									  isRegistration:Optional[bool] = False) -> None:
+									  isRegistration:Optional[bool] = False,
+									  isRejected:Optional[bool] = False) -> None:
 		"""	Handling incoming requests is rather generic, since the special handling of some requests, like
 			registration is done later anyway.
+
+			If *isRejected* is True then the request could not be queued for handling. It is only answered with an error.
 		"""
 
 		def _sendResponse(result:Result) -> None:
@@ -188,15 +205,17 @@ class MQTTClientHandler(MQTTHandler):
 		def _logRequest(result:Result) -> None:
 			"""	Log request.
 			"""
-			L.isDebug and L.logDebug(f'Operation: {result.request.originalRequest.get("op")}')
+			L.isDebug and L.logDebug('Operation: %s', result.request.originalRequest.get('op'))
 			if contentType == ContentSerializationType.JSON:
 				L.isDebug and L.logDebug(f'Body: \n{cast(str, data.decode())}')
 			else:
-				L.isDebug and L.logDebug(f'Body: \n{TextTools.toHex(cast(bytes, data))}\n=>\n{result.request.originalRequest}')
+				L.isDebug and L.logDebug('Body: \n%s\n=>\n%s', TextTools.toHex(cast(bytes, data)), result.request.originalRequest)
 					
 
+		startTs = perf_counter()
+
 		# SP relative of for : /cseid/aei
-		L.isDebug and L.logDebug(f'==> MQTT Request: {topic}')
+		L.isDebug and L.logDebug('==> MQTT Request: %s', topic)
 
 		# Check correct topic length
 		if len(ts := topic.split('/')) != self.topicPrefixCount + 5:
@@ -228,6 +247,13 @@ class MQTTClientHandler(MQTTHandler):
 			_sendResponse(dissectResult)
 			return
 
+		# The request was rejected because the queue of received messages is full
+		if isRejected:
+			_sendResponse(Result(rsc = ResponseStatusCode.TARGET_NOT_REACHABLE,
+								 request = request, 
+								 dbg = L.logWarn('MQTT request queue is full')))
+			return
+
 		if isRegistration:
 			# Check access in case of a registration
 			if CSE.security.allowedCredentialIDsMqtt:
@@ -295,8 +321,12 @@ class MQTTClientHandler(MQTTHandler):
 		if request.ot:
 			responseResult.request.ot = getResourceDate()
 		
-		#	Transform request to oneM2M request
-		_sendResponse(responseResult)
+		#	Transform request to oneM2M request. No response is sent if the originator didn't request one
+		if request.rt == ResponseType.noResponse:
+			L.isDebug and L.logDebug(f'No response requested for: {request.rqi}')
+		else:
+			_sendResponse(responseResult)
+		CSE.statistics.recordRequest('mqtt', request.op, perf_counter() - startTs)
 	
 
 ##############################################################################
@@ -314,10 +344,13 @@ class MQTTClient(object):
 		'mqttConnections',
 		'receivedResponses',
 		'receivedResponsesLock',
+		'nextResponsesCleanup',
 
 		'enable',
 		'topicPrefix',
 		'requestTimeout',
+		'qos',
+		'notificationNoResponse',
 	)
 
 	# TODO move config handling to event handler
@@ -333,8 +366,9 @@ class MQTTClient(object):
 		self.isStopped												= False
 		self.topicsCount											= 0
 		self.mqttConnections:Dict[Tuple[str, int], MQTTConnection]	= {}
-		self.receivedResponses:Dict[str, Tuple[Result, str]]		= {}
+		self.receivedResponses:Dict[str, Tuple[Future[Tuple[Result, str]], float]]	= {}	# rqi -> (future, deadline)
 		self.receivedResponsesLock									= Lock()
+		self.nextResponsesCleanup									= 0.0
 
 
 		self.mqttConnection = self.connectToMqttBroker(address	= Configuration.get('mqtt.address'),
@@ -375,6 +409,8 @@ class MQTTClient(object):
 		self.enable = Configuration.get('mqtt.enable')
 		self.topicPrefix = Configuration.get('mqtt.topicPrefix')
 		self.requestTimeout = Configuration.get('mqtt.timeout')
+		self.qos = Configuration.get('mqtt.qos')
+		self.notificationNoResponse = Configuration.get('mqtt.notificationNoResponse')
 
 
 	def configUpdate(self, name:str, 
@@ -390,6 +426,8 @@ class MQTTClient(object):
 		if key not in [ 'mqtt.enable', 
 						'mqtt.topicPrefix',
 						'mqtt.timeout', 
+						'mqtt.qos',
+						'mqtt.notificationNoResponse',
 					  ]:
 			return
 
@@ -425,11 +463,21 @@ class MQTTClient(object):
 		return waitFor(self.requestTimeout, lambda:self.mqttConnection.isConnected and self.mqttConnection.subscribedCount == 3)	# currently 3 topics
 
 
+	def getStatistics(self) -> Optional[Dict[str, Any]]:
+		"""	Return the metrics of the handling of received messages of the connection to the CSE's MQTT broker.
+
+			Return:
+				Dictionary with the number of currently and maximum queued messages, the number of handled messages,
+				and the 99th percentile of the handling latency in seconds, or None if MQTT is not enabled.
+		"""
+		return self.mqttConnection.dispatcher.getStatistics() if self.mqttConnection else None
+
+
 	def isConnected(self) -> bool:
 		"""	Check whether the MQTT client is connected to a broker. Wait for a moment
 			to take startup connection into account.
 		"""
-		return waitFor(self.requestTimeout, lambda:self.mqttConnection.isConnected)
+		return self.mqttConnection.waitForConnection(self.requestTimeout)
 
 
 	def connectToMqttBroker(self, address:str, port:int, useTLS:bool, username:str, password:str) -> Optional[MQTTConnection]:
@@ -450,7 +498,12 @@ class MQTTClient(object):
 												username 			= username,
 												password			= password,
 												lowLevelLogging 	= L.enableBindingsLogging,
-												messageHandler 		= MQTTClientHandler	(self))
+												messageHandler 		= MQTTClientHandler	(self),
+												workerPoolSize		= Configuration.get('mqtt.workerPoolSize'),
+												maxQueueSize		= Configuration.get('mqtt.maxQueueSize'),
+												qos					= self.qos,
+												maxInflightMessages	= Configuration.get('mqtt.maxInflightMessages'),
+												maxQueuedMessages	= Configuration.get('mqtt.maxQueuedMessages'))
 				if mqttConnection:
 					self.mqttConnections[(address, port)] = mqttConnection
 			return mqttConnection
@@ -480,6 +533,13 @@ class MQTTClient(object):
 
 	def sendMqttRequest(self, request:CSERequest, url:str) -> Result:
 		"""	Sending a request via MQTT.
+
+			The QoS for the request can be set for a target with the *qos* query argument of the *url*, 
+			for example *mqtt://broker:1883?qos=1*. Otherwise the configured default QoS is used.
+
+			If the request's responseType is *noResponse* then the request is only published, and no
+			response is awaited. This is also done for notifications, except verification requests,
+			if *[mqtt]:notificationNoResponse* is set.
 		"""
 
 		if self.isStopped:
@@ -495,6 +555,12 @@ class MQTTClient(object):
 			mqttPort = 1883 if mqttScheme == 'mqtt' else 8883
 		mqttUsername = u.username
 		mqttPassword = u.password
+		mqttQoS = self.qos
+		if (qos := parse_qs(u.query).get('qos')):
+			if qos[0] not in ( '0', '1', '2' ):
+				return Result(rsc = ResponseStatusCode.BAD_REQUEST, 
+							  dbg = L.logWarn(f'Invalid MQTT QoS in url: {url}'))
+			mqttQoS = int(qos[0])
 
 		# Pack everything that is needed in a Result object as if this is a normal "response" (for MQTT this doesn't matter)
 		# This seems to be a bit complicated, but we fill in the necessary values as if this is a normal "response"
@@ -508,6 +574,8 @@ class MQTTClient(object):
 		req.request.ot			= getResourceDate()
 		req.rsc					= ResponseStatusCode.UNKNOWN								# explicitly remove the provided OK because we don't want have any
 		req.request.ct			= req.request.ct if req.request.ct else CSE.defaultSerialization 	# get the serialization
+		if self.notificationNoResponse and req.request.op == Operation.NOTIFY and not TextTools.findXPath(req.request.pc, 'm2m:sgn/vrq'):
+			req.request.rt		= ResponseType.noResponse									# Fire-and-forget notification, except for verification requests
 
 		# construct the actual request and topic.
 		# Some work is needed here because we take a normal URL for the address
@@ -542,50 +610,98 @@ class MQTTClient(object):
 													  password = mqttPassword)
 
 			# Wait a moment until we are connected.
-			waitFor(self.requestTimeout, lambda: mqttConnection is not None and mqttConnection.isConnected)
+			mqttConnection and mqttConnection.waitForConnection(self.requestTimeout)
 
 		# We are not connected, so -> fail
 		if not mqttConnection or not mqttConnection.isConnected:
 			return Result(rsc = ResponseStatusCode.TARGET_NOT_REACHABLE, 
 						  dbg = L.logWarn(f'Cannot connect to MQTT broker at: {mqttHost}:{mqttPort}'))
 
-		# Publish the request and wait for the response.
+		# Only publish the request if no response is requested
+		if req.request.rt == ResponseType.noResponse:
+			logRequest(preq, topic, isResponse=False, isIncoming=False)
+			if not mqttConnection.publish(topic, cast(bytes, cast(Tuple, preq.data)[1]), qos = mqttQoS):
+				return Result(rsc = ResponseStatusCode.TARGET_NOT_REACHABLE, 
+							  dbg = L.logWarn(f'Cannot publish MQTT request to: {mqttHost}:{mqttPort}'))
+			return Result(rsc = ResponseStatusCode.OK, request = req.request)
+
+		# Register the expected response before publishing the request, so that even a very fast response
+		# finds its waiting request. Publish the request and wait for the response.
 		# Then return the response as result
+		self.registerResponse(preq.request.rqi, self.requestTimeout)
 		logRequest(preq, topic, isResponse=False, isIncoming=False)
-		mqttConnection.publish(topic, cast(bytes, cast(Tuple, preq.data)[1]))
+		if not mqttConnection.publish(topic, cast(bytes, cast(Tuple, preq.data)[1]), qos = mqttQoS):
+			self.unregisterResponse(preq.request.rqi)
+			return Result(rsc = ResponseStatusCode.TARGET_NOT_REACHABLE, 
+						  dbg = L.logWarn(f'Cannot publish MQTT request to: {mqttHost}:{mqttPort}'))
 		response, responseTopic = self.waitForResponse(preq.request.rqi, self.requestTimeout)
 		logRequest(response, responseTopic, isResponse = True, isIncoming = True)
 		return response
 
 
+	def registerResponse(self, rqi:str, timeOut:float) -> Future[Tuple[Result, str]]:
+		"""	Register a future for the response to a request with a specific requestIdentifier *rqi*.
+			This must be done before the request is sent. Any number of requests may wait for their responses
+			at the same time.
+
+			Registered responses that are still not removed a while after their timeout, for example
+			because the waiting request failed, are removed as well.
+
+			Args:
+				rqi: The requestIdentifier of the request.
+				timeOut: The time in seconds to wait for the response.
+
+			Return:
+				The future that is completed with a tuple (response, topic).
+		"""
+		now = perf_counter()
+		with self.receivedResponsesLock:
+			if now >= self.nextResponsesCleanup:
+				for _rqi in [ r for r, (_, deadline) in self.receivedResponses.items() if deadline < now ]:
+					del self.receivedResponses[_rqi]
+				self.nextResponsesCleanup = now + self.requestTimeout
+			if not (entry := self.receivedResponses.get(rqi)):
+				entry = self.receivedResponses[rqi] = (Future(), now + max(timeOut, 0.0) + self.requestTimeout)
+			return entry[0]
+
+
+	def unregisterResponse(self, rqi:str) -> None:
+		"""	Remove the registered future for the response to a request with a specific requestIdentifier *rqi*.
+
+			Args:
+				rqi: The requestIdentifier of the request.
+		"""
+		with self.receivedResponsesLock:
+			self.receivedResponses.pop(rqi, None)
+
+
 	def addResponse(self, response:Result, topic:str) -> None:
-		"""	Add a response and topic to the response dictionary. The key is the *rqi* (requestIdentifier) of
-			the response. 
+		"""	Hand a response and topic to the request that waits for it. The key is the *rqi* (requestIdentifier) of
+			the response. The waiting request is woken up immediately.
+
+			Responses for which no request is waiting, for example because the request has already timed out, are discarded.
 		"""
 		if (rqi := response.request.rqi):
 			with self.receivedResponsesLock:
-				self.receivedResponses[rqi] = (response, topic)
+				entry = self.receivedResponses.get(rqi)
+			if not entry:
+				L.isDebug and L.logDebug(f'Discarding MQTT response for unknown or timed out request: {rqi}')
+				return
+			if not entry[0].done():
+				entry[0].set_result((response, topic))
 
 
 	def waitForResponse(self, rqi:str, timeOut:float) -> Tuple[ Result, str ]:
-		"""	Wait for a response with a specific requestIdentifier *rqi*.
+		"""	Wait for a response with a specific requestIdentifier *rqi*. 
+			The response is registered first if this hasn't been done before.
 		"""
-		resp = None
-		topic = None
-
-		def _receivedResponse() -> bool:
-			nonlocal resp, topic
-			with self.receivedResponsesLock:
-				if not self.receivedResponses:
-					return False
-				if rqi in self.receivedResponses:
-					resp, topic = self.receivedResponses.pop(rqi)	# return the response (in a Result object), and remove it from the dict.
-					return True
-			return False
-			
-		if not waitFor(timeOut, _receivedResponse):
+		try:
+			resp, topic = self.registerResponse(rqi, timeOut).result(max(timeOut, 0.0))
+		except FutureTimeoutError:
 			return Result(rsc = ResponseStatusCode.TARGET_NOT_REACHABLE, 
 						  dbg = 'Target not reachable or timeout'), None
+		finally:
+			self.unregisterResponse(rqi)	# remove the response (or the pending future) from the dict.
 		resp.data = resp.request.pc					# Add the pc to the data, since components excepct this. 
 													# TODO perhaps unify the use of response values throughout the CSE
 		CSE.event.responseReceived(resp.request)	# type:ignore [attr-defined]
@@ -624,6 +740,8 @@ def logRequest(reqResult:Result,
 			   isIncoming:Optional[bool] = False) -> None:
 	"""	Log a request. Make some adjustments, depending on the request or response type.
 	"""
+	if not L.isDebug:
+		return
 	if isIncoming:
 		if isResponse:
 			prefix = f'MQTT Response <== ({reqResult.rsc})'
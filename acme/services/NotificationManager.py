@@ -11,27 +11,32 @@
 """
 
 from __future__ import annotations
-from typing import Callable, Union, Any, cast, Optional
+from typing import Callable, Union, Any, cast, Optional, Tuple, Iterator
 
-import sys, copy
-from threading import Lock, current_thread
+import sys, copy, random, time
+from dataclasses import dataclass, field
+from contextlib import contextmanager
+from threading import Lock, current_thread, local
+from concurrent.futures import Future, wait as waitForFutures
 
 import isodate
 from ..etc.Types import CSERequest, MissingData, ResourceTypes, NotificationContentType, NotificationEventType, TimeWindowType, EventEvaluationMode
-from ..etc.Types import EventCategory, JSON, JSONLIST, ResourceTypes, Operation
-from ..etc.ResponseStatusCodes import ResponseStatusCode, ResponseException, exceptionFromRSC
+from ..etc.Types import EventCategory, JSON, JSONLIST, ResourceTypes, Operation, ContentSerializationType, RequestResponseList
+from ..etc.ResponseStatusCodes import ResponseStatusCode, ResponseException, exceptionFromRSC, isSuccessRSC
 from ..etc.ResponseStatusCodes import INTERNAL_SERVER_ERROR, SUBSCRIPTION_VERIFICATION_INITIATION_FAILED
 from ..etc.ResponseStatusCodes import TARGET_NOT_REACHABLE, REMOTE_ENTITY_NOT_REACHABLE, OPERATION_NOT_ALLOWED
 from ..etc.ResponseStatusCodes import OPERATION_DENIED_BY_REMOTE_ENTITY, NOT_FOUND
-from ..etc.DateUtils import fromDuration, getResourceDate, cronMatchesTimestamp, utcDatetime
-from ..etc.Utils import toSPRelative, pureResource, isAcmeUrl, compareIDs
+from ..etc.DateUtils import fromDuration, getResourceDate, toISO8601Date, utcTime
+from ..etc.Utils import toSPRelative, pureResource, isAcmeUrl, compareIDs, uniqueID
+from ..etc.RequestUtils import serializeData
 from ..helpers.TextTools import setXPath, findXPath
 from ..services import CSE
 from ..services.Configuration import Configuration
 from ..resources.Resource import Resource
 from ..resources.CRS import CRS
 from ..resources.SUB import SUB
-from ..helpers.BackgroundWorker import BackgroundWorker, BackgroundWorkerPool
+from ..helpers.BackgroundWorker import BackgroundWorker, BackgroundWorkerPool, JobRejectedError
+from ..helpers.DeadlineTimer import DeadlineTimer
 from ..services.Logging import Logging as L
 
 # TODO: removal policy (e.g. unsuccessful tries)
@@ -40,6 +45,299 @@ SenderFunction = Callable[[str], bool]	# type:ignore[misc] # bc cyclic definitio
 """ Type definition for sender callback function. """
 
 
+class NotificationPayloadCache(object):
+	"""	Cache for the payload of the notifications of a single notification event.
+
+		The resource representation and its serializations are the same for all targets of an event.
+		They are therefore only calculated once per *nct*, *net* and content serialization, and only
+		the subscription specific attributes *sur* and *cr* are patched into the serialized payload for
+		each target.
+
+		Attributes:
+			resource: The resource of the notification event.
+			modifiedAttributes: The modified attributes of the notification event.
+			representations: The cached resource representations. Mapping from *nct* to the representation.
+			templates: The cached serialized payloads, split at the positions of *sur* and *cr*.
+	"""
+
+	__slots__ = (
+		'resource',
+		'modifiedAttributes',
+		'representations',
+		'templates',
+	)
+	"""	Slots of the class. """
+
+	_surPlaceholder = f'__sur_{uniqueID()}__'
+	"""	Placeholder for the *sur* attribute in the serialized payload. """
+	_crPlaceholder = f'__cr_{uniqueID()}__'
+	"""	Placeholder for the *cr* attribute in the serialized payload. """
+
+
+	def __init__(self, resource:Optional[Resource] = None, modifiedAttributes:Optional[JSON] = None) -> None:
+		"""	Initialization of the cache for a notification event.
+
+			Args:
+				resource: The resource of the notification event.
+				modifiedAttributes: The modified attributes of the notification event.
+		"""
+		self.resource = resource
+		self.modifiedAttributes = modifiedAttributes
+		self.representations:dict[NotificationContentType, JSON] = {}
+		self.templates:dict[tuple, tuple[str|bytes, ...]] = {}
+
+
+	@staticmethod
+	def isCacheable(nct:NotificationContentType) -> bool:
+		"""	Check whether the representation for a *notificationContentType* only depends on the event.
+
+			Args:
+				nct: The notification content type.
+
+			Return:
+				True if the representation can be cached.
+		"""
+		return nct in (NotificationContentType.allAttributes, NotificationContentType.ri, NotificationContentType.modifiedAttributes)
+
+
+	def representation(self, nct:NotificationContentType) -> Optional[JSON]:
+		"""	Return the (cached) resource representation for a *notificationContentType*.
+
+			The returned structure is shared between all targets and must not be changed.
+
+			Args:
+				nct: The notification content type.
+
+			Return:
+				The representation, or None if it cannot be cached.
+		"""
+		if (data := self.representations.get(nct)) is None:
+			match nct:
+				case NotificationContentType.allAttributes:
+					data = self.resource.asDict()
+				case NotificationContentType.ri:
+					data = { 'm2m:uri' : self.resource.ri }
+				case NotificationContentType.modifiedAttributes:
+					data = { self.resource.tpe : self.modifiedAttributes }
+				case _:
+					return None
+			self.representations[nct] = data
+		return data
+
+
+	def serializer(self, nct:NotificationContentType, 
+						 net:NotificationEventType, 
+						 sur:str, 
+						 cr:Optional[str]) -> Callable[[ContentSerializationType], Optional[str|bytes]]:
+		"""	Return a function that returns the serialized notification payload for a single target.
+
+			Args:
+				nct: The notification content type.
+				net: The notification event type.
+				sur: The subscription reference of the target's subscription.
+				cr: The creator of the target's subscription, or None.
+
+			Return:
+				A function that takes a content serialization type and returns the serialized payload,
+				or None if the payload cannot be serialized from the cache.
+		"""
+
+		def _serialize(ct:ContentSerializationType) -> Optional[str|bytes]:
+			key = (nct, net, cr is not None, ct)
+			if (fragments := self.templates.get(key)) is None:
+				fragments = self.templates[key] = self._template(nct, net, cr is not None, ct)
+			if not fragments:	# not possible for this serialization
+				return None
+			if cr is None:
+				return fragments[0] + serializeData(sur, ct) + fragments[1]	# type:ignore[operator]
+			return fragments[0] + serializeData(sur, ct) + fragments[1] + serializeData(cr, ct) + fragments[2]	# type:ignore[operator]
+
+		return _serialize
+
+
+	def _template(self, nct:NotificationContentType, 
+						net:NotificationEventType, 
+						hasCr:bool, 
+						ct:ContentSerializationType) -> tuple[str|bytes, ...]:
+		"""	Serialize a notification payload with placeholders for *sur* and *cr*, and split it at the placeholders.
+
+			Args:
+				nct: The notification content type.
+				net: The notification event type.
+				hasCr: Whether the payload contains a *cr* attribute.
+				ct: The content serialization type.
+
+			Return:
+				The fragments of the serialized payload, or an empty tuple if this is not possible.
+		"""
+		if ct not in (ContentSerializationType.JSON, ContentSerializationType.CBOR):
+			return ()
+		template = serializeData(buildSubscriptionNotification(self.representation(nct), 
+																   net, 
+																   self._surPlaceholder, 
+																   self._crPlaceholder if hasCr else None), ct)
+		fragments = template.split(serializeData(self._surPlaceholder, ct))	# type:ignore[union-attr, arg-type]
+		if len(fragments) != 2:
+			return ()
+		if hasCr:
+			_f = fragments[1].split(serializeData(self._crPlaceholder, ct))	# type:ignore[arg-type]
+			if len(_f) != 2:
+				return ()
+			return (fragments[0], _f[0], _f[1])
+		return tuple(fragments)
+
+
+def buildSubscriptionNotification(data:Optional[JSON], 
+								  net:Optional[NotificationEventType], 
+								  sur:str, 
+								  cr:Optional[str]) -> JSON:
+	"""	Build the payload of a subscription notification.
+
+		Args:
+			data: The representation, or None.
+			net: The notification event type, or None.
+			sur: The subscription reference.
+			cr: The creator of the subscription, or None.
+
+		Return:
+			The notification as a `JSON` structure.
+	"""
+	request:JSON = {
+		'm2m:sgn' : {
+			'nev' : {
+				'rep' : {},
+				'net' : NotificationEventType.resourceUpdate
+			},
+			'sur' : sur
+		}
+	}
+	net is not None and setXPath(request, 'm2m:sgn/nev/net', net)
+	data is not None and setXPath(request, 'm2m:sgn/nev/rep', data)
+	cr is not None and setXPath(request, 'm2m:sgn/cr', cr)	# Set creator in notification if it was present in subscription
+	return request
+
+
+def _activationDate(ts:Optional[float]) -> str:
+	"""	Format the time of the next activation of a scheduled resource for logging.
+
+		Args:
+			ts: The POSIX timestamp of the next activation, or None if there is none.
+
+		Return:
+			The readable ISO 8601 date, or "never".
+	"""
+	return 'never' if ts is None else toISO8601Date(ts, readable = True)
+
+
+_retryableRSCs = ( ResponseStatusCode.TARGET_NOT_REACHABLE, 
+				   ResponseStatusCode.REMOTE_ENTITY_NOT_REACHABLE, 
+				   ResponseStatusCode.REQUEST_TIMEOUT )
+"""	Response status codes of failed notifications that are retried. """
+
+
+@dataclass
+class NotificationTarget(object):
+	"""	Delivery state and metrics of a single notification target.
+	"""
+	nu:str
+	""" The notification URI of the target. """
+	delivered:int = 0
+	""" Number of successfully delivered notifications. """
+	failed:int = 0
+	""" Number of failed delivery attempts. """
+	rejected:int = 0
+	""" Number of notifications that were rejected by the target with a non-retryable error. """
+	retries:int = 0
+	""" Number of retries. """
+	deadLetters:int = 0
+	""" Number of notifications that were stored as dead letters. """
+	replayed:int = 0
+	""" Number of dead letters that were replayed successfully. """
+	consecutiveFailures:int = 0
+	""" Number of consecutive failed delivery attempts. """
+	circuitOpenedAt:float = 0.0
+	""" Timestamp when the target was regarded as unavailable, or 0.0 if it is available. """
+	probeScheduled:bool = False
+	""" Indicates whether a probe for an unavailable target is scheduled. """
+	replaying:bool = False
+	""" Indicates whether dead letters are currently replayed. """
+	deadLettersChecked:bool = False
+	""" Indicates whether the stored dead letters of the target were replayed since the CSE started. """
+
+
+	def asDict(self) -> JSON:
+		"""	Return the metrics of the target.
+
+			Return:
+				The metrics as a dictionary.
+		"""
+		return {
+			'delivered': self.delivered,
+			'failed': self.failed,
+			'rejected': self.rejected,
+			'retries': self.retries,
+			'deadLetters': self.deadLetters,
+			'replayed': self.replayed,
+			'consecutiveFailures': self.consecutiveFailures,
+			'available': self.circuitOpenedAt == 0.0,
+		}
+
+
+@dataclass
+class CRSWindow(object):
+	"""	The state and the cached metadata of the time window of a single \<crs> resource.
+	"""
+	ri:str
+	""" The resource ID of the \<crs> resource. """
+	twt:TimeWindowType
+	""" The time window type. """
+	tws:float
+	""" The time window size in seconds. """
+	subCount:int
+	""" The number of subscriptions of the \<crs>, ie. the maximum number of expected unique notifications. """
+	eem:EventEvaluationMode
+	""" The event evaluation mode. """
+	nu:list[str]
+	""" The notification URIs of the \<crs>. """
+	nse:bool = False
+	""" Indicates whether notification statistics are enabled for the \<crs>. """
+	exc:Optional[int] = None
+	""" The expiration counter of the \<crs>. """
+	received:set[str] = field(default_factory = set)
+	""" The unique subscription resource IDs of the notifications received in the current window. """
+	deadline:float = 0.0
+	""" The POSIX timestamp when the current window ends, or 0.0 if no window is running. """
+
+
+	@classmethod
+	def fromResource(cls, crs:CRS) -> CRSWindow:
+		"""	Create a new window for a \<crs> resource.
+
+			Args:
+				crs: The \<crs> resource.
+
+			Return:
+				The new *CRSWindow* instance.
+		"""
+		window = cls(crs.ri, crs.twt, 0.0, 0, EventEvaluationMode.ALL_EVENTS_PRESENT, [])
+		window.update(crs)
+		return window
+
+
+	def update(self, crs:CRS) -> None:
+		"""	Update the cached metadata from a \<crs> resource.
+
+			Args:
+				crs: The \<crs> resource.
+		"""
+		self.tws = fromDuration(crs.tws)
+		self.subCount = crs._countSubscriptions()
+		self.eem = EventEvaluationMode(crs.eem) if crs.eem is not None else EventEvaluationMode.ALL_EVENTS_PRESENT
+		self.nu = list(crs.nu or [])
+		self.nse = bool(crs.nse)
+		self.exc = crs.exc
+
+
 class NotificationManager(object):
 	"""	This class defines functionalities to handle subscriptions and notifications.
 
@@ -51,8 +349,25 @@ class NotificationManager(object):
 		'lockBatchNotification',
 		'lockNotificationEventStats',
 
+		'lockNotificationTargets',
+
 		'asyncSubscriptionNotifications',
 		'enableSubscriptionVerificationRequests',
+		'enableNotificationRetries',
+		'notificationRetryMaxAttempts',
+		'notificationRetryInitialDelay',
+		'notificationRetryMaxDelay',
+		'notificationRetryJitter',
+		'notificationCircuitBreakerThreshold',
+		'notificationCircuitBreakerTimeout',
+		'notificationTimeoutBudget',
+
+		'notificationTargets',
+		'_cascadedDeletion',
+
+		'lockCRSWindows',
+		'crsWindows',
+		'crsWindowTimer',
 
 		'_eventNotification',
 	)
@@ -70,6 +385,17 @@ class NotificationManager(object):
 
 		self.lockBatchNotification = Lock()					# Lock for batchNotifications
 		self.lockNotificationEventStats = Lock()			# Lock for notificationEventStats
+		self.lockNotificationTargets = Lock()				# Lock for notificationTargets
+
+		self.notificationTargets:dict[str, NotificationTarget] = {}	# Delivery state and metrics per notification target
+		self._cascadedDeletion = local()					# Per-thread depth of cascaded resource deletions
+
+		self.lockCRSWindows = Lock()						# Lock for crsWindows
+		self.crsWindows:dict[str, CRSWindow] = {}			# Time windows of <crs> resources. Mapping from the <crs> resource ID
+		self.crsWindowTimer = DeadlineTimer(self._crsWindowExpired, 	# Shared timer for all <crs> time windows
+											name = 'crsWindowTimer',
+											errorCallback = lambda ri, e: L.logErr(f'Error handling time window for <crs>: {ri}', exc = e))
+		self.crsWindowTimer.start()
 
 		CSE.event.addHandler(CSE.event.cseReset, self.restart)		# type: ignore
 		
@@ -85,6 +411,11 @@ class NotificationManager(object):
 			Returns:
 				Boolean that indicates the success of the operation
 		"""
+		BackgroundWorkerPool.stopWorkers('notificationRetry_*')
+		BackgroundWorkerPool.stopWorkers('notificationProbe_*')
+		self.crsWindowTimer.stop()
+		with self.lockCRSWindows:
+			self.crsWindows.clear()
 		L.isInfo and L.log('NotificationManager shut down')
 		return True
 
@@ -95,15 +426,19 @@ class NotificationManager(object):
 			Args:
 				name: The name of the event.
 		"""
-		L.isInfo and L.log('NotificationManager: Stopping all <CRS> window workers')
+		L.isInfo and L.log('NotificationManager: Stopping all <CRS> time windows')
 
-		# Stop all crossResourceSubscription workers
-		periodicWorkers = BackgroundWorkerPool.stopWorkers('crsPeriodic_*')
-		BackgroundWorkerPool.stopWorkers('crsSliding_*')
+		# Stop all crossResourceSubscription windows. Periodic windows are started again when 
+		# the <crs> resources are imported.
+		with self.lockCRSWindows:
+			self.crsWindows.clear()
+			self.crsWindowTimer.clear()
 
-		# Restart the periodic crossResourceSubscription workers with its old arguments
-		for worker in periodicWorkers:
-			worker.start(**worker.args)
+		# Stop all notification retries and clear the notification targets
+		BackgroundWorkerPool.stopWorkers('notificationRetry_*')
+		BackgroundWorkerPool.stopWorkers('notificationProbe_*')
+		with self.lockNotificationTargets:
+			self.notificationTargets.clear()
 
 		L.isDebug and L.logDebug('NotificationManager restarted')
 
@@ -113,6 +448,14 @@ class NotificationManager(object):
 		"""
 		self.asyncSubscriptionNotifications	= Configuration.get('cse.asyncSubscriptionNotifications')
 		self.enableSubscriptionVerificationRequests	= Configuration.get('cse.enableSubscriptionVerificationRequests')
+		self.enableNotificationRetries = Configuration.get('cse.notification.enableRetries')
+		self.notificationRetryMaxAttempts = Configuration.get('cse.notification.retryMaxAttempts')
+		self.notificationRetryInitialDelay = Configuration.get('cse.notification.retryInitialDelay')
+		self.notificationRetryMaxDelay = Configuration.get('cse.notification.retryMaxDelay')
+		self.notificationRetryJitter = Configuration.get('cse.notification.retryJitter')
+		self.notificationCircuitBreakerThreshold = Configuration.get('cse.notification.circuitBreakerThreshold')
+		self.notificationCircuitBreakerTimeout = Configuration.get('cse.notification.circuitBreakerTimeout')
+		self.notificationTimeoutBudget = Configuration.get('cse.notification.timeoutBudget')
 
 
 	def configUpdate(self, name:str, 
@@ -125,7 +468,16 @@ class NotificationManager(object):
 				key: The configuration key that has changed.
 				value: The new value of the configuration key.
 		"""
-		if key not in ( 'cse.asyncSubscriptionNotifications', 'cse.enableSubscriptionVerificationRequests' ):
+		if key not in ( 'cse.asyncSubscriptionNotifications', 
+						'cse.enableSubscriptionVerificationRequests',
+						'cse.notification.enableRetries',
+						'cse.notification.retryMaxAttempts',
+						'cse.notification.retryInitialDelay',
+						'cse.notification.retryMaxDelay',
+						'cse.notification.retryJitter',
+						'cse.notification.circuitBreakerThreshold',
+						'cse.notification.circuitBreakerTimeout',
+						'cse.notification.timeoutBudget' ):
 			return
 		self._assignConfig()
 
@@ -169,21 +521,51 @@ class NotificationManager(object):
 		# Send outstanding batchNotifications for a subscription
 		self._flushBatchNotifications(subscription)
 
-		# Send a deletion request to the subscriberURI
+		# Send a deletion request to the subscriberURI. When the subscription is deleted as part of 
+		# a deleted resource tree then the deletion notification is queued and sent in the background.
 		if (su := subscription.su):
-			if not self.sendDeletionNotification(su, subscription.ri):
+			if self.isCascadedDeletion():
+				self._sendDeletionNotificationAsync(su, subscription.ri)
+			elif not self.sendDeletionNotification(su, subscription.ri):
 				L.isWarn and L.logWarn(f'Deletion request failed for: {su}') # but ignore the error
 
 		# Send a deletion request to the associatedCrossResourceSub
 		if (acrs := subscription.acrs):
-			self.sendDeletionNotification([ nu for nu in acrs ], subscription.ri)
+			if self.isCascadedDeletion():
+				self._sendDeletionNotificationAsync([ nu for nu in acrs ], subscription.ri)
+			else:
+				self.sendDeletionNotification([ nu for nu in acrs ], subscription.ri)
 		
-		# Finally remove subscriptions from storage
+		# Finally remove subscriptions and undelivered notifications from storage
 		try:
 			if not CSE.storage.removeSubscription(subscription):
 				raise INTERNAL_SERVER_ERROR('cannot remove subscription from database')
 		except NOT_FOUND:
 			pass	# ignore, could be expected
+		CSE.storage.removeDeadLettersForSubscription(subscription.ri)
+
+
+	@contextmanager
+	def cascadedDeletion(self) -> Iterator[None]:
+		"""	Context manager to mark the deletion of child resources of a deleted resource in the current thread.
+
+			Deletion notifications of subscriptions that are removed in this context are sent asynchronously.
+		"""
+		depth = getattr(self._cascadedDeletion, 'depth', 0)
+		self._cascadedDeletion.depth = depth + 1
+		try:
+			yield
+		finally:
+			self._cascadedDeletion.depth = depth
+
+
+	def isCascadedDeletion(self) -> bool:
+		"""	Check whether resources are currently deleted as part of a deleted resource tree in the current thread.
+
+			Return:
+				True if the current thread is deleting child resources of a deleted resource.
+		"""
+		return getattr(self._cascadedDeletion, 'depth', 0) > 0
 
 
 	def updateSubscription(self, subscription:SUB, previousNus:list[str], originator:str) -> None:
@@ -279,6 +661,10 @@ class NotificationManager(object):
 				# TODO ensure uniqueness
 				subs.append(sub)
 
+		# The notification payload is the same for all subscriptions of this event
+		payloadCache = NotificationPayloadCache(childResource if reason in [ NotificationEventType.createDirectChild, NotificationEventType.deleteDirectChild ] else resource, 
+												modifiedAttributes)
+
 		for sub in subs:
 
 			if reason not in sub['net']:	# check whether reason is actually included in the subscription
@@ -295,16 +681,10 @@ class NotificationManager(object):
 
 			# Check the subscription's schedule, but only if it is not an immediate notification
 			if not ((nec := sub['nec']) and nec == EventCategory.Immediate):
-				if (_sc := CSE.storage.searchScheduleForTarget(ri)):
-					_ts = utcDatetime()
-
-					# Check whether the current time matches the schedule
-					for s in _sc:
-						if cronMatchesTimestamp(s, _ts):
-							break
-					else:
-						# No schedule matches the current time, so continue with the next subscription
-						continue
+				if not CSE.schedule.isActive(ri):
+					# No schedule matches the current time, so continue with the next subscription
+					L.isDebug and L.logDebug('Subscription: %s is inactive until: %s', ri, _activationDate(CSE.schedule.nextActivation(ri)))
+					continue
 
 			match reason:
 				case NotificationEventType.createDirectChild | NotificationEventType.deleteDirectChild:	# reasons for child resources
@@ -315,7 +695,8 @@ class NotificationManager(object):
 														 reason, 
 														 resource = childResource, 
 														 modifiedAttributes = modifiedAttributes, 
-														 asynchronous = self.asyncSubscriptionNotifications)
+														 asynchronous = self.asyncSubscriptionNotifications,
+														 payloadCache = payloadCache)
 					self.countNotificationEvents(ri)
 			
 				# Check Update and enc/atr vs the modified attributes 
@@ -329,7 +710,8 @@ class NotificationManager(object):
 															 reason, 
 															 resource = resource, 
 															 modifiedAttributes = modifiedAttributes,
-															 asynchronous = self.asyncSubscriptionNotifications)
+															 asynchronous = self.asyncSubscriptionNotifications,
+															 payloadCache = payloadCache)
 						self.countNotificationEvents(ri)
 					else:
 						L.isDebug and L.logDebug('Skipping notification: No matching attributes found')
@@ -350,7 +732,8 @@ class NotificationManager(object):
 														reason, 
 														resource, 
 														modifiedAttributes = modifiedAttributes,
-														asynchronous = False)	# blocking NET always synchronous!
+														asynchronous = False,	# blocking NET always synchronous!
+														payloadCache = payloadCache)
 					self.countNotificationEvents(ri)
 
 				# all other reasons that target the resource
@@ -359,7 +742,8 @@ class NotificationManager(object):
 														reason, 
 														resource, 
 														modifiedAttributes = modifiedAttributes,
-														asynchronous = self.asyncSubscriptionNotifications)
+														asynchronous = self.asyncSubscriptionNotifications,
+														payloadCache = payloadCache)
 					self.countNotificationEvents(ri)
 
 
@@ -587,80 +971,74 @@ class NotificationManager(object):
 
 		# Send a deletion request to the subscriberURI
 		if (su := crs.su):
-			if not self.sendDeletionNotification(su, crs.ri):
+			if self.isCascadedDeletion():
+				self._sendDeletionNotificationAsync(su, crs.ri)
+			elif not self.sendDeletionNotification(su, crs.ri):
 				L.isWarn and L.logWarn(f'Deletion request failed for: {su}') # but ignore the error
 
 
 
-	def _crsCheckForNotification(self, data:list[str], 
-			      					   crsRi:str, 
-									   subCount:int, 
-									   eem:EventEvaluationMode = EventEvaluationMode.ALL_EVENTS_PRESENT) -> None:
+	def _crsCheckForNotification(self, window:CRSWindow, data:set[str]) -> None:
 		"""	Test whether a notification must be sent for a a <crs> window.
 
 			This method also sends the notification(s) if the window requirements are met.
 			
 			Args:
-				data: List of unique resource IDs.
-				crsRi: The resource ID of the <crs> resource for the window.
-				subCount: Maximum number of expected resource IDs in *data*.
-				eem: EventEvaluationMode.
+				window: The <crs> window.
+				data: Set of the unique subscription resource IDs received in the window.
 		"""
-		
-		# First make sure that the list in 'data' only contains unique resource IDs
-		data = list(set(data))
-
-		L.isDebug and L.logDebug(f'Checking <crs>: {crsRi} window properties: unique notification count: {len(data)}, max expected count: {subCount}, eem: {eem}')
+		crsRi = window.ri
+		subCount = window.subCount
+		eem = window.eem
+		count = len(data)
+		L.isDebug and L.logDebug(f'Checking <crs>: {crsRi} window properties: unique notification count: {count}, max expected count: {subCount}, eem: {eem}')
 
 		# Test for conditions
-		if	((eem is None or eem == EventEvaluationMode.ALL_EVENTS_PRESENT) and len(data) == subCount) or \
-			(eem == EventEvaluationMode.ALL_OR_SOME_EVENTS_PRESENT and 1 <= len(data) <= subCount) or \
-			(eem == EventEvaluationMode.SOME_EVENTS_MISSING and 1 <= len(data) < subCount) or \
-			(eem == EventEvaluationMode.ALL_OR_SOME_EVENTS_MISSING and 0 <= len(data) < subCount) or \
-			(eem == EventEvaluationMode.ALL_EVENTS_MISSING and len(data) == 0):
+		if	(eem == EventEvaluationMode.ALL_EVENTS_PRESENT and count == subCount) or \
+			(eem == EventEvaluationMode.ALL_OR_SOME_EVENTS_PRESENT and 1 <= count <= subCount) or \
+			(eem == EventEvaluationMode.SOME_EVENTS_MISSING and 1 <= count < subCount) or \
+			(eem == EventEvaluationMode.ALL_OR_SOME_EVENTS_MISSING and 0 <= count < subCount) or \
+			(eem == EventEvaluationMode.ALL_EVENTS_MISSING and count == 0):
 
 			L.isDebug and L.logDebug(f'Received sufficient notifications - sending notification')
 			
 			# Check the crossResourceSubscription's schedule, if there is one
-			if (_sc := CSE.storage.searchScheduleForTarget(crsRi)):
-				_ts = utcDatetime()
-
-				# Check whether the current time matches any schedule
-				for s in _sc:
-					if cronMatchesTimestamp(s, _ts):
-						break
-				else:
-					# No schedule matches the current time, so clear the data and just return
-					L.isDebug and L.logDebug(f'No matching schedule found for <crs>: {crsRi}')
-					return
-
-			try:
-				resource = CSE.dispatcher.retrieveResource(crsRi)
-			except ResponseException as e:
-				L.logWarn(f'Cannot retrieve <crs> resource: {crsRi}: {e.dbg}')	# Not much we can do here
+			if not CSE.schedule.isActive(crsRi):
+				# No schedule matches the current time, so clear the data and just return
+				L.isDebug and L.logDebug('No matching schedule found for <crs>: %s. Inactive until: %s', crsRi, _activationDate(CSE.schedule.nextActivation(crsRi)))
 				return
 
-			crs = cast(CRS, resource)
+			# The <crs> resource is only needed for the notification statistics and the expiration counter
+			crs:Optional[CRS] = None
+			if window.nse or window.exc:
+				try:
+					crs = cast(CRS, CSE.dispatcher.retrieveResource(crsRi))
+				except ResponseException as e:
+					L.logWarn(f'Cannot retrieve <crs> resource: {crsRi}: {e.dbg}')	# Not much we can do here
+					return
 
 			# Send the notification directly. Handle the counting of sent notifications and received responses
 			# in pre and post functions for the notifications of each target
 			dct:JSON = { 'm2m:sgn' : {
-					'sur' : toSPRelative(crs.ri)
+					'sur' : toSPRelative(crsRi)
 				}
 			}
 			self.sendNotificationWithDict(dct, 
-										  crs.nu, 
+										  window.nu, 
 										  originator = CSE.cseCsi,
 										  background = True,
-										  preFunc = lambda target: self.countSentReceivedNotification(crs, target),
-										  postFunc = lambda target: self.countSentReceivedNotification(crs, target, isResponse = True)
+										  preFunc = (lambda target: self.countSentReceivedNotification(crs, target)) if crs else None,
+										  postFunc = (lambda target: self.countSentReceivedNotification(crs, target, isResponse = True)) if crs else None
 										 )
-			self.countNotificationEvents(crs.ri, sub = crs)	# Count notification events
+			if not crs:
+				return
+			self.countNotificationEvents(crsRi, sub = crs)	# Count notification events
 			
 			# Check for <crs> expiration
 			if (exc := crs.exc):
 				exc -= 1
 				crs.setAttribute('exc', exc)
+				window.exc = exc
 				L.isDebug and L.logDebug(f'Reducing <crs> expiration counter to {exc}')
 				crs.dbUpdate(True)
 				if exc <= 0:
@@ -671,122 +1049,106 @@ class NotificationManager(object):
 			L.isDebug and L.logDebug(f'No notification sent')
 
 
-	# Time Window Monitor : Periodic
+	# Time Windows
 
-	def _getPeriodicWorkerName(self, ri:str) -> str:
-		"""	Return the name of a periodic window worker.
+	def startCRSPeriodicWindow(self, crs:CRS) -> None:
+		"""	Start the periodic time window of a <crs> resource. 
 		
+			The window is evaluated after each *timeWindowSize* period.
+
 			Args:
-				ri: Resource ID for which the worker is running.
-			
-			Return:
-				String with the worker name.
+				crs: The <crs> resource.
 		"""
-		return f'crsPeriodic_{ri}'
-
+		window = CRSWindow.fromResource(crs)
+		L.isDebug and L.logDebug(f'Starting PeriodicWindow for crs: {window.ri}. TimeWindowSize: {window.tws}. TimeWindowInterpretation: {window.eem}')
+		with self.lockCRSWindows:
+			self.crsWindows[window.ri] = window
+			self._scheduleCRSWindow(window, utcTime() + window.tws)
 
-	def startCRSPeriodicWindow(self, crsRi:str, 
-			    					 tws:str, 
-									 expectedCount:int,
-									 eem:EventEvaluationMode = EventEvaluationMode.ALL_EVENTS_PRESENT) -> None:
 
-		crsTws = fromDuration(tws)
-		L.isDebug and L.logDebug(f'Starting PeriodicWindow for crs: {crsRi}. TimeWindowSize: {crsTws}. TimeWindowInterpretation: {eem}')
+	def stopCRSWindow(self, crsRi:str) -> None:
+		"""	Stop the periodic or sliding time window of a <crs> resource.
 
-		# Start a background worker. "data", which will contain the RI's later is empty
-		BackgroundWorkerPool.newWorker(crsTws, 
-									   self._crsPeriodicWindowMonitor, 
-									   name = self._getPeriodicWorkerName(crsRi), 
-									   startWithDelay = True,
-									   data = []).start(crsRi = crsRi, expectedCount = expectedCount, eem = eem)
+			Args:
+				crsRi: The resource ID of the <crs> resource.
+		"""
+		L.isDebug and L.logDebug(f'Stopping time window for crs: {crsRi}')
+		with self.lockCRSWindows:
+			self.crsWindows.pop(crsRi, None)	# Outdated deadlines are ignored by the timer
 
 
-	def stopCRSPeriodicWindow(self, crsRi:str) -> None:
-		L.isDebug and L.logDebug(f'Stopping PeriodicWindow for crs: {crsRi}')
-		BackgroundWorkerPool.stopWorkers(self._getPeriodicWorkerName(crsRi))
+	def updateCRSWindow(self, crs:CRS) -> None:
+		"""	Update the cached metadata of a running time window of a <crs> resource.
 
+			Args:
+				crs: The updated <crs> resource.
+		"""
+		with self.lockCRSWindows:
+			if (window := self.crsWindows.get(crs.ri)):
+				window.update(crs)
 
-	def _crsPeriodicWindowMonitor(self, _data:list[str], 
-							   			_worker:BackgroundWorker,
-			       						crsRi:str, 
-										expectedCount:int,
-										eem:EventEvaluationMode = EventEvaluationMode.ALL_EVENTS_PRESENT) -> bool: 
-		L.isDebug and L.logDebug(f'Checking periodic window for <crs>: {crsRi}')
-		self._crsCheckForNotification(_data, crsRi, expectedCount, eem)
-		_worker.data = []
-		return True
 
+	def _scheduleCRSWindow(self, window:CRSWindow, deadline:float) -> None:
+		"""	Set the end of the current time window and add it to the shared timer.
 
-	# Time Window Monitor : Sliding
+			Must be called while holding *lockCRSWindows*.
 
-	def _getSlidingWorkerName(self, ri:str) -> str:
-		"""	Return the name of a sliding window worker.
-		
 			Args:
-				ri: Resource ID for which the worker is running.
-			
-			Return:
-				String with the worker name.
+				window: The <crs> window.
+				deadline: The POSIX timestamp when the window ends.
 		"""
-		return f'crsSliding_{ri}'
-
-
-	def startCRSSlidingWindow(self, crsRi:str,
-			   						tws:str, 
-									sur:str, 
-									subCount:int,
-									eem:EventEvaluationMode = EventEvaluationMode.ALL_EVENTS_PRESENT) -> BackgroundWorker:
-		crsTws = fromDuration(tws)
-		L.isDebug and L.logDebug(f'Starting SlidingWindow for crs: {crsRi}. TimeWindowSize: {crsTws}. SubScount: {subCount}')
-
-		# Start an actor for the sliding window. "data" already contains the first notification source in an array
-		return BackgroundWorkerPool.newActor(self._crsSlidingWindowMonitor, 
-											 crsTws,
-											 name = self._getSlidingWorkerName(crsRi), 
-											 data = [ sur ]).start(crsRi = crsRi, subCount = subCount, eem = eem)
-
-
-	def stopCRSSlidingWindow(self, crsRi:str) -> None:
-		L.isDebug and L.logDebug(f'Stopping SlidingWindow for crs: {crsRi}')
-		BackgroundWorkerPool.stopWorkers(self._getSlidingWorkerName(crsRi))
-
-
-	def _crsSlidingWindowMonitor(self, _data:Any,
-							  		   _worker:BackgroundWorker,
-			      					   crsRi:str, 
-									   subCount:int, 
-									   eem:EventEvaluationMode = EventEvaluationMode.ALL_EVENTS_PRESENT) -> bool:
-		L.isDebug and L.logDebug(f'Checking sliding window for <crs>: {crsRi}')
-		self._crsCheckForNotification(_data, crsRi, subCount, eem)
-		_worker.data = []
-		# _data.clear()
-		return True
+		window.deadline = deadline
+		self.crsWindowTimer.schedule(window.ri, deadline)
 
 
-	# Received Notification handling
+	def _crsWindowExpired(self, crsRi:str, deadline:float) -> None:
+		"""	Callback of the shared timer when the time window of a <crs> resource ends.
 
-	def receivedCrossResourceSubscriptionNotification(self, sur:str, crs:Resource) -> None:
-		crsRi = crs.ri
-		crsTwt = crs.twt
-		crsTws = crs.tws
-		L.isDebug and L.logDebug(f'Received notification for <crs>: {crsRi}, twt: {crsTwt}, tws: {crsTws}')
-		match crsTwt:
-			case TimeWindowType.SLIDINGWINDOW:
-				if (workers := BackgroundWorkerPool.findWorkers(self._getSlidingWorkerName(crsRi))):
-					L.isDebug and L.logDebug(f'Adding notification to worker: {workers[0].name}')
-					if sur not in workers[0].data:
-						workers[0].data.append(sur)
-				else:
-					workers = [ self.startCRSSlidingWindow(crsRi, crsTws, sur, crs._countSubscriptions(), crs.eem) ]	# sur is added automatically when creating actor
+			The received notifications are evaluated in a separate job. A periodic window is
+			immediately scheduled again.
+
+			Args:
+				crsRi: The resource ID of the <crs> resource.
+				deadline: The deadline of the expired window.
+		"""
+		with self.lockCRSWindows:
+			if not (window := self.crsWindows.get(crsRi)) or window.deadline != deadline:
+				return	# Window has been stopped or rescheduled in the meantime
+			data = window.received
+			window.received = set()
+			if window.twt == TimeWindowType.PERIODICWINDOW:
+				# Schedule relative to the previous deadline to prevent drift
+				self._scheduleCRSWindow(window, max(deadline + window.tws, utcTime()))
+			else:
+				window.deadline = 0.0	# A sliding window is started again with the next notification
+
+		L.isDebug and L.logDebug(f'Checking {"periodic" if window.twt == TimeWindowType.PERIODICWINDOW else "sliding"} window for <crs>: {crsRi}')
+		self._runNotificationJob(lambda: self._crsCheckForNotification(window, data), name = f'crsWindow_{crsRi}')
 
-			case TimeWindowType.PERIODICWINDOW:
-				if (workers := BackgroundWorkerPool.findWorkers(self._getPeriodicWorkerName(crsRi))):
-					if sur not in workers[0].data:
-						workers[0].data.append(sur)
 
-			# No else: Periodic is running or not
+	# Received Notification handling
 
-		workers and L.isDebug and L.logDebug(f'Worker data: {workers[0].data}')
+	def receivedCrossResourceSubscriptionNotification(self, sur:str, crs:CRS) -> None:
+		"""	Handle a notification for a <crs> resource from one of its subscriptions.
+
+			Args:
+				sur: The resource ID of the subscription that sent the notification.
+				crs: The <crs> resource.
+		"""
+		crsRi = crs.ri
+		L.isDebug and L.logDebug(f'Received notification for <crs>: {crsRi}, twt: {crs.twt}, tws: {crs.tws}')
+		with self.lockCRSWindows:
+			if not (window := self.crsWindows.get(crsRi)):
+				if crs.twt != TimeWindowType.SLIDINGWINDOW:
+					return	# A periodic window is running or not
+				window = self.crsWindows[crsRi] = CRSWindow.fromResource(crs)
+
+			window.received.add(sur)
+			if window.twt == TimeWindowType.SLIDINGWINDOW and not window.deadline:
+				# Start the sliding window with the first notification
+				L.isDebug and L.logDebug(f'Starting SlidingWindow for crs: {crsRi}. TimeWindowSize: {window.tws}. SubScount: {window.subCount}')
+				self._scheduleCRSWindow(window, utcTime() + window.tws)
+			L.isDebug and L.logDebug(f'Window data: {window.received}')
 		
 
 
@@ -1016,16 +1378,24 @@ class NotificationManager(object):
 		if (nus := subscription.nu):
 			ri = subscription.ri
 			# notify new nus (verification request). New ones are the ones that are not in the previousNU list
+			targets:list[str] = []
 			for nu in nus:
 				if not previousNus or (nu not in previousNus):	# send only to new entries in nu
 					# Skip notifications to originator
 					if nu == originator or compareIDs(nu, originator):
 						L.isDebug and L.logDebug(f'Notification URI skipped: uri: {nu} == originator: {originator}')
 						continue
-					# Send verification notification to target (either direct URL, or an entity)
-					if not self.sendVerificationRequest(nu, ri, originator = originator):
-						# Return when even a single verification request fails
-						raise SUBSCRIPTION_VERIFICATION_INITIATION_FAILED(f'Verification request failed for: {nu}')
+					targets.append(nu)
+
+			# Send verification notifications to all targets (either direct URL, or an entity) concurrently
+			if targets:
+				if not self.enableSubscriptionVerificationRequests:
+					L.isDebug and L.logDebug('Skipping verification request (disabled)')
+				else:
+					self._eventNotification()
+					if (failed := self._sendNotificationConcurrently(targets, self._verificationSender(ri, originator))):
+						# Fail when even a single verification request fails
+						raise SUBSCRIPTION_VERIFICATION_INITIATION_FAILED(f'Verification request failed for: {", ".join(failed)}')
 
 		# Add/Update NotificationStatsInfo structure
 		self.validateAndConstructNotificationStatsInfo(subscription, False) # DON'T add nsi here if not present
@@ -1038,7 +1408,7 @@ class NotificationManager(object):
 									  ri:str, 
 									  originator:Optional[str] = None) -> bool:
 		"""	Define the callback function for verification notifications and send
-				the notification. 
+				the notification. Verification requests to multiple targets are sent concurrently.
 
 				Args:
 					uri: The URI to send the verification request to. This may be a list of URI's. Each URI could be a direct URL, or an entity.
@@ -1051,6 +1421,20 @@ class NotificationManager(object):
 			L.isDebug and L.logDebug('Skipping verification request (disabled)')
 			return True
 
+		return self._sendNotification(uri, self._verificationSender(ri, originator), concurrent = True)
+
+
+	def _verificationSender(self, ri:str, originator:Optional[str] = None) -> SenderFunction:
+		"""	Return the sender callback function for verification requests.
+
+			Args:
+				ri: The resource ID of the subscription.
+				originator: The originator on which behalf to send the notification.
+
+			Return:
+				The sender function.
+		"""
+
 		def sender(uri:str) -> bool:
 			# Skip verification requests to acme: receivers
 			if isAcmeUrl(uri):
@@ -1081,18 +1465,18 @@ class NotificationManager(object):
 				return False
 			return True
 
-
-		return self._sendNotification(uri, sender)
+		return sender
 
 
 	def sendDeletionNotification(self, uri:Union[str, list[str]], ri:str) -> bool:
-		"""	Send a Deletion Notification to a single or a list of target.
+		"""	Send a Deletion Notification to a single or a list of target. Deletion notifications to
+			multiple targets are sent concurrently.
 
 			Args:
 				uri: Single or a list of notification target URIs.
 				ri: ResourceID of the subscription.
 			Return:
-				Boolean indicat
+				Boolean indicating success.
 		"""
 
 		def sender(uri:str) -> bool:
@@ -1115,7 +1499,21 @@ class NotificationManager(object):
 			return True
 
 
-		return self._sendNotification(uri, sender) if uri else True	# Ignore if the uri is None
+		return self._sendNotification(uri, sender, concurrent = True) if uri else True	# Ignore if the uri is None
+
+
+	def _sendDeletionNotificationAsync(self, uri:Union[str, list[str]], ri:str) -> None:
+		"""	Queue a Deletion Notification to be sent in the background. This is used for deletions
+			of whole resource trees, which otherwise would block the request for each subscription.
+
+			Args:
+				uri: Single or a list of notification target URIs.
+				ri: ResourceID of the subscription.
+		"""
+		def _send() -> None:
+			if not self.sendDeletionNotification(uri, ri):
+				L.isWarn and L.logWarn(f'Deletion request failed for: {uri}') # but ignore the error
+		self._runNotificationJob(_send, name = f'NOTDEL_{ri}')
 
 
 	def _handleSubscriptionNotification(self, sub:JSON, 
@@ -1123,22 +1521,44 @@ class NotificationManager(object):
 											  resource:Optional[Resource] = None, 
 											  modifiedAttributes:Optional[JSON] = None, 
 											  missingData:Optional[MissingData] = None,
-											  asynchronous:bool = False) ->  bool:
+											  asynchronous:bool = False,
+											  payloadCache:Optional[NotificationPayloadCache] = None) ->  bool:
 		"""	Send a subscription notification.
+
+			Args:
+				sub: The internal subscription structure.
+				notificationEventType: The notification event type.
+				resource: The resource of the notification event.
+				modifiedAttributes: The modified attributes of the resource.
+				missingData: The missing data structure for *TimeSeries* notifications.
+				asynchronous: Whether the notifications are sent asynchronously.
+				payloadCache: Optional cache for the notification payload of the same event. A new one is used if *None*.
+
+			Return:
+				Boolean indicating success.
 		"""
-		# TODO doc
 		L.isDebug and L.logDebug(f'Handling notification for notificationEventType: {notificationEventType}')
+		if payloadCache is None:
+			payloadCache = NotificationPayloadCache(resource, modifiedAttributes)
 
 
-		def _sendNotification(uri:str, subscription:SUB, notificationRequest:JSON) -> bool:
+		def _sendNotification(uri:str, 
+							  subscription:SUB, 
+							  notificationRequest:JSON, 
+							  serializer:Optional[Callable[[ContentSerializationType], Optional[str|bytes]]]) -> bool:
+			# Don't send to unavailable targets when retries are enabled. The notification is stored as a dead letter instead.
+			if self.enableNotificationRetries and not self._acceptNotification(uri, sub['ri'], notificationRequest):
+				return False
 			try:
-				CSE.request.handleSendRequest(CSERequest(op = Operation.NOTIFY,
-														 to = uri, 
-											  			 originator = CSE.cseCsi,
-											  			 pc = notificationRequest))
+				res = CSE.request.handleSendRequest(CSERequest(op = Operation.NOTIFY,
+															   to = uri, 
+															   originator = CSE.cseCsi,
+															   pc = notificationRequest,
+															   _pcSerializer = serializer))
 			except ResponseException as e:
 				L.isDebug and L.logDebug(f'Notification failed for: {uri} : {e.dbg}')
 				return False
+			self.enableNotificationRetries and self._checkNotificationResult(uri, sub['ri'], notificationRequest, res, 1)
 			self.countSentReceivedNotification(subscription, uri, isResponse = True) # count received notification
 			return True
 
@@ -1147,36 +1567,29 @@ class NotificationManager(object):
 			"""	Sender callback function for a single normal subscription notifications
 			"""
 			L.isDebug and L.logDebug(f'Sending notification to: {uri}, reason: {notificationEventType}, asynchronous: {asynchronous}')
-			notificationRequest:JSON = {
-				'm2m:sgn' : {
-					'nev' : {
-						'rep' : {},
-						'net' : NotificationEventType.resourceUpdate
-					},
-					'sur' : toSPRelative(sub['ri'])
-				}
-			}
 
 			# L.logDebug(missingData)
 
 			nct = sub['nct']
+			sur = toSPRelative(sub['ri'])
 			creator = sub.get('cr')	# creator, might be None
-			# switch to populate data
+
+			# Get the data. The representations that only depend on the event are taken from the cache
 			data = None
-			nct == NotificationContentType.allAttributes						and (data := resource.asDict())
-			nct == NotificationContentType.ri 						and (data := { 'm2m:uri' : resource.ri })
-			nct == NotificationContentType.modifiedAttributes		and (data := { resource.tpe : modifiedAttributes })
-			nct == NotificationContentType.timeSeriesNotification	and (data := { 'm2m:tsn' : missingData.asDict() })
+			serializer = None
+			if payloadCache.isCacheable(nct):
+				data = payloadCache.representation(nct)
+				serializer = payloadCache.serializer(nct, notificationEventType, sur, creator)
+			elif nct == NotificationContentType.timeSeriesNotification:
+				data = { 'm2m:tsn' : missingData.asDict() }
 			# TODO nct == NotificationContentType.triggerPayload
 
-			# Add some values to the notification
-			notificationEventType is not None and setXPath(notificationRequest, 'm2m:sgn/nev/net', notificationEventType)
-			data is not None and setXPath(notificationRequest, 'm2m:sgn/nev/rep', data)
-			creator is not None and setXPath(notificationRequest, 'm2m:sgn/cr', creator)	# Set creator in notification if it was present in subscription
+			# Build the notification
+			_notificationRequest = buildSubscriptionNotification(data, notificationEventType, sur, creator)
 
 			# Check for batch notifications
 			if sub['bn']:
-				return self._storeBatchNotification(uri, sub, notificationRequest)
+				return self._storeBatchNotification(uri, sub, _notificationRequest)
 			else:
 				# If nse is set to True then count this notification request
 				subscription = None
@@ -1190,11 +1603,10 @@ class NotificationManager(object):
 				
 				# Send the notification
 				if asynchronous:
-					BackgroundWorkerPool.runJob(lambda: _sendNotification(uri, subscription, notificationRequest), 
-																		  name = f'NOT_{sub["ri"]}')
-					return True
+					return self._runNotificationJob(lambda: _sendNotification(uri, subscription, _notificationRequest, serializer), 
+													name = f'NOT_{sub["ri"]}')
 				else:
-					return _sendNotification(uri, subscription, notificationRequest)
+					return _sendNotification(uri, subscription, _notificationRequest, serializer)
 
 				# if not CSE.request.sendNotifyRequest(uri, 
 				# 									 originator = CSE.cseCsi,
@@ -1224,7 +1636,9 @@ class NotificationManager(object):
 		return result								
 
 
-	def _sendNotification(self, uris:Union[str, list[str]], senderFunction:SenderFunction) -> bool:
+	def _sendNotification(self, uris:Union[str, list[str]], 
+								senderFunction:SenderFunction, 
+								concurrent:Optional[bool] = False) -> bool:
 		"""	Send a notification to a single or to multiple targets if necessary. 
 		
 			Call the infividual callback functions to do the resource preparation and the the actual sending.
@@ -1232,6 +1646,7 @@ class NotificationManager(object):
 			Args:
 				uris: Either a string or a list of strings of notification receivers.
 				senderFunction: A function that is called to perform the actual notification sending.
+				concurrent: If True then notifications to multiple targets are sent concurrently, with a shared timeout budget.
 			
 			Return:
 				Returns *True*, even when nothing was sent, and *False* when any *senderFunction* returned False. 
@@ -1241,6 +1656,8 @@ class NotificationManager(object):
 
 		if isinstance(uris, str):
 			return senderFunction(uris)
+		elif concurrent and len(uris) > 1:
+			return not self._sendNotificationConcurrently(uris, senderFunction)
 		else:
 			for uri in uris:
 				if not senderFunction(uri):
@@ -1248,6 +1665,344 @@ class NotificationManager(object):
 			return True
 
 
+	def _sendNotificationConcurrently(self, uris:list[str], senderFunction:SenderFunction) -> list[str]:
+		"""	Send a notification to multiple targets concurrently. 
+		
+			All targets share the same timeout budget (*[cse.notification]:timeoutBudget*). Targets that have not
+			been notified when the budget is used up are regarded as failed.
+
+			Args:
+				uris: A list of notification receivers.
+				senderFunction: A function that is called to perform the actual notification sending.
+			
+			Return:
+				The list of targets for which the notification failed. The list is empty if all notifications were successful.
+		"""
+		if len(uris) == 1:
+			return [] if senderFunction(uris[0]) else list(uris)
+
+		claimLock = Lock()
+
+		def _send(uri:str, future:Future) -> None:
+			# Each notification is sent only once, either by a job or by the caller
+			with claimLock:
+				if future.running() or future.done() or not future.set_running_or_notify_cancel():
+					return
+			try:
+				future.set_result(senderFunction(uri))
+			except Exception as e:
+				L.logErr(f'Error sending notification to: {uri}', exc = e)
+				future.set_result(False)
+
+		# The notifications are sent by jobs of the job pool. Rejected tasks are not run in the caller's
+		# thread immediately, but only after all other tasks have been submitted.
+		futures = [ Future() for _ in uris ]
+		for uri, future in zip(uris, futures):
+			try:
+				BackgroundWorkerPool.runJob(lambda uri = uri, future = future: _send(uri, future), name = 'NOT_fanOut', rejectionPolicy = 'abort')
+			except JobRejectedError:
+				pass
+		
+		# The caller might itself run in a job, and the tasks might wait in the job queue when the pool is
+		# exhausted. Therefore the caller sends all notifications itself that have not been started by a job yet.
+		deadline = time.monotonic() + self.notificationTimeoutBudget
+		for uri, future in zip(uris, futures):
+			if time.monotonic() >= deadline:
+				break
+			_send(uri, future)
+
+		# Wait for all results, or until the timeout budget is used up
+		_, notDone = waitForFutures(futures, timeout = max(deadline - time.monotonic(), 0.0))
+		if notDone:
+			for future in notDone:
+				future.cancel()
+			L.isWarn and L.logWarn(f'Timeout sending notifications to: {[ uri for uri, future in zip(uris, futures) if future in notDone ]}')
+		return [ uri for uri, future in zip(uris, futures) if future in notDone or not future.result() ]
+
+
+
+	def _runNotificationJob(self, task:Callable, name:str) -> bool:
+		"""	Run a notification task in a job of the job pool.
+
+			Notification tasks are never discarded silently or run in the caller's thread. If the
+			job pool is exhausted then the task is rejected and an error is logged.
+
+			Args:
+				task: The notification task.
+				name: The name of the job.
+
+			Return:
+				True if the task was started or queued, False if it was rejected.
+		"""
+		try:
+			BackgroundWorkerPool.runJob(task, name = name, rejectionPolicy = 'abort')
+		except JobRejectedError as e:
+			L.logErr(f'Notification task rejected: {str(e)}')
+			return False
+		return True
+
+
+
+	##########################################################################
+	#
+	#	Notification Retries
+	#
+
+	def getNotificationTargetStatistics(self) -> dict[str, JSON]:
+		"""	Return the delivery metrics of all notification targets.
+
+			Return:
+				Dictionary with the notification URIs as keys and the metrics as values.
+		"""
+		with self.lockNotificationTargets:
+			return { nu: t.asDict() for nu, t in self.notificationTargets.items() }
+
+
+	def _getNotificationTarget(self, nu:str) -> NotificationTarget:
+		"""	Return the state of a notification target. A new state is created if necessary.
+			
+			The caller must hold the *lockNotificationTargets* lock.
+
+			Args:
+				nu: The notification URI.
+			
+			Return:
+				The target's state.
+		"""
+		if (target := self.notificationTargets.get(nu)) is None:
+			target = self.notificationTargets[nu] = NotificationTarget(nu)
+		return target
+
+
+	def _acceptNotification(self, nu:str, ri:str, notificationRequest:JSON, attempts:int = 0) -> bool:
+		"""	Check whether a notification can be sent to a target. 
+		
+			If the target is currently regarded as unavailable then the notification is stored as a dead letter.
+			After the *circuitBreakerTimeout* the next notification is sent to probe the target.
+
+			Args:
+				nu: The notification URI.
+				ri: The resource ID of the subscription.
+				notificationRequest: The notification request.
+				attempts: The number of previous delivery attempts.
+
+			Return:
+				True if the notification can be sent.
+		"""
+		with self.lockNotificationTargets:
+			target = self._getNotificationTarget(nu)
+			if not target.circuitOpenedAt or utcTime() >= target.circuitOpenedAt + self.notificationCircuitBreakerTimeout:
+				return True
+		L.isDebug and L.logDebug(f'Notification target unavailable: {nu}')
+		self._deadLetterNotification(nu, ri, notificationRequest, attempts)
+		return False
+
+
+	def _checkNotificationResult(self, nu:str, 
+									   ri:str, 
+									   notificationRequest:JSON, 
+									   responses:RequestResponseList, 
+									   attempts:int, 
+									   deadLetter:bool = True) -> bool:
+		"""	Check the result of a sent notification and schedule a retry if necessary.
+
+			Args:
+				nu: The notification URI.
+				ri: The resource ID of the subscription.
+				notificationRequest: The notification request.
+				responses: The responses of the notification request.
+				attempts: The number of delivery attempts, including this one.
+				deadLetter: Store the notification as a dead letter when it finally cannot be delivered.
+
+			Return:
+				True if the notification was delivered.
+		"""
+		if not responses:	# Nothing was sent, so there is nothing to retry
+			return True
+		if isSuccessRSC(rsc := responses[0].result.rsc):
+			self._notificationDelivered(nu)
+			return True
+		if rsc not in _retryableRSCs:	# The target rejected the notification. Retrying would not help
+			L.isDebug and L.logDebug(f'Notification rejected by: {nu} rsc: {rsc}')
+			with self.lockNotificationTargets:
+				self._getNotificationTarget(nu).rejected += 1
+			return True
+		self._notificationFailed(nu, ri, notificationRequest, attempts, deadLetter)
+		return False
+
+
+	def _notificationDelivered(self, nu:str) -> None:
+		"""	Record a delivered notification. If the target was failing before, or if this is the first
+			delivered notification to the target since the CSE started, then the dead letters for the target
+			are replayed. The latter replays dead letters that were stored before a restart of the CSE.
+
+			Args:
+				nu: The notification URI.
+		"""
+		with self.lockNotificationTargets:
+			target = self._getNotificationTarget(nu)
+			target.delivered += 1
+			recovered = target.consecutiveFailures > 0
+			replay = recovered or not target.deadLettersChecked
+			target.consecutiveFailures = 0
+			target.circuitOpenedAt = 0.0
+			target.deadLettersChecked = True
+		if replay:
+			recovered and L.isDebug and L.logDebug(f'Notification target recovered: {nu}')
+			self._runNotificationJob(lambda: self._replayDeadLetters(nu), name = f'NOTREPLAY_{nu}')
+
+
+	def _notificationFailed(self, nu:str, ri:str, notificationRequest:JSON, attempts:int, deadLetter:bool = True) -> None:
+		"""	Record a failed notification. The notification is retried with an exponential backoff,
+			or stored as a dead letter when the maximum number of attempts is reached or the target
+			is regarded as unavailable.
+
+			Args:
+				nu: The notification URI.
+				ri: The resource ID of the subscription.
+				notificationRequest: The notification request.
+				attempts: The number of delivery attempts so far.
+				deadLetter: Store the notification as a dead letter when it finally cannot be delivered.
+		"""
+		with self.lockNotificationTargets:
+			target = self._getNotificationTarget(nu)
+			target.failed += 1
+			target.consecutiveFailures += 1
+
+			# Open the circuit after too many consecutive failures, and schedule a probe for the target
+			if target.consecutiveFailures >= self.notificationCircuitBreakerThreshold:
+				if not target.circuitOpenedAt:
+					L.isWarn and L.logWarn(f'Notification target unavailable after {target.consecutiveFailures} failures: {nu}')
+				target.circuitOpenedAt = utcTime()
+				if not target.probeScheduled:
+					target.probeScheduled = True
+					BackgroundWorkerPool.newActor(self._probeNotificationTarget, 
+												  delay = self.notificationCircuitBreakerTimeout,
+												  name = f'notificationProbe_{nu}',
+												  data = nu).start()
+			circuitOpen = target.circuitOpenedAt > 0.0
+
+		if not deadLetter:
+			return
+		if circuitOpen or attempts >= self.notificationRetryMaxAttempts:
+			self._deadLetterNotification(nu, ri, notificationRequest, attempts)
+			return
+
+		# Schedule a retry with exponential backoff and jitter
+		delay = min(self.notificationRetryMaxDelay, self.notificationRetryInitialDelay * (2 ** (attempts - 1)))
+		delay *= 1.0 + random.uniform(-self.notificationRetryJitter, self.notificationRetryJitter)
+		L.isDebug and L.logDebug(f'Retrying notification to: {nu} in {delay:.2f} seconds (attempt: {attempts + 1})')
+		BackgroundWorkerPool.newActor(self._retryNotification, 
+									  delay = delay,
+									  name = f'notificationRetry_{nu}_{uniqueID()}',
+									  data = (nu, ri, notificationRequest, attempts + 1)).start()
+
+
+	def _retryNotification(self, _data:Tuple[str, str, JSON, int]) -> None:
+		"""	Retry to send a notification. This is the callback for the retry actors.
+
+			Args:
+				_data: Tuple of notification URI, subscription resource ID, notification request, and attempt number.
+		"""
+		nu, ri, notificationRequest, attempts = _data
+		if not self._acceptNotification(nu, ri, notificationRequest, attempts - 1):
+			return
+		with self.lockNotificationTargets:
+			self._getNotificationTarget(nu).retries += 1
+		self._checkNotificationResult(nu, ri, notificationRequest, self._sendNotificationRequest(nu, notificationRequest), attempts)
+
+
+	def _probeNotificationTarget(self, _data:str) -> None:
+		"""	Probe an unavailable notification target by replaying its dead letters. 
+			This is the callback for the probe actors.
+
+			Args:
+				_data: The notification URI.
+		"""
+		with self.lockNotificationTargets:
+			target = self._getNotificationTarget(_data)
+			target.probeScheduled = False
+			if not target.circuitOpenedAt:
+				return
+		L.isDebug and L.logDebug(f'Probing notification target: {_data}')
+		if not self._replayDeadLetters(_data):
+			# No dead letter was tried. Close the circuit so that the next notification probes the target.
+			with self.lockNotificationTargets:
+				target.circuitOpenedAt = 0.0
+
+
+	def _replayDeadLetters(self, nu:str) -> bool:
+		"""	Replay the dead letters of a notification target, oldest first. The replay stops at the first
+			failed notification.
+
+			Args:
+				nu: The notification URI.
+
+			Return:
+				True if at least one dead letter was tried to be sent.
+		"""
+		with self.lockNotificationTargets:
+			target = self._getNotificationTarget(nu)
+			if target.replaying:
+				return True
+			target.replaying = True
+		tried = False
+		try:
+			for each in CSE.storage.getDeadLetters(nu):
+				tried = True
+				responses = self._sendNotificationRequest(nu, each['request'])
+				if not self._checkNotificationResult(nu, 
+													 each['ri'], 
+													 each['request'], 
+													 responses,
+													 each['attempts'] + 1, 
+													 deadLetter = False):
+					break
+				# The dead letter is removed even if the target rejected it, but only counted as replayed when it was delivered
+				CSE.storage.removeDeadLetter(each['id'])
+				if responses and isSuccessRSC(responses[0].result.rsc):
+					with self.lockNotificationTargets:
+						target.replayed += 1
+		finally:
+			with self.lockNotificationTargets:
+				target.replaying = False
+		return tried
+
+
+	def _deadLetterNotification(self, nu:str, ri:str, notificationRequest:JSON, attempts:int) -> None:
+		"""	Store an undeliverable notification as a dead letter.
+
+			Args:
+				nu: The notification URI.
+				ri: The resource ID of the subscription.
+				notificationRequest: The notification request.
+				attempts: The number of failed delivery attempts.
+		"""
+		L.isDebug and L.logDebug(f'Storing undeliverable notification for: {nu} after {attempts} attempt(s)')
+		with self.lockNotificationTargets:
+			self._getNotificationTarget(nu).deadLetters += 1
+		CSE.storage.addDeadLetter(ri, nu, notificationRequest, attempts)
+
+
+	def _sendNotificationRequest(self, nu:str, notificationRequest:JSON) -> RequestResponseList:
+		"""	Send a notification request to a target.
+
+			Args:
+				nu: The notification URI.
+				notificationRequest: The notification request.
+
+			Return:
+				The list of responses. It is empty if the request could not be sent.
+		"""
+		try:
+			return CSE.request.handleSendRequest(CSERequest(op = Operation.NOTIFY,
+															to = nu, 
+															originator = CSE.cseCsi,
+															pc = notificationRequest))
+		except ResponseException as e:
+			L.isDebug and L.logDebug(f'Notification failed for: {nu} : {e.dbg}')
+			return []
+
 
 	##########################################################################
 	#
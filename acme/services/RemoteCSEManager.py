@@ -26,6 +26,7 @@ from ..resources.Factory import resourceFromDict
 from ..services.Configuration import Configuration
 from ..services import CSE
 from ..helpers.BackgroundWorker import BackgroundWorker, BackgroundWorkerPool
+from ..helpers.EventManager import HandlerMode
 from ..services.Logging import Logging as L
 
 
@@ -90,20 +91,21 @@ class RemoteCSEManager(object):
 		self._assignConfig()
 
 		#	The following lines register event handlers for registration and de-registration events.
-		#	The following events are registered when registerueng and de-registerung from the registrar CSE
-		CSE.event.addHandler(CSE.event.registeredToRegistrarCSE, self.handleRegistrarRegistration)				# type: ignore
-		CSE.event.addHandler(CSE.event.deregisteredFromRegistrarCSE, self.handleRegistrarDeregistration)		# type: ignore
+		#	The following events are registered when registerueng and de-registerung from the registrar CSE.
+		#	The handlers send requests to other CSEs, so they run in separate jobs
+		CSE.event.addHandler(CSE.event.registeredToRegistrarCSE, self.handleRegistrarRegistration, HandlerMode.job)				# type: ignore
+		CSE.event.addHandler(CSE.event.deregisteredFromRegistrarCSE, self.handleRegistrarDeregistration, HandlerMode.job)		# type: ignore
 
 		#	The following events are usually thrown by the Registration Manager.
-		CSE.event.addHandler(CSE.event.registreeCSEHasRegistered, self.handleRegistreeCSERegistration)			# type: ignore
-		CSE.event.addHandler(CSE.event.registreeCSEHasDeregistered, self.handleRegistreeCSEDeregistration)		# type: ignore
-		CSE.event.addHandler(CSE.event.registreeCSEUpdate, self.handleRegistreeCSEUpdate)							# type: ignore
+		CSE.event.addHandler(CSE.event.registreeCSEHasRegistered, self.handleRegistreeCSERegistration, HandlerMode.job)			# type: ignore
+		CSE.event.addHandler(CSE.event.registreeCSEHasDeregistered, self.handleRegistreeCSEDeregistration, HandlerMode.job)		# type: ignore
+		CSE.event.addHandler(CSE.event.registreeCSEUpdate, self.handleRegistreeCSEUpdate, HandlerMode.job)							# type: ignore
 
 		# Add a handler for configuration changes
 		CSE.event.addHandler(CSE.event.configUpdate, self.configUpdate)		# type: ignore
 
 		# Add a handler when the CSE is started
-		CSE.event.addHandler(CSE.event.cseStartup, self.start)	# type: ignore
+		CSE.event.addHandler(CSE.event.cseStartup, self.start, HandlerMode.job)	# type: ignore
 		L.isInfo and L.log('RemoteCSEManager initialized')
 
 		# Optimize event handling
@@ -8,11 +8,13 @@
 #
 
 from __future__ import annotations
-from typing import Any, List, Tuple, cast, Dict, Optional, Union
+from typing import Any, Callable, List, Tuple, cast, Dict, Optional, Union, Iterator
 
-import urllib.parse
+import urllib.parse, asyncio
 from copy import deepcopy
-from threading import Lock
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import Lock, Condition, local
 
 from ..etc.Types import JSON, BasicType, DesiredIdentifierResultType, FilterOperation, ResourceTypes
 from ..etc.Types import FilterUsage, Operation, Permission, RequestCallback, RequestType
@@ -22,12 +24,12 @@ from ..etc.Types import CSERequest, ContentSerializationType, RequestResponseLis
 from ..etc.ResponseStatusCodes import ResponseException
 from ..etc.ResponseStatusCodes import BAD_REQUEST, NOT_FOUND, REQUEST_TIMEOUT, RELEASE_VERSION_NOT_SUPPORTED
 from ..etc.ResponseStatusCodes import UNSUPPORTED_MEDIA_TYPE, OPERATION_NOT_ALLOWED, REQUEST_TIMEOUT
-from ..etc.DateUtils import getResourceDate, fromAbsRelTimestamp, utcTime, waitFor, toISO8601Date, fromDuration
+from ..etc.DateUtils import getResourceDate, fromAbsRelTimestamp, utcTime, toISO8601Date, fromDuration, timeUntilTimestamp
 from ..etc.RequestUtils import requestFromResult, determineSerialization, deserializeData
 from ..etc.Utils import isCSERelative, toSPRelative, isValidCSI, isValidAEI, uniqueRI, isURL, isAbsolute, isSPRelative
-from ..etc.Utils import compareIDs, isAcmeUrl, isHttpUrl, isMQTTUrl, localResourceID, retrieveIDFromPath, getIdFromOriginator
+from ..etc.Utils import compareIDs, isAcmeUrl, isHttpUrl, isMQTTUrl, isCoAPUrl, localResourceID, retrieveIDFromPath, getIdFromOriginator
 from ..etc.Utils import isStructured, structuredPathFromRI
-from ..helpers.TextTools import setXPath
+from ..helpers.TextTools import setXPath, simpleMatch
 from ..services.Configuration import Configuration
 from ..services import CSE
 from ..resources.Resource import Resource
@@ -35,6 +37,8 @@ from ..resources.CSEBase import getCSE
 from ..resources.REQ import REQ
 from ..resources.PCH import PCH
 from ..helpers.BackgroundWorker import BackgroundWorkerPool
+from ..helpers.DeadlineTimer import DeadlineTimer
+from ..helpers.SingleFlight import SingleFlight
 from ..services.Logging import Logging as L
 
 # Type definition
@@ -49,8 +53,170 @@ TargetDetails = List[ 						#type: ignore[misc]
 				] ]	
 
 
-# This factor determines how often the monitor looks for expired request resources
-expirationCheckFactor = 2.0
+_filterCriteriaAttributes:dict[str, Tuple[Optional[BasicType], bool]] = {
+	# Attributes that are validated according to their attribute policies
+	**{ a: (None, False) for a in ( 'lim', 'lvl', 'ofst', 'arp',
+									'crb', 'cra', 'ms', 'us', 'sts', 'stb', 'exb', 'exa', 'lbq', 'sza', 'szb', 'catr', 'patr',
+									'smf',
+									'aq' ) },
+	# List attributes
+	'lbl':	(BasicType.list, False),
+	'cty':	(BasicType.list, False),
+	# List attributes that are normally non-lists. Their elements are validated individually
+	'ty':	(BasicType.list, True),
+}
+"""	Filter criteria attributes that are copied to the *FilterCriteria* structure of a request.
+	Mapping from the attribute name to the attribute type that overrides the attribute policy's type, and whether the elements of a list are validated as well.
+"""
+
+
+class PollingPending(object):
+	"""	A long-polling request that waits asynchronously for a queued request instead of blocking a thread.
+		It is returned in *Result.pending* when the request is handled in the `RequestManager.asyncPolling()` context.
+
+		The server awaits `RequestManager.awaitPollingRequest()` and then calls *resume* in a thread to complete
+		the request. Each layer of the request processing that receives a pending result adds its own completion
+		with `wrap()`, so that only the remaining steps of the request processing are done when it is resumed.
+
+		Attributes:
+			originator: The originator for which a request is waited for.
+			deadline: The UTC-based timestamp until which the polling request may wait.
+			resume: Callable that completes the request and returns the result of the outermost layer.
+	"""
+
+	__slots__ = (
+		'originator',
+		'deadline',
+		'resume',
+	)
+	"""	Slots of the class. """
+
+	def __init__(self, originator:str, deadline:float, resume:Callable[[], Any]) -> None:
+		"""	Initialization of the pending request.
+
+			Args:
+				originator: The originator for which a request is waited for.
+				deadline: The UTC-based timestamp until which the polling request may wait.
+				resume: Callable that completes the request.
+		"""
+		self.originator = originator
+		self.deadline = deadline
+		self.resume = resume
+
+
+	def wrap(self, completion:Callable[[Callable[[], Any]], Any]) -> None:
+		"""	Add the completion of an outer layer. 
+
+			Args:
+				completion: Callable that receives the previous *resume* callable, calls it, and returns its own result.
+		"""
+		resume = self.resume
+		self.resume = lambda: completion(resume)
+
+
+	def remainingTime(self) -> float:
+		"""	Return the remaining time until the deadline.
+
+			Return:
+				The time in seconds, or 0.0 if the deadline has passed.
+		"""
+		return max(0.0, self.deadline - utcTime())
+
+
+def _resolveFuture(future:asyncio.Future) -> None:
+	"""	Resolve an asyncio future of a waiting long-polling request. Must be called in the future's event loop.
+
+		Args:
+			future: The future to resolve.
+	"""
+	if not future.done():
+		future.set_result(True)
+
+
+class PollingQueue(object):
+	"""	The queued requests and responses for a single originator of a polling channel.
+
+		Requests and responses are kept in separate ordered dictionaries, indexed by their request identifiers.
+		They preserve the queueing order, so that both the oldest entry and an entry with a specific
+		request identifier can be found and removed in constant time.
+
+		Attributes:
+			queues: Ordered dictionaries with the queued requests, one for each request type. Mapping from the request identifiers.
+			condition: The condition, on the request lock, that waiting polling requests wait for.
+			waiters: The number of waiting polling requests.
+			futures: The asyncio futures of the long-polling requests that are waited for asynchronously.
+	"""
+
+	__slots__ = (
+		'queues',
+		'condition',
+		'waiters',
+		'futures',
+	)
+	"""	Slots of the class. """
+
+
+	def __init__(self, lock:Lock) -> None:
+		"""	Initialization of the queue.
+
+			Args:
+				lock: The lock that protects the queue. It is also used for the *condition*.
+		"""
+		self.queues:Dict[RequestType, OrderedDict[str, CSERequest]] = { RequestType.REQUEST: OrderedDict(), 
+																		RequestType.RESPONSE: OrderedDict() }
+		self.condition = Condition(lock)
+		self.waiters = 0
+		self.futures:list[asyncio.Future] = []
+
+
+	def add(self, request:CSERequest, reqType:RequestType) -> None:
+		"""	Add a request to the end of the queue.
+
+			Args:
+				request: The request to add.
+				reqType: Whether the request is a request or a response.
+		"""
+		self.queues[reqType][request.rqi] = request
+
+
+	def has(self, requestID:str, reqType:RequestType) -> bool:
+		"""	Check whether a matching request is queued.
+
+			Args:
+				requestID: Request Identifier to match. Might be *None* to match all request IDs.
+				reqType: Match request or response.
+
+			Return:
+				True if a matching request is queued.
+		"""
+		return bool(self.queues[reqType]) if requestID is None else requestID in self.queues[reqType]
+
+
+	def remove(self, requestID:str, reqType:RequestType) -> Optional[CSERequest]:
+		"""	Remove a request from the queue.
+
+			Args:
+				requestID: Request Identifier of the request to remove. If it is *None* then the oldest request is removed.
+				reqType: Match request or response.
+
+			Return:
+				The removed request, or *None* if there is no matching request.
+		"""
+		if requestID is not None:
+			return self.queues[reqType].pop(requestID, None)
+		if self.queues[reqType]:
+			return self.queues[reqType].popitem(last = False)[1]
+		return None
+
+
+	def isUnused(self) -> bool:
+		"""	Check whether the queue is empty and no polling request is waiting for it.
+
+			Return:
+				True if the queue can be removed.
+		"""
+		return not self.waiters and not self.futures and not any(self.queues.values())
+
 
 class RequestManager(object):
 
@@ -58,14 +224,20 @@ class RequestManager(object):
 		'_requestLock',
 		'_requests',
 		'_rqiOriginator',
-		'_pcWorker',
+		'_pcTimer',
+		'_asyncPolling',
+		'_transitRetrieves',
 
 		'requestHandlers',
 		'flexBlockingBlocking',
 		'requestExpirationDelta',
 		'maxExpirationDelta',
 		'sendToFromInResponses',
+		'allowJSONComments',
 		'enableRequestRecording',
+		'coalesceTransitRetrieves',
+		'transitCacheTTL',
+		'transitPermissionClasses',
 
 		'_eventRequestReceived',
 		'_eventRequestReceived',
@@ -91,9 +263,17 @@ class RequestManager(object):
 		#	Structures for pollingChannel requests
 		#
 		self._requestLock = Lock()													# Lock to access the following two dictionaries
-		self._requests:Dict[str, List[ Tuple[CSERequest, RequestType] ] ] = {}		# Dictionary to map request originators to a list of reqeests. Used for handling polling requests.
+		self._requests:Dict[str, PollingQueue] = {}									# Dictionary to map request originators to a queue of requests. Used for handling polling requests.
 		self._rqiOriginator:Dict[str, str] = {}										# Dictionary to map requestIdentifiers to an originator of a request. Used for handling of polling requests.
-		self._pcWorker = BackgroundWorkerPool.newWorker(self.requestExpirationDelta * expirationCheckFactor, self._cleanupPollingRequests, name='pollingChannelExpiration').start()
+		self._pcTimer = DeadlineTimer(self._expirePollingRequest, 					# Shared timer for the expiration of all queued polling requests
+									  name = 'pollingChannelExpiration',
+									  errorCallback = lambda key, e: L.logErr(f'Error removing expired polling request: {key}', exc = e)).start()
+		self._asyncPolling = local()												# Per-thread state of long-polling requests that are handled for the asyncio server
+
+		#
+		#	Coalescing and caching of transit RETRIEVE requests
+		#
+		self._transitRetrieves = SingleFlight()
 
 		# Add a handler when the CSE is reset
 		CSE.event.addHandler(CSE.event.cseReset, self.restart)	# type: ignore
@@ -160,9 +340,9 @@ class RequestManager(object):
 
 
 	def shutdown(self) -> bool:
-		# Stop the PollingChannel Cleanup worker
-		if self._pcWorker:
-			self._pcWorker.stop()
+		# Stop the PollingChannel expiration timer
+		if self._pcTimer:
+			self._pcTimer.stop()
 		L.isInfo and L.log('RequestManager shut down')
 		return True
 
@@ -172,12 +352,17 @@ class RequestManager(object):
 		"""
 		# Terminate waiting request and pollingQueue actors
 		BackgroundWorkerPool.removeWorkers('request_*')
-		BackgroundWorkerPool.removeWorkers('unqueuePolling_*')
+		self._pcTimer.clear()
 
-		# empty polling channel queues
+		# empty polling channel queues. Queues with waiting polling requests are only emptied.
 		with self._requestLock:
-			self._requests = {}
+			for originator, queue in list(self._requests.items()):
+				for each in queue.queues.values():
+					each.clear()
+				if queue.isUnused():
+					del self._requests[originator]
 			self._rqiOriginator = {}
+		self._transitRetrieves.clear()
 		L.logDebug('RequestManager restarted')
 	
 
@@ -188,7 +373,14 @@ class RequestManager(object):
 		self.requestExpirationDelta	= Configuration.get('cse.requestExpirationDelta')
 		self.maxExpirationDelta		= Configuration.get('cse.maxExpirationDelta')
 		self.sendToFromInResponses	= Configuration.get('cse.sendToFromInResponses')
+		self.allowJSONComments		= Configuration.get('cse.allowJSONComments')
 		self.enableRequestRecording	= Configuration.get('cse.operation.requests.enable')
+		self.coalesceTransitRetrieves	= Configuration.get('cse.operation.requests.coalesceTransitRetrieves')
+		self.transitCacheTTL		= Configuration.get('cse.operation.requests.transitCacheTTL')
+		self.transitPermissionClasses:List[Tuple[str, str]] = []	# (originator pattern, permission class)
+		for each in Configuration.get('cse.operation.requests.transitPermissionClasses'):
+			permissionClass, _, pattern = each.partition(':')
+			self.transitPermissionClasses.append((pattern.strip(), permissionClass.strip()))
 
 
 	def configUpdate(self, name:str, 
@@ -201,15 +393,15 @@ class RequestManager(object):
 				key: Name of the updated configuration setting.
 				value: New value for the config setting.
 		"""
-		if key not in [ 'cse.flexBlockingPreference', 'cse.requestExpirationDelta', 'cse.maxExpirationDelta', 'cse.operation.requests.enable']:
+		if key not in [ 'cse.flexBlockingPreference', 'cse.requestExpirationDelta', 'cse.maxExpirationDelta', 'cse.allowJSONComments', 'cse.operation.requests.enable',
+						'cse.operation.requests.coalesceTransitRetrieves', 'cse.operation.requests.transitCacheTTL',
+						'cse.operation.requests.transitPermissionClasses' ]:
 			return
 
 		# Configuration values
 		self._assignConfig()
-
-		# restart expiration worker
-		if self._pcWorker:
-			self._pcWorker.restart(self.requestExpirationDelta * expirationCheckFactor)
+		if key in [ 'cse.operation.requests.transitCacheTTL', 'cse.operation.requests.transitPermissionClasses' ]:
+			self._transitRetrieves.clear()
 
 
 	#########################################################################
@@ -254,11 +446,29 @@ class RequestManager(object):
 							  dbg = L.logWarn(f'Partial retrieve is only valid for rcn=1 or rcn=7 (was: {request.rcn})'))
 
 		# Call the appropriate request function
+		return self._handleAndRecordRequest(request, lambda: self.requestHandlers[request.op].ownRequest(request))
+
+
+	def _handleAndRecordRequest(self, request:CSERequest, handler:Callable[[], Result]) -> Result:
+		"""	Call a request handler and record the request with its result.
+
+			A pending long-polling request is recorded when it is resumed.
+
+			Args:
+				request: The incoming request.
+				handler: Callable that handles the request.
+			Return:
+				Request result.
+		"""
 		try:
-			res = self.requestHandlers[request.op].ownRequest(request)
+			res = handler()
 		except ResponseException as e:
 			res = Result(rsc = e.rsc, dbg = e.dbg, request = e.data)
 
+		if res.pending:
+			res.pending.wrap(lambda resume: self._handleAndRecordRequest(request, resume))
+			return res
+
 		# Add to requests database
 		self.recordRequest(request, res)
 
@@ -304,7 +514,7 @@ class RequestManager(object):
 	#
 
 	def retrieveRequest(self, request:CSERequest) ->  Result:
-		L.isDebug and L.logDebug(f'RETRIEVE ID: {request.id if request.id else request.srn}, originator: {request.originator}')
+		L.isDebug and L.logDebug('RETRIEVE ID: %s, originator: %s', request.id if request.id else request.srn, request.originator)
 		
 		match request.rt:
 			case ResponseType.blockingRequest:
@@ -326,7 +536,7 @@ class RequestManager(object):
 	#
 
 	def createRequest(self, request:CSERequest) -> Result:
-		L.isDebug and L.logDebug(f'CREATE ID: {request.id if request.id else request.srn}, originator: {request.originator}')
+		L.isDebug and L.logDebug('CREATE ID: %s, originator: %s', request.id if request.id else request.srn, request.originator)
 
 		# Check contentType and resourceType
 		if request.ty == None:
@@ -352,7 +562,7 @@ class RequestManager(object):
 	#
 
 	def updateRequest(self, request:CSERequest) -> Result:
-		L.isDebug and L.logDebug(f'UPDATE ID: {request.id if request.id else request.srn}, originator: {request.originator}')
+		L.isDebug and L.logDebug('UPDATE ID: %s, originator: %s', request.id if request.id else request.srn, request.originator)
 
 		# Don't update the CSEBase
 		if request.id == CSE.cseRi:
@@ -380,7 +590,7 @@ class RequestManager(object):
 
 
 	def deleteRequest(self, request:CSERequest,) -> Result:
-		L.isDebug and L.logDebug(f'DELETE ID: {request.id if request.id else request.srn}, originator: {request.originator}')
+		L.isDebug and L.logDebug('DELETE ID: %s, originator: %s', request.id if request.id else request.srn, request.originator)
 
 		# Don't delete the CSEBase
 		if request.id in [ CSE.cseRi, CSE.cseRi, CSE.cseRn ]:
@@ -406,11 +616,11 @@ class RequestManager(object):
 	#
 
 	def notifyRequest(self, request:CSERequest) -> Result:
-		L.isDebug and L.logDebug(f'NOTIFY ID: {request.id if request.id else request.srn}, originator: {request.originator}')
+		L.isDebug and L.logDebug('NOTIFY ID: %s, originator: %s', request.id if request.id else request.srn, request.originator)
 
 
 		match request.rt:
-			case ResponseType.blockingRequest:
+			case ResponseType.blockingRequest | ResponseType.noResponse:	# The binding doesn't send a response for noResponse
 				return CSE.dispatcher.processNotifyRequest(request, request.originator)
 			case ResponseType.nonBlockingRequestSynch | ResponseType.nonBlockingRequestAsynch:
 				return self._handleNonBlockingRequest(request)
@@ -610,8 +820,109 @@ class RequestManager(object):
 		self._originatorToSPRelative(request)
 
 		# L.isDebug and L.logDebug(f'Forwarding RETRIEVE/DISCOVERY request to: {res.data}')
-		L.isDebug and L.logDebug(f'Forwarding RETRIEVE/DISCOVERY request to: {request.id}')
-		return self.handleSendRequest(request)[0].result		# there should be at least one result
+		L.isDebug and L.logDebug('Forwarding RETRIEVE/DISCOVERY request to: %s', request.id)
+		if not self.coalesceTransitRetrieves or request.rt != ResponseType.blockingRequest:
+			return self.handleSendRequest(request)[0].result		# there should be at least one result
+
+		# Identical requests that are in progress are sent only once, and all originators receive the same response.
+		# Successful responses may also be cached for a short time.
+		# The originator's permission class is part of the key because the remote CSE checks the originator's privileges.
+		# A waiting request doesn't wait longer than its requestExpirationTimestamp or resultExpirationTimestamp.
+		key = self._transitRetrieveKey(request)
+		timeout:Optional[float] = None
+		if deadlines := [ ts for ts in (request._rqetUTCts, request._rsetUTCts) if ts is not None ]:
+			timeout = max(0.0, timeUntilTimestamp(min(deadlines)))
+		try:
+			result, shared = self._transitRetrieves.do(key,
+													   lambda: self.handleSendRequest(request)[0].result,		# there should be at least one result
+													   timeout = timeout,
+													   cacheTTL = lambda result: self._transitCacheTTLFor(request, result))
+		except TimeoutError:
+			raise REQUEST_TIMEOUT(L.logWarn(f'Timeout waiting for a forwarded RETRIEVE/DISCOVERY request to: {request.id}'))
+		# A shared result is a deep copy, so each originator gets its own result, request, and content
+		if shared:
+			L.isDebug and L.logDebug(f'Returning the shared response of a forwarded RETRIEVE/DISCOVERY request to: {request.id}')
+		return result
+
+
+	def _transitRetrieveKey(self, request:CSERequest) -> Tuple:
+		"""	Return the key that identifies identical forwarded RETRIEVE and DISCOVERY requests.
+
+			Args:
+				request: The request to forward.
+
+			Return:
+				Tuple with the operation, the target, the originator's permission class, and the request attributes that determine the response.
+		"""
+		filterCriteria:list[Tuple[str, str]] = []
+		request.fc.mapAttributes(lambda k, v: filterCriteria.append((k, str(v))), True)
+		attributeList = request.pc.get('m2m:atrl') if isinstance(request.pc, dict) else None
+		return (request.op,
+				request.to,
+				self._transitPermissionClass(request.originator),
+				request.rcn,
+				request.drt,
+				request.rvi,
+				request.sqi,
+				tuple(sorted(filterCriteria)),
+				tuple(attributeList) if attributeList else None)
+
+
+	def _transitPermissionClass(self, originator:str) -> str:
+		"""	Return the permission class of an originator for coalescing forwarded requests. 
+		
+			Originators that match one of the configured patterns share the permission class of that pattern,
+			ie. they are assumed to have the same privileges at the remote CSEs. Any other originator forms its own class.
+
+			Args:
+				originator: The originator of a forwarded request in SP-relative format.
+
+			Return:
+				The name of the permission class, or the originator itself.
+		"""
+		for pattern, permissionClass in self.transitPermissionClasses:
+			if simpleMatch(originator, pattern):
+				return f'class:{permissionClass}'
+		return originator
+
+
+	def _transitCacheTTLFor(self, request:CSERequest, result:Result) -> float:
+		"""	Return the time to cache the result of a forwarded RETRIEVE or DISCOVERY request.
+
+			Only successful results are cached, and not beyond the request's resultExpirationTimestamp.
+
+			Args:
+				request: The forwarded request.
+				result: The result of the request.
+
+			Return:
+				Time in seconds, or 0.0 if the result is not cached.
+		"""
+		if self.transitCacheTTL <= 0.0 or result.rsc != ResponseStatusCode.OK:
+			return 0.0
+		if request._rsetUTCts is not None:
+			return min(self.transitCacheTTL, timeUntilTimestamp(request._rsetUTCts))
+		return self.transitCacheTTL
+
+
+	def _invalidateTransitRetrieves(self, request:CSERequest) -> None:
+		"""	Remove the cached results of forwarded RETRIEVE and DISCOVERY requests for the target
+			of a forwarded CREATE, UPDATE or DELETE request, and for the target's children.
+
+			This is done before and after the request is forwarded, so that results of RETRIEVE requests
+			that were in progress at the same time are removed as well.
+
+			Attention:
+				Targets are compared by their path segments. Cached results for the same resource, but addressed
+				by another identifier (e.g. the unstructured resource ID instead of the structured path) are
+				not removed. They expire after *transitCacheTTL* seconds.
+
+			Args:
+				request: The forwarded request.
+		"""
+		if self.transitCacheTTL > 0.0 and (to := request.to.rstrip('/') if request.to else None):
+			prefix = to + '/'
+			self._transitRetrieves.invalidate(lambda key: key[1] is not None and (key[1].rstrip('/') == to or key[1].startswith(prefix)))
 
 
 	def handleTransitCreateRequest(self, request:CSERequest) -> Result:
@@ -621,8 +932,12 @@ class RequestManager(object):
 		# See TS-0001, 7.3.2.6, Forwarding
 		self._originatorToSPRelative(request)
 
-		L.isDebug and L.logDebug(f'Forwarding CREATE request to: {request.id}')
-		return self.handleSendRequest(request)[0].result	# there should be at least one result
+		L.isDebug and L.logDebug('Forwarding CREATE request to: %s', request.id)
+		self._invalidateTransitRetrieves(request)
+		try:
+			return self.handleSendRequest(request)[0].result	# there should be at least one result
+		finally:
+			self._invalidateTransitRetrieves(request)
 
 
 	def handleTransitUpdateRequest(self, request:CSERequest) -> Result:
@@ -632,8 +947,12 @@ class RequestManager(object):
 		# See TS-0001, 7.3.2.6, Forwarding
 		self._originatorToSPRelative(request)
 
-		L.isDebug and L.logDebug(f'Forwarding UPDATE request to: {request.id}')
-		return self.handleSendRequest(request)[0].result	# there should be at least one result
+		L.isDebug and L.logDebug('Forwarding UPDATE request to: %s', request.id)
+		self._invalidateTransitRetrieves(request)
+		try:
+			return self.handleSendRequest(request)[0].result	# there should be at least one result
+		finally:
+			self._invalidateTransitRetrieves(request)
 
 
 	def handleTransitDeleteRequest(self, request:CSERequest) -> Result:
@@ -643,8 +962,12 @@ class RequestManager(object):
 		# See TS-0001, 7.3.2.6, Forwarding
 		self._originatorToSPRelative(request)
 
-		L.isDebug and L.logDebug(f'Forwarding DELETE request to: {request.id}')
-		return self.handleSendRequest(request)[0].result	# there should be at least one result
+		L.isDebug and L.logDebug('Forwarding DELETE request to: %s', request.id)
+		self._invalidateTransitRetrieves(request)
+		try:
+			return self.handleSendRequest(request)[0].result	# there should be at least one result
+		finally:
+			self._invalidateTransitRetrieves(request)
 
 
 	def handleTransitNotifyRequest(self, request:CSERequest) -> Result:
@@ -654,7 +977,7 @@ class RequestManager(object):
 		# See TS-0001, 7.3.2.6, Forwarding
 		self._originatorToSPRelative(request)
 
-		L.isDebug and L.logDebug(f'Forwarding NOTIFY request to: {request.id}')
+		L.isDebug and L.logDebug('Forwarding NOTIFY request to: %s', request.id)
 		return self.handleSendRequest(request)[0].result	# there should be at least one result
 
 
@@ -677,17 +1000,16 @@ class RequestManager(object):
 	#	Request/Response async sequence helpers for Polling
 	#
 	#	All the requests for all PCU are stored in a single dictionary:
-	#		originator : [ request* ]
+	#		originator : PollingQueue
 	#
 
 	def hasPollingRequest(self, originator:str, requestID:str = None, reqType:RequestType = RequestType.REQUEST) -> bool:
 		"""	Check whether there is a pending request or response pending for the tuple (*originator*, *requestID*).
-			This method is also used as a callback for periodic check whether a request or response is queued.
 			If *requestID* is not *None* then the check is for a request with that ID. 
 			Otherwise, *True* will be returned if there is any request for the *originator*.
 		"""
 		with self._requestLock:
-			return (lst := self._requests.get(originator)) is not None and any(	 (r, t) for r,t in lst if (requestID is None or r.rqi == requestID) and (t == reqType) )
+			return (queue := self._requests.get(originator)) is not None and queue.has(requestID, reqType)
 
 	
 	def queuePollingRequest(self, request:CSERequest, reqType:RequestType=RequestType.REQUEST) -> None:
@@ -723,21 +1045,24 @@ class RequestManager(object):
 		
 		# Add to queue
 		with self._requestLock:
-			if not (originator := request.id) in self._requests:
-				self._requests[originator] = [ (request, reqType) ]
-			else:
-				self._requests[originator].append( (request, reqType) )
+			if not (queue := self._requests.get(originator := request.id)):
+				queue = self._requests[originator] = PollingQueue(self._requestLock)
+			queue.add(request, reqType)
 			# store mapping between RQI and request originator
 			self._rqiOriginator[request.rqi] = request.originator
 
 			if reqType == RequestType.RESPONSE:
 				del self._rqiOriginator[request.rqi]
 
+			# Wake up the polling requests that are waiting for this originator
+			if queue.waiters:
+				queue.condition.notify_all()
+			for future in queue.futures:
+				future.get_loop().call_soon_threadsafe(_resolveFuture, future)
+			queue.futures.clear()
 		
-		# Start an actor to remove the request after the timeout		
-		BackgroundWorkerPool.newActor(	lambda: self.unqueuePollingRequest(originator, request.rqi, reqType), 
-										delay = request._rqetUTCts - utcTime() + 1.0,	# +1 second delay 
-										name = f'unqueuePolling_{request.rqi}-{reqType}').start()
+		# Remove the request after the timeout (+1 second delay)
+		self._pcTimer.schedule((originator, request.rqi, reqType), request._rqetUTCts + 1.0)
 	
 
 	def unqueuePollingRequest(self, originator:str, requestID:str, reqType:RequestType) -> CSERequest:
@@ -745,25 +1070,13 @@ class RequestManager(object):
 		"""
 		L.isDebug and L.logDebug(f'Unqueuing polling request, originator: {originator}, requestID: {requestID}')
 		with self._requestLock:
-			resultRequest = None
-			if lst := self._requests.get(originator):
-				requests = []
-				
-				# extract the queried request or the first one found, and build a new list for the remaining
-				# Building a new list is faster than extracting and removing elements in place
-				for r,t in lst:	
-					if (requestID is None or requestID == r.rqi) and t == reqType and not resultRequest:	# Either get an uspecified reuqest, or a specific one
-						resultRequest = r
-					else:
-						requests.append( (r, t) )
-				if requests:
-					self._requests[originator] = requests
-				else:
-					del self._requests[originator]
-				
-			if resultRequest:
-				BackgroundWorkerPool.stopWorkers(f'unqueuePolling_{resultRequest.rqi}-{reqType}')
-					
+			if not (queue := self._requests.get(originator)):
+				return None
+			# Either get an unspecified request, or a specific one. 
+			# Its entry in the expiration timer is skipped when it becomes due.
+			resultRequest = queue.remove(requestID, reqType)
+			if queue.isUnused():
+				del self._requests[originator]
 			return resultRequest
 
 
@@ -771,10 +1084,16 @@ class RequestManager(object):
 									requestID:str, 
 									timeout:float, 
 									reqType:Optional[RequestType] = RequestType.REQUEST, 
-									aggregate:Optional[bool] = False) -> Result:
-		"""	Busy waiting for a polling request.
+									aggregate:Optional[bool] = False,
+									asyncWait:Optional[bool] = False) -> Result:
+		"""	Wait for a polling request.
 			The function returns when there is a new or pending matching request in the queue, or when the
-			*timeout* (in seconds) is met.
+			*timeout* (in seconds) is met. Waiting is done on a condition per originator that is notified
+			when a request is queued, so no periodic checks are necessary.
+
+			If *asyncWait* is True and the request is handled for the asyncio server then the thread is not
+			blocked. Instead, a result with a `PollingPending` object is returned, and the server waits 
+			asynchronously and then resumes the request (see `asyncPolling()` and `awaitPollingRequest()`).
 			
 			Args:
 				originator: Request originator to match.
@@ -782,12 +1101,41 @@ class RequestManager(object):
 				timeout: Timeout in seconds for the polling request to wait.
 				reqType: Match request or response.
 				aggregate: Boolean indicating whether all the available requests shall be returned in one aggregation, or separately.
+				asyncWait: Boolean indicating whether the waiting may be done asynchronously. The caller must then handle a pending result.
 			Return:
 				 The function returns a Result object with the request or aggregated requests in the `request` attribute.
 		"""
 		L.isDebug and L.logDebug(f'Waiting for: {reqType} for originator: {originator}, requestID: {requestID}')
 
-		if waitFor(timeout, lambda:self.hasPollingRequest(originator, requestID, reqType)):	# Wait until timeout, or the request of the correct type was found
+		if asyncWait and getattr(self._asyncPolling, 'enabled', False) and timeout > 0.0 and not self.hasPollingRequest(originator, requestID, reqType):
+			# Handled for the asyncio server: Don't block the thread, but let the server wait asynchronously
+			deadline = utcTime() + timeout
+			return Result(pending = PollingPending(originator, 
+												   deadline,
+												   lambda: self._pollingResult(originator, requestID, max(0.0, deadline - utcTime()), reqType, aggregate)))
+		return self._pollingResult(originator, requestID, timeout, reqType, aggregate)
+
+
+	def _pollingResult(self, originator:str, 
+							 requestID:str, 
+							 timeout:float, 
+							 reqType:RequestType, 
+							 aggregate:bool) -> Result:
+		"""	Wait for a polling request and return it.
+
+			When a pending long-polling request is resumed then the request is usually queued already. Only if
+			another polling request has taken it in the meantime the thread waits for the remaining time.
+
+			Args:
+				originator: Request originator to match.
+				requestID: Request Identifier to match. Might be *None* to match all request IDs.
+				timeout: Timeout in seconds for the polling request to wait.
+				reqType: Match request or response.
+				aggregate: Boolean indicating whether all the available requests shall be returned in one aggregation, or separately.
+			Return:
+				 The function returns a Result object with the request or aggregated requests in the `request` attribute.
+		"""
+		if self._waitForPollingCondition(originator, requestID, timeout, reqType):	# Wait until timeout, or the request of the correct type was found
 			L.isDebug and L.logDebug(f'Received {reqType} request for originator: {originator}, requestID: {requestID}, aggregate: {aggregate}')
 
 			if aggregate:
@@ -808,6 +1156,80 @@ class RequestManager(object):
 		raise REQUEST_TIMEOUT(L.logWarn(f'Timeout while waiting for: {reqType} for originator: {originator}, requestID: {requestID}'))
 
 
+	def _waitForPollingCondition(self, originator:str, requestID:str, timeout:float, reqType:RequestType) -> bool:
+		"""	Wait on the condition of the originator's queue until a matching request is queued, or until the *timeout* is met.
+
+			The condition is shared by all polling requests that wait for the same *originator*. The queue
+			is removed again when it is empty and the last of them returns.
+
+			Args:
+				originator: Request originator to match.
+				requestID: Request Identifier to match. Might be *None* to match all request IDs.
+				timeout: Timeout in seconds.
+				reqType: Match request or response.
+
+			Return:
+				True if a matching request is queued, False if the *timeout* was met.
+		"""
+		if timeout < 0.0:
+			return False
+		with self._requestLock:
+			if not (queue := self._requests.get(originator)):
+				queue = self._requests[originator] = PollingQueue(self._requestLock)
+			queue.waiters += 1
+			try:
+				return queue.condition.wait_for(lambda: queue.has(requestID, reqType), timeout)
+			finally:
+				queue.waiters -= 1
+				if queue.isUnused() and self._requests.get(originator) is queue:
+					del self._requests[originator]
+
+
+	@contextmanager
+	def asyncPolling(self) -> Iterator[None]:
+		"""	Context manager to handle a request for the asyncio server. Long-polling requests that are
+			handled in this context don't block the thread, but return a result with a `PollingPending` object instead.
+		"""
+		self._asyncPolling.enabled = True
+		try:
+			yield
+		finally:
+			self._asyncPolling.enabled = False
+
+
+	async def awaitPollingRequest(self, originator:str, timeout:float) -> bool:
+		"""	Wait asynchronously until a request is queued for an *originator*, or until the *timeout* is met.
+
+			This is the asynchronous counterpart to the waiting in `waitForPollingRequest()`. It must be called
+			in an asyncio event loop.
+
+			Args:
+				originator: Request originator to match.
+				timeout: Timeout in seconds.
+
+			Return:
+				True if a request is queued, False if the *timeout* was met.
+		"""
+		future = asyncio.get_running_loop().create_future()
+		with self._requestLock:
+			if not (queue := self._requests.get(originator)):
+				queue = self._requests[originator] = PollingQueue(self._requestLock)
+			if queue.has(None, RequestType.REQUEST):
+				return True
+			queue.futures.append(future)
+		try:
+			await asyncio.wait_for(future, timeout)
+			return True
+		except asyncio.TimeoutError:
+			return False
+		finally:
+			with self._requestLock:
+				if future in queue.futures:
+					queue.futures.remove(future)
+				if queue.isUnused() and self._requests.get(originator) is queue:
+					del self._requests[originator]
+
+
 	def queueRequestForPCH(	self, 
 							operation:Operation,
 							pchOriginator:str,
@@ -859,7 +1281,7 @@ class RequestManager(object):
 		# See TS-0001, 7.3.2.6, Forwarding
 		self._originatorToSPRelative(request)
 
-		L.isDebug and L.logDebug(f'Storing REQUEST for: {request.id} with rqi: {request.rqi} pc:{request.pc} for polling')
+		L.isDebug and L.logDebug('Storing REQUEST for: %s with rqi: %s pc:%s for polling', request.id, request.rqi, request.pc)
 		self.queuePollingRequest(request, reqType)
 		return request
 
@@ -880,26 +1302,28 @@ class RequestManager(object):
 		return Result(rsc = response.request.rsc, request = response.request)
 
 
-	def _cleanupPollingRequests(self) -> bool:
+	def _expirePollingRequest(self, key:Tuple[str, str, RequestType], deadline:float) -> None:
+		"""	Callback of the shared expiration timer. Remove an expired request from the polling request queue.
+
+			Entries of requests that were already retrieved, or that were queued again with a later
+			expiration time, are ignored.
+
+			Args:
+				key: Tuple (originator, requestID, request type) of the request.
+				deadline: The POSIX timestamp when the request expires.
+		"""
+		originator, rqi, reqType = key
 		with self._requestLock:
-			# Search all entries in the queue and remove those that have expired in the past
-			# Remove those requests also from 
-			now = utcTime()
-			for originator, requests in list(self._requests.items()):
-				nList = []
-				for tup in list(requests):				# Test all requests for expiration
-					if tup[0]._rqetUTCts > now:	# not expired
-						nList.append(tup)				# add the request tupple again to the list if it hasnt expired
-					else:
-						L.isDebug and L.logDebug(f'Remove old polling request: {tup}')
-						# Also remove the requestID - originator mapping
-						if (rqi := tup[0].rqi) in self._rqiOriginator:
-							del self._rqiOriginator[rqi]
-				if len(nList) > 0:	# Add the lists again if there still more requests for this originator
-					self._requests[originator] = nList
-				else:				# remove the entry
-					del self._requests[originator]
-		return True
+			if not (queue := self._requests.get(originator)) or not (request := queue.queues[reqType].get(rqi)):
+				return
+			if request._rqetUTCts + 1.0 > deadline:		# queued again in the meantime
+				return
+			L.isDebug and L.logDebug(f'Remove old polling request: {request}')
+			queue.remove(rqi, reqType)
+			if queue.isUnused():
+				del self._requests[originator]
+			# Also remove the requestID - originator mapping
+			self._rqiOriginator.pop(rqi, None)
 					
 		
 	###########################################################################
@@ -936,7 +1360,7 @@ class RequestManager(object):
 	def _sendRequest(self, request:CSERequest) -> RequestResponseList:
 		"""	Send a request via the appropriate channel or transport protocol.
 		"""
-		L.isDebug and L.logDebug(f'Sending {request.op.name} request to: {request.to}')
+		L.isDebug and L.logDebug('Sending %s request to: %s', request.op.name, request.to)
 
 		# Determine all the details for one or multiple targets
 		if not (resolved := self.determineTargetDetails(request)):	# empty list?
@@ -990,6 +1414,10 @@ class RequestManager(object):
 				results.append( RequestResponse(_request, CSE.mqttClient.sendMqttRequest(_request, url)) )
 				continue
 
+			elif isCoAPUrl(url):
+				results.append( RequestResponse(_request, CSE.coapServer.sendCoapRequest(_request, url)) )
+				continue
+
 			# Special handling for ACME internal events.
 			# This might be more generalize when other opeations are supported as well
 			elif isAcmeUrl(url) and request.op == Operation.NOTIFY:
@@ -1019,7 +1447,7 @@ class RequestManager(object):
 		ct = ContentSerializationType.getType(mediaType, default = CSE.defaultSerialization)
 		if data:
 			try:
-				if (dct := deserializeData(data, ct)) is None:
+				if (dct := deserializeData(data, ct, self.allowJSONComments)) is None:
 					raise UNSUPPORTED_MEDIA_TYPE(f'Unsupported media type for content-type: {ct.name}', data = (None, ct))
 			except UNSUPPORTED_MEDIA_TYPE as e:
 				raise
@@ -1193,15 +1621,6 @@ class RequestManager(object):
 				else:
 					cseRequest.oet = toISO8601Date(_ts)	# Re-assign "real" ISO8601 timestamp
 
-			# RVI - releaseVersionIndicator
-			if  (rvi := gget(cseRequest.originalRequest, 'rvi', greedy=False)):
-				if rvi not in CSE.supportedReleaseVersions:
-					raise RELEASE_VERSION_NOT_SUPPORTED(L.logDebug(f'release version unsupported: {rvi}'), data = cseRequest)
-				else:
-					cseRequest.rvi = rvi	
-			else:
-				raise RELEASE_VERSION_NOT_SUPPORTED(L.logDebug(f'Release Version Indicator is missing in request, falling back to RVI=\'1\'. But release version \'1\' is not supported. Use RVI with one of {CSE.supportedReleaseVersions}.'))
-
 			# VSI - vendorInformation
 			if (vsi := gget(cseRequest.originalRequest, 'vsi', greedy=False)):
 				cseRequest.vsi = vsi	
@@ -1280,17 +1699,10 @@ class RequestManager(object):
 			#	Discovery and FilterCriteria
 			#
 			if fcAttrs:	# only when there is a filterCriteria, copy the available attribute to the FilterCriteria structure
-				for h in ( 'lim', 'lvl', 'ofst', 'arp',
-						   'crb', 'cra', 'ms', 'us', 'sts', 'stb', 'exb', 'exa', 'lbq', 'sza', 'szb', 'catr', 'patr',
-						   'smf', 
-						   'aq'):
-					if (v := gget(fcAttrs, h)) is not None:	# may be int
-						cseRequest.fc.set(h, v)
-				for h in ( 'lbl', 'cty' ): # different handling of list attributes
-					if (v := gget(fcAttrs, h, attributeType = BasicType.list, checkSubType = False)) is not None:
-						cseRequest.fc.set(h, v)
-				for h in ( 'ty', ): # different handling of list attributes that are normally non-lists
-					if (v := gget(fcAttrs, h, attributeType = BasicType.list, checkSubType = True)) is not None:	# may be int
+				# Only the attributes that are present in the request are looked up in the table
+				for h in [ h for h in fcAttrs if h in _filterCriteriaAttributes ]:
+					attributeType, checkSubType = _filterCriteriaAttributes[h]
+					if (v := gget(fcAttrs, h, attributeType = attributeType, checkSubType = checkSubType)) is not None:	# may be int
 						cseRequest.fc.set(h, v)
 
 				# Handling of geo-query attributes
@@ -0,0 +1,299 @@
+#
+#	ScheduleManager.py
+#
+#	(c) 2023 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Managing <schedule> resources and schedule checks
+#
+
+"""	This module implements the schedule service of the CSE. It keeps the *scheduleEntries* of all
+	\<schedule> resources in memory, compiled per target resource, so that checking whether a target
+	is currently active does not need a database lookup or parsing of cron patterns.
+"""
+
+from __future__ import annotations
+from typing import Optional, Sequence
+
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from threading import Lock
+
+from ..etc.DateUtils import CronPattern, compileCronPattern, utcDatetime
+from ..resources.SCH import SCH
+from ..services import CSE
+from ..services.Logging import Logging as L
+
+
+@dataclass
+class TargetSchedule(object):
+	"""	The compiled schedules of a single target resource.
+	"""
+	schedules:dict[str, list[CronPattern]] = field(default_factory = dict)
+	""" Compiled patterns for each \<schedule> resource of the target. Mapping from the \<schedule>'s resource ID. """
+	patterns:list[CronPattern] = field(default_factory = list)
+	""" All compiled patterns of the target. """
+	checkedAt:int = -1
+	""" The POSIX timestamp (seconds) of the last evaluation. """
+	active:bool = False
+	""" The result of the last evaluation. """
+	inactiveFrom:int = -1
+	""" The POSIX timestamp (seconds) from which the target is known to be inactive. """
+	nextActivation:float = 0.0
+	""" The POSIX timestamp of the next activation of the target. """
+
+
+	def compile(self) -> None:
+		"""	Rebuild the list of all compiled patterns and reset the cached evaluation results.
+		"""
+		self.patterns = [ p for each in self.schedules.values() for p in each ]
+		self.checkedAt = -1
+		self.inactiveFrom = -1
+		self.nextActivation = 0.0
+
+
+class ScheduleManager(object):
+	"""	This class implements the schedule service.
+
+		Attributes:
+			targets: Compiled schedules for each target resource. Mapping from the target's resource ID.
+			lockSchedules: Lock to protect the *targets* structure during updates.
+	"""
+
+	__slots__ = (
+		'targets',
+		'lockSchedules',
+	)
+	"""	Slots of the class. """
+
+
+	def __init__(self) -> None:
+		"""	Initialization of the ScheduleManager module.
+		"""
+		self.targets:dict[str, TargetSchedule] = {}
+		self.lockSchedules = Lock()
+
+		# Read the already stored schedules
+		self._loadSchedules()
+
+		# Add a handler when the CSE is reset
+		CSE.event.addHandler(CSE.event.cseReset, self.restart)	# type: ignore
+		L.isInfo and L.log('ScheduleManager initialized')
+
+
+	def shutdown(self) -> bool:
+		"""	Shutdown the ScheduleManager.
+
+			Return:
+				Boolean, always True.
+		"""
+		self.targets.clear()
+		L.isInfo and L.log('ScheduleManager shut down')
+		return True
+
+
+	def restart(self, name:str) -> None:
+		"""	Restart the ScheduleManager service. The schedules are added again during the import.
+
+			Args:
+				name: The name of the event.
+		"""
+		with self.lockSchedules:
+			self.targets.clear()
+		L.isDebug and L.logDebug('ScheduleManager restarted')
+
+
+	def _loadSchedules(self) -> None:
+		"""	Load and compile all schedules from the database.
+		"""
+		for each in CSE.storage.getSchedules():
+			self._setSchedule(each['ri'], each['pi'], each['sce'])
+		L.isDebug and L.logDebug(f'Loaded schedules for {len(self.targets)} target(s)')
+
+
+	#########################################################################
+	#
+	#	Schedule management
+	#
+
+	def addSchedule(self, schedule:SCH) -> bool:
+		"""	Add or update a \<schedule> resource. The schedule is stored in the database and compiled.
+
+			Args:
+				schedule: The \<schedule> resource.
+
+			Return:
+				Boolean value to indicate success or failure.
+		"""
+		if not CSE.storage.upsertSchedule(schedule):
+			return False
+		self._setSchedule(schedule.ri, schedule.pi, schedule.attribute('se/sce'))
+		return True
+
+
+	def removeSchedule(self, schedule:SCH) -> bool:
+		"""	Remove a \<schedule> resource from the database and the compiled schedules.
+
+			Args:
+				schedule: The \<schedule> resource.
+
+			Return:
+				Boolean value to indicate success or failure.
+		"""
+		with self.lockSchedules:
+			if (target := self.targets.get(schedule.pi)):
+				target.schedules.pop(schedule.ri, None)
+				if target.schedules:
+					target.compile()
+				else:
+					del self.targets[schedule.pi]
+		return CSE.storage.removeSchedule(schedule)
+
+
+	def setSchedule(self, target:str, sce:Optional[Sequence[str]]) -> None:
+		"""	Set the schedule entries of a target that is not scheduled by \<schedule> resources, for example
+			a script. These entries are only kept in memory and are not stored in the database.
+
+			Args:
+				target: The identifier of the target. It must not clash with a resource ID.
+				sce: The list of schedule entries (cron patterns).
+		"""
+		self._setSchedule(target, target, sce)
+
+
+	def removeSchedules(self, target:str) -> None:
+		"""	Remove all schedule entries of a target that were set with `setSchedule()`.
+
+			Args:
+				target: The identifier of the target.
+		"""
+		with self.lockSchedules:
+			self.targets.pop(target, None)
+
+
+	def _setSchedule(self, ri:str, pi:str, sce:Optional[Sequence[str]]) -> None:
+		"""	Compile and set the schedule entries of a \<schedule> resource for its target.
+
+			Args:
+				ri: The resource ID of the \<schedule> resource.
+				pi: The resource ID of the target resource.
+				sce: The list of schedule entries (cron patterns).
+		"""
+		patterns:list[CronPattern] = []
+		for each in sce or []:
+			try:
+				patterns.append(compileCronPattern(each))
+			except ValueError as e:
+				L.logWarn(f'Invalid schedule entry: "{each}" for: {ri}: {str(e)}')
+		with self.lockSchedules:
+			# A <schedule> could have been moved to another target
+			for targetRi, target in list(self.targets.items()):
+				if targetRi != pi and ri in target.schedules:
+					del target.schedules[ri]
+					if target.schedules:
+						target.compile()
+					else:
+						del self.targets[targetRi]
+			target = self.targets.setdefault(pi, TargetSchedule())
+			target.schedules[ri] = patterns
+			target.compile()
+
+
+	#########################################################################
+	#
+	#	Schedule checks
+	#
+
+	def hasSchedule(self, ri:str) -> bool:
+		"""	Test whether there is a schedule for a target resource.
+
+			Args:
+				ri: The resource ID of the target resource.
+
+			Return:
+				True if there is at least one valid schedule entry for the target.
+		"""
+		with self.lockSchedules:
+			return (target := self.targets.get(ri)) is not None and len(target.patterns) > 0
+
+
+	def isActive(self, ri:str, ts:Optional[datetime] = None) -> bool:
+		"""	Test whether a target resource is active according to its schedules.
+
+			A target without any schedule is always active. The result is cached per second.
+			If a target is inactive then the time of its next activation is also cached, so that
+			until then no patterns need to be evaluated at all.
+
+			Args:
+				ri: The resource ID of the target resource.
+				ts: Optional timestamp to check. If *None* then the current UTC-based time is used.
+
+			Return:
+				True if any of the target's schedule entries matches, or if the target has no schedule.
+		"""
+		if ts is None:
+			ts = utcDatetime()
+		second = int(ts.timestamp())
+
+		with self.lockSchedules:
+			if not (target := self.targets.get(ri)) or not target.patterns:
+				return True
+
+			# Cached results. Either already evaluated during this second, or known to be inactive until the next activation
+			if second == target.checkedAt:
+				return target.active
+			if target.inactiveFrom <= second < target.nextActivation:
+				return False
+
+			# Evaluate the compiled patterns
+			if (active := any(p.matches(ts) for p in target.patterns)):
+				target.inactiveFrom = -1
+				target.nextActivation = 0.0
+			else:
+				target.inactiveFrom = second
+				target.nextActivation = self._nextActivation(target, ts)
+			target.active = active
+			target.checkedAt = second
+			return active
+
+
+	def nextActivation(self, ri:str, ts:Optional[datetime] = None) -> Optional[float]:
+		"""	Return the time of the next activation of a target resource.
+
+			Background workers can use this to sleep until the target becomes active again.
+			The time is taken from the cached evaluation result of `isActive()`.
+
+			Args:
+				ri: The resource ID of the target resource.
+				ts: Optional timestamp from which to start. If *None* then the current UTC-based time is used.
+
+			Return:
+				The POSIX timestamp of the next activation. This is the timestamp of *ts* if the target is currently active
+				or has no schedule. *None* is returned if the target will not become active again.
+		"""
+		if ts is None:
+			ts = utcDatetime()
+		if self.isActive(ri, ts):
+			return ts.timestamp()
+		with self.lockSchedules:
+			if not (target := self.targets.get(ri)):	# Removed in the meantime
+				return ts.timestamp()
+			return None if math.isinf(na := target.nextActivation) else na
+
+
+	def _nextActivation(self, target:TargetSchedule, ts:datetime) -> float:
+		"""	Calculate the next activation of a target.
+
+			Args:
+				target: The target's compiled schedules.
+				ts: The timestamp from which to start.
+
+			Return:
+				The POSIX timestamp of the next activation, or *infinity* if there is none.
+		"""
+		result = math.inf
+		for p in target.patterns:
+			if (n := p.nextMatch(ts)) is not None:
+				result = min(result, n.timestamp())
+		return result
@@ -11,6 +11,7 @@ from __future__ import annotations
 from typing import Callable, Dict, Union, Any, Tuple, cast, Optional, List
 
 from pathlib import Path
+from datetime import timedelta
 import json, os, fnmatch, traceback
 import requests, webbrowser
 from decimal import Decimal
@@ -20,12 +21,13 @@ from rich.text import Text
 from ..helpers.KeyHandler import FunctionKey
 from ..etc.Types import JSON, ACMEIntEnum, CSERequest, Operation, ResourceTypes, Result, BasicType, AttributePolicy
 from ..etc.ResponseStatusCodes import ResponseException
-from ..etc.DateUtils import cronMatchesTimestamp, getResourceDate, utcDatetime
+from ..etc.DateUtils import getResourceDate, utcDatetime
 from ..etc.Utils import runsInIPython, uniqueRI, isURL, uniqueID, pureResource
 from .Configuration import Configuration
 from ..helpers.Interpreter import PContext, PFuncCallable, PUndefinedError, PError, PState, SSymbol, SType, PSymbolCallable
 from ..helpers.Interpreter import PInvalidArgumentError,PInvalidTypeError, PRuntimeError, PUnsupportedError, PPermissionError
 from ..helpers.BackgroundWorker import BackgroundWorker, BackgroundWorkerPool
+from ..helpers.EventManager import HandlerMode
 from ..helpers.TextTools import setXPath, simpleMatch
 from ..helpers.TextTools import setXPath
 from ..helpers.NetworkTools import pingTCPServer, isValidPort
@@ -58,6 +60,9 @@ _metaOnNotification = 'onNotification'
 """ Name of the meta tag "onNotification". """
 _metaOnKey = 'onKey'
 """ Name of the meta tag "onKey". """
+_cronMaxInterval = 60.0
+""" Maximum time in seconds the cron monitor sleeps until it checks the scheduled scripts again. """
+
 _metaPromptlessEvents = [ _metaInit, _metaOnStartup, _metaOnRestart, _metaOnShutdown, _metaAt, _metaOnNotification ]
 """ Events for which the "prompt" meta tag is to be ignored. """
 
@@ -1570,6 +1575,8 @@ class ScriptManager(object):
 			scriptDirectories: List of script directories to monitoe.
 			scriptUpdatesMonitor: `BackgroundWorker` worker to monitor script directories.
 			scriptCronWorker: `BackgroundWorker` worker to run cron-enabled scripts.
+			cronSchedules: The *at* patterns of the scripts that are registered with the schedule service. Mapping from the schedule target.
+			cronCheckedAt: The POSIX timestamp (seconds) of the last check for scheduled scripts.
 			maxRuntime: Maximum runtime for a script.
 	"""
 
@@ -1578,6 +1585,8 @@ class ScriptManager(object):
 		'storage',
 		'scriptUpdatesMonitor',
 		'scriptCronWorker',
+		'cronSchedules',
+		'cronCheckedAt',
 
 		'categoryDescriptions',
 		'scriptDirectories',
@@ -1597,11 +1606,13 @@ class ScriptManager(object):
 
 		self.scriptUpdatesMonitor:BackgroundWorker = None
 		self.scriptCronWorker:BackgroundWorker = None
+		self.cronSchedules:Dict[str, str] = {}
+		self.cronCheckedAt = -1
 
 		self._assignConfig()
 
 		# Also do some internal handling
-		CSE.event.addHandler(CSE.event.cseStartup, self.cseStarted)			# type: ignore
+		CSE.event.addHandler(CSE.event.cseStartup, self.cseStarted, HandlerMode.job)	# type: ignore
 		CSE.event.addHandler(CSE.event.cseReset, self.restart)				# type: ignore
 		CSE.event.addHandler(CSE.event.cseRestarted, self.restartFinished)	# type: ignore
 		CSE.event.addHandler(CSE.event.keyboard, self.onKeyboard)			# type: ignore
@@ -1689,8 +1700,7 @@ class ScriptManager(object):
 		if self.scriptMonitorInterval > 0.0:
 			self.scriptUpdatesMonitor.start()
 
-		# Add a worker to check scheduled script, fixed every second
-		# TODO resolution
+		# Add a worker to check scheduled scripts. It sleeps until the next activation of a scheduled script
 		self.scriptCronWorker = BackgroundWorkerPool.newWorker(1, 
 							 								   self.cronMonitor, 
 															   'scriptCronMonitor').start()
@@ -1707,6 +1717,7 @@ class ScriptManager(object):
 		"""
 		self.removeScripts()
 		self.storage.clear()
+		self.cronSchedules.clear()	# The schedule service is reset as well
 		L.isDebug and L.logDebug('ScriptManager restarted')
 	
 
@@ -1790,24 +1801,52 @@ class ScriptManager(object):
 		return True
 
 
-	def cronMonitor(self) -> bool:
+	def cronMonitor(self, _worker:BackgroundWorker) -> bool:
 		"""	This is the callback for the cron scheduler.
 		
 			It looks for scripts with an *@at* meta tag and takes the argument as a cron pattern.
-			Scripts that are scheduled to run now will be run, one after the other.
+			The patterns are registered with the schedule service. Scripts that are scheduled to run now
+			will be run, one after the other. Afterwards the worker sleeps until the next activation
+			of any of the scripts, but at most *_cronMaxInterval* seconds.
+
+			Args:
+				_worker: The worker that runs this callback.
 			
 			Return:
 				Boolean. Usually *True* to continue with monitoring.
 		"""
-		#L.isDebug and L.logDebug(f'Looking for scheduled scripts')
 		_ts = utcDatetime()
+		second = int(_ts.timestamp())
+		runScripts = second != self.cronCheckedAt		# Don't run scripts twice in the same second, e.g. after workNow()
+		self.cronCheckedAt = second
+		nextRun = _ts.timestamp() + _cronMaxInterval
+		targets:set[str] = set()
+
 		for each in self.findScripts(meta = _metaAt):
-			try:
-				if cronMatchesTimestamp(at := each.meta.get(_metaAt), _ts):
-					L.isDebug and L.logDebug(f'Running script: {each.scriptName} at: {at}')
-					self.runScript(each)
-			except ValueError as e:
-				L.logErr(f'Error in script: {each.scriptName} - {str(e)}')
+			target = f'script:{each.scriptName}'
+			targets.add(target)
+			at = each.meta.get(_metaAt)
+
+			# Register the pattern if it is new or changed
+			if self.cronSchedules.get(target) != at:
+				CSE.schedule.setSchedule(target, [ at ])
+				self.cronSchedules[target] = at
+			if not CSE.schedule.hasSchedule(target):	# Invalid pattern
+				continue
+
+			if runScripts and CSE.schedule.isActive(target, _ts):
+				L.isDebug and L.logDebug(f'Running script: {each.scriptName} at: {at}')
+				self.runScript(each)
+			if (na := CSE.schedule.nextActivation(target, _ts + timedelta(seconds = 1))) is not None:
+				nextRun = min(nextRun, na)
+
+		# Remove the schedules of removed scripts
+		for target in set(self.cronSchedules) - targets:
+			CSE.schedule.removeSchedules(target)
+			del self.cronSchedules[target]
+
+		# The worker runs on time, so the next run is relative to the scheduled time of this run
+		_worker.interval = max(nextRun - _worker.nextRunTime, 0.1)
 		return True
 
 	##########################################################################
@@ -1905,6 +1944,10 @@ class ScriptManager(object):
 		if not pcontext.scriptFilename:							# Add filename to meta data
 			pcontext.scriptFilename = filename
 		self.scripts[name] = pcontext
+
+		# Wake up the cron monitor to register the script's schedule
+		if _metaAt in pcontext.meta and self.scriptCronWorker:
+			self.scriptCronWorker.workNow()
 		return pcontext
 	
 
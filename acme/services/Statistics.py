@@ -10,20 +10,23 @@
 """	Statistics Module for internal statistics.
 """
 from __future__ import annotations
-from typing import Dict, Union, Optional
+from typing import Any, Dict, Hashable, Tuple, Union, Optional
 
-import datetime
+import datetime, weakref
+from bisect import bisect_left
+from collections import deque
 from urllib.parse import urlparse
-from copy import deepcopy
-from threading import Lock
+from threading import Lock, Thread, current_thread, local
+from time import monotonic
 
-from ..etc.Types import CSEType, ResourceTypes
+from ..etc.Types import CSEType, ResourceTypes, Operation
 from ..etc.DateUtils import utcTime, toISO8601Date
 from ..services import CSE
 from ..services.Configuration import Configuration
 from ..resources.Resource import Resource
 from ..resources.CSEBase import getCSE
 from ..helpers.BackgroundWorker import BackgroundWorkerPool
+from ..helpers.EventManager import HandlerMode
 from ..services.Logging import Logging as L
 
 
@@ -93,19 +96,138 @@ resourceCount		= 'ctRes'
 StatsT = Dict[str, Union[str, int, float]]
 """ Type for statistics records. """
 
+latencyBuckets = ( 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, float('inf') )
+""" Upper bounds (in seconds) of the buckets of the request latency histograms. """
+
+rateWindow = 10
+""" Maximum number of samples that are used to calculate request rates. """
+
+
+class ShardedCounters(object):
+	"""	Counters that are incremented without taking a lock.
+
+		Every thread increments the counters in its own shard. The shards are merged when the counters are read. 
+		The shards of threads that have finished are then folded into the base values.
+
+		Attributes:
+			_base: The base values, including the values of the shards of finished threads.
+			_shards: The shards of the threads, together with a weak reference to their thread.
+			_local: Thread-local storage for the shard of the current thread.
+			_lock: Lock to protect the base values and the list of shards.
+	"""
+
+	__slots__ = (
+		'_base',
+		'_shards',
+		'_local',
+		'_lock',
+	)
+	""" Slots of class attributes. """
+
+
+	def __init__(self, base:Optional[Dict[Hashable, Any]] = None) -> None:
+		"""	Initialize the counters.
+
+			Args:
+				base: Initial values of the counters.
+		"""
+		self._base:Dict[Hashable, Any] = dict(base or {})
+		self._shards:list[Tuple[weakref.ref[Thread], Dict[Hashable, Any]]] = []
+		self._local = local()
+		self._lock = Lock()
+
+
+	def add(self, key:Hashable, count:Optional[int] = 1) -> None:
+		"""	Increment a counter in the shard of the current thread.
+
+			Args:
+				key: The counter.
+				count: The value to add.
+		"""
+		try:
+			shard = self._local.shard
+		except AttributeError:
+			shard = self._newShard()
+		shard[key] = shard.get(key, 0) + count
+
+
+	def set(self, key:Hashable, value:Any) -> None:
+		"""	Set a value. This is meant for values that are not counted, e.g. timestamps.
+
+			The shards are only written by their own threads. If a counter is set then the current
+			values of the shards are subtracted from the base value instead of removing them from the shards.
+
+			Args:
+				key: The value's key.
+				value: The value.
+		"""
+		with self._lock:
+			if (offset := sum(shard.get(key, 0) for _, shard in self._shards)):
+				value -= offset
+			self._base[key] = value
+
+
+	def values(self) -> Dict[Hashable, Any]:
+		"""	Merge the shards and return the current values.
+
+			Return:
+				Dictionary with all values.
+		"""
+		with self._lock:
+			result = dict(self._base)
+			shards = []
+			for ref, shard in self._shards:
+				values = dict(shard)	# copying a dictionary is atomic
+				for k, v in values.items():
+					result[k] = result.get(k, 0) + v
+				if (thread := ref()) is None or not thread.is_alive():
+					# No more increments from that thread, so fold its shard into the base values
+					for k, v in values.items():
+						self._base[k] = self._base.get(k, 0) + v
+				else:
+					shards.append((ref, shard))
+			self._shards = shards
+		return result
+
+
+	def reset(self, base:Optional[Dict[Hashable, Any]] = None) -> None:
+		"""	Reset all counters.
+
+			Args:
+				base: New initial values of the counters.
+		"""
+		with self._lock:
+			self._base = dict(base or {})
+			self._shards = []
+			self._local = local()
+
+
+	def _newShard(self) -> Dict[Hashable, Any]:
+		"""	Create and register the shard of the current thread.
+
+			Return:
+				The new shard.
+		"""
+		shard:Dict[Hashable, Any] = {}
+		with self._lock:
+			self._shards.append((weakref.ref(current_thread()), shard))
+		self._local.shard = shard
+		return shard
+
+
 class Statistics(object):
 	"""	Statistics class. Handles all internal statistics.
 
 		Attributes:
 			statisticsEnabled:		Flag whether statistics are enabled.
-			statLock:				Internal lock for statistic handling.
-			stats:					Statistics records
+			stats:					Statistics records and request latency histograms as sharded counters.
+			rateSamples:			Samples of the request counts to calculate request rates.
 	"""
 
 	__slots__ = (
 		'statisticsEnabled',
-		'statLock',
 		'stats',
+		'rateSamples',
 	)
 	""" Slots of class attributes. """
 
@@ -113,11 +235,9 @@ class Statistics(object):
 	def __init__(self) -> None:
 		self.statisticsEnabled = Configuration.get('cse.statistics.enable')
 
-		# create lock
-		self.statLock = Lock()
-
 		# retrieve or create statistics record, even when statistics are disabled
-		self.stats = self.setupStats()
+		self.stats = ShardedCounters(self.setupStats())
+		self.rateSamples:deque[Tuple[float, Dict[Tuple[str, str], int]]] = deque(maxlen = rateWindow)
 
 		if self.statisticsEnabled:
 
@@ -125,36 +245,37 @@ class Statistics(object):
 			L.isInfo and L.log('Starting statistics DB thread')
 			BackgroundWorkerPool.newWorker(Configuration.get('cse.statistics.writeInterval'), self.statisticsDBWorker, 'statsDBWorker').start()
 
-			# subscripe vto various events
+			# subscripe vto various events. The occurrences are coalesced by the event manager and
+			# delivered periodically as counts, so that raising an event does not cost a thread handoff.
 			# mypy cannot handle dynamically created attributes
-			CSE.event.addHandler(CSE.event.createResource, lambda n, _: self._handleStatsEvent(createdResources)) 	# type: ignore
-			CSE.event.addHandler(CSE.event.updateResource, lambda n, _: self._handleStatsEvent(updatedResources))	# type: ignore
-			CSE.event.addHandler(CSE.event.deleteResource, lambda n, _: self._handleStatsEvent(deletedResources))	# type: ignore
-			CSE.event.addHandler(CSE.event.expireResource, lambda n, _: self._handleStatsEvent(expiredResources))	# type: ignore
-			CSE.event.addHandler(CSE.event.httpRetrieve, lambda n: self._handleStatsEvent(httpRetrieves))			# type: ignore
-			CSE.event.addHandler(CSE.event.httpCreate, lambda n: self._handleStatsEvent(httpCreates))				# type: ignore
-			CSE.event.addHandler(CSE.event.httpUpdate, lambda n: self._handleStatsEvent(httpUpdates))				# type: ignore
-			CSE.event.addHandler(CSE.event.httpDelete, lambda n: self._handleStatsEvent(httpDeletes))				# type: ignore
-			CSE.event.addHandler(CSE.event.httpNotify, lambda n: self._handleStatsEvent(httpNotifies))			# type: ignore
-			CSE.event.addHandler(CSE.event.httpSendRetrieve, lambda n: self._handleStatsEvent(httpSendRetrieves))	# type: ignore
-			CSE.event.addHandler(CSE.event.httpSendCreate, lambda n: self._handleStatsEvent(httpSendCreates))		# type: ignore
-			CSE.event.addHandler(CSE.event.httpSendUpdate, lambda n: self._handleStatsEvent(httpSendUpdates))		# type: ignore
-			CSE.event.addHandler(CSE.event.httpSendDelete, lambda n: self._handleStatsEvent(httpSendDeletes))		# type: ignore
-			CSE.event.addHandler(CSE.event.httpSendNotify, lambda n: self._handleStatsEvent(httpSendNotifies))	# type: ignore
-			CSE.event.addHandler(CSE.event.mqttRetrieve, lambda n: self._handleStatsEvent(mqttRetrieves))			# type: ignore
-			CSE.event.addHandler(CSE.event.mqttCreate, lambda n: self._handleStatsEvent(mqttCreates))				# type: ignore
-			CSE.event.addHandler(CSE.event.mqttUpdate, lambda n: self._handleStatsEvent(mqttUpdates))				# type: ignore
-			CSE.event.addHandler(CSE.event.mqttDelete, lambda n: self._handleStatsEvent(mqttDeletes))				# type: ignore
-			CSE.event.addHandler(CSE.event.mqttNotify, lambda n: self._handleStatsEvent(mqttNotifies))			# type: ignore
-			CSE.event.addHandler(CSE.event.mqttSendRetrieve, lambda n: self._handleStatsEvent(mqttSendRetrieves))	# type: ignore
-			CSE.event.addHandler(CSE.event.mqttSendCreate, lambda n: self._handleStatsEvent(mqttSendCreates))		# type: ignore
-			CSE.event.addHandler(CSE.event.mqttSendUpdate, lambda n: self._handleStatsEvent(mqttSendUpdates))		# type: ignore
-			CSE.event.addHandler(CSE.event.mqttSendDelete, lambda n: self._handleStatsEvent(mqttSendDeletes))		# type: ignore
-			CSE.event.addHandler(CSE.event.mqttSendNotify, lambda n: self._handleStatsEvent(mqttSendNotifies))	# type: ignore
-			CSE.event.addHandler(CSE.event.notification, lambda n: self._handleStatsEvent(notifications))			# type: ignore
-			CSE.event.addHandler(CSE.event.cseStartup, self.handleCseStartup)									# type: ignore
-			CSE.event.addHandler(CSE.event.logError, lambda n: self._handleStatsEvent(logErrors))					# type: ignore
-			CSE.event.addHandler(CSE.event.logWarning, lambda n: self._handleStatsEvent(logWarnings))				# type: ignore
+			CSE.event.addHandler(CSE.event.createResource, lambda n, c: self._handleStatsEvent(createdResources, c), HandlerMode.counter) 	# type: ignore
+			CSE.event.addHandler(CSE.event.updateResource, lambda n, c: self._handleStatsEvent(updatedResources, c), HandlerMode.counter)	# type: ignore
+			CSE.event.addHandler(CSE.event.deleteResource, lambda n, c: self._handleStatsEvent(deletedResources, c), HandlerMode.counter)	# type: ignore
+			CSE.event.addHandler(CSE.event.expireResource, lambda n, c: self._handleStatsEvent(expiredResources, c), HandlerMode.counter)	# type: ignore
+			CSE.event.addHandler(CSE.event.httpRetrieve, lambda n, c: self._handleStatsEvent(httpRetrieves, c), HandlerMode.counter)			# type: ignore
+			CSE.event.addHandler(CSE.event.httpCreate, lambda n, c: self._handleStatsEvent(httpCreates, c), HandlerMode.counter)				# type: ignore
+			CSE.event.addHandler(CSE.event.httpUpdate, lambda n, c: self._handleStatsEvent(httpUpdates, c), HandlerMode.counter)				# type: ignore
+			CSE.event.addHandler(CSE.event.httpDelete, lambda n, c: self._handleStatsEvent(httpDeletes, c), HandlerMode.counter)				# type: ignore
+			CSE.event.addHandler(CSE.event.httpNotify, lambda n, c: self._handleStatsEvent(httpNotifies, c), HandlerMode.counter)			# type: ignore
+			CSE.event.addHandler(CSE.event.httpSendRetrieve, lambda n, c: self._handleStatsEvent(httpSendRetrieves, c), HandlerMode.counter)	# type: ignore
+			CSE.event.addHandler(CSE.event.httpSendCreate, lambda n, c: self._handleStatsEvent(httpSendCreates, c), HandlerMode.counter)		# type: ignore
+			CSE.event.addHandler(CSE.event.httpSendUpdate, lambda n, c: self._handleStatsEvent(httpSendUpdates, c), HandlerMode.counter)		# type: ignore
+			CSE.event.addHandler(CSE.event.httpSendDelete, lambda n, c: self._handleStatsEvent(httpSendDeletes, c), HandlerMode.counter)		# type: ignore
+			CSE.event.addHandler(CSE.event.httpSendNotify, lambda n, c: self._handleStatsEvent(httpSendNotifies, c), HandlerMode.counter)	# type: ignore
+			CSE.event.addHandler(CSE.event.mqttRetrieve, lambda n, c: self._handleStatsEvent(mqttRetrieves, c), HandlerMode.counter)			# type: ignore
+			CSE.event.addHandler(CSE.event.mqttCreate, lambda n, c: self._handleStatsEvent(mqttCreates, c), HandlerMode.counter)				# type: ignore
+			CSE.event.addHandler(CSE.event.mqttUpdate, lambda n, c: self._handleStatsEvent(mqttUpdates, c), HandlerMode.counter)				# type: ignore
+			CSE.event.addHandler(CSE.event.mqttDelete, lambda n, c: self._handleStatsEvent(mqttDeletes, c), HandlerMode.counter)				# type: ignore
+			CSE.event.addHandler(CSE.event.mqttNotify, lambda n, c: self._handleStatsEvent(mqttNotifies, c), HandlerMode.counter)			# type: ignore
+			CSE.event.addHandler(CSE.event.mqttSendRetrieve, lambda n, c: self._handleStatsEvent(mqttSendRetrieves, c), HandlerMode.counter)	# type: ignore
+			CSE.event.addHandler(CSE.event.mqttSendCreate, lambda n, c: self._handleStatsEvent(mqttSendCreates, c), HandlerMode.counter)		# type: ignore
+			CSE.event.addHandler(CSE.event.mqttSendUpdate, lambda n, c: self._handleStatsEvent(mqttSendUpdates, c), HandlerMode.counter)		# type: ignore
+			CSE.event.addHandler(CSE.event.mqttSendDelete, lambda n, c: self._handleStatsEvent(mqttSendDeletes, c), HandlerMode.counter)		# type: ignore
+			CSE.event.addHandler(CSE.event.mqttSendNotify, lambda n, c: self._handleStatsEvent(mqttSendNotifies, c), HandlerMode.counter)	# type: ignore
+			CSE.event.addHandler(CSE.event.notification, lambda n, c: self._handleStatsEvent(notifications, c), HandlerMode.counter)			# type: ignore
+			CSE.event.addHandler(CSE.event.cseStartup, self.handleCseStartup, HandlerMode.inline)				# type: ignore
+			CSE.event.addHandler(CSE.event.logError, lambda n, c: self._handleStatsEvent(logErrors, c), HandlerMode.counter)					# type: ignore
+			CSE.event.addHandler(CSE.event.logWarning, lambda n, c: self._handleStatsEvent(logWarnings, c), HandlerMode.counter)				# type: ignore
 
 			# Also do some internal handling
 			CSE.event.addHandler(CSE.event.cseReset, self.restart)												# type: ignore
@@ -187,7 +308,8 @@ class Statistics(object):
 				name:	The name of the event that triggered the restart.
 		"""
 		self.purgeDBStatistics()
-		self.stats = self.setupStats()
+		self.stats.reset(self.setupStats())
+		self.rateSamples.clear()
 		self.handleCseStartup(None)
 		L.isDebug and L.logDebug('Statistics restarted')
 
@@ -240,7 +362,8 @@ class Statistics(object):
 			Return:
 				The statistics dictionary.
 		"""
-		s = deepcopy(self.stats)
+		CSE.event.flushCounters()	# Get the pending occurrences of the events
+		s:StatsT = { k: v for k, v in self.stats.values().items() if isinstance(k, str) }	# without the histograms
 
 		# Calculate some stats
 		# s[cseUpTime] = str(datetime.timedelta(seconds=int(datetime.datetime.now(datetime.timezone.utc).timestamp() - int(s[cseStartUpTime]))))
@@ -255,20 +378,14 @@ class Statistics(object):
 	#	Event handlers
 	#
 
-	def _handleStatsEvent(self, eventType:str) -> None:
+	def _handleStatsEvent(self, eventType:str, count:Optional[int] = 1) -> None:
 		"""	Generic handling of statist events.
 
 			Args:
 				eventType:	The type of event that occurred.
+				count:		The number of occurrences of the event.
 		"""
-		try:
-			with self.statLock:
-				self.stats[eventType] += 1		# type: ignore
-		except KeyError:
-			# In case there is a version update and a new event was added,
-			# the we might just add this event as the first entry
-			with self.statLock:
-				self.stats[eventType] = 1		# type: ignore
+		self.stats.add(eventType, count)
 
 
 	def handleCseStartup(self, name:str) -> None:
@@ -277,9 +394,71 @@ class Statistics(object):
 			Args:
 				name:	The name of the event that triggered function.
 		"""
-		with self.statLock:
-			# self.stats[cseStartUpTime] = datetime.datetime.now(datetime.timezone.utc).timestamp()
-			self.stats[cseStartUpTime] = utcTime()
+		# self.stats[cseStartUpTime] = datetime.datetime.now(datetime.timezone.utc).timestamp()
+		self.stats.set(cseStartUpTime, utcTime())
+
+
+	#########################################################################
+	#
+	#	Request rates and latencies
+	#
+
+	def recordRequest(self, transport:str, operation:Operation, duration:float) -> None:
+		"""	Record the handling of a received request in the latency histogram of its transport and operation.
+
+			This is called on the request path and does not take a lock.
+
+			Args:
+				transport:	The transport binding, e.g. "http" or "mqtt".
+				operation:	The request's operation.
+				duration:	The time in seconds it took to handle the request.
+		"""
+		if self.statisticsEnabled:
+			self.stats.add((transport, operation.name, bisect_left(latencyBuckets, duration)))
+
+
+	def getRequestMetrics(self) -> Dict[Tuple[str, str], Dict[str, float]]:
+		"""	Return the request rates and latency percentiles for each transport and operation.
+
+			Rates are calculated over the last *rateWindow* calls of this method that are at least a second apart. 
+			Percentiles are the upper bounds of the histogram buckets in which they fall.
+
+			Return:
+				Dictionary with (transport, operation name) tuples as keys. Each value is a dictionary with the 
+				*count* of requests, the *rate* in requests per second, and the *p50*, *p90* and *p99* latencies in seconds.
+		"""
+		histograms:Dict[Tuple[str, str], list[int]] = {}
+		for key, count in self.stats.values().items():
+			if isinstance(key, tuple):
+				histograms.setdefault(key[:2], [0] * len(latencyBuckets))[key[2]] += count
+		counts = { k: sum(h) for k, h in histograms.items() }
+
+		# Calculate the rates against the oldest sample
+		now = monotonic()
+		oldestTs, oldestCounts = self.rateSamples[0] if self.rateSamples else (now, counts)
+		if not self.rateSamples or now - self.rateSamples[-1][0] >= 1.0:
+			self.rateSamples.append((now, counts))
+
+		def _percentile(histogram:list[int], total:int, p:float) -> float:
+			threshold = total * p
+			seen = 0
+			for i, c in enumerate(histogram):
+				seen += c
+				if seen >= threshold:
+					return latencyBuckets[i]
+			return latencyBuckets[-1]
+
+		result:Dict[Tuple[str, str], Dict[str, float]] = {}
+		for key, histogram in histograms.items():
+			total = counts[key]
+			result[key] = {
+				'count':	total,
+				'rate':		(total - oldestCounts.get(key, 0)) / (now - oldestTs) if now > oldestTs else 0.0,
+				'p50':		_percentile(histogram, total, 0.50),
+				'p90':		_percentile(histogram, total, 0.90),
+				'p99':		_percentile(histogram, total, 0.99),
+			}
+		return result
 
 
 	#########################################################################
@@ -309,8 +488,7 @@ class Statistics(object):
 				The retrieved statistics dictionary.
 		"""
 		
-		with self.statLock:
-			return CSE.storage.getStatistics()
+		return CSE.storage.getStatistics()
 
 
 	def storeDBStatistics(self) -> bool:
@@ -319,15 +497,14 @@ class Statistics(object):
 			Return:
 				True if the statistics were stored successfully, False otherwise.
 		"""
-		with self.statLock:
-			return CSE.storage.updateStatistics(self.stats)
+		CSE.event.flushCounters()	# Get the pending occurrences of the events
+		return CSE.storage.updateStatistics({ k: v for k, v in self.stats.values().items() if isinstance(k, str) })
 	
 
 	def purgeDBStatistics(self) -> None:
 		"""	Purge statistics data.
 		"""
-		with self.statLock:
-			CSE.storage.purgeStatistics()
+		CSE.storage.purgeStatistics()
 
 	
 	#########################################################################
@@ -67,6 +67,8 @@ _requests = 'requests'
 """ Name of the requests table. """
 _schedules = 'schedules'
 """ Name of the schedules table. """
+_deadLetters = 'deadLetters'
+""" Name of the deadLetters table. """
 
 
 class Storage(object):
@@ -198,6 +200,8 @@ class Storage(object):
             self.getActions()
             dbFile = _schedules
             self.getSchedules()
+            dbFile = _deadLetters
+            self.countDeadLetters()
 
             # TODO requests
 
@@ -849,6 +853,77 @@ class Storage(object):
         return self.db.removeSchedule(schedule.ri)
 
 
+    #########################################################################
+    ##
+    ##  Dead Letters
+    ##
+
+    def addDeadLetter(self, ri:str, nu:str, request:JSON, attempts:int) -> bool:
+        """ Add an undeliverable notification to the dead letter DB.
+
+            The number of dead letters is limited. The oldest dead letters are removed
+            when the limit is reached.
+
+            Args:
+                ri: The resource ID of the subscription.
+                nu: The notification URI.
+                request: The notification request.
+                attempts: The number of failed delivery attempts.
+
+            Return:
+                Boolean value to indicate success or failure.
+        """
+        return self.db.addDeadLetter(ri, nu, request, attempts)
+
+
+    def getDeadLetters(self, nu:str) -> list[dict]:
+        """ Retrieve the dead letters for a notification URI, oldest first.
+
+            Args:
+                nu: The notification URI.
+
+            Return:
+                List of dead letters. May be empty.
+        """
+        return self.db.getDeadLetters(nu)
+
+
+    def countDeadLetters(self, nu:Optional[str] = None) -> int:
+        """ Count the number of dead letters.
+
+            Args:
+                nu: Optional notification URI. If given then only the dead letters for this URI are counted.
+
+            Return:
+                The number of dead letters.
+        """
+        return self.db.countDeadLetters(nu)
+
+
+    def removeDeadLetter(self, id:int) -> bool:
+        """ Remove a single dead letter from the DB.
+
+            Args:
+                id: The ID of the dead letter.
+
+            Return:
+                Boolean value to indicate success or failure.
+        """
+        return self.db.removeDeadLetter(id)
+
+
+    def removeDeadLettersForSubscription(self, ri:str) -> bool:
+        """ Remove all dead letters of a subscription from the DB.
+
+            Args:
+                ri: The resource ID of the subscription.
+
+            Return:
+                Boolean value to indicate success or failure.
+        """
+        return self.db.removeDeadLettersForSubscription(ri)
+
+
 #########################################################################
 #
 #   Define class for postgresql
@@ -1078,6 +1153,45 @@ class Schedules(object):
             print("error")
 
 
+#########################################################################
+#
+#   DeadLetters Class
+#
+#   This class may be moved later to an own module.
+
+class DeadLetters(object):
+    def __init__(self,path:str,dbname:str):
+        self.conn = path
+        self.cur = path.cursor()
+        self.db2name = dbname
+        self.cur.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.db2name} (
+                id SERIAL PRIMARY KEY,
+                ri VARCHAR(255),
+                nu VARCHAR(255),
+                tstamp TIMESTAMP,
+                attempts INT,
+                request JSONB
+            );
+            CREATE INDEX IF NOT EXISTS {self.db2name}_nu_idx ON {self.db2name} (nu);
+            """
+        )
+        self.conn.commit()
+
+    def truncate(self)->None:
+        """
+        Truncate the table by removing all documents.
+        """
+        sql = f'truncate table {self.db2name}'
+        
+        try:
+            self.cur.execute(sql)
+            self.conn.commit()
+        except :
+            print("error")
+
+
 #########################################################################
 #
 #   Statistics Class
@@ -1085,6 +1199,12 @@ class Schedules(object):
 #   This class may be moved later to an own module.
 
 class Statistics(object):
+    columns = ( 'rmRes', 'crRes', 'upRes', 'exRes', 'notif', 
+                'htRet', 'htCre', 'htUpd', 'htDel', 'htNot', 'htSRt', 'htSCr', 'htSUp', 'htSDl', 'htSNo',
+                'mqRet', 'mqCre', 'mqUpd', 'mqDel', 'mqNot', 'mqSRt', 'mqSCr', 'mqSUp', 'mqSDl', 'mqSNo',
+                'cseSU', 'lgErr', 'lgWrn' )
+    """ The statistics columns. Postgres stores the names in lower case. """
+
     def __init__(self,path:str,dbname:str):
         self.conn = path
         self.cur = path.cursor()
@@ -1126,52 +1246,52 @@ class Statistics(object):
             """
         )
         self.conn.commit()
+
+        # The statement to insert or update the single statistics row
+        self.upsertSQL = f"""
+            INSERT INTO {self.db2name} (ID, {", ".join(self.columns)}) VALUES (%s, {", ".join(["%s"] * len(self.columns))})
+            ON CONFLICT (ID) DO UPDATE SET {", ".join([ f"{c} = EXCLUDED.{c}" for c in self.columns ])};
+        """
        
-    def update(self,stats:JSON,doc_ids:int = None):
-        sql = f"UPDATE {self.db2name} SET "
-        for i,j in dict.items(stats):
-            sql+=f"{i} = {j}, "
-        sql = sql[:-2]
-        sql +=f" where id='{doc_ids}'"
-        # print(sql)
+
+    def upsert(self, stats:JSON) -> bool:
+        """ Insert or update the statistics row with a single statement.
+
+            Args:
+                stats: The statistics to store. Missing values are stored as 0.
+
+            Return:
+                True if the statistics were stored.
+        """
         try:
-            self.cur.execute(sql)
+            self.cur.execute(self.upsertSQL, (str(self.doc_id), *[ stats.get(c, 0) for c in self.columns ]))
             self.conn.commit()
-            stats = self.search({"id":f"{doc_ids}"})
+            return True
         except db.DatabaseError as db_err:
-            stats = []
+            self.conn.rollback()
             print("error")
             print(db_err)
-            
-        #doc_id 삭제
-        return stats
-        
-    def insert(self,stats:JSON) -> int:
-        tmp = {"id":self.doc_id}
-        self.doc_id+=1
-        tmp.update(stats)
-        stats = tmp
-        
-        sql = f"INSERT INTO {self.db2name} ("
-        for i,j in dict.items(stats):
-            sql+=f"{i}, "
-        sql = sql[:-2]
-        sql+=") VALUES ("
-        
-        for i,j in dict.items(stats):
-            sql+=f"{j}, "
-        sql = sql[:-2]
-        sql+=")"
-        # print(sql)
+            return False
+
+
+    def get(self) -> Optional[JSON]:
+        """ Retrieve the statistics row.
+
+            Return:
+                The statistics with the attribute names as keys, or None if there is no statistics row.
+        """
         try:
-            self.cur.execute(sql)
-            self.conn.commit()
+            self.cur.execute(f"SELECT {', '.join(self.columns)} FROM {self.db2name} WHERE ID = %s", (str(self.doc_id),))
+            row = self.cur.fetchone()
         except db.DatabaseError as db_err:
+            self.conn.rollback()
             print("error")
             print(db_err)
-        # print(stats)
-        stats = stats['id']
-        return stats
+            return None
+        if not row:
+            return None
+        return { c: (v if v is not None else 0) for c, v in zip(self.columns, row) }
+
     
     def truncate(self)->None:
         """
@@ -1185,24 +1305,6 @@ class Statistics(object):
             self.conn.commit()
         except :
             print("error")
-    
-    def all(self):
-        sql =f"select row_to_json({self.db2name}) from {self.db2name}"
-        try:
-            self.cur.execute(sql)
-            stats = self.cur.fetchall()
-        
-            tmps=[]
-            tmp={}
-            for i in stats:
-                for j,k in dict.items(i[0]):
-                    tmp[j] = k
-                tmps.append(tmp)
-            stats = tmps
-        
-        except Exception as e:
-            stats = []
-        return stats
 
 
 class Subscriptions(object):
@@ -1590,6 +1692,8 @@ class TinyDBBinding(object):
         """ Lock for the requests table."""
         self.lockSchedules              = Lock()
         """ Lock for the schedules table."""
+        self.lockDeadLetters            = Lock()
+        """ Lock for the deadLetters table."""
 
         # file names
         self.fileResources              = f'{self.path}/{_resources}-{postfix}.json'
@@ -1628,6 +1732,8 @@ class TinyDBBinding(object):
             """ The TinyDB database for the requests table."""
             self.dbSchedules            = "schedules"
             """ The TinyDB database for the schedules table."""
+            self.dbDeadLetters          = "deadletters"
+            """ The database for the deadLetters table."""
         else:
             L.isInfo and L.log('DB in file system')
             self.dbResources            = TinyDB(self.fileResources, storage = TinyDBBufferedStorage, write_delay = self.writeDelay)
@@ -1646,6 +1752,8 @@ class TinyDBBinding(object):
             """ The TinyDB database for the requests table."""
             self.dbSchedules            = "schedules"
             """ The TinyDB database for the schedules table."""
+            self.dbDeadLetters          = "deadletters"
+            """ The database for the deadLetters table."""
 
         
         # Open/Create tables
@@ -1683,6 +1791,9 @@ class TinyDBBinding(object):
         self.tabSchedules = Schedules(conn, self.dbSchedules)
         """ The TinyDB table for the schedules table."""
 
+        self.tabDeadLetters = DeadLetters(conn, self.dbDeadLetters)
+        """ The table for the deadLetters table."""
+
 
         # Create the Queries
         self.resourceQuery              = Query()
@@ -1711,6 +1822,8 @@ class TinyDBBinding(object):
         """ Delay for writing to the database. """
         self.maxRequests = Configuration.get('cse.operation.requests.size')
         """ Maximum number of oneM2M recorded requests to keep in the database. """
+        self.maxDeadLetters = Configuration.get('cse.notification.deadLetterSize')
+        """ Maximum number of undeliverable notifications to keep in the database. """
 
 
     def closeDB(self) -> None:
@@ -1749,6 +1862,7 @@ class TinyDBBinding(object):
         self.tabActions.truncate()
         self.tabRequests.truncate()
         self.tabSchedules.truncate()
+        self.tabDeadLetters.truncate()
     
 
     def backupDB(self, dir:str) -> bool:
@@ -2257,10 +2371,7 @@ class TinyDBBinding(object):
                 The statistics, or None if not found.
         """
         with self.lockStatistics:
-            stats = self.tabStatistics.all()
-            # stats = self.tabStatistics.get(doc_id = 1)
-            # return stats if stats is not None and len(stats) > 0 else None
-            return stats[0] if stats else None
+            return self.tabStatistics.get()
 
 
     def upsertStatistics(self, stats:JSON) -> bool:
@@ -2273,13 +2384,7 @@ class TinyDBBinding(object):
                 True if the statistics were updated or inserted, False otherwise.
         """
         with self.lockStatistics:
-            # if len(self.tabStatistics) > 0:
-            if len(self.tabStatistics.all()) > 0:
-                doc_id = self.tabStatistics.all()[0].doc_id
-                #return self.tabStatistics.update(stats, doc_ids = [1]) is not None
-                return self.tabStatistics.update(stats, doc_ids = [doc_id]) is not None
-            else:
-                return self.tabStatistics.insert(stats) is not None
+            return self.tabStatistics.upsert(stats)
 
 
     def purgeStatistics(self) -> None:
@@ -2555,3 +2660,107 @@ class TinyDBBinding(object):
             affected_rows = self.cur.rowcount
             self.conn.commit()
             return affected_rows > 0
+
+
+    #
+    #   DeadLetters
+    #
+
+    def addDeadLetter(self, ri:str, nu:str, request:JSON, attempts:int) -> bool:
+        """ Add a dead letter to the database and remove the oldest ones if the maximum number is exceeded.
+
+            Args:
+                ri: The resource ID of the subscription.
+                nu: The notification URI.
+                request: The notification request.
+                attempts: The number of failed delivery attempts.
+
+            Return:
+                True if the dead letter was added, False otherwise.
+        """
+        with self.lockDeadLetters:
+            try:
+                self.cur.execute("""
+                    INSERT INTO deadletters (ri, nu, tstamp, attempts, request)
+                    VALUES (%s, %s, NOW(), %s, %s)
+                    """, (ri, nu, attempts, extras.Json(request)))
+                added = self.cur.rowcount > 0
+                self.cur.execute("""
+                    DELETE FROM deadletters
+                    WHERE id IN (SELECT id FROM deadletters ORDER BY id DESC OFFSET %s)
+                    """, (self.maxDeadLetters, ))
+                self.conn.commit()
+                return added
+            except Exception as e:
+                self.conn.rollback()
+                L.logErr(f'Cannot add dead letter for: {nu}', exc = e)
+                return False
+
+
+    def getDeadLetters(self, nu:str) -> list[dict]:
+        """ Return the dead letters for a notification URI, oldest first.
+
+            Args:
+                nu: The notification URI.
+
+            Return:
+                A list of dead letters.
+        """
+        with self.lockDeadLetters:
+            self.cur.execute("""
+                SELECT id, ri, nu, attempts, request
+                FROM deadletters
+                WHERE nu = %s
+                ORDER BY id
+            """, (nu, ))
+            rows = self.cur.fetchall()
+            return [{"id": row[0], "ri": row[1], "nu": row[2], "attempts": row[3], "request": row[4]} for row in rows]
+
+
+    def countDeadLetters(self, nu:Optional[str] = None) -> int:
+        """ Return the number of dead letters.
+
+            Args:
+                nu: Optional notification URI to count only the dead letters for this URI.
+
+            Return:
+                The number of dead letters.
+        """
+        with self.lockDeadLetters:
+            if nu is None:
+                self.cur.execute("SELECT COUNT(*) FROM deadletters;")
+            else:
+                self.cur.execute("SELECT COUNT(*) FROM deadletters WHERE nu = %s;", (nu, ))
+            return self.cur.fetchone()[0]
+
+
+    def removeDeadLetter(self, id:int) -> bool:
+        """ Remove a dead letter.
+
+            Args:
+                id: The ID of the dead letter.
+
+            Return:
+                True if the dead letter was removed, False otherwise.
+        """
+        with self.lockDeadLetters:
+            self.cur.execute("DELETE FROM deadletters WHERE id = %s;", (id, ))
+            affected_rows = self.cur.rowcount
+            self.conn.commit()
+            return affected_rows > 0
+
+
+    def removeDeadLettersForSubscription(self, ri:str) -> bool:
+        """ Remove all dead letters of a subscription.
+
+            Args:
+                ri: The resource ID of the subscription.
+
+            Return:
+                True if any dead letter was removed, False otherwise.
+        """
+        with self.lockDeadLetters:
+            self.cur.execute("DELETE FROM deadletters WHERE ri = %s;", (ri, ))
+            affected_rows = self.cur.rowcount
+            self.conn.commit()
+            return affected_rows > 0
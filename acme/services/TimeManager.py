@@ -16,6 +16,7 @@ from ..etc.Types import BeaconCriteria, CSERequest, Result, ResourceTypes
 from ..etc.ResponseStatusCodes import BAD_REQUEST
 from ..etc.DateUtils import isodateDelta, toDuration, getResourceDate
 from ..helpers.BackgroundWorker import BackgroundWorker, BackgroundWorkerPool
+from ..helpers.EventManager import HandlerMode
 from ..services.Logging import Logging as L
 
 # TODO add check to http request handling
@@ -40,8 +41,8 @@ class TimeManager(object):
 			self.addPeriodicTimeSyncBeacon(each)
 		
 		# Register to receive events
-		CSE.event.addHandler(CSE.event.requestReceived, self.requestReveivedHandler)			# type: ignore
-		CSE.event.addHandler(CSE.event.responseReceived, self.responseReveivedHandler)			# type: ignore
+		CSE.event.addHandler(CSE.event.requestReceived, self.requestReveivedHandler, HandlerMode.inline)			# type: ignore
+		CSE.event.addHandler(CSE.event.responseReceived, self.responseReveivedHandler, HandlerMode.inline)		# type: ignore
 		
 		# Table for periodic timeSyncBeacons
 		self.periodicTimeSyncBeacons:dict[str, BackgroundWorker] = {}
@@ -44,6 +44,10 @@ setup(
 		'tinydb',
 		'waitress',
 	],
+	extras_require={
+		'asyncio': [ 'aiohttp' ],
+		'fastjson': [ 'orjson' ],
+	},
     entry_points={
         'console_scripts': [
             'acme-cse=acme.__main__:main',
@@ -56,6 +56,15 @@ CSEID					= '/id-in'			# CSE-ID
 
 ##############################################################################
 
+#
+#	CoAP (if configured)
+#
+
+COAPADDRESS				= 'localhost'		# CoAP server address of the CSE
+COAPPORT				= 5683				# CoAP server port of the CSE
+
+##############################################################################
+
 #
 #	MQTT (if configured)
 #
@@ -0,0 +1,245 @@
+#
+#	testCoAP.py
+#
+#	(c) 2023 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Unit tests for the CoAP message encoding and the CoAP binding
+#
+
+import unittest, sys, socket, random, json
+if '..' not in sys.path:
+	sys.path.append('..')
+from typing import Tuple, Optional
+from acme.etc.Types import ResponseStatusCode as RC
+from acme.helpers.CoAPMessage import CoAPMessage, CoAPType, CoAPCode, CoAPOption, CoAPContentFormat
+from init import *
+
+
+coapAddress = (COAPADDRESS, COAPPORT)
+
+
+def sendCoAPRequest(message:CoAPMessage, timeout:float = 2.0) -> Optional[CoAPMessage]:
+	"""	Send a CoAP message to the CSE and wait for the response with the same token.
+
+		Args:
+			message: The message to send.
+			timeout: Time in seconds to wait for the response.
+
+		Return:
+			The response, or None if no response was received.
+	"""
+	with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+		sock.settimeout(timeout)
+		sock.sendto(message.encode(), coapAddress)
+		try:
+			while True:
+				response = CoAPMessage.decode(sock.recv(65535))
+				if response.token == message.token:
+					return response
+		except socket.timeout:
+			return None
+
+
+def coapRetrieveRequest(path:str, originator:str, type:CoAPType = CoAPType.CON, mid:Optional[int] = None) -> CoAPMessage:
+	"""	Build a CoAP RETRIEVE request.
+
+		Args:
+			path: The target path, e.g. "~/id-in/cse-in".
+			originator: The originator of the request.
+			type: The message type.
+			mid: Optional message ID. A random one is used if not given.
+
+		Return:
+			The request message.
+	"""
+	message = CoAPMessage(type, CoAPCode.GET, random.randrange(0x10000) if mid is None else mid, random.getrandbits(32).to_bytes(4, 'big'))
+	for p in path.split('/'):
+		message.addOption(CoAPOption.URI_PATH, p)
+	message.addOption(CoAPOption.ACCEPT, CoAPContentFormat.JSON)
+	message.addOption(CoAPOption.ONEM2M_FR, originator)
+	message.addOption(CoAPOption.ONEM2M_RQI, uniqueID())
+	message.addOption(CoAPOption.ONEM2M_RVI, RELEASEVERSION)
+	return message
+
+
+cseCoAPPath = f'~{CSEID}/{CSERN}'
+noCoAP = noCSE or sendCoAPRequest(coapRetrieveRequest(cseCoAPPath, ORIGINATOR), 1.0) is None
+
+
+class TestCoAPMessage(unittest.TestCase):
+
+	def setUp(self) -> None:
+		testCaseStart(self._testMethodName)
+	
+
+	def tearDown(self) -> None:
+		testCaseEnd(self._testMethodName)
+
+
+	#########################################################################
+
+
+	def test_encodeDecodeRequest(self) -> None:
+		"""	Encode and decode a request with token, options and payload """
+		message = CoAPMessage(CoAPType.CON, CoAPCode.POST, 0x1234, b'\x01\x02\x03\x04', b'{"m2m:sgn": {}}')
+		message.addOption(CoAPOption.URI_PATH, '~')
+		message.addOption(CoAPOption.URI_PATH, 'id-in')
+		message.addOption(CoAPOption.CONTENT_FORMAT, CoAPContentFormat.JSON)
+		message.addOption(CoAPOption.ONEM2M_FR, 'CAdmin')
+		decoded = CoAPMessage.decode(message.encode())
+		self.assertEqual(decoded.type, CoAPType.CON)
+		self.assertEqual(decoded.code, CoAPCode.POST)
+		self.assertEqual(decoded.mid, 0x1234)
+		self.assertEqual(decoded.token, b'\x01\x02\x03\x04')
+		self.assertEqual(decoded.getOptions(CoAPOption.URI_PATH), [ b'~', b'id-in' ])
+		self.assertEqual(decoded.getUintOption(CoAPOption.CONTENT_FORMAT), CoAPContentFormat.JSON)
+		self.assertEqual(decoded.getOption(CoAPOption.ONEM2M_FR), b'CAdmin')
+		self.assertEqual(decoded.payload, b'{"m2m:sgn": {}}')
+
+
+	def test_encodeDecodeEmptyMessage(self) -> None:
+		"""	Encode and decode an empty ACK without token, options and payload """
+		message = CoAPMessage(CoAPType.ACK, CoAPCode.EMPTY, 0xffff)
+		self.assertEqual(message.encode(), b'\x60\x00\xff\xff')
+		decoded = CoAPMessage.decode(message.encode())
+		self.assertEqual(decoded.type, CoAPType.ACK)
+		self.assertEqual(decoded.code, CoAPCode.EMPTY)
+		self.assertEqual(decoded.token, b'')
+		self.assertEqual(decoded.options, [])
+		self.assertEqual(decoded.payload, b'')
+
+
+	def test_encodeDecodeExtendedOptions(self) -> None:
+		"""	Encode and decode options with extended deltas and lengths """
+		message = CoAPMessage(CoAPType.NON, CoAPCode.CONTENT, 1, b'\xaa')
+		message.addOption(CoAPOption.URI_PATH, 'x' * 20)			# 1 byte extended length
+		message.addOption(CoAPOption.ONEM2M_RQI, 'r' * 300)		# 2 byte extended delta and length
+		message.addOption(CoAPOption.ONEM2M_VSI, '')			# empty value
+		decoded = CoAPMessage.decode(message.encode())
+		self.assertEqual(decoded.getOption(CoAPOption.URI_PATH), b'x' * 20)
+		self.assertEqual(decoded.getOption(CoAPOption.ONEM2M_RQI), b'r' * 300)
+		self.assertEqual(decoded.getOption(CoAPOption.ONEM2M_VSI), b'')
+
+
+	def test_encodeDecodeUintOptions(self) -> None:
+		"""	Encode and decode unsigned integer options """
+		message = CoAPMessage(CoAPType.CON, CoAPCode.GET, 1)
+		message.addOption(CoAPOption.OBSERVE, 0)
+		message.addOption(CoAPOption.ONEM2M_RSC, int(RC.OK))
+		message.addOption(CoAPOption.BLOCK2, 0x12345)
+		decoded = CoAPMessage.decode(message.encode())
+		self.assertEqual(decoded.getUintOption(CoAPOption.OBSERVE), 0)
+		self.assertEqual(decoded.getUintOption(CoAPOption.ONEM2M_RSC), int(RC.OK))
+		self.assertEqual(decoded.getUintOption(CoAPOption.BLOCK2), 0x12345)
+		self.assertIsNone(decoded.getUintOption(CoAPOption.BLOCK1))
+
+
+	def test_decodeMalformedMessages(self) -> None:
+		"""	Decode malformed messages -> Fail """
+		for data in [ b'',							# empty
+					  b'\x40\x01\x00',				# shorter than the header
+					  b'\x80\x01\x00\x01',			# wrong version
+					  b'\x49\x01\x00\x01' + b'\x00' * 9,	# token length > 8
+					  b'\x48\x01\x00\x01',			# token missing
+					  b'\x44\x01\x00\x01\x01\x02',	# token truncated
+					  b'\x40\x01\x00\x01\xff',		# payload marker without payload
+					  b'\x40\x01\x00\x01\xf0',		# option delta 15
+					  b'\x40\x01\x00\x01\x0f',		# option length 15
+					  b'\x40\x01\x00\x01\xd0',		# extended option delta missing
+					  b'\x40\x01\x00\x01\xe0\x01',	# extended option delta truncated
+					  b'\x40\x01\x00\x01\xb5ab',	# option value exceeds message
+					]:
+			with self.assertRaises(ValueError, msg = data):
+				CoAPMessage.decode(data)
+
+
+class TestCoAP(unittest.TestCase):
+
+	def setUp(self) -> None:
+		testCaseStart(self._testMethodName)
+	
+
+	def tearDown(self) -> None:
+		testCaseEnd(self._testMethodName)
+
+
+	#########################################################################
+
+
+	@unittest.skipIf(noCoAP, 'No CoAP binding')
+	def test_retrieveCSEBaseCON(self) -> None:
+		"""	RETRIEVE <CB> with a confirmable request -> piggybacked response """
+		request = coapRetrieveRequest(cseCoAPPath, ORIGINATOR)
+		self.assertIsNotNone(response := sendCoAPRequest(request))
+		self.assertEqual(response.type, CoAPType.ACK)
+		self.assertEqual(response.mid, request.mid)
+		self.assertEqual(response.code, CoAPCode.CONTENT)
+		self.assertEqual(response.getUintOption(CoAPOption.ONEM2M_RSC), RC.OK)
+		self.assertEqual(response.getOption(CoAPOption.ONEM2M_RQI), request.getOption(CoAPOption.ONEM2M_RQI))
+		self.assertEqual(response.getUintOption(CoAPOption.CONTENT_FORMAT), CoAPContentFormat.JSON)
+		r = json.loads(response.payload)
+		self.assertEqual(findXPath(r, 'm2m:cb/ri'), CSERI)
+
+
+	@unittest.skipIf(noCoAP, 'No CoAP binding')
+	def test_retrieveCSEBaseNON(self) -> None:
+		"""	RETRIEVE <CB> with a non-confirmable request -> NON response """
+		request = coapRetrieveRequest(cseCoAPPath, ORIGINATOR, CoAPType.NON)
+		self.assertIsNotNone(response := sendCoAPRequest(request))
+		self.assertEqual(response.type, CoAPType.NON)
+		self.assertEqual(response.code, CoAPCode.CONTENT)
+		self.assertEqual(response.getUintOption(CoAPOption.ONEM2M_RSC), RC.OK)
+
+
+	@unittest.skipIf(noCoAP, 'No CoAP binding')
+	def test_retrieveUnknownResourceFail(self) -> None:
+		"""	RETRIEVE unknown resource -> Fail """
+		self.assertIsNotNone(response := sendCoAPRequest(coapRetrieveRequest(f'{cseCoAPPath}/wrong', ORIGINATOR)))
+		self.assertEqual(response.code, CoAPCode.NOT_FOUND)
+		self.assertEqual(response.getUintOption(CoAPOption.ONEM2M_RSC), RC.NOT_FOUND)
+
+
+	@unittest.skipIf(noCoAP, 'No CoAP binding')
+	def test_retransmittedRequest(self) -> None:
+		"""	Retransmit a confirmable request -> same response """
+		request = coapRetrieveRequest(cseCoAPPath, ORIGINATOR)
+		self.assertIsNotNone(response1 := sendCoAPRequest(request))
+		self.assertIsNotNone(response2 := sendCoAPRequest(request))
+		self.assertEqual(response1.encode(), response2.encode())
+
+
+	@unittest.skipIf(noCoAP, 'No CoAP binding')
+	def test_unsupportedMethodFail(self) -> None:
+		"""	Send a request with an unsupported method -> Fail """
+		request = coapRetrieveRequest(cseCoAPPath, ORIGINATOR)
+		request.code = 0x07		# iPATCH
+		self.assertIsNotNone(response := sendCoAPRequest(request))
+		self.assertEqual(response.code, CoAPCode.METHOD_NOT_ALLOWED)
+
+
+def run(testFailFast:bool) -> Tuple[int, int, int, float]:
+	suite = unittest.TestSuite()
+
+	# CoAP message encoding
+	addTest(suite, TestCoAPMessage('test_encodeDecodeRequest'))
+	addTest(suite, TestCoAPMessage('test_encodeDecodeEmptyMessage'))
+	addTest(suite, TestCoAPMessage('test_encodeDecodeExtendedOptions'))
+	addTest(suite, TestCoAPMessage('test_encodeDecodeUintOptions'))
+	addTest(suite, TestCoAPMessage('test_decodeMalformedMessages'))
+
+	# CoAP binding
+	addTest(suite, TestCoAP('test_retrieveCSEBaseCON'))
+	addTest(suite, TestCoAP('test_retrieveCSEBaseNON'))
+	addTest(suite, TestCoAP('test_retrieveUnknownResourceFail'))
+	addTest(suite, TestCoAP('test_retransmittedRequest'))
+	addTest(suite, TestCoAP('test_unsupportedMethodFail'))
+
+	result = unittest.TextTestRunner(verbosity = testVerbosity, failfast = testFailFast).run(suite)
+	printResult(result)
+	return result.testsRun, len(result.errors + result.failures), len(result.skipped), getSleepTimeCount()
+
+
+if __name__ == '__main__':
+	r, errors, s, t = run(True)
+	sys.exit(errors)
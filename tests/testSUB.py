@@ -288,7 +288,7 @@ class TestSUB(unittest.TestCase):
 		"""	DELETE <CNT> -> <SUB> deleted as well. Send deletion notification"""
 		r, rsc = DELETE(cntURL, TestSUB.originator)	# Just delete the Container and everything below it. Ignore whether it exists or not
 		self.assertEqual(rsc, RC.DELETED)
-		lastNotification = getLastNotification()	# no delay! blocking
+		lastNotification = getLastNotification(wait = notificationDelay)	# deletion notifications for child resources are sent asynchronously
 		self.assertTrue(findXPath(lastNotification, 'm2m:sgn/sud'))
 
 
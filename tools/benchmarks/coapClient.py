@@ -0,0 +1,207 @@
+#
+#	coapClient.py
+#
+#	(c) 2023 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Benchmark for the CoAP binding. It runs a local CoAP server, or sends requests to a running CSE.
+#
+
+from __future__ import annotations
+from typing import Optional
+
+import argparse, random, socket, sys, time, re
+from threading import Thread
+from types import SimpleNamespace
+import pathlib, os
+parent = pathlib.Path(os.path.abspath(os.path.dirname(__file__))).parent.parent
+sys.path.append(f'{parent}')
+from acme.services import CSE	# Import the CSE module first to resolve the circular module imports
+from acme.services.CoAPServer import CoAPServer
+from acme.services.Configuration import Configuration
+from acme.services.Importer import Importer
+from acme.services.RequestManager import RequestManager
+from acme.services.Validator import Validator
+from acme.etc.Types import ContentSerializationType, CSERequest, ResponseStatusCode, Result
+from acme.helpers.BackgroundWorker import BackgroundWorkerPool
+from acme.helpers.CoAPMessage import CoAPMessage, CoAPType, CoAPCode, CoAPOption, CoAPContentFormat, encodeBlock, decodeBlock
+
+
+class BenchmarkRequestManager(RequestManager):
+	"""	A request manager that answers every request with the same resource, without a running CSE.
+		Requests to a target that ends with *large* are answered with a resource with a large content.
+	"""
+
+	resource = { 'm2m:cin': { 'ty': 4, 'rn': 'cin', 'ri': 'cin1234', 'pi': 'cnt1234', 'ct': '20231019T120000,000000',
+							  'lt': '20231019T120000,000000', 'et': '20281019T120000,000000', 'st': 1, 'cs': 5, 'con': 'value' } }
+	"""	The resource that is returned for every request. """
+
+	largeResource = { 'm2m:cin': { **resource['m2m:cin'], 'cs': 16384, 'con': 'x' * 16384 } }
+	"""	The resource that is returned for requests to a target that ends with *large*. """
+
+
+	def handleRequest(self, request:CSERequest) -> Result:	# type:ignore[override]
+		return Result(rsc = ResponseStatusCode.OK, resource = self.largeResource if request.to.endswith('large') else self.resource, request = request)
+
+
+	def recordRequest(self, request:CSERequest, result:Result) -> None:	# type:ignore[override]
+		pass
+
+
+def setup(port:int) -> CoAPServer:
+	"""	Set the few CSE settings that are used when handling a request, import the attribute policies,
+		and start a CoAP server, without a configuration file and without starting the CSE.
+
+		Args:
+			port: The port of the CoAP server.
+
+		Return:
+			The running CoAP server.
+	"""
+	CSE.defaultSerialization = ContentSerializationType.JSON
+	CSE.supportedReleaseVersions = [ '2a', '3', '4' ]
+	CSE.cseCsi = '/id-in'
+	CSE.statistics = SimpleNamespace(recordRequest = lambda *args: None)	# type:ignore[assignment]
+	CSE.event = SimpleNamespace(addHandler = lambda *args: None, configUpdate = None, responseReceived = lambda *args: None)	# type:ignore[assignment]
+	CSE.validator = Validator()
+	importer = Importer.__new__(Importer)
+	importer.resourcePath = f'{parent}/init'
+	importer.macroMatch = re.compile(r'\$\{[\w.]+\}')
+	if not (importer.importEnumPolicies() and importer.importAttributePolicies()):
+		raise RuntimeError('Cannot import the attribute policies')
+	CSE.request = BenchmarkRequestManager.__new__(BenchmarkRequestManager)
+	CSE.request.allowJSONComments = True
+
+	Configuration.all().update({
+		'coap.enable': True,
+		'coap.listenIF': '127.0.0.1',
+		'coap.port': port,
+		'coap.blockSize': 1024,
+		'coap.workerPoolSize': 4,
+		'coap.maxQueueSize': 1000,
+		'coap.timeout': 10.0,
+		'coap.security.useDTLS': False,
+		'coap.security.dtlsVersion': 'auto',
+		'coap.security.verifyCertificate': False,
+		'coap.security.certificateFile': None,
+		'coap.security.privateKeyFile': None,
+	})
+	BackgroundWorkerPool.setLogger(None)
+	server = CoAPServer()
+	if not server.run():
+		raise RuntimeError(f'Cannot start the CoAP server on port: {port}')
+	time.sleep(0.2)		# Give the server a moment to bind the socket
+	return server
+
+
+def request(sock:socket.socket, address:tuple[str, int], mid:int, path:str, type:CoAPType = CoAPType.CON, block2:Optional[int] = None) -> Optional[CoAPMessage]:
+	"""	Send a RETRIEVE request and wait for the response.
+
+		Args:
+			sock: The client socket.
+			address: The (host, port) tuple of the server.
+			mid: The message ID of the request.
+			path: The target path of the request.
+			type: The message type of the request.
+			block2: Optional value of a Block2 option.
+
+		Return:
+			The response.
+	"""
+	message = CoAPMessage(type, CoAPCode.GET, mid, random.getrandbits(32).to_bytes(4, 'big'))
+	for p in path.split('/'):
+		message.addOption(CoAPOption.URI_PATH, p)
+	message.addOption(CoAPOption.ACCEPT, CoAPContentFormat.JSON)
+	message.addOption(CoAPOption.ONEM2M_FR, 'CmyAE')
+	message.addOption(CoAPOption.ONEM2M_RQI, '1234')
+	message.addOption(CoAPOption.ONEM2M_RVI, '4')
+	if block2 is not None:
+		message.addOption(CoAPOption.BLOCK2, block2)
+	sock.sendto(message.encode(), address)
+	while True:
+		response = CoAPMessage.decode(sock.recv(65535))
+		if response.token == message.token:
+			break
+	if response.code != CoAPCode.CONTENT:
+		raise RuntimeError(f'Unexpected response code: {response.code:#x}')
+	return response
+
+
+def client(address:tuple[str, int], count:int, path:str, type:CoAPType) -> None:
+	"""	Send a number of RETRIEVE requests from a single client socket. Large responses are retrieved
+		completely in blocks.
+
+		Args:
+			address: The (host, port) tuple of the server.
+			count: The number of requests.
+			path: The target path of the requests.
+			type: The message type of the requests.
+	"""
+	sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+	sock.settimeout(5.0)
+	mid = random.randrange(0x10000)
+	for _ in range(count):
+		mid = (mid + 1) & 0xffff
+		response = request(sock, address, mid, path, type)
+		while (block2 := response.getUintOption(CoAPOption.BLOCK2)) is not None:
+			num, more, szx = decodeBlock(block2)
+			if not more:
+				break
+			mid = (mid + 1) & 0xffff
+			response = request(sock, address, mid, path, type, encodeBlock(num + 1, False, szx))
+	sock.close()
+
+
+def measure(name:str, address:tuple[str, int], clients:int, count:int, path:str, type:CoAPType) -> None:
+	"""	Measure and print the request rate of a number of clients.
+
+		Args:
+			name: Name of the measurement.
+			address: The (host, port) tuple of the server.
+			clients: Number of concurrent clients.
+			count: Number of requests per client.
+			path: The target path of the requests.
+			type: The message type of the requests.
+	"""
+	client(address, 10, path, type)		# warm up
+	clientThreads = [ Thread(target = client, args = (address, count, path, type)) for _ in range(clients) ]
+	start = time.perf_counter()
+	for t in clientThreads:
+		t.start()
+	for t in clientThreads:
+		t.join()
+	duration = time.perf_counter() - start
+	print(f'{name:<22}: {duration * 1000:.1f} ms ({clients * count / duration:.0f} requests/s)')
+
+
+def benchmark(count:int, clients:int, host:Optional[str], port:int, path:str) -> None:
+	"""	Run the benchmark.
+
+		Args:
+			count: Number of requests per client.
+			clients: Number of concurrent clients.
+			host: The host of a running CSE, or None to run a local CoAP server.
+			port: The port of the CoAP server.
+			path: The target path of the requests.
+	"""
+	server = None if host else setup(port)
+	address = (host if host else '127.0.0.1', port)
+	print(f'Requests              : {count} x {clients} clients')
+	try:
+		measure('CON requests', address, clients, count, path, CoAPType.CON)
+		measure('NON requests', address, clients, count, path, CoAPType.NON)
+		if not host:
+			measure('Block2 (16 KB)', address, clients, max(1, count // 10), f'{path}/large', CoAPType.CON)
+	finally:
+		server and server.shutdown()
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description = 'Benchmark for the CoAP binding')
+	parser.add_argument('--count', '-n', action = 'store', dest = 'count', type = int, default = 2000, help = 'number of requests per client (default: 2000)')
+	parser.add_argument('--clients', '-c', action = 'store', dest = 'clients', type = int, default = 4, help = 'number of concurrent clients (default: 4)')
+	parser.add_argument('--host', action = 'store', dest = 'host', default = None, help = 'host of a running CSE (default: run a local CoAP server)')
+	parser.add_argument('--port', '-p', action = 'store', dest = 'port', type = int, default = 15683, help = 'port of the CoAP server (default: 15683)')
+	parser.add_argument('--path', action = 'store', dest = 'path', default = '~/id-in/cse-in', help = 'target path of the requests (default: ~/id-in/cse-in)')
+	args = parser.parse_args()
+	benchmark(args.count, args.clients, args.host, args.port, args.path)
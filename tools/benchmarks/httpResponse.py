@@ -0,0 +1,133 @@
+#
+#	httpResponse.py
+#
+#	(c) 2023 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Benchmark for building http responses.
+#
+
+from __future__ import annotations
+from typing import Any, Callable, Optional, cast
+
+import argparse, sys, time
+from types import SimpleNamespace
+import pathlib, os
+parent = pathlib.Path(os.path.abspath(os.path.dirname(__file__))).parent.parent
+sys.path.append(f'{parent}')
+from flask import Response
+from acme.services import CSE
+from acme.services.HttpServer import HttpServer
+from acme.etc.Constants import Constants
+from acme.etc.DateUtils import toISO8601Date, utcTime
+from acme.etc.RequestUtils import requestFromResult, serializeData
+from acme.etc.Types import CSERequest, ContentSerializationType, JSON, Operation, ResponseStatusCode, Result
+from acme.helpers.TextTools import findXPath
+
+
+def legacyPrepareResponse(server:HttpServer, result:Result, originalRequest:CSERequest) -> Response:
+	"""	The former building of a response via a full oneM2M primitive, for comparison.
+		The copying of the request attributes is the same as in *HttpServer._prepareResponse()*.
+
+		Args:
+			server: The http server.
+			result: The result to respond.
+			originalRequest: The original request.
+
+		Return:
+			The response.
+	"""
+	result.request.ct = ContentSerializationType.getType(originalRequest.httpAccept[0])
+	result.request.originator = originalRequest.originator
+	result.request.rqi = originalRequest.rqi
+	result.request.rvi = originalRequest.rvi
+	result.request.vsi = originalRequest.vsi
+	result.request.ec  = originalRequest.ec
+	result.request.rset = originalRequest.rset
+
+	outResult = requestFromResult(result, isResponse = True)
+	headers = {}
+	headers['Server'] = server.serverID
+	if result.rsc:
+		headers[Constants().hfRSC] = f'{int(result.rsc)}'
+	if rqi := findXPath(cast(JSON, outResult.data), 'rqi'):
+		headers[Constants().hfRI] = rqi
+	else:
+		headers[Constants().hfRI] = result.request.rqi
+	if rvi := findXPath(cast(JSON, outResult.data), 'rvi'):
+		headers[Constants().hfRVI] = rvi
+	if vsi := findXPath(cast(JSON, outResult.data), 'vsi'):
+		headers[Constants().hfVSI] = vsi
+	if rset := findXPath(cast(JSON, outResult.data), 'rset'):
+		headers[Constants().hfRST] = rset
+	headers[Constants().hfOT] = toISO8601Date(utcTime())
+	statusCode = result.rsc.httpStatusCode()
+	headers['Content-Type'] = (cts := result.request.ct.toHeader())
+	origData:JSON = cast(JSON, outResult.data)
+	outResult.data = serializeData(cast(JSON, outResult.data)['pc'], result.request.ct) if 'pc' in cast(JSON, outResult.data) else ''
+	if originalRequest and originalRequest.op == Operation.CREATE:
+		if  (uri := findXPath(origData, 'pc/m2m:uri')) is not None or \
+			(uri := findXPath(origData, 'pc/m2m:rce/uri')):
+				headers['Content-Location'] = uri
+	return Response(response = outResult.data, status = statusCode, content_type = cts, headers = headers)
+
+
+def setup() -> HttpServer:
+	"""	Set the few CSE settings that are used when building a response, without a configuration
+		and without starting the CSE.
+
+		Return:
+			An http server instance that is only used to build responses.
+	"""
+	CSE.defaultSerialization = ContentSerializationType.JSON
+	CSE.cseCsi = '/id-in'
+	CSE.request = SimpleNamespace(sendToFromInResponses = True)	# type:ignore[assignment]
+	server = HttpServer.__new__(HttpServer)
+	server.serverID = f'ACME {Constants.version}'
+	return server
+
+
+def measure(name:str, count:int, build:Callable[[], Any]) -> None:
+	"""	Measure and print the time of a number of built responses.
+
+		Args:
+			name: Name of the measurement.
+			count: Number of responses.
+			build: The function that builds a single response.
+	"""
+	start = time.perf_counter()
+	for _ in range(count):
+		build()
+	duration = time.perf_counter() - start
+	print(f'{name:<22}: {duration * 1000:.1f} ms ({duration / count * 1e6:.2f} µs/response)')
+
+
+def benchmark(count:int, serialization:str) -> None:
+	"""	Run the benchmark.
+
+		Args:
+			count: Number of responses.
+			serialization: The content serialization of the responses.
+	"""
+	server = setup()
+	accept = [ ContentSerializationType.getType(serialization).toHeader() ]
+	cin = { 'm2m:cin': { 'ty': 4, 'rn': 'cin', 'ri': 'cin1234', 'pi': 'cnt1234', 'ct': '20231019T120000,000000',
+						 'lt': '20231019T120000,000000', 'et': '20281019T120000,000000', 'st': 1, 'cs': 5, 'con': 'value' } }
+
+	def _request(op:Operation) -> CSERequest:
+		return CSERequest(op = op, rqi = '1234', rvi = '4', originator = 'CmyAE', httpAccept = accept)
+
+	print(f'Responses             : {count}')
+	print(f'Serialization         : {serialization}')
+	for op, rsc in ((Operation.RETRIEVE, ResponseStatusCode.OK), (Operation.CREATE, ResponseStatusCode.CREATED)):
+		request = _request(op)
+		measure(f'{op.name} legacy', count, lambda: legacyPrepareResponse(server, Result(rsc = rsc, resource = cin, request = CSERequest()), request))
+		measure(f'{op.name}', count, lambda: server._prepareResponse(Result(rsc = rsc, resource = cin, request = CSERequest()), request))
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description = 'Benchmark for building http responses')
+	parser.add_argument('--count', '-n', action = 'store', dest = 'count', type = int, default = 10000, help = 'number of responses (default: 10000)')
+	parser.add_argument('--serialization', '-s', action = 'store', dest = 'serialization', choices = [ 'json', 'cbor' ], default = 'json', help = 'content serialization of the responses (default: json)')
+	args = parser.parse_args()
+	benchmark(args.count, args.serialization)
@@ -0,0 +1,80 @@
+#
+#	jsonParse.py
+#
+#	(c) 2023 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Benchmark for parsing JSON request bodies.
+#
+
+from __future__ import annotations
+from typing import Any, Callable
+
+import argparse, sys, time, json
+import pathlib, os
+parent = pathlib.Path(os.path.abspath(os.path.dirname(__file__))).parent.parent
+sys.path.append(f'{parent}')
+from acme.services import CSE	# Import the CSE module first to resolve the circular module imports
+from acme.etc.RequestUtils import deserializeData, orjson
+from acme.etc.Types import ContentSerializationType
+from acme.helpers import TextTools
+
+
+def cinBody(size:int) -> bytes:
+	"""	Create the JSON body of a CREATE request for a \<contentInstance> resource.
+
+		Args:
+			size: Length of the *con* attribute.
+
+		Return:
+			The serialized request body.
+	"""
+	return json.dumps({ 'm2m:cin': {
+							'cnf': 'text/plain:0',
+							'con': 'x' * size,
+							'lbl': [ 'tag:greeting', 'tag:benchmark' ],
+							'rn': 'myContentInstance'
+						}
+					  }).encode('utf-8')
+
+
+def measure(name:str, count:int, size:int, parse:Callable[[], Any]) -> None:
+	"""	Measure and print the time of a number of parse calls.
+
+		Args:
+			name: Name of the measurement.
+			count: Number of parse calls.
+			size: Size of the parsed body in bytes.
+			parse: The function that parses the body once.
+	"""
+	start = time.perf_counter()
+	for _ in range(count):
+		parse()
+	duration = time.perf_counter() - start
+	print(f'{name:<22}: {duration * 1000:.1f} ms ({duration / count * 1e6:.2f} µs/body, {size * count / duration / 1e6:.1f} MB/s)')
+
+
+def benchmark(count:int, size:int) -> None:
+	"""	Run the benchmark.
+
+		Args:
+			count: Number of parsed bodies.
+			size: Length of the *con* attribute.
+	"""
+	body = cinBody(size)
+	print(f'Bodies                : {count}')
+	print(f'Body size             : {len(body)} bytes')
+	print(f'orjson                : {"installed" if orjson else "not installed"}')
+	measure('Comment removal', count, len(body), lambda: json.loads(TextTools.removeCommentsFromJSON(body.decode('utf-8'))))
+	measure('json.loads()', count, len(body), lambda: json.loads(body))
+	if orjson:
+		measure('orjson.loads()', count, len(body), lambda: orjson.loads(body))
+	measure('deserializeData()', count, len(body), lambda: deserializeData(body, ContentSerializationType.JSON))
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description = 'Benchmark for parsing JSON request bodies')
+	parser.add_argument('--count', '-n', action = 'store', dest = 'count', type = int, default = 1000, help = 'number of parsed bodies (default: 1000)')
+	parser.add_argument('--size', '-s', action = 'store', dest = 'size', type = int, default = 100000, help = 'size of the content of the <cin> resource in bytes (default: 100000)')
+	args = parser.parse_args()
+	benchmark(args.count, args.size)
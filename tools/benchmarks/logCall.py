@@ -0,0 +1,113 @@
+#
+#	logCall.py
+#
+#	(c) 2023 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Benchmark for the caller-side overhead of a log call.
+#
+
+from __future__ import annotations
+from typing import Any, Callable
+
+import argparse, sys, time, inspect, threading, logging
+from queue import Queue
+import pathlib, os
+parent = pathlib.Path(os.path.abspath(os.path.dirname(__file__))).parent.parent
+sys.path.append(f'{parent}')
+from acme.services.Logging import Logging, LogLevel
+
+
+def legacyLog(level:int, msg:Any, stackOffset:int = 0) -> str:
+	"""	The former caller capture of *Logging._log()* with *inspect.stack()*, for comparison.
+
+		Args:
+			level: The log level.
+			msg: The log message.
+			stackOffset: Optional offset in the stack frame.
+
+		Return:
+			The log *msg*.
+	"""
+	if Logging.logLevel <= level:
+		caller = inspect.getframeinfo(inspect.stack()[stackOffset + 1][0])
+		thread = threading.current_thread()
+		msg = msg[:Logging.maxLogMessageLength] if Logging.maxLogMessageLength else msg
+		Logging.queue.put((level, msg, caller, thread))
+	return msg
+
+
+def setupLogging() -> None:
+	"""	Configure the logging class attributes for queueing debug messages, without
+		a configuration and without starting the logging actor. The queued messages are
+		not processed.
+	"""
+	Logging.logLevel = LogLevel.DEBUG
+	Logging.isDebug = True
+	Logging.isInfo = True
+	Logging.isWarn = True
+	Logging.enableScreenLogging = True
+	Logging.enableFileLogging = False
+	Logging.maxLogMessageLength = 1000
+	Logging.queue = Queue()
+	Logging.enableQueue = True
+
+
+def atDepth(depth:int, func:Callable[[], None]) -> None:
+	"""	Call a function at a specific stack depth.
+
+		Args:
+			depth: Number of additional stack frames.
+			func: The function to call.
+	"""
+	if depth > 0:
+		atDepth(depth - 1, func)
+	else:
+		func()
+
+
+def measure(name:str, count:int, depth:int, logFunc:Callable[[], Any]) -> None:
+	"""	Measure and print the time of a number of log calls.
+
+		Args:
+			name: Name of the measurement.
+			count: Number of log calls.
+			depth: Stack depth of the log calls.
+			logFunc: The function that performs a single log call.
+	"""
+	def _run() -> None:
+		for _ in range(count):
+			logFunc()
+
+	Logging.queue = Queue()
+	start = time.perf_counter()
+	atDepth(depth, _run)
+	duration = time.perf_counter() - start
+	print(f'{name:<22}: {duration * 1000:.1f} ms ({duration / count * 1e6:.2f} µs/call)')
+
+
+def benchmark(count:int, depth:int) -> None:
+	"""	Run the benchmark.
+
+		Args:
+			count: Number of log calls.
+			depth: Additional stack depth of the log calls.
+	"""
+	setupLogging()
+	request = { 'op': 2, 'to': 'cse-in/myAE/myContainer', 'fr': 'CmyAE', 'rqi': '1234', 'rvi': '4' }
+	print(f'Log calls             : {count}')
+	print(f'Stack depth           : {len(inspect.stack()) + depth}')
+	measure('inspect.stack()', count, depth, lambda: legacyLog(logging.DEBUG, f'==> Request: {request}'))
+	measure('Logging.logDebug()', count, depth, lambda: Logging.logDebug(f'==> Request: {request}'))
+
+	# Guarded call when debug logging is disabled
+	Logging.isDebug = False
+	measure('Guarded, disabled', count, depth, lambda: Logging.isDebug and Logging.logDebug(f'==> Request: {request}'))
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description = 'Benchmark for the caller-side overhead of a log call')
+	parser.add_argument('--count', '-n', action = 'store', dest = 'count', type = int, default = 10000, help = 'number of log calls (default: 10000)')
+	parser.add_argument('--depth', '-d', action = 'store', dest = 'depth', type = int, default = 20, help = 'additional stack depth of the log calls (default: 20)')
+	args = parser.parse_args()
+	benchmark(args.count, args.depth)
@@ -0,0 +1,128 @@
+#
+#	mqttDispatch.py
+#
+#	(c) 2023 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Benchmark for routing and dispatching received MQTT messages.
+#
+
+from __future__ import annotations
+from typing import Any, Callable
+
+import argparse, sys, time, threading
+import pathlib, os
+parent = pathlib.Path(os.path.abspath(os.path.dirname(__file__))).parent.parent
+sys.path.append(f'{parent}')
+from acme.helpers.BackgroundWorker import BackgroundWorkerPool
+from acme.helpers.MQTTConnection import MQTTTopic, MQTTTopicTrie
+from acme.helpers.OrderedDispatcher import OrderedDispatcher
+from acme.helpers.TextTools import simpleMatch
+
+
+def subscriptions(count:int) -> dict[str, MQTTTopic]:
+	"""	Create the topics a CSE subscribes to: its request and response topics, and further
+		request topics for registrees.
+
+		Args:
+			count: Number of additional request topics.
+
+		Return:
+			Dictionary of topic filters. Mapping to the *MQTTTopic* instances.
+	"""
+	filters = [ '/oneM2M/req/+/id-in/+', '/oneM2M/resp/id-in/+/+' ] + [ f'/oneM2M/req/+/id-mn{i}/+' for i in range(count) ]
+	return { f: MQTTTopic(topic = f, callback = None, callbackArgs = {}) for f in filters }
+
+
+class Handled(object):
+	"""	Counter of handled messages.
+	"""
+	__slots__ = ( 'count', 'lock' )
+	"""	Slots of the class. """
+
+	def __init__(self) -> None:
+		self.count = 0
+		self.lock = threading.Lock()
+
+
+	def callback(self, **kwargs:Any) -> None:
+		"""	The callback for all topics. Simulates a short request handling.
+		"""
+		time.sleep(0.0005)
+		with self.lock:
+			self.count += 1
+
+
+handled = Handled()
+"""	The counter of handled messages. """
+
+
+def measure(name:str, messages:list[str], route:Callable[[str], Any]) -> None:
+	"""	Route and dispatch a number of messages, and print the time until all of them were handled.
+
+		Args:
+			name: Name of the measurement.
+			messages: The topics of the received messages.
+			route: The function that routes and dispatches a single message. It returns False if the message was rejected.
+	"""
+	start = time.perf_counter()
+	rejected = sum(1 for topic in messages if route(topic) is False)
+	routed = time.perf_counter()
+	while handled.count < len(messages) - rejected:
+		time.sleep(0.001)
+	done = time.perf_counter()
+	print(f'{name:<22}: {(routed - start) / len(messages) * 1e6:.2f} µs/message routed, {(len(messages) - rejected) / (done - start):.0f} messages/s handled, {rejected} rejected')
+
+
+def benchmark(count:int, topics:int, originators:int, poolSize:int, maxQueueSize:int) -> None:
+	"""	Run the benchmark.
+
+		Args:
+			count: Number of messages.
+			topics: Number of additional subscribed-to request topics.
+			originators: Number of different originators of the messages.
+			poolSize: Number of worker threads of the dispatcher.
+			maxQueueSize: Maximum number of queued messages of the dispatcher. Further messages are rejected.
+	"""
+	BackgroundWorkerPool.setLogger(None)
+	subscribed = subscriptions(topics)
+	for t in subscribed.values():
+		t.callback = handled.callback
+	messages = [ f'/oneM2M/req/CAE{i % originators}/id-mn{topics - 1}/json' for i in range(count) ]
+
+	def legacy(messageTopic:str) -> None:
+		for t in subscribed.keys():
+			if simpleMatch(messageTopic, t, star = '#'):
+				if (topic := subscribed[t]).callback:
+					BackgroundWorkerPool.newActor(topic.callback, name = f'mid_{time.time()}').start(topic = messageTopic, **topic.callbackArgs)
+					break
+
+	trie = MQTTTopicTrie()
+	for f, t in subscribed.items():
+		trie.add(f, t)
+	dispatcher = OrderedDispatcher('mqttDispatch', poolSize = poolSize, maxQueueSize = maxQueueSize).start()
+
+	def routed(messageTopic:str) -> bool:
+		if (topic := trie.match(messageTopic)) and topic.callback:
+			return dispatcher.dispatch(messageTopic, topic.callback, topic = messageTopic, **topic.callbackArgs)
+		return True
+
+	print(f'Messages              : {count} ({originators} originators)')
+	print(f'Subscribed topics     : {len(subscribed)}')
+	measure('Match and new actor', messages, legacy)
+	handled.count = 0
+	measure('Trie and dispatcher', messages, routed)
+	stats = dispatcher.getStatistics()
+	print(f'Dispatcher            : max. queued {stats["maxQueued"]}, p99 latency {stats["latencyP99"] * 1000:.1f} ms')
+	dispatcher.stop()
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description = 'Benchmark for routing and dispatching received MQTT messages')
+	parser.add_argument('--count', '-n', action = 'store', dest = 'count', type = int, default = 10000, help = 'number of messages (default: 10000)')
+	parser.add_argument('--topics', '-t', action = 'store', dest = 'topics', type = int, default = 50, help = 'number of additional subscribed-to request topics (default: 50)')
+	parser.add_argument('--originators', '-o', action = 'store', dest = 'originators', type = int, default = 20, help = 'number of different originators (default: 20)')
+	parser.add_argument('--poolSize', '-p', action = 'store', dest = 'poolSize', type = int, default = 10, help = 'number of worker threads of the dispatcher (default: 10)')
+	parser.add_argument('--queueSize', '-q', action = 'store', dest = 'queueSize', type = int, default = 10000, help = 'maximum number of queued messages of the dispatcher (default: 10000)')
+	args = parser.parse_args()
+	benchmark(args.count, args.topics, args.originators, args.poolSize, args.queueSize)
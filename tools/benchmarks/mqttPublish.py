@@ -0,0 +1,125 @@
+#
+#	mqttPublish.py
+#
+#	(c) 2023 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Benchmark for publishing MQTT messages, e.g. notifications without a response.
+#
+
+from __future__ import annotations
+
+import argparse, sys, time, socket, threading
+import pathlib, os
+parent = pathlib.Path(os.path.abspath(os.path.dirname(__file__))).parent.parent
+sys.path.append(f'{parent}')
+from acme.helpers.BackgroundWorker import BackgroundWorkerPool
+from acme.helpers.MQTTConnection import MQTTConnection
+
+
+class SinkBroker(object):
+	"""	A minimal MQTT broker for a single client. It acknowledges the connection and all published
+		messages, and counts them. Messages are not forwarded.
+	"""
+	__slots__ = ( 'server', 'port', 'received', 'thread' )
+	"""	Slots of the class. """
+
+	def __init__(self) -> None:
+		self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+		self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+		self.server.bind(('127.0.0.1', 0))
+		self.server.listen(1)
+		self.port = self.server.getsockname()[1]
+		self.received = 0
+		self.thread = threading.Thread(target = self._run, daemon = True)
+		self.thread.start()
+
+
+	def _run(self) -> None:
+		"""	Accept a single connection and handle its packets.
+		"""
+		connection, _ = self.server.accept()
+		reader = connection.makefile('rb')
+		while (header := reader.read(1)):
+			length = 0
+			multiplier = 1
+			while True:		# Remaining length, variable length encoding
+				digit = reader.read(1)[0]
+				length += (digit & 0x7f) * multiplier
+				multiplier *= 128
+				if not digit & 0x80:
+					break
+			body = reader.read(length)
+			match header[0] >> 4:
+				case 1:		# CONNECT
+					connection.sendall(b'\x20\x02\x00\x00')
+				case 3:		# PUBLISH
+					self.received += 1
+					if (header[0] >> 1) & 0x03:		# QoS 1: PUBACK with the message ID after the topic
+						topicLength = int.from_bytes(body[0:2], 'big')
+						connection.sendall(b'\x40\x02' + body[2 + topicLength:4 + topicLength])
+				case 12:	# PINGREQ
+					connection.sendall(b'\xd0\x00')
+				case 14:	# DISCONNECT
+					break
+		connection.close()
+
+
+def measure(name:str, count:int, publishers:int, qos:int, maxInflightMessages:int) -> None:
+	"""	Publish a number of messages from several threads, and print the time until the broker received all of them.
+
+		Args:
+			name: Name of the measurement.
+			count: Number of messages per publishing thread.
+			publishers: Number of publishing threads.
+			qos: The QoS of the messages.
+			maxInflightMessages: The maximum number of unacknowledged QoS 1 messages.
+	"""
+	broker = SinkBroker()
+	connection = MQTTConnection('127.0.0.1', broker.port, keepalive = 60, interface = '127.0.0.1', clientID = None, lowLevelLogging = False,
+								qos = qos, maxInflightMessages = maxInflightMessages)
+	connection.run()
+	if not connection.waitForConnection(5.0):
+		raise RuntimeError('Cannot connect to the broker')
+	payload = b'{"m2m:sgn": {"nev": {"rep": {"m2m:cin": {"con": "value"}}, "net": 3}, "sur": "/id-in/sub1234"}}'
+
+	def _publisher() -> None:
+		for _ in range(count):
+			connection.publish('/oneM2M/req/id-in/CAE/json', payload)
+
+	threads = [ threading.Thread(target = _publisher) for _ in range(publishers) ]
+	start = time.perf_counter()
+	for t in threads:
+		t.start()
+	for t in threads:
+		t.join()
+	published = time.perf_counter()
+	while broker.received < count * publishers and time.perf_counter() - start < 60.0:
+		time.sleep(0.001)
+	done = time.perf_counter()
+	connection.shutdown()
+	print(f'{name:<22}: {(published - start) / (count * publishers) * 1e6:.2f} µs/message published, {broker.received / (done - start):.0f} messages/s received')
+
+
+def benchmark(count:int, publishers:int, maxInflightMessages:int) -> None:
+	"""	Run the benchmark.
+
+		Args:
+			count: Number of messages per publishing thread.
+			publishers: Number of publishing threads.
+			maxInflightMessages: The maximum number of unacknowledged QoS 1 messages for the tuned measurement.
+	"""
+	BackgroundWorkerPool.setLogger(None)
+	print(f'Messages              : {count} x {publishers} publishers')
+	measure('QoS 0', count, publishers, 0, 20)
+	measure('QoS 1, in-flight 20', count, publishers, 1, 20)
+	measure(f'QoS 1, in-flight {maxInflightMessages}', count, publishers, 1, maxInflightMessages)
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description = 'Benchmark for publishing MQTT messages')
+	parser.add_argument('--count', '-n', action = 'store', dest = 'count', type = int, default = 5000, help = 'number of messages per publishing thread (default: 5000)')
+	parser.add_argument('--publishers', '-p', action = 'store', dest = 'publishers', type = int, default = 4, help = 'number of publishing threads (default: 4)')
+	parser.add_argument('--inflight', '-i', action = 'store', dest = 'inflight', type = int, default = 100, help = 'maximum number of unacknowledged QoS 1 messages for the tuned measurement (default: 100)')
+	args = parser.parse_args()
+	benchmark(args.count, args.publishers, args.inflight)
@@ -0,0 +1,89 @@
+#
+#	requestDissect.py
+#
+#	(c) 2023 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Benchmark for dissecting http requests into oneM2M requests.
+#
+
+from __future__ import annotations
+from typing import Any, Callable, Optional
+
+import argparse, sys, time, re
+import pathlib, os
+parent = pathlib.Path(os.path.abspath(os.path.dirname(__file__))).parent.parent
+sys.path.append(f'{parent}')
+import flask
+from acme.services import CSE	# Import the CSE module first to resolve the circular module imports
+from acme.services.HttpServer import HttpServer
+from acme.services.Importer import Importer
+from acme.services.RequestManager import RequestManager
+from acme.services.Validator import Validator
+from acme.etc.Types import ContentSerializationType, Operation
+
+
+def setup() -> HttpServer:
+	"""	Set the few CSE settings and import the attribute policies that are used when dissecting a request,
+		without a configuration and without starting the CSE.
+
+		Return:
+			An http server instance that is only used to dissect requests.
+	"""
+	CSE.defaultSerialization = ContentSerializationType.JSON
+	CSE.supportedReleaseVersions = [ '2a', '3', '4' ]
+	CSE.validator = Validator()
+	importer = Importer.__new__(Importer)
+	importer.resourcePath = f'{parent}/init'
+	importer.macroMatch = re.compile(r'\$\{[\w.]+\}')
+	if not (importer.importEnumPolicies() and importer.importAttributePolicies()):
+		raise RuntimeError('Cannot import the attribute policies')
+	CSE.request = RequestManager.__new__(RequestManager)
+	CSE.request.allowJSONComments = True
+	return HttpServer.__new__(HttpServer)
+
+
+def measure(name:str, count:int, dissect:Callable[[], Any]) -> None:
+	"""	Measure and print the time of a number of dissected requests.
+
+		Args:
+			name: Name of the measurement.
+			count: Number of requests.
+			dissect: The function that dissects a single request.
+	"""
+	start = time.perf_counter()
+	for _ in range(count):
+		dissect()
+	duration = time.perf_counter() - start
+	print(f'{name:<22}: {duration * 1000:.1f} ms ({duration / count * 1e6:.2f} µs/request)')
+
+
+def benchmark(count:int, query:Optional[str]) -> None:
+	"""	Run the benchmark.
+
+		Args:
+			count: Number of requests.
+			query: Optional additional query string for the RETRIEVE request.
+	"""
+	server = setup()
+	app = flask.Flask('requestDissect')
+	headers = { 'X-M2M-Origin': 'CmyAE', 'X-M2M-RI': '1234', 'X-M2M-RVI': '4', 'Accept': 'application/json' }
+	requests = {
+		'RETRIEVE': ('GET', '~/id-in/cse-in/myAE/myCNT/la', Operation.RETRIEVE, None, None),
+		'RETRIEVE (filter)': ('GET', f'~/id-in/cse-in/myAE/myCNT?fu=2&ty=4&lbl=tag:greeting&lim=10&rcn=8{"&" + query if query else ""}', Operation.RETRIEVE, None, None),
+		'CREATE': ('POST', '~/id-in/cse-in/myAE/myCNT', Operation.CREATE, '{"m2m:cin": {"cnf": "text/plain:0", "con": "hello", "lbl": ["tag:greeting"]}}', 'application/json;ty=4'),
+	}
+
+	print(f'Requests              : {count}')
+	for name, (method, url, operation, data, contentType) in requests.items():
+		path = url.partition('?')[0]
+		with app.test_request_context(f'/{url}', method = method, headers = headers, data = data, content_type = contentType):
+			measure(name, count, lambda: server._dissectHttpRequest(flask.request, operation, path))
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description = 'Benchmark for dissecting http requests into oneM2M requests')
+	parser.add_argument('--count', '-n', action = 'store', dest = 'count', type = int, default = 10000, help = 'number of requests (default: 10000)')
+	parser.add_argument('--query', '-q', action = 'store', dest = 'query', default = None, help = 'additional query string for the filtered RETRIEVE request, e.g. "cra=20230101T000000"')
+	args = parser.parse_args()
+	benchmark(args.count, args.query)
@@ -0,0 +1,105 @@
+#
+#	serialization.py
+#
+#	(c) 2023 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Benchmark for the serializer backends.
+#
+
+from __future__ import annotations
+from typing import Any, Callable
+
+import argparse, sys, time
+import pathlib, os
+parent = pathlib.Path(os.path.abspath(os.path.dirname(__file__))).parent.parent
+sys.path.append(f'{parent}')
+from acme.services import CSE	# Import the CSE module first to resolve the circular module imports
+from acme.etc.Serializers import getSerializers, selectSerializer
+from acme.etc.Types import ContentSerializationType, JSON
+
+
+def common(ty:int, rn:str) -> JSON:
+	"""	Create the common attributes of a resource.
+
+		Args:
+			ty: The resource type.
+			rn: The resource name.
+
+		Return:
+			Dictionary with the common attributes.
+	"""
+	return {	'ty': ty,
+				'rn': rn,
+				'ri': f'{rn}-1234567890',
+				'pi': 'id-in',
+				'ct': '20231019T120000,000000',
+				'lt': '20231019T120000,000000',
+				'et': '20281019T120000,000000',
+				'lbl': [ 'tag:benchmark' ],
+			}
+
+
+def resources(size:int) -> dict[str, JSON]:
+	"""	Create example resources.
+
+		Args:
+			size: Length of the *con* attribute of \<contentInstance> resources, and number of resources in a discovery result.
+
+		Return:
+			Dictionary of example resources. Mapping from a short name.
+	"""
+	cin = { 'm2m:cin': common(4, 'cin') | { 'cnf': 'text/plain:0', 'cs': size, 'st': 1, 'con': 'x' * size } }
+	return {
+		'AE': 	{ 'm2m:ae': common(2, 'myAE') | { 'aei': 'CmyAE', 'api': 'Nmy.app', 'rr': True, 'srv': [ '3', '4' ], 'poa': [ 'http://localhost:9990' ] } },
+		'CNT':	{ 'm2m:cnt': common(3, 'myCNT') | { 'st': 1, 'cni': 10, 'cbs': 1000, 'mni': 100, 'mbs': 10000 } },
+		'CIN':	cin,
+		'SUB':	{ 'm2m:sub': common(23, 'mySUB') | { 'nu': [ 'CmyAE' ], 'enc': { 'net': [ 1, 3 ] }, 'nct': 1, 'nsi': [] } },
+		'ACP':	{ 'm2m:acp': common(1, 'myACP') | { 'pv': { 'acr': [ { 'acor': [ 'CmyAE', 'CAdmin' ], 'acop': 63 } ] },
+														 'pvs': { 'acr': [ { 'acor': [ 'CAdmin' ], 'acop': 63 } ] } } },
+		'Discovery':	{ 'm2m:cnt': common(3, 'myCNT') | { 'm2m:cin': [ common(4, f'cin{i}') | { 'cnf': 'text/plain:0', 'con': 'value' } for i in range(size) ] } },
+	}
+
+
+def measure(count:int, func:Callable[[], Any]) -> float:
+	"""	Measure the time of a number of calls.
+
+		Args:
+			count: Number of calls.
+			func: The function to call.
+
+		Return:
+			The time per call in microseconds.
+	"""
+	start = time.perf_counter()
+	for _ in range(count):
+		func()
+	return (time.perf_counter() - start) / count * 1e6
+
+
+def benchmark(count:int, size:int) -> None:
+	"""	Run the benchmark.
+
+		Args:
+			count: Number of encode and decode calls per resource.
+			size: Length of the *con* attribute of \<contentInstance> resources, and number of resources in a discovery result.
+	"""
+	print(f'Calls per resource        : {count}')
+	print(f'{"Serializer":<26}  {"Resource":<10} {"Bytes":>8} {"Encode µs":>10} {"Decode µs":>10}')
+	for ct, backends in getSerializers().items():
+		for backend in backends:
+			serializer = selectSerializer(ct, backend)
+			for name, resource in resources(size).items():
+				data = serializer.dumps(resource)
+				encode = measure(count, lambda: serializer.dumps(resource))
+				decode = measure(count, lambda: serializer.loads(data))
+				print(f'{ct.name + " " + backend:<26}  {name:<10} {len(data):>8} {encode:>10.2f} {decode:>10.2f}')
+		selectSerializer(ct, backends[0])
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description = 'Benchmark for the serializer backends')
+	parser.add_argument('--count', '-n', action = 'store', dest = 'count', type = int, default = 10000, help = 'number of encode and decode calls per resource (default: 10000)')
+	parser.add_argument('--size', '-s', action = 'store', dest = 'size', type = int, default = 100, help = 'size of the content of <cin> resources, and number of resources in a discovery result (default: 100)')
+	args = parser.parse_args()
+	benchmark(args.count, args.size)
@@ -0,0 +1,115 @@
+#
+#	transitRetrieve.py
+#
+#	(c) 2023 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Benchmark for forwarding RETRIEVE requests to a remote CSE, with and without coalescing.
+#
+
+from __future__ import annotations
+
+import argparse, sys, time, threading
+import pathlib, os
+parent = pathlib.Path(os.path.abspath(os.path.dirname(__file__))).parent.parent
+sys.path.append(f'{parent}')
+from acme.services import CSE	# Import the CSE module first to resolve the circular module imports
+from acme.services.RequestManager import RequestManager
+from acme.etc.Types import CSERequest, Operation, ResponseStatusCode, Result, RequestResponse, RequestResponseList
+from acme.helpers.SingleFlight import SingleFlight
+
+
+class BenchmarkRequestManager(RequestManager):
+	"""	A request manager that answers forwarded requests after a fixed latency, and counts them.
+	"""
+
+	upstreamLatency = 0.01
+	"""	The time in seconds until a forwarded request is answered. """
+
+	upstreamRequests = 0
+	"""	The number of forwarded requests. """
+
+
+	def handleSendRequest(self, request:CSERequest) -> RequestResponseList:	# type:ignore[override]
+		BenchmarkRequestManager.upstreamRequests += 1
+		time.sleep(self.upstreamLatency)
+		return [ RequestResponse(request, Result(rsc = ResponseStatusCode.OK, data = { 'm2m:cin': { 'con': 'value' } }, request = request)) ]
+
+
+def poller(manager:RequestManager, originator:str, count:int, interval:float, latencies:list[float]) -> None:
+	"""	Send a number of RETRIEVE requests for the same remote resource.
+
+		Args:
+			manager: The request manager.
+			originator: The originator of the requests.
+			count: The number of requests.
+			interval: The time in seconds between two requests.
+			latencies: List to which the latencies of the requests are added.
+	"""
+	for _ in range(count):
+		request = CSERequest(op = Operation.RETRIEVE, to = '/id-mn/cse-mn/myAE/myCNT/la', originator = originator)
+		start = time.perf_counter()
+		manager.handleTransitRetrieveRequest(request)
+		latencies.append(time.perf_counter() - start)
+		time.sleep(interval)
+
+
+def measure(name:str, pollers:int, count:int, interval:float, coalesce:bool, cacheTTL:float, permissionClass:bool) -> None:
+	"""	Run a number of pollers concurrently, and print the number of forwarded requests and the request latencies.
+		Each poller uses its own originator.
+
+		Args:
+			name: Name of the measurement.
+			pollers: Number of concurrent pollers.
+			count: Number of requests per poller.
+			interval: The time in seconds between two requests of a poller.
+			coalesce: Whether identical requests are coalesced.
+			cacheTTL: Time in seconds to cache responses.
+			permissionClass: Whether the originators of all pollers belong to the same permission class.
+	"""
+	manager = BenchmarkRequestManager.__new__(BenchmarkRequestManager)
+	manager.coalesceTransitRetrieves = coalesce
+	manager.transitCacheTTL = cacheTTL
+	manager.transitPermissionClasses = [ ('/id-in/CmyAE*', 'pollers') ] if permissionClass else []
+	manager._transitRetrieves = SingleFlight()
+	BenchmarkRequestManager.upstreamRequests = 0
+	latencies:list[float] = []
+	threads = [ threading.Thread(target = poller, args = (manager, f'CmyAE{i}', count, interval, latencies)) for i in range(pollers) ]
+	start = time.perf_counter()
+	for t in threads:
+		t.start()
+	for t in threads:
+		t.join()
+	duration = time.perf_counter() - start
+	latencies.sort()
+	print(f'{name:<22}: {BenchmarkRequestManager.upstreamRequests:>6} upstream requests, {duration * 1000:.1f} ms, latency p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms')
+
+
+def benchmark(pollers:int, count:int, interval:float, latency:float, cacheTTL:float) -> None:
+	"""	Run the benchmark.
+
+		Args:
+			pollers: Number of concurrent pollers.
+			count: Number of requests per poller.
+			interval: The time in seconds between two requests of a poller.
+			latency: The latency of the remote CSE in seconds.
+			cacheTTL: Time in seconds to cache responses for the cached measurement.
+	"""
+	CSE.cseCsi = '/id-in'
+	BenchmarkRequestManager.upstreamLatency = latency
+	print(f'Requests              : {count} x {pollers} pollers, upstream latency {latency * 1000:.0f} ms')
+	measure('Forward each', pollers, count, interval, False, 0.0, False)
+	measure('Coalesced, originator', pollers, count, interval, True, 0.0, False)
+	measure('Coalesced, class', pollers, count, interval, True, 0.0, True)
+	measure(f'Coalesced, TTL {cacheTTL}s', pollers, count, interval, True, cacheTTL, True)
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description = 'Benchmark for forwarding RETRIEVE requests to a remote CSE')
+	parser.add_argument('--pollers', '-p', action = 'store', dest = 'pollers', type = int, default = 50, help = 'number of concurrent pollers (default: 50)')
+	parser.add_argument('--count', '-n', action = 'store', dest = 'count', type = int, default = 100, help = 'number of requests per poller (default: 100)')
+	parser.add_argument('--interval', '-i', action = 'store', dest = 'interval', type = float, default = 0.001, help = 'time in seconds between two requests of a poller (default: 0.001)')
+	parser.add_argument('--latency', '-l', action = 'store', dest = 'latency', type = float, default = 0.01, help = 'latency of the remote CSE in seconds (default: 0.01)')
+	parser.add_argument('--ttl', '-t', action = 'store', dest = 'ttl', type = float, default = 0.5, help = 'cache time in seconds for the cached measurement (default: 0.5)')
+	args = parser.parse_args()
+	benchmark(args.pollers, args.count, args.interval, args.latency, args.ttl)
@@ -0,0 +1,71 @@
+#
+#	workerScheduling.py
+#
+#	(c) 2023 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Benchmark for scheduling, cancelling and running actors of the BackgroundWorkerPool.
+#
+
+from __future__ import annotations
+import argparse, sys, time, threading
+import pathlib, os
+parent = pathlib.Path(os.path.abspath(os.path.dirname(__file__))).parent.parent
+sys.path.append(f'{parent}')
+from acme.helpers.BackgroundWorker import BackgroundWorkerPool
+
+
+def benchmark(count:int, delay:float, cancelRatio:float) -> None:
+	"""	Schedule a number of actors, cancel a part of them, and wait until the rest has run.
+
+		Args:
+			count: Number of actors to schedule.
+			delay: Maximum delay in seconds of the actors. The actors are evenly distributed over this time.
+			cancelRatio: Fraction of the actors that are stopped before they run.
+	"""
+	BackgroundWorkerPool.setLogger(None)
+	executed = 0
+	lock = threading.Lock()
+	allDone = threading.Event()
+	toCancel = int(count * cancelRatio)
+	expected = count - toCancel
+
+	def callback() -> None:
+		nonlocal executed
+		with lock:
+			executed += 1
+			if executed == expected:
+				allDone.set()
+
+	# Schedule
+	start = time.perf_counter()
+	actors = [ BackgroundWorkerPool.newActor(callback, delay = delay * (i + 1) / count, name = f'benchmark_{i}').start() 
+			   for i in range(count) ]
+	scheduled = time.perf_counter()
+
+	# Cancel
+	for actor in actors[-toCancel:] if toCancel else []:
+		actor.stop()
+	cancelled = time.perf_counter()
+
+	# Wait for the remaining actors
+	finished = allDone.wait(delay + 60.0) if expected else True
+	done = time.perf_counter()
+
+	print(f'Actors scheduled      : {count}')
+	print(f'Schedule time         : {(scheduled - start) * 1000:.1f} ms ({(scheduled - start) / count * 1e6:.2f} µs/actor)')
+	if toCancel:
+		print(f'Actors cancelled      : {toCancel}')
+		print(f'Cancel time           : {(cancelled - scheduled) * 1000:.1f} ms ({(cancelled - scheduled) / toCancel * 1e6:.2f} µs/actor)')
+	print(f'Actors executed       : {executed}{"" if finished else " (timeout)"}')
+	print(f'Time until all ran    : {(done - start):.2f} s (last actor due after {delay:.2f} s)')
+	print(f'Threads after the run : {threading.active_count()}')
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description = 'Benchmark the scheduling of BackgroundWorkerPool actors')
+	parser.add_argument('--count', '-n', type = int, default = 100000, help = 'number of actors (default: 100000)')
+	parser.add_argument('--delay', '-d', type = float, default = 5.0, help = 'maximum delay of the actors in seconds (default: 5.0)')
+	parser.add_argument('--cancel', '-c', type = float, default = 0.5, help = 'fraction of actors that are cancelled before they run (default: 0.5)')
+	args = parser.parse_args()
+	benchmark(args.count, args.delay, args.cancel)
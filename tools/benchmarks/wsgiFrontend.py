@@ -0,0 +1,153 @@
+#
+#	wsgiFrontend.py
+#
+#	(c) 2023 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Benchmark for the WSGI frontends of the http server.
+#
+
+from __future__ import annotations
+from typing import Any
+
+import argparse, logging, sys, time, re
+from http.client import HTTPConnection
+from threading import Thread
+from types import SimpleNamespace
+import pathlib, os
+parent = pathlib.Path(os.path.abspath(os.path.dirname(__file__))).parent.parent
+sys.path.append(f'{parent}')
+from flask import Flask
+from waitress import create_server
+from acme.services import CSE	# Import the CSE module first to resolve the circular module imports
+from acme.services.HttpServer import HttpServer
+from acme.services.Importer import Importer
+from acme.services.RequestManager import RequestManager
+from acme.services.Validator import Validator
+from acme.etc.Constants import Constants
+from acme.etc.Types import ContentSerializationType, CSERequest, ResponseStatusCode, Result
+
+
+class BenchmarkRequestManager(RequestManager):
+	"""	A request manager that answers every request with the same resource, without a running CSE.
+	"""
+
+	resource = { 'm2m:cin': { 'ty': 4, 'rn': 'cin', 'ri': 'cin1234', 'pi': 'cnt1234', 'ct': '20231019T120000,000000',
+							  'lt': '20231019T120000,000000', 'et': '20281019T120000,000000', 'st': 1, 'cs': 5, 'con': 'value' } }
+	"""	The resource that is returned for every request. """
+
+
+	def handleRequest(self, request:CSERequest) -> Result:	# type:ignore[override]
+		return Result(rsc = ResponseStatusCode.OK, resource = self.resource, request = request)
+
+
+	def recordRequest(self, request:CSERequest, result:Result) -> None:	# type:ignore[override]
+		pass
+
+
+def setup() -> HttpServer:
+	"""	Set the few CSE settings that are used when handling a request, and import the attribute policies,
+		without a configuration and without starting the CSE.
+
+		Return:
+			An http server instance with the oneM2M endpoints.
+	"""
+	CSE.defaultSerialization = ContentSerializationType.JSON
+	CSE.supportedReleaseVersions = [ '2a', '3', '4' ]
+	CSE.cseCsi = '/id-in'
+	CSE.statistics = SimpleNamespace(recordRequest = lambda *args: None)	# type:ignore[assignment]
+	CSE.validator = Validator()
+	importer = Importer.__new__(Importer)
+	importer.resourcePath = f'{parent}/init'
+	importer.macroMatch = re.compile(r'\$\{[\w.]+\}')
+	if not (importer.importEnumPolicies() and importer.importAttributePolicies()):
+		raise RuntimeError('Cannot import the attribute policies')
+	CSE.request = BenchmarkRequestManager.__new__(BenchmarkRequestManager)
+	CSE.request.allowJSONComments = True
+
+	server = HttpServer.__new__(HttpServer)
+	server.flaskApp = Flask('wsgiFrontend')
+	server.rootPath = ''
+	server.allowPatchForDelete = False
+	server.enableBasicAuth = False
+	server.enableTokenAuth = False
+	server.isStopped = False
+	server.serverID = f'ACME {Constants.version}'
+	server._eventHttpRetrieve = lambda: None
+	for method, handler in (('GET', server.handleGET), ('POST', server.handlePOST), ('PUT', server.handlePUT), ('DELETE', server.handleDELETE)):
+		server.addEndpoint('/<path:path>', handler = handler, methods = [ method ])
+	server.addEndpoint('/__version__', handler = lambda: Constants.version, methods = [ 'GET' ])
+	server._prepareLeanWSGIApp()
+	return server
+
+
+def client(port:int, count:int, path:str) -> None:
+	"""	Send a number of RETRIEVE requests over a single keep-alive connection.
+
+		Args:
+			port: The port of the server.
+			count: The number of requests.
+			path: The target path of the requests.
+	"""
+	headers = { 'X-M2M-Origin': 'CmyAE', 'X-M2M-RI': '1234', 'X-M2M-RVI': '4', 'Accept': 'application/json' }
+	connection = HTTPConnection('127.0.0.1', port)
+	for _ in range(count):
+		connection.request('GET', path, headers = headers)
+		if (response := connection.getresponse()).status != 200:
+			raise RuntimeError(f'Unexpected response status: {response.status}')
+		response.read()
+	connection.close()
+
+
+def measure(name:str, app:Any, port:int, threads:int, clients:int, count:int) -> None:
+	"""	Run a waitress server with a WSGI application, and measure and print the request rate of a number of clients.
+
+		Args:
+			name: Name of the measurement.
+			app: The WSGI application.
+			port: The port of the server.
+			threads: Number of server threads.
+			clients: Number of concurrent clients.
+			count: Number of requests per client.
+	"""
+	server = create_server(app, host = '127.0.0.1', port = port, threads = threads)
+	serverThread = Thread(target = server.run, daemon = True)
+	serverThread.start()
+	try:
+		client(port, 10, '/~/id-in/cse-in/myAE/myCNT/la')		# warm up
+		clientThreads = [ Thread(target = client, args = (port, count, '/~/id-in/cse-in/myAE/myCNT/la')) for _ in range(clients) ]
+		start = time.perf_counter()
+		for t in clientThreads:
+			t.start()
+		for t in clientThreads:
+			t.join()
+		duration = time.perf_counter() - start
+	finally:
+		server.close()
+	print(f'{name:<22}: {duration * 1000:.1f} ms ({clients * count / duration:.0f} requests/s)')
+
+
+def benchmark(count:int, clients:int, threads:int, port:int) -> None:
+	"""	Run the benchmark.
+
+		Args:
+			count: Number of requests per client.
+			clients: Number of concurrent clients.
+			threads: Number of server threads.
+			port: The first port for the servers.
+	"""
+	logging.getLogger('waitress.queue').setLevel(logging.ERROR)	# Don't log the depth of the task queue
+	server = setup()
+	print(f'Requests              : {count} x {clients} clients')
+	measure('Flask application', server.flaskApp, port, threads, clients, count)
+	measure('Lean application', server._leanWSGIApp, port + 1, threads, clients, count)
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description = 'Benchmark for the WSGI frontends of the http server')
+	parser.add_argument('--count', '-n', action = 'store', dest = 'count', type = int, default = 2000, help = 'number of requests per client (default: 2000)')
+	parser.add_argument('--clients', '-c', action = 'store', dest = 'clients', type = int, default = 4, help = 'number of concurrent clients (default: 4)')
+	parser.add_argument('--threads', '-t', action = 'store', dest = 'threads', type = int, default = 4, help = 'number of server threads (default: 4)')
+	parser.add_argument('--port', '-p', action = 'store', dest = 'port', type = int, default = 18080, help = 'first port for the servers (default: 18080)')
+	args = parser.parse_args()
+	benchmark(args.count, args.clients, args.threads, args.port)